@@ -2,17 +2,33 @@
 
 from __future__ import annotations
 
+import io
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import List, Optional, Iterable
 
+import numpy as np
 import pandas as pd
 
 from brokers.base import BaseBroker
+from brokers.trade_ledger import (
+    ENTRY, EXIT, LOT, PENDING, SIDE,
+    LedgerTrades, TradeLedger, TradeView, cycle_closed, fill_and_take_profit, open_pnl, to_ms,
+)
 from brokers.tradelocker import TradeLockerBroker
+from data.ingestion.backfill import TradeLockerHistoryProvider
+from data.store.candle_cache import CandleCache
+from data.store.candle_store import CandleStore
+from data.store.resampler import resample
+from models.account_snapshot import AccountSnapshot
+from models.position import Position
 from models.trade import Trade, Side
 from models.cycle import Cycle
 from models.candle import Candle
+from models.candle_array import CandleArray
+from models.forex_instrument import ForexInstrument
+from data.constants.forex_instruments import ForexInstruments
 import runtime_settings as rs
 
 
@@ -20,6 +36,28 @@ PIP = 0.0001
 LADDER_PIPS = 2     # 2-pip spacing down the ladder
 TP_PIPS = 2         # 2-pip take-profit above entry
 COMMISSION = rs.ROUNDTRIP_COMMISSION_PER_LOT
+CSV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def read_csv_rows(file_path: str | Path, offset: int = 0) -> pd.DataFrame:
+    """
+    OHLCV rows of a candle CSV from byte `offset` on (0, or a row start as
+    reported by an earlier read), with the byte offset of every row in an
+    `offset` column. A run resumed at a known row only parses the rows
+    after it.
+    """
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        start = max(offset, len(header))
+        f.seek(start)
+        body = f.read()
+    # blank lines are kept as empty rows so row i still starts at starts[i]
+    starts = start + np.concatenate(([0], np.flatnonzero(np.frombuffer(body, dtype=np.uint8) == ord("\n")) + 1))
+    df = pd.read_csv(io.BytesIO(header + body), usecols=CSV_COLUMNS, skip_blank_lines=False)
+    df["offset"] = starts[: len(df)]
+    df = df.dropna(subset=["timestamp"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    return df
 
 
 class BacktestBroker(BaseBroker):
@@ -31,20 +69,54 @@ class BacktestBroker(BaseBroker):
     - A Trade is filled if candle.low <= price <= candle.high.
     - TP is executed if candle.high >= tp_price.
     - Only one TP fill per candle (like real TL behavior).
+
+    With `fixed_point=True` every order price is snapped to the instrument's
+    point grid (1e-5 for EURUSD) and the fill / TP tests above are done on
+    integer points, so results are exact and identical across machines.
     """
 
-    def __init__(self, symbol: str = "EURUSD", csv_path: Optional[str] = "data/raw/lowrider_1m_backtest_tradelocker_output.csv"):
+    def __init__(
+        self,
+        symbol: str = "EURUSD",
+        csv_path: Optional[str] = "data/raw/lowrider_1m_backtest_tradelocker_output.csv",
+        candle_store: Optional[CandleStore] = None,
+        fixed_point: bool = False,
+        keep_closed_cycles: bool = True,
+        initial_balance: float = 10_000.0,
+    ):
         # NOTE: we intentionally do NOT call BaseBroker.__init__ here,
         # to avoid forcing a ForexInstrument dependency right now.
         self.symbol = symbol
+        self.instrument: ForexInstrument = getattr(ForexInstruments, symbol, ForexInstruments.EURUSD)
+
+        # Fixed-point mode: order prices are snapped to the point grid and the
+        # ledger keeps them as integer points for the fill / TP tests
+        self.fixed_point = fixed_point
+
+        # Every trade placed, as ledger rows; Cycle.positions are ranges of them
+        self.ledger = TradeLedger(symbol, self.instrument.pip_size, self.instrument.dollars_per_pip_per_lot)
 
         # If provided, this CSV is used by get_candles_range().
         # Expected columns: timestamp,open,high,low,close,volume
         self.csv_path = csv_path
 
+        # Local cache of TradeLocker history used by get_candles_range_from_tradelocker()
+        self.candle_store = candle_store or CandleStore()
+
         self.positions: List[Cycle] = []  # all positions ever created, open or closed
         self.current_position: Optional[Cycle] = None
 
+        # With keep_closed_cycles=False (long streaming runs) closed cycles are
+        # dropped from self.positions and only their totals are kept.
+        self.keep_closed_cycles = keep_closed_cycles
+        self._archived_cycles = 0
+        self._archived_trades = 0
+        self._archived_pnl = 0.0
+        self._archived_net = 0.0        # account currency, for get_account_snapshot
+
+        # Starting cash of the simulated account (account currency)
+        self.initial_balance = initial_balance
+
         # These are set as candles are processed
         self._current_timestamp: Optional[datetime] = None
         self._last_close: Optional[float] = None
@@ -53,36 +125,228 @@ class BacktestBroker(BaseBroker):
     # Helpers
     # ----------------------------------------------------------------------
 
-    def _generate_trade_id(self) -> str:
-        return f"t{len(self.positions)}_{datetime.now(tz=timezone.utc).timestamp()}"
+    def _add_trade(
+        self,
+        position: Cycle,
+        side: Side,
+        lot_size: float,
+        price: float,
+        tp_price: Optional[float],
+        sl_price: Optional[float],
+        ladder_position: int,
+        pending: bool,
+        now: datetime,
+    ) -> TradeView:
+        """Append a ledger row (on the point grid in fixed-point mode) and add its view to `position`."""
+        entry_pts = tp_pts = 0
+        if self.fixed_point:
+            entry_pts = self.instrument.to_points(price)
+            price = self.instrument.from_points(entry_pts)
+            if tp_price is not None:
+                tp_pts = self.instrument.to_points(tp_price)
+                tp_price = self.instrument.from_points(tp_pts)
+
+        i = self.ledger.append(
+            entry=price,
+            lot=lot_size,
+            side=1 if side == "buy" else -1,
+            cycle=self._archived_cycles + len(self.positions) - 1,
+            depth=ladder_position,
+            pending=pending,
+            open_ms=to_ms(now),
+            tp=tp_price,
+            sl=sl_price,
+            entry_pts=entry_pts,
+            tp_pts=tp_pts,
+        )
+        trade = self.ledger.view(i)
+        position.positions.append(trade)
+        return trade
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["candle_store"] = self.candle_store.root
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        state["candle_store"] = CandleStore(state["candle_store"])
+        self.__dict__.update(state)
 
     def position_is_open(self) -> bool:
-        return (
-            self.current_position is not None and
-            not self.current_position.is_closed
-        )
+        if self.current_position is None:
+            return False
+        lo, hi = self.ledger.span(self.current_position.positions)
+        return not cycle_closed(self.ledger.prices, self.ledger.state, lo, hi)
 
     def open_new_position(self) -> Cycle:
         """Called automatically when placing the anchor."""
-        pos = Cycle(symbol=self.symbol, positions=[])
+        pos = Cycle(symbol=self.symbol, positions=LedgerTrades(self.ledger, self.ledger.end))
         self.positions.append(pos)
         self.current_position = pos
         return pos
 
+    def _end_cycle(self, position: Cycle) -> None:
+        """Clear the active cycle; unless closed cycles are kept, fold it into the archived totals."""
+        self.current_position = None
+        if self.keep_closed_cycles:
+            return
+        lo, hi = self.ledger.span(position.positions)
+        self._archived_trades += self.ledger.closed_count(lo, hi)
+        self._archived_pnl += float(self.ledger.pnl(lo, hi).sum())
+        self._archived_net += self._realized_net(lo, hi)
+        self.positions = [p for p in self.positions if p is not position]
+        self._archived_cycles += 1
+        if not self.positions:
+            self.ledger.release(self.ledger.end)
+
+    # ----------------------------------------------------------------------
+    # BaseBroker: environment hooks
+    # ----------------------------------------------------------------------
+    def refresh(self):
+        """Nothing to refresh in simulation."""
+        pass
+
+    def get_current_bid_ask(self):
+        """Simulation has no book: bid == ask == last close."""
+        if self._last_close is None:
+            raise RuntimeError("BacktestBroker._last_close is not set.")
+        return (self._last_close, self._last_close)
+
+    def get_current_spread(self) -> float:
+        return 0.0
+
+    def get_account_snapshot(self, date_from: datetime, date_to: datetime) -> AccountSnapshot:
+        """
+        The simulated account in TradeLocker's shape. Activated positions are
+        the trades still in the ledger that filled inside [date_from, date_to]
+        (pending ones are only counted); money is in account currency with the
+        round-trip commission, the balance is initial_balance plus the net PnL
+        of every closed trade and open PnL is marked at the last close.
+        """
+        from_ms_, to_ms_ = to_ms(date_from), to_ms(date_to)
+        positions = []
+        for cycle in self.positions:
+            for trade in cycle.positions:
+                if not trade.is_pending and from_ms_ <= to_ms(trade.open_time) <= to_ms_:
+                    positions.append(self.trade_position(trade))
+
+        open_trades = self.get_open_trades()
+        open_gross = open_commission = 0.0
+        if self._last_close is not None:
+            for trade in open_trades:
+                if not trade.is_pending:
+                    open_gross += self.trade_gross_pnl(trade, self._last_close)
+                    open_commission += round(COMMISSION * trade.lot_size, 2)
+        open_net = open_gross - open_commission
+        balance = self.initial_balance + self._archived_net + self._realized_net(0, len(self.ledger))
+
+        return AccountSnapshot(
+            cycle_open_gross_pnl=sum(p.gross_pnl for p in positions),
+            cycle_open_net_pnl=sum(p.net_pnl for p in positions),
+            account_open_gross_pnl=round(open_gross, 2),
+            account_open_net_pnl=round(open_net, 2),
+            account_balance=round(balance, 2),
+            account_projected_balance=round(balance + open_net, 2),
+            account_cash_balance=round(balance, 2),
+            unsettled_cash=0.0,
+            activated_positions=positions,
+            num_pending_positions=sum(1 for t in open_trades if t.is_pending),
+        )
+
+    def trade_gross_pnl(self, trade: Trade, exit_price: float) -> float:
+        """PnL in account currency of `trade` exiting at `exit_price`, before commission."""
+        sign = 1 if trade.side == "buy" else -1
+        pip_diff = sign * (exit_price - trade.executed_price) / self.instrument.pip_size
+        return pip_diff * self.instrument.dollars_per_pip_per_lot * trade.lot_size
+
+    def trade_position(self, trade: Trade, cycle_id: str = "") -> Position:
+        """A filled trade as TradeLocker reports it (see Position.from_tradelocker_trades)."""
+        lot_size = trade.lot_size
+        commission = round(COMMISSION * lot_size, 2)
+        closed = trade.exit_price is not None
+        if closed:
+            gross_pnl = round(self.trade_gross_pnl(trade, trade.exit_price), 2)
+            net_pnl = round(gross_pnl - commission, 2)
+        else:
+            gross_pnl = net_pnl = 0.0
+        return Position(
+            id=trade.id,
+            status="closed" if closed else "active",
+            cycle_id=cycle_id,
+            symbol=self.symbol,
+            lot_size=lot_size,
+            side=trade.side,
+            open_time=trade.open_time,
+            close_time=trade.close_time,
+            entry_price=trade.executed_price,
+            exit_price=trade.exit_price,
+            nominal_tp_price=trade.tp_price,
+            gross_pnl=gross_pnl,
+            net_pnl=net_pnl,
+            commission=commission,
+            trades=[trade],
+            position_depth=trade.ladder_position,
+        )
+
+    def _realized_net(self, lo: int, hi: int) -> float:
+        """Net PnL (account currency, rounded per trade like trade_position) of the closed rows in [lo, hi)."""
+        p, state = self.ledger.prices[:, lo:hi], self.ledger.state[:, lo:hi]
+        closed = ~np.isnan(p[EXIT]) & (state[PENDING] == 0)
+        if not closed.any():
+            return 0.0
+        pip_diff = state[SIDE][closed] * (p[EXIT][closed] - p[ENTRY][closed]) / self.instrument.pip_size
+        gross = np.round(pip_diff * self.instrument.dollars_per_pip_per_lot * p[LOT][closed], 2)
+        commission = np.round(COMMISSION * p[LOT][closed], 2)
+        return float((gross - commission).sum())
+
+    async def close_all(self) -> bool:
+        """
+        Like TradeLocker: close the filled trades at the last close and cancel
+        the unfilled limit orders. Cancelled rungs stay pending in their
+        (now ended) cycle and are never filled.
+        """
+        position = self.current_position
+        if position is None:
+            return True
+        for trade in position.positions:
+            if trade.exit_price is None and not trade.is_pending:
+                self.close_trade(trade)
+        self._end_cycle(position)
+        return True
+
     # ----------------------------------------------------------------------
     # BaseBroker: market data
     # ----------------------------------------------------------------------
+    def get_candles_range(
+        self,
+        symbol: str,
+        resolution: str,
+        date_from: datetime,
+        date_to: datetime,
+    ) -> List[Candle]:
+        """Candles from the configured CSV (see get_candles_range_from_csv)."""
+        return self.get_candles_range_from_csv(self.csv_path, resolution, date_from, date_to)
+
     def get_candles_range_from_csv(
         self,
         file_path: str,
         resolution: str,
         date_from: datetime,
         date_to: datetime,
+        base_resolution: str = "1m",
+        session_offset: timedelta = timedelta(0),
+        offset: int = 0,
     ) -> List[Candle]:
         """
         Load candles from the configured CSV and return the slice between
         start and end (inclusive).
 
+        The CSV holds `base_resolution` bars; any coarser `resolution`
+        (5m, 15m, 1H, 4H, ...) is derived from them by OHLCV resampling,
+        with buckets aligned by `session_offset` (e.g. FX_ROLLOVER_OFFSET).
+        `offset` skips to that byte of the file (a row start, see
+        read_csv_rows).
+
         CSV format:
             timestamp,open,high,low,close,volume
         timestamp example:
@@ -94,48 +358,65 @@ class BacktestBroker(BaseBroker):
                 "Set broker.csv_path to a CSV file before calling get_candles_range()."
             )
 
-        df = pd.read_csv(file_path)
-        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+        rows = read_csv_rows(file_path, offset)
+        return self.candles_in_range(rows, resolution, date_from, date_to, base_resolution, session_offset)
 
+    @staticmethod
+    def candles_in_range(
+        rows: pd.DataFrame,
+        resolution: str,
+        date_from: datetime,
+        date_to: datetime,
+        base_resolution: str = "1m",
+        session_offset: timedelta = timedelta(0),
+    ) -> List[Candle]:
+        """Candles of `rows` (read_csv_rows) between start and end (inclusive), resampled to `resolution`."""
         # Normalize start/end to UTC-aware for robust comparison
         if date_from.tzinfo is None:
-            date_from = date_from.replace(tzinfo=df["timestamp"].dt.tz)
+            date_from = date_from.replace(tzinfo=rows["timestamp"].dt.tz)
         if date_to.tzinfo is None:
-            date_to = date_to.replace(tzinfo=df["timestamp"].dt.tz)
-
-        mask = (df["timestamp"] >= date_from) & (df["timestamp"] <= date_to)
-        sliced = df.loc[mask].sort_values("timestamp")
-
-        candles: List[Candle] = []
-        for _, row in sliced.iterrows():
-            candles.append(
-                Candle(
-                    timestamp=row["timestamp"],
-                    open=float(row["open"]),
-                    high=float(row["high"]),
-                    low=float(row["low"]),
-                    close=float(row["close"]),
-                    volume=float(row["volume"]),
-                )
-            )
+            date_to = date_to.replace(tzinfo=rows["timestamp"].dt.tz)
+
+        mask = (rows["timestamp"] >= date_from) & (rows["timestamp"] <= date_to)
+        sliced = CandleArray.from_frame(rows.loc[mask].sort_values("timestamp"))
+
+        if resolution and resolution != base_resolution:
+            sliced = resample(sliced, resolution, session_offset)
+
+        return sliced.to_candles()
 
-        return candles
-    
     def get_candles_range_from_tradelocker(
         self,
         symbol: str,
         resolution: str,
         date_from: datetime,
-        date_to: datetime
+        date_to: datetime,
+        offline: bool = False,
     ) -> List[Candle]:
         """
-        Load candles from TradeLocker by default
+        Load candles from TradeLocker through the read-through candle cache.
+        Ranges already in the candle store are served from disk without
+        touching (or even authenticating with) TradeLocker; only missing bars
+        are fetched. `offline=True` never goes to the network.
         """
+        if date_from.tzinfo is None:
+            date_from = date_from.replace(tzinfo=timezone.utc)
+        if date_to.tzinfo is None:
+            date_to = date_to.replace(tzinfo=timezone.utc)
 
-        broker = TradeLockerBroker()
-        candles = broker.get_candles_range(symbol=symbol, resolution=resolution, date_from=date_from, date_to=date_to)
+        cache = CandleCache(
+            self.candle_store,
+            provider_factory=lambda: TradeLockerHistoryProvider(TradeLockerBroker(instrument_name=symbol)),
+        )
+        candles = cache.get_range(
+            symbol,
+            resolution,
+            int(date_from.timestamp() * 1000),
+            int(date_to.timestamp() * 1000),
+            offline=offline,
+        )
 
-        return candles
+        return candles.to_candles()
 
     # ----------------------------------------------------------------------
     # Original "core broker" methods (kept, used internally)
@@ -163,27 +444,8 @@ class BacktestBroker(BaseBroker):
         entry_price = self._last_close  # set by strategy driving the broker
         now = self._current_timestamp
 
-        trade = Trade(
-            id=self._generate_trade_id(),
-            cycle_id=None,         # set later
-            symbol=symbol,
-            side=side,
-            lot_size=lot_size,
-            executed_price=entry_price,
-            open_time=now,
-            tp_price=tp_price,
-            sl_price=sl_price,
-            ladder_position=ladder_position,
-            is_pending=False,
-            raw={},
-        )
-
         pos = self.open_new_position()
-
-        trade.cycle_id = id(pos)
-        pos.positions.append(trade)
-
-        return trade
+        return self._add_trade(pos, side, lot_size, entry_price, tp_price, sl_price, ladder_position, pending=False, now=now)
 
     def place_limit_order(
         self,
@@ -198,30 +460,12 @@ class BacktestBroker(BaseBroker):
 
         now = self._current_timestamp or datetime.now(tz=timezone.utc)
 
-        trade = Trade(
-            id=self._generate_trade_id(),
-            cycle_id=None,
-            symbol=symbol,
-            side=side,
-            lot_size=lot_size,
-            executed_price=limit_price,
-            open_time=now,
-            tp_price=tp_price,
-            sl_price=sl_price,
-            ladder_position=ladder_position,
-            is_pending=True,
-            raw={},
-        )
-
         if not self.current_position:
             position = self.open_new_position()
         else:
             position = self.current_position
 
-        trade.cycle_id = id(position)
-        position.positions.append(trade)
-
-        return trade
+        return self._add_trade(position, side, lot_size, limit_price, tp_price, sl_price, ladder_position, pending=True, now=now)
 
     def get_open_positions(self) -> Optional[Cycle]:
         """Returns the single current position (if open)."""
@@ -253,30 +497,24 @@ class BacktestBroker(BaseBroker):
             return
 
         position = self.current_position
+        ledger = self.ledger
+        lo, hi = ledger.span(position.positions)
 
         # 1) Fill pending limit buys if candle trades through limit price
-        for trade in position.positions:
-            if trade.is_pending and candle.low <= trade.executed_price <= candle.high:
-                trade.is_pending = False
-                trade.open_time = candle.timestamp
-
-        # 2) Take profits — ONLY ONE TP PER CANDLE
-        #    Pick the highest TP available that can be hit
-        filled_tps = [
-            trade for trade in position.positions
-            if (not trade.is_pending) and trade.exit_price is None and trade.tp_price is not None
-        ]
-
-        if filled_tps:
-            candidates = [t for t in filled_tps if candle.high >= t.tp_price]
-            if candidates:
-                trade_to_close = max(candidates, key=lambda t: t.tp_price)
-                trade_to_close.exit_price = trade_to_close.tp_price
-                trade_to_close.close_time = candle.timestamp
+        # 2) Take profits — ONLY ONE TP PER CANDLE (the highest one that can be hit)
+        # Fixed-point mode compares integer points instead of float prices.
+        if self.fixed_point:
+            low, high = self.instrument.to_points(candle.low), self.instrument.to_points(candle.high)
+        else:
+            low, high = candle.low, candle.high
+        closed = fill_and_take_profit(
+            ledger.prices, ledger.times, ledger.state, lo, hi,
+            float(low), float(high), to_ms(candle.timestamp), self.fixed_point,
+        )
 
         # If all trades closed, position ends
-        if position.is_closed:
-            self.current_position = None
+        if closed:
+            self._end_cycle(position)
 
     # ----------------------------------------------------------------------
     # BaseBroker: simple trade primitives (BUY-only for Lowrider)
@@ -399,7 +637,7 @@ class BacktestBroker(BaseBroker):
 
         # If everything is now closed, clear current_position
         if position.is_closed:
-            self.current_position = None
+            self._end_cycle(position)
 
         return flattened
 
@@ -410,17 +648,15 @@ class BacktestBroker(BaseBroker):
         """
         Sum of realized PnL from all closed trades across all positions.
         """
-        total = 0.0
-        for pos in self.positions:
-            for t in pos.positions:
-                if t.exit_price is not None:
-                    # If the trade model already has realized_pnl, use it.
-                    if t.realized_pnl is not None:
-                        total += t.realized_pnl
-                    else:
-                        # fallback computation
-                        total += (t.exit_price - t.executed_price) * t.lot_size * 10000
-        return total
+        return self._archived_pnl + float(self.ledger.pnl().sum())
+
+    def closed_trade_count(self) -> int:
+        """Number of trades that have exited, across all positions."""
+        return self._archived_trades + self.ledger.closed_count()
+
+    def export_trades(self, path) -> Path:
+        """Write every trade still in the ledger to one parquet file."""
+        return self.ledger.to_parquet(path)
 
     def unrealized_pnl(self, current_price: float) -> float:
         """
@@ -430,9 +666,8 @@ class BacktestBroker(BaseBroker):
         if pos is None:
             return 0.0
 
-        total = 0.0
-        for t in pos.positions:
-            if t.exit_price is None:  # open trade
-                total += (current_price - t.executed_price) * t.lot_size * 10000
-
-        return total
+        lo, hi = self.ledger.span(pos.positions)
+        return open_pnl(
+            self.ledger.prices, self.ledger.state, lo, hi, float(current_price),
+            self.instrument.pip_size, self.instrument.dollars_per_pip_per_lot,
+        )
@@ -0,0 +1,254 @@
+"""
+replay.py
+---------
+Broker adapter that lets live-path code (Session) trade historical bars on
+a simulated clock.
+
+    clock = SimulatedClock(start)
+    broker = ReplayBroker(bars, clock)            # bars: CandleArray of 1m bars
+    session = Session(broker, clock=clock)
+
+Bars are handed to an inner BacktestBroker as they close on the clock, so
+orders placed after a bar closed can only fill from the next bar on (the
+research loop fills against the bar the signal came from). Everything the
+live code reads comes back in TradeLocker's shapes:
+
+- get_candles_range: only bars that have closed by clock.now()
+- get_account_snapshot: an AccountSnapshot whose activated positions are
+  the filled orders placed inside [date_from, date_to] (pending orders are
+  only counted, as on TradeLocker), valued with the instrument's pip value
+  and the round-trip commission
+- close_all: closes filled trades at the last close, cancels pending ones
+
+Once the clock runs a whole bar past the last bar, every call raises
+ReplayExhausted.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from brokers.backtest import COMMISSION, BacktestBroker
+from brokers.base import BaseBroker
+from models.account_snapshot import AccountSnapshot
+from models.candle import Candle
+from models.candle_array import CandleArray
+from models.cycle import Cycle
+from models.position import Position
+from models.trade import Trade
+from utils.clock import Clock
+from utils.time import dt_to_ms, resolution_to_ms
+
+
+class ReplayExhausted(Exception):
+    """The clock has moved past the last replayed bar."""
+
+
+class ReplayBroker(BaseBroker):
+
+    def __init__(
+        self,
+        bars: CandleArray,
+        clock: Clock,
+        broker: Optional[BacktestBroker] = None,
+        resolution: str = "1m",
+        initial_balance: float = 10_000.0,
+        spread_pips: float = 0.0,
+    ):
+        self.broker = broker or BacktestBroker(csv_path=None, fixed_point=True)
+        self.instrument = self.broker.instrument
+        self.symbol = self.broker.symbol
+        self.clock = clock
+        self.bars = bars
+        self.resolution = resolution
+        self.bar_ms = resolution_to_ms(resolution)
+        self.close_ms = bars.timestamp + self.bar_ms
+        self.spread_pips = spread_pips
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+
+        self._fed = 0                                   # bars already handed to the inner broker
+        self._placed_ms: List[int] = []                 # placement time of every order, ascending
+        self._orders: List[Tuple[Trade, str]] = []      # (trade, strategy_id), same order
+        self._closed: List[Optional[Position]] = []     # the order's Position once it has closed
+        self._unsettled: List[int] = []                 # orders not yet closed or cancelled
+
+    # ----------------------------------------------------------------------
+    # Clock → inner broker
+    # ----------------------------------------------------------------------
+    @property
+    def bars_fed(self) -> int:
+        return self._fed
+
+    @property
+    def orders(self) -> List[Tuple[Trade, str]]:
+        """Every order placed, as (trade, strategy_id), oldest first."""
+        return self._orders
+
+    def _sync(self) -> None:
+        """Feed the inner broker every bar that has closed by now."""
+        now_ms = dt_to_ms(self.clock.now())
+        if len(self.bars) == 0 or now_ms >= self.close_ms[-1] + self.bar_ms:
+            raise ReplayExhausted(f"no bars left to replay at {self.clock.now()}")
+        closed = int(np.searchsorted(self.close_ms, now_ms, side="right"))
+        if closed > self._fed:
+            for candle in self.bars.take(slice(self._fed, closed)).to_candles():
+                self.broker.process_candle(candle)
+            self._fed = closed
+            self._settle()
+
+    def _settle(self) -> None:
+        """Book closed orders into the balance; their Positions no longer change."""
+        still_open = []
+        for i in self._unsettled:
+            trade, strategy_id = self._orders[i]
+            if trade.exit_price is None:
+                still_open.append(i)
+            else:
+                self._closed[i] = position = self._position(trade, strategy_id)
+                self.balance += position.net_pnl
+        self._unsettled = still_open
+
+    # ----------------------------------------------------------------------
+    # BaseBroker: environment hooks / market data
+    # ----------------------------------------------------------------------
+    def refresh(self):
+        pass
+
+    def get_candles_range_from_csv(self, *args, **kwargs) -> List[Candle]:
+        return self.broker.get_candles_range_from_csv(*args, **kwargs)
+
+    def get_candles_range(
+        self,
+        symbol: str,
+        resolution: str,
+        date_from: datetime,
+        date_to: datetime,
+    ) -> List[Candle]:
+        """Bars opened at or after date_from that closed by min(date_to, now)."""
+        if resolution != self.resolution:
+            raise ValueError(f"ReplayBroker replays {self.resolution} bars, not {resolution}")
+        self._sync()
+        lo = int(np.searchsorted(self.bars.timestamp, dt_to_ms(date_from), side="left"))
+        hi = int(np.searchsorted(self.close_ms, min(dt_to_ms(date_to), dt_to_ms(self.clock.now())), side="right"))
+        return self.bars.take(slice(lo, max(lo, hi))).to_candles()
+
+    def get_current_bid_ask(self) -> Tuple[float, float]:
+        """Bid is the last closed bar's close; ask adds the configured spread."""
+        self._sync()
+        bid, _ = self.broker.get_current_bid_ask()
+        return bid, self.instrument.round_price(bid + self.spread_pips * self.instrument.pip_size)
+
+    def get_current_spread(self) -> float:
+        bid, ask = self.get_current_bid_ask()
+        return (ask - bid) / self.instrument.pip_size
+
+    # ----------------------------------------------------------------------
+    # BaseBroker: orders
+    # ----------------------------------------------------------------------
+    def place_limit_buy(
+        self,
+        entry_price: float,
+        lot_size: float,
+        tp_price: float | None = None,
+        strategy_id: str | None = None,
+    ) -> str:
+        self._sync()
+        strategy_id = strategy_id or ""
+        depth = strategy_id.rsplit("_", 1)[-1]
+        trade = self.broker.place_limit_order(
+            symbol=self.symbol,
+            side="buy",
+            lot_size=lot_size,
+            limit_price=entry_price,
+            tp_price=tp_price,
+            ladder_position=int(depth) if depth.isdigit() else -1,
+        )
+        self._placed_ms.append(dt_to_ms(self.clock.now()))
+        self._orders.append((trade, strategy_id))
+        self._closed.append(None)
+        self._unsettled.append(len(self._orders) - 1)
+        return trade.id
+
+    def add_rung(
+        self,
+        entry_price: float,
+        tp_price: float,
+        lot_size: float,
+        ladder_position: int,
+        strategy_id: str,
+    ) -> str:
+        return self.place_limit_buy(entry_price, lot_size, tp_price, strategy_id)
+
+    def close_trade(self, trade: Trade, exit_price: float | None = None) -> Trade:
+        self._sync()
+        trade = self.broker.close_trade(trade, exit_price)
+        self._settle()
+        return trade
+
+    async def close_all(self) -> bool:
+        self._sync()
+        await self.broker.close_all()
+        self._settle()
+        # whatever is still unsettled was pending and has been cancelled
+        self._unsettled = []
+        return True
+
+    def flatten_all(self) -> Iterable[Trade]:
+        self._sync()
+        flattened = self.broker.flatten_all()
+        self._settle()
+        return flattened
+
+    # ----------------------------------------------------------------------
+    # BaseBroker: position / account view
+    # ----------------------------------------------------------------------
+    def get_open_trades(self) -> List[Trade]:
+        self._sync()
+        return self.broker.get_open_trades()
+
+    def get_active_cycle(self) -> Cycle | None:
+        self._sync()
+        return self.broker.get_active_cycle()
+
+    def _position(self, trade: Trade, strategy_id: str) -> Position:
+        """A filled order as TradeLocker reports it, tagged with the order's strategy_id."""
+        return self.broker.trade_position(trade, cycle_id=strategy_id)
+
+    def get_account_snapshot(self, date_from: datetime, date_to: datetime) -> AccountSnapshot:
+        self._sync()
+        lo = bisect_left(self._placed_ms, dt_to_ms(date_from))
+        hi = bisect_right(self._placed_ms, dt_to_ms(date_to))
+        positions = []
+        for i in range(lo, hi):
+            trade, strategy_id = self._orders[i]
+            if self._closed[i] is not None:
+                positions.append(self._closed[i])
+            elif not trade.is_pending:
+                positions.append(self._position(trade, strategy_id))
+
+        bid, _ = self.get_current_bid_ask()
+        open_gross = open_commission = 0.0
+        for i in self._unsettled:
+            trade, _ = self._orders[i]
+            if not trade.is_pending:
+                open_gross += self.broker.trade_gross_pnl(trade, bid)
+                open_commission += round(COMMISSION * trade.lot_size, 2)
+        open_net = open_gross - open_commission
+
+        return AccountSnapshot(
+            cycle_open_gross_pnl=sum(p.gross_pnl for p in positions),
+            cycle_open_net_pnl=sum(p.net_pnl for p in positions),
+            account_open_gross_pnl=round(open_gross, 2),
+            account_open_net_pnl=round(open_net, 2),
+            account_balance=round(self.balance, 2),
+            account_projected_balance=round(self.balance + open_net, 2),
+            account_cash_balance=round(self.balance, 2),
+            unsettled_cash=0.0,
+            activated_positions=positions,
+            num_pending_positions=sum(1 for t in self.broker.get_open_trades() if t.is_pending),
+        )
@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from models.candle import Candle
+from models.candle_array import CandleArray
+
+T0 = datetime(2024, 1, 8, tzinfo=timezone.utc)
+T0_MS = int(T0.timestamp() * 1000)
+
+
+def make_candle(i: int, low: float, high: float, close: float | None = None) -> Candle:
+    """The 1m candle ``i`` minutes after T0; close defaults to the bar's midpoint."""
+    close = close if close is not None else (low + high) / 2
+    return Candle(timestamp=T0 + timedelta(minutes=i), open=close, high=high, low=low, close=close, volume=1.0)
+
+
+def make_bars(lows, highs, closes) -> CandleArray:
+    """Consecutive 1m bars from T0, opening at their close."""
+    n = len(closes)
+    return CandleArray(
+        timestamp=T0_MS + 60_000 * np.arange(n, dtype=np.int64),
+        open=np.asarray(closes, dtype=float), high=np.asarray(highs, dtype=float),
+        low=np.asarray(lows, dtype=float), close=np.asarray(closes, dtype=float), volume=np.ones(n),
+    )
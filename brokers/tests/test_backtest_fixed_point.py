@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from brokers.backtest import BacktestBroker
+from brokers.tests.helpers import T0, make_candle
+from data.constants.forex_instruments import ForexInstruments
+from models.candle_array import CandleArray, to_points
+
+EURUSD = ForexInstruments.EURUSD
+
+
+def test_instrument_point_helpers():
+    assert EURUSD.point_size == pytest.approx(1e-5)
+    assert EURUSD.pips_to_points(2.5) == 25
+    assert EURUSD.to_points(1.10001) == 110001
+    assert EURUSD.from_points(110001) == 1.10001
+    # 0.1 + 0.2 style drift is snapped back onto the grid
+    assert EURUSD.round_price(1.1 + 3 * 0.0001) == 1.1003
+
+
+def test_limit_fill_is_exact_where_float_arithmetic_drifts():
+    # 1.1 - 3 pips lands just above 1.0997 in float64, so a candle whose high is
+    # exactly 1.09970 misses the float fill test but must fill on points.
+    entry = 1.1 - 3 * 0.0001
+    assert entry > 1.0997
+
+    def run(fixed_point: bool):
+        broker = BacktestBroker(csv_path=None, fixed_point=fixed_point)
+        broker.process_candle(make_candle(0, 1.0998, 1.1000, close=1.1000))
+        trade = broker.place_limit_buy(entry_price=entry, lot_size=0.01, tp_price=entry + 3 * 0.0001)
+        broker.process_candle(make_candle(1, 1.0990, 1.0997))
+        return broker, trade
+
+    _, float_trade = run(fixed_point=False)
+    assert float_trade.is_pending
+
+    broker, trade = run(fixed_point=True)
+    assert trade.executed_price == 1.0997
+    assert trade.tp_price == 1.1
+    assert not trade.is_pending and trade.status == "filled"
+
+    broker.process_candle(make_candle(2, 1.0998, 1.1000))
+    assert trade.exit_price == 1.1
+    assert broker.current_position is None
+
+
+def test_only_highest_tp_fills_per_candle():
+    broker = BacktestBroker(csv_path=None, fixed_point=True)
+    broker.process_candle(make_candle(0, 1.0990, 1.1000, close=1.1000))
+    low_rung = broker.add_rung(entry_price=1.0990, tp_price=1.0996, lot_size=0.01, ladder_position=1)
+    high_rung = broker.add_rung(entry_price=1.0994, tp_price=1.1000, lot_size=0.01, ladder_position=0)
+
+    broker.process_candle(make_candle(1, 1.0989, 1.0994))
+    broker.process_candle(make_candle(2, 1.0990, 1.1001))
+    assert high_rung.exit_price == 1.1
+    assert low_rung.exit_price is None
+
+
+def test_point_candle_array_roundtrip_and_memory():
+    n = 1000
+    arr = CandleArray(
+        timestamp=np.arange(n, dtype=np.int64) * 60_000,
+        open=np.full(n, 1.10001),
+        high=np.full(n, 1.10012),
+        low=np.full(n, 1.09995),
+        close=np.full(n, 1.10003),
+        volume=np.ones(n),
+    )
+    pts = arr.to_points(EURUSD)
+    assert pts.high.dtype == np.int32
+    assert pts.high[0] == 110012
+    assert pts.close.nbytes * 2 == arr.close.nbytes
+    np.testing.assert_array_equal(pts.to_prices().low, arr.low)
+
+
+def test_to_points_refuses_overflow():
+    with pytest.raises(OverflowError):
+        to_points(np.array([30_000.0]), 1e-5, np.int32)
+    assert to_points(np.array([30_000.0]), 1e-5, np.int64)[0] == 3_000_000_000
+
+
+def test_pickled_broker_keeps_point_prices():
+    import pickle
+
+    broker = BacktestBroker(csv_path=None, fixed_point=True)
+    broker.process_candle(make_candle(0, 1.0998, 1.1000, close=1.1000))
+    broker.place_limit_buy(entry_price=1.1 - 3 * 0.0001, lot_size=0.01, tp_price=1.1)
+
+    restored = pickle.loads(pickle.dumps(broker))
+    restored.process_candle(make_candle(1, 1.0990, 1.0997))
+    restored.process_candle(make_candle(2, 1.0995, 1.1000))
+    trade = restored.get_all_positions()[0].positions[0]
+    assert trade.exit_price == 1.1
+    assert restored.current_position is None
+    assert restored.candle_store.root == broker.candle_store.root
+
+
+def test_dropping_closed_cycles_keeps_totals():
+    def run(keep: bool) -> BacktestBroker:
+        broker = BacktestBroker(csv_path=None, fixed_point=True, keep_closed_cycles=keep)
+        for i in range(0, 40, 4):
+            broker.process_candle(make_candle(i, 1.0995, 1.1000, close=1.1000))
+            broker.place_limit_buy(entry_price=1.0998, lot_size=0.01, tp_price=1.1001)
+            broker.place_limit_buy(entry_price=1.0996, lot_size=0.01, tp_price=1.0999)
+            broker.process_candle(make_candle(i + 1, 1.0995, 1.0999))
+            broker.process_candle(make_candle(i + 2, 1.0997, 1.1001))
+        return broker
+
+    kept, dropped = run(True), run(False)
+    assert len(kept.positions) == 10 and dropped.positions == []
+    assert dropped.realized_pnl() == pytest.approx(kept.realized_pnl())
+    assert dropped.closed_trade_count() == kept.closed_trade_count() == 20
+    assert len(dropped.ledger) == 0 and len(kept.ledger) == 20
+
+
+@pytest.mark.parametrize("keep_closed_cycles", [True, False])
+def test_account_snapshot_values_the_ledger_like_tradelocker(keep_closed_cycles):
+    from brokers.backtest import COMMISSION
+
+    broker = BacktestBroker(csv_path=None, fixed_point=True, keep_closed_cycles=keep_closed_cycles, initial_balance=1_000.0)
+    broker.process_candle(make_candle(0, 1.0998, 1.1000, close=1.1000))
+    broker.add_rung(entry_price=1.0998, tp_price=1.1001, lot_size=1.0, ladder_position=0)
+    broker.add_rung(entry_price=1.0990, tp_price=1.0993, lot_size=1.0, ladder_position=1)
+
+    broker.process_candle(make_candle(1, 1.0996, 1.0999, close=1.0997))        # depth 0 fills
+    snap = broker.get_account_snapshot(T0, T0 + timedelta(minutes=1))
+    [position] = snap.activated_positions
+    assert (position.status, position.position_depth, position.entry_price) == ("active", 0, 1.0998)
+    assert snap.num_pending_positions == 1
+    assert snap.account_open_gross_pnl == pytest.approx(-10.0)            # 1 pip x $10 x 1 lot
+    assert snap.account_open_net_pnl == pytest.approx(-10.0 - COMMISSION)
+    assert snap.account_balance == pytest.approx(1_000.0)
+
+    broker.process_candle(make_candle(2, 1.0999, 1.1002, close=1.1002))        # TP closes the cycle
+    snap = broker.get_account_snapshot(T0, T0 + timedelta(minutes=2))
+    assert snap.account_balance == pytest.approx(1_000.0 + 30.0 - COMMISSION)
+    assert snap.account_open_gross_pnl == 0.0 and snap.num_pending_positions == 0
+    if keep_closed_cycles:
+        [position] = snap.activated_positions
+        assert (position.status, position.exit_price, position.gross_pnl) == ("closed", 1.1001, 30.0)
+    else:
+        assert snap.activated_positions == []          # archived cycles only keep their totals
+    # the window is on fill time
+    assert broker.get_account_snapshot(T0 + timedelta(minutes=2), T0 + timedelta(minutes=3)).activated_positions == []
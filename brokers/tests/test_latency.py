@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from brokers.tradelocker import TradeLockerBroker
+from brokers.tradelocker_mock import Faults, MockTradeLockerServer
+from data.synthetic.price_paths import PricePathGenerator
+from utils.clock import SimulatedClock
+from utils.latency import LatencyHistogram, LatencyRecorder
+from utils.time import ms_to_dt
+
+
+def test_histogram_percentiles_stay_within_one_percent():
+    samples = np.random.default_rng(1).lognormal(mean=-3, sigma=1, size=20_000)     # seconds
+    histogram = LatencyHistogram()
+    for seconds in samples:
+        histogram.record(seconds)
+
+    for q in (50, 90, 99, 99.9):
+        assert histogram.percentile(q) == pytest.approx(np.percentile(samples, q) * 1000, rel=0.01)
+    assert histogram.count == len(samples)
+    assert histogram.max == pytest.approx(samples.max() * 1000, abs=1e-3)
+    assert histogram.mean == pytest.approx(samples.mean() * 1000, rel=1e-4)
+
+    # halves merge into the same histogram
+    a, b = LatencyHistogram(), LatencyHistogram()
+    for i, seconds in enumerate(samples):
+        (a if i % 2 else b).record(seconds)
+    merged = a.merge(b)
+    assert (merged.counts == histogram.counts).all()
+    assert (merged.min_us, merged.max_us) == (histogram.min_us, histogram.max_us)
+
+
+def test_recorder_times_spans_with_its_timer(tmp_path):
+    ticks = iter([0.0, 0.25, 1.0, 1.5])
+    latency = LatencyRecorder(timer=lambda: next(ticks))
+    with latency.span("fetch"):
+        pass
+    with pytest.raises(RuntimeError):
+        with latency.span("fetch"):
+            raise RuntimeError("failed requests are timed too")
+    latency.record("time_to_order", 0.002)
+
+    summary = latency.summary()
+    assert list(summary) == ["fetch", "time_to_order"]
+    assert summary["fetch"]["count"] == 2
+    assert summary["fetch"]["max_ms"] == 500.0
+    assert latency.last["fetch"] == 0.5
+
+    path = tmp_path / "latency.jsonl"
+    latency.write_jsonl(str(path), cycle_id="c1")
+    latency.write_jsonl(str(path), cycle_id="c2")
+    assert path.read_text().count("\n") == 2
+    assert latency.format()[1].startswith("fetch ")
+
+
+def test_tradelocker_broker_times_every_http_call_by_route():
+    bars = PricePathGenerator(seed=7).gbm(10)
+    clock = SimulatedClock(ms_to_dt(int(bars.timestamp[4]) + 60_000))
+    latency = LatencyRecorder()
+    with MockTradeLockerServer(bars, clock=clock, faults=Faults(latency_ms=20)) as server:
+        broker = TradeLockerBroker(email="t", password="t", server="MOCK", base_url=server.url, latency=latency)
+        broker.refresh()
+        broker.get_current_spread()
+        broker.get_candles_range("EURUSD", "1m", clock.now() - timedelta(minutes=5), clock.now())
+
+    spans = latency.summary()
+    assert spans["http POST /auth/jwt/token"]["count"] == 1
+    assert spans["http GET /trade/accounts/{id}/instruments"]["count"] == 1
+    assert spans["http GET /trade/quotes"]["count"] == 1
+    assert spans["http GET /trade/history"]["p50_ms"] >= 20
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from brokers.replay import ReplayBroker, ReplayExhausted
+from brokers.tests.helpers import T0, make_bars
+from utils.clock import SimulatedClock
+
+
+def test_simulated_clock_sleeps_in_virtual_time():
+    clock = SimulatedClock(T0)
+    clock.sleep(2)
+    asyncio.run(clock.asleep(58))
+    assert clock.now() == T0 + timedelta(minutes=1)
+    assert clock.monotonic() == clock.slept == 60
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+
+
+def test_orders_fill_on_bars_that_close_after_them():
+    #               bar 0    bar 1    bar 2    bar 3
+    replay = make_bars(
+        lows=[1.0995, 1.0996, 1.0990, 1.0999],
+        highs=[1.1000, 1.0999, 1.0999, 1.1005],
+        closes=[1.0997, 1.0998, 1.0996, 1.1004],
+    )
+    clock = SimulatedClock(T0 + timedelta(minutes=1))      # bar 0 has just closed
+    broker = ReplayBroker(replay, clock, spread_pips=0.3)
+
+    candles = broker.get_candles_range("EURUSD", "1m", T0 - timedelta(hours=1), clock.now())
+    assert [c.close for c in candles] == [1.0997]
+    assert broker.get_current_spread() == pytest.approx(0.3)
+
+    # bar 0 traded through 1.0996, but the order only exists from its close on
+    broker.place_limit_buy(1.0996, 1.0, tp_price=1.1003, strategy_id="RSILR_x_0")
+    broker.place_limit_buy(1.0993, 1.0, tp_price=1.1000, strategy_id="RSILR_x_1")
+    clock.sleep(60)
+    snap = broker.get_account_snapshot(T0, clock.now())
+    assert [p.position_depth for p in snap.activated_positions] == [0]
+    assert snap.num_pending_positions == 1
+
+    clock.sleep(120)                                        # bars 2 and 3: depth 1 fills, both TPs are hit
+    snap = broker.get_account_snapshot(T0, clock.now())
+    positions = sorted(snap.activated_positions, key=lambda p: p.position_depth)
+    assert [p.status for p in positions] == ["closed", "active"]   # one TP per bar
+    assert positions[0].gross_pnl == pytest.approx(70.0)             # 7 pips x $10 x 1 lot
+    assert snap.account_balance == pytest.approx(10_070.0)
+    assert snap.account_open_gross_pnl == pytest.approx(110.0)     # 1.1004 - 1.0993
+
+
+def test_close_all_cancels_pending_orders_and_replay_ends():
+    replay = make_bars(lows=[1.0995, 1.0990, 1.0980], highs=[1.1000, 1.0999, 1.0999], closes=[1.0997, 1.0995, 1.0985])
+    clock = SimulatedClock(T0 + timedelta(minutes=1))
+    broker = ReplayBroker(replay, clock)
+    broker.place_limit_buy(1.0995, 1.0, tp_price=1.1010, strategy_id="c_0")
+    broker.place_limit_buy(1.0970, 1.0, tp_price=1.1000, strategy_id="c_1")
+    clock.sleep(60)
+
+    asyncio.run(broker.close_all())
+    clock.sleep(60)                                         # bar 2 would have filled depth 1
+    snap = broker.get_account_snapshot(T0, clock.now())
+    assert [(p.position_depth, p.exit_price) for p in snap.activated_positions] == [(0, 1.0995)]
+    assert snap.num_pending_positions == 0
+    assert broker.balance == pytest.approx(10_000.0)
+
+    clock.sleep(60)
+    with pytest.raises(ReplayExhausted):
+        broker.get_account_snapshot(T0, clock.now())
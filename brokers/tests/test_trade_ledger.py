@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from brokers.backtest import BacktestBroker
+from brokers.tests.helpers import T0, make_candle
+from brokers.trade_ledger import LedgerTrades, TradeLedger
+
+
+def test_views_read_and_write_rows_across_growth():
+    ledger = TradeLedger("EURUSD", 0.0001, 10.0, capacity=2)
+    trades = LedgerTrades(ledger, ledger.end)
+    for depth in range(5):
+        i = ledger.append(entry=1.1 - depth * 0.0002, lot=0.1, side=1, cycle=0, depth=depth, pending=True, open_ms=0, tp=1.1002)
+        trades.append(ledger.view(i))
+
+    assert len(ledger) == len(trades) == 5
+    trade = trades[3]
+    assert (trade.side, trade.ladder_position, trade.status) == ("buy", 3, "pending")
+    assert trade.executed_price == pytest.approx(1.0994)
+    assert trade.exit_price is None and trade.sl_price is None and trade.close_time is None
+
+    trade.exit_price = 1.1002
+    trade.close_time = T0
+    trade.is_pending = False
+    assert trades[3].exit_price == 1.1002 and trades[3].close_time == T0 and trades[3].status == "filled"
+    assert ledger.pnl()[3] == pytest.approx(8 * 10.0 * 0.1)     # 8 pips at $10 per pip per lot
+
+    with pytest.raises(ValueError):
+        trades.append(ledger.view(0))       # not the next row
+
+
+def test_released_rows_are_not_readable():
+    ledger = TradeLedger("EURUSD", 0.0001, 10.0)
+    first = ledger.view(ledger.append(entry=1.1, lot=0.1, side=1, cycle=0, depth=0, pending=False, open_ms=0))
+    second = ledger.view(ledger.append(entry=1.2, lot=0.1, side=1, cycle=1, depth=0, pending=False, open_ms=0))
+    ledger.release(1)
+
+    assert len(ledger) == 1 and second.executed_price == 1.2
+    with pytest.raises(LookupError):
+        first.executed_price
+
+
+def test_broker_trades_export_as_one_frame(tmp_path):
+    broker = BacktestBroker(csv_path=None, fixed_point=True)
+    broker.process_candle(make_candle(0, 1.0998, 1.1000, close=1.1000))
+    broker.add_rung(entry_price=1.0999, tp_price=1.1001, lot_size=1.0, ladder_position=0)
+    broker.add_rung(entry_price=1.0997, tp_price=1.1000, lot_size=1.0, ladder_position=1)
+    broker.process_candle(make_candle(1, 1.0996, 1.0999, close=1.0997))
+    broker.process_candle(make_candle(2, 1.0997, 1.1001, close=1.1001))
+
+    # one TP per candle: the higher one went first, the lower one is still open
+    cycle = broker.positions[0]
+    assert [t.exit_price for t in cycle.positions] == [1.1001, None]
+    assert broker.realized_pnl() == pytest.approx(20.0)
+    assert broker.unrealized_pnl(1.0998) == pytest.approx(10.0)
+
+    frame = pd.read_parquet(broker.export_trades(tmp_path / "trades.parquet"))
+    assert list(frame["depth"]) == [0, 1]
+    assert list(frame["pending"]) == [False, False]
+    assert frame["pnl"].tolist() == pytest.approx([20.0, 0.0])
+    assert frame["close_time"].isna().tolist() == [False, True]
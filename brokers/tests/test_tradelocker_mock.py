@@ -0,0 +1,87 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from brokers.tests.helpers import T0, make_bars
+from brokers.tradelocker import TradeLockerBroker
+from brokers.tradelocker_mock import Faults, MockTradeLockerServer
+from utils.clock import SimulatedClock
+
+
+def client(server: MockTradeLockerServer) -> TradeLockerBroker:
+    broker = TradeLockerBroker(email="test", password="test", server="MOCK", base_url=server.url)
+    broker.refresh()                     # loads the column mappings, as Session.run_cycle does
+    return broker
+
+
+def test_broker_trades_through_the_mock_with_shuffled_columns():
+    replay = make_bars(lows=[1.0995, 1.0990, 1.0996, 1.0999], highs=[1.1000, 1.0999, 1.0999, 1.1005],
+                       closes=[1.0997, 1.0996, 1.0998, 1.1004])
+    clock = SimulatedClock(T0 + timedelta(minutes=1))      # bar 0 has just closed
+    with MockTradeLockerServer(replay, clock=clock, spread_pips=0.2, shuffle_columns=3) as server:
+        broker = client(server)
+
+        candles = broker.get_candles_range("EURUSD", "1m", T0 - timedelta(hours=1), clock.now())
+        assert [c.close for c in candles] == [1.0997]
+        bid, ask = broker.get_current_bid_ask()
+        assert (bid, ask) == (1.0997, pytest.approx(1.09972))
+
+        opened = clock.now()
+        broker.place_limit_buy(1.0992, 1.0, tp_price=1.1002, strategy_id="RSILR_x_0")
+        snap = broker.get_account_snapshot(opened, clock.now())
+        assert snap.num_pending_positions == 1 and snap.activated_positions == []
+
+        clock.sleep(60)                                     # bar 1 fills the order
+        snap = broker.get_account_snapshot(opened, clock.now())
+        [position] = snap.activated_positions
+        assert (position.status, position.entry_price, position.position_depth) == ("active", 1.0992, 0)
+        assert snap.account_open_gross_pnl == pytest.approx(40.0)        # 1.0996 - 1.0992
+
+        clock.sleep(120)                                    # bar 3 reaches the take-profit
+        snap = broker.get_account_snapshot(opened, clock.now())
+        [position] = snap.activated_positions
+        assert (position.status, position.exit_price) == ("closed", 1.1002)
+        assert snap.account_balance == pytest.approx(10_100.0)
+
+    assert server.calls["POST /auth/jwt/token"] == 1
+    assert server.calls["POST /trade/accounts/{id}/orders"] == 1
+    assert set(server.responses) == {200, 201}
+
+
+def test_injected_faults_reach_the_client():
+    replay = make_bars(lows=[1.0995] * 3, highs=[1.1000] * 3, closes=[1.0997] * 3)
+    clock = SimulatedClock(T0 + timedelta(minutes=1))
+    with MockTradeLockerServer(replay, clock=clock) as server:
+        broker = client(server)
+
+        server.faults = Faults(latency_ms=50)
+        started = time.perf_counter()
+        broker.get_current_bid_ask()
+        assert time.perf_counter() - started >= 0.05
+
+        server.faults = Faults(error_rate=1.0)
+        with pytest.raises(RuntimeError, match="Internal server error"):
+            broker.get_current_bid_ask()
+
+        # the bucket refills on the server's clock, not on wall time
+        server.faults = Faults(rate_limit_rps=1, rate_limit_burst=2)
+        server.reset_counters()
+        broker.get_current_bid_ask()
+        broker.get_current_bid_ask()
+        with pytest.raises(RuntimeError, match="Too many requests"):
+            broker.get_current_bid_ask()
+        clock.sleep(1)
+        broker.get_current_bid_ask()
+        assert server.calls["GET /trade/quotes"] == 4
+        assert server.responses == {200: 3, 429: 1}
+
+
+def test_market_data_waits_for_the_first_bar_to_close():
+    replay = make_bars(lows=[1.0995], highs=[1.1000], closes=[1.0997])
+    clock = SimulatedClock(T0)
+    with MockTradeLockerServer(replay, clock=clock) as server:
+        broker = client(server)
+        with pytest.raises(RuntimeError):
+            broker.get_current_bid_ask()
+        assert server.responses[503] == 1
@@ -0,0 +1,432 @@
+"""
+trade_ledger.py
+---------------
+Columnar store of the trades a BacktestBroker has placed.
+
+Every trade is one row (column position) of three preallocated NumPy
+blocks that double in size when full:
+
+    prices  float64  entry, tp, sl, lot, exit, realized      (NaN: not set)
+    times   int64    open_ms, close_ms                        (NO_TIME: not set)
+    state   int64    entry_pts, tp_pts, cycle, depth, side, pending
+
+Code that expects `Trade` objects gets a `TradeView`: a two-slot object
+(ledger, row) whose attributes read and write the blocks. A cycle's trades
+are consecutive rows, so `Cycle.positions` is a `LedgerTrades` range that
+creates views on access; no Python object is kept per trade. The broker's
+per-candle work runs as compiled loops over the cycle's rows, and post-run
+analytics are whole-column operations:
+
+    frame = broker.ledger.to_frame()           # one row per trade
+    broker.ledger.to_parquet("reports/trades.parquet")
+
+Row numbers are absolute: `release(upto)` drops the rows before `upto`
+(once their cycles are archived) and views of released rows raise
+LookupError instead of reading recycled rows.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+
+NO_TIME = np.iinfo(np.int64).min
+
+# Rows of the three blocks
+ENTRY, TP, SL, LOT, EXIT, REALIZED = range(6)                 # prices
+OPEN_MS, CLOSE_MS = range(2)                                  # times
+ENTRY_PTS, TP_PTS, CYCLE, DEPTH, SIDE, PENDING = range(6)     # state
+
+_COLUMNS = {
+    "entry": ("prices", ENTRY),
+    "tp": ("prices", TP),
+    "sl": ("prices", SL),
+    "lot": ("prices", LOT),
+    "exit": ("prices", EXIT),
+    "realized": ("prices", REALIZED),
+    "open_ms": ("times", OPEN_MS),
+    "close_ms": ("times", CLOSE_MS),
+    "entry_pts": ("state", ENTRY_PTS),      # fixed-point brokers only
+    "tp_pts": ("state", TP_PTS),
+    "cycle": ("state", CYCLE),
+    "depth": ("state", DEPTH),
+    "side": ("state", SIDE),                # +1 buy / -1 sell
+    "pending": ("state", PENDING),
+}
+
+
+def to_ms(ts: datetime) -> int:
+    return int(ts.timestamp() * 1000)
+
+
+def from_ms(ms: int) -> Optional[datetime]:
+    return None if ms == NO_TIME else datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+# ----------------------------------------------------------------------
+# Per-candle kernels over one cycle's rows [lo, hi)
+# ----------------------------------------------------------------------
+@njit(cache=True)
+def fill_and_take_profit(prices, times, state, lo, hi, low, high, now_ms, fixed_point):
+    """
+    Fill pending rows whose entry lies in [low, high], then close the one
+    filled row with the highest hit TP (first on ties) at its TP price.
+    With `fixed_point` the candle's low / high are integer points and are
+    compared with the rows' points instead of their prices.
+    Returns whether the cycle is now closed.
+    """
+    for i in range(lo, hi):
+        entry = state[ENTRY_PTS, i] if fixed_point else prices[ENTRY, i]
+        if state[PENDING, i] and low <= entry <= high:
+            state[PENDING, i] = 0
+            times[OPEN_MS, i] = now_ms
+
+    best = -1
+    best_tp = 0.0
+    for i in range(lo, hi):
+        if state[PENDING, i] or not np.isnan(prices[EXIT, i]) or np.isnan(prices[TP, i]):
+            continue
+        tp = state[TP_PTS, i] if fixed_point else prices[TP, i]
+        if high >= tp and (best < 0 or tp > best_tp):
+            best, best_tp = i, tp
+    if best >= 0:
+        prices[EXIT, best] = prices[TP, best]
+        times[CLOSE_MS, best] = now_ms
+
+    return cycle_closed(prices, state, lo, hi)
+
+
+@njit(cache=True)
+def cycle_closed(prices, state, lo, hi):
+    """Something filled and every filled row has exited (Cycle.is_closed)."""
+    any_filled = False
+    for i in range(lo, hi):
+        if not state[PENDING, i]:
+            any_filled = True
+            if np.isnan(prices[EXIT, i]):
+                return False
+    return any_filled
+
+
+@njit(cache=True)
+def open_pnl(prices, state, lo, hi, price, pip_size, pip_value):
+    """PnL in account currency of the rows still open at `price` (see BacktestBroker.trade_gross_pnl)."""
+    total = 0.0
+    for i in range(lo, hi):
+        if np.isnan(prices[EXIT, i]):
+            total += state[SIDE, i] * (price - prices[ENTRY, i]) / pip_size * pip_value * prices[LOT, i]
+    return total
+
+
+class TradeLedger:
+    """
+    PnL columns are in account currency: `pip_size` is the instrument's pip and
+    `pip_value` what one pip is worth per standard lot.
+    """
+
+    def __init__(self, symbol: str, pip_size: float, pip_value: float, capacity: int = 256):
+        self.symbol = symbol
+        self.pip_size = pip_size
+        self.pip_value = pip_value
+        self.n = 0          # live rows
+        self.offset = 0     # absolute number of the first live row
+        self.prices = np.empty((6, capacity), dtype=np.float64)
+        self.times = np.empty((2, capacity), dtype=np.int64)
+        self.state = np.empty((6, capacity), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def column(self, name: str) -> np.ndarray:
+        """The live rows of one column (a view into its block)."""
+        block, k = _COLUMNS[name]
+        return getattr(self, block)[k, :self.n]
+
+    @property
+    def end(self) -> int:
+        """Absolute number the next appended row gets."""
+        return self.offset + self.n
+
+    def row(self, i: int) -> int:
+        """Column position of absolute row `i`."""
+        r = i - self.offset
+        if r < 0 or r >= self.n:
+            raise LookupError(f"trade {i} is not in the ledger (released or never added)")
+        return r
+
+    def span(self, trades: LedgerTrades) -> tuple[int, int]:
+        """Column positions [lo, hi) of a range of rows."""
+        if trades.start < self.offset:
+            raise LookupError("trades have been released from the ledger")
+        return trades.start - self.offset, trades.stop - self.offset
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def append(
+        self,
+        entry: float,
+        lot: float,
+        side: int,
+        cycle: int,
+        depth: int,
+        pending: bool,
+        open_ms: int,
+        tp: Optional[float] = None,
+        sl: Optional[float] = None,
+        entry_pts: int = 0,
+        tp_pts: int = 0,
+    ) -> int:
+        if self.n == self.prices.shape[1]:
+            self._grow()
+        r = self.n
+        self.prices[:, r] = (entry, np.nan if tp is None else tp, np.nan if sl is None else sl, lot, np.nan, np.nan)
+        self.times[:, r] = (open_ms, NO_TIME)
+        self.state[:, r] = (entry_pts, tp_pts, cycle, depth, side, pending)
+        self.n += 1
+        return self.offset + r
+
+    def _grow(self) -> None:
+        for name in ("prices", "times", "state"):
+            block = getattr(self, name)
+            grown = np.empty((block.shape[0], max(2 * block.shape[1], 16)), dtype=block.dtype)
+            grown[:, :self.n] = block[:, :self.n]
+            setattr(self, name, grown)
+
+    def release(self, upto: int) -> None:
+        """Forget the rows before absolute row `upto`."""
+        k = min(max(upto - self.offset, 0), self.n)
+        if k == 0:
+            return
+        for block in (self.prices, self.times, self.state):
+            block[:, :self.n - k] = block[:, k:self.n]
+        self.n -= k
+        self.offset += k
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def view(self, i: int) -> TradeView:
+        return TradeView(self, i)
+
+    def pnl(self, lo: int = 0, hi: Optional[int] = None) -> np.ndarray:
+        """Realized PnL of closed rows in [lo, hi) (column positions), 0 for open ones."""
+        hi = self.n if hi is None else hi
+        p = self.prices[:, lo:hi]
+        fallback = self.state[SIDE, lo:hi] * (p[EXIT] - p[ENTRY]) / self.pip_size * self.pip_value * p[LOT]
+        pnl = np.where(np.isnan(p[REALIZED]), fallback, p[REALIZED])
+        return np.where(np.isnan(p[EXIT]), 0.0, pnl)
+
+    def closed_count(self, lo: int = 0, hi: Optional[int] = None) -> int:
+        """Number of rows in [lo, hi) that have exited."""
+        hi = self.n if hi is None else hi
+        return int((~np.isnan(self.prices[EXIT, lo:hi])).sum())
+
+    def to_frame(self) -> pd.DataFrame:
+        col = self.column
+        close_ms = col("close_ms")
+        frame = pd.DataFrame({
+            "trade": np.arange(self.offset, self.end),
+            "cycle": col("cycle"),
+            "depth": col("depth"),
+            "side": np.where(col("side") > 0, "buy", "sell"),
+            "lot": col("lot"),
+            "entry": col("entry"),
+            "tp": col("tp"),
+            "sl": col("sl"),
+            "exit": col("exit"),
+            "pending": col("pending").astype(bool),
+            "open_time": pd.to_datetime(col("open_ms"), unit="ms", utc=True),
+            "close_time": pd.to_datetime(np.where(close_ms == NO_TIME, np.nan, close_ms), unit="ms", utc=True),
+            "pnl": self.pnl(),
+        })
+        frame.insert(0, "symbol", self.symbol)
+        return frame
+
+    def to_parquet(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.to_frame().to_parquet(path, index=False)
+        return path
+
+
+class LedgerTrades:
+    """List-like range of consecutive ledger rows (a cycle's trades), yielding TradeViews."""
+
+    __slots__ = ("_ledger", "start", "stop")
+
+    def __init__(self, ledger: TradeLedger, start: int):
+        self._ledger = ledger
+        self.start = start
+        self.stop = start
+
+    def append(self, trade: TradeView) -> None:
+        if trade._ledger is not self._ledger or trade._i != self.stop:
+            raise ValueError("a cycle's trades must be consecutive ledger rows")
+        self.stop += 1
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [TradeView(self._ledger, i) for i in range(self.start, self.stop)[k]]
+        return TradeView(self._ledger, range(self.start, self.stop)[k])
+
+    def __iter__(self):
+        for i in range(self.start, self.stop):
+            yield TradeView(self._ledger, i)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class TradeView:
+    """Trade-compatible view of one ledger row (see models.trade.Trade)."""
+
+    __slots__ = ("_ledger", "_i")
+
+    def __init__(self, ledger: TradeLedger, i: int):
+        self._ledger = ledger
+        self._i = i
+
+    def _get(self, col: str):
+        block, k = _COLUMNS[col]
+        ledger = self._ledger
+        return getattr(ledger, block)[k, ledger.row(self._i)]
+
+    def _set(self, col: str, value) -> None:
+        block, k = _COLUMNS[col]
+        ledger = self._ledger
+        getattr(ledger, block)[k, ledger.row(self._i)] = value
+
+    def _get_price(self, col: str) -> Optional[float]:
+        value = self._get(col)
+        return None if np.isnan(value) else float(value)
+
+    def _set_price(self, col: str, value: Optional[float]) -> None:
+        self._set(col, np.nan if value is None else value)
+
+    # --- identity -------------------------------------------------------
+    @property
+    def id(self) -> str:
+        return f"t{self.cycle_id}_{self._i}"
+
+    custom_id = ""
+
+    @property
+    def raw(self) -> dict:
+        return {}      # simulated trades have no provider payload
+
+    @property
+    def cycle_id(self) -> int:
+        return int(self._get("cycle"))
+
+    @property
+    def symbol(self) -> str:
+        return self._ledger.symbol
+
+    @property
+    def side(self) -> str:
+        return "buy" if self._get("side") > 0 else "sell"
+
+    @property
+    def lot_size(self) -> float:
+        return float(self._get("lot"))
+
+    @property
+    def ladder_position(self) -> int:
+        return int(self._get("depth"))
+
+    # --- prices ---------------------------------------------------------
+    @property
+    def executed_price(self) -> float:
+        return float(self._get("entry"))
+
+    @executed_price.setter
+    def executed_price(self, value: float) -> None:
+        self._set("entry", value)
+
+    @property
+    def tp_price(self) -> Optional[float]:
+        return self._get_price("tp")
+
+    @tp_price.setter
+    def tp_price(self, value: Optional[float]) -> None:
+        self._set_price("tp", value)
+
+    @property
+    def sl_price(self) -> Optional[float]:
+        return self._get_price("sl")
+
+    @sl_price.setter
+    def sl_price(self, value: Optional[float]) -> None:
+        self._set_price("sl", value)
+
+    @property
+    def exit_price(self) -> Optional[float]:
+        return self._get_price("exit")
+
+    @exit_price.setter
+    def exit_price(self, value: Optional[float]) -> None:
+        self._set_price("exit", value)
+
+    @property
+    def realized_pnl(self) -> Optional[float]:
+        return self._get_price("realized")
+
+    @realized_pnl.setter
+    def realized_pnl(self, value: Optional[float]) -> None:
+        self._set_price("realized", value)
+
+    # --- state ----------------------------------------------------------
+    @property
+    def is_pending(self) -> bool:
+        return bool(self._get("pending"))
+
+    @is_pending.setter
+    def is_pending(self, value: bool) -> None:
+        self._set("pending", value)
+
+    @property
+    def status(self) -> str:
+        return "pending" if self.is_pending else "filled"
+
+    @status.setter
+    def status(self, value: str) -> None:
+        self.is_pending = value == "pending"
+
+    @property
+    def open_time(self) -> datetime:
+        return from_ms(int(self._get("open_ms")))
+
+    @open_time.setter
+    def open_time(self, value: datetime) -> None:
+        self._set("open_ms", to_ms(value))
+
+    @property
+    def close_time(self) -> Optional[datetime]:
+        return from_ms(int(self._get("close_ms")))
+
+    @close_time.setter
+    def close_time(self, value: Optional[datetime]) -> None:
+        self._set("close_ms", NO_TIME if value is None else to_ms(value))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TradeView) and other._ledger is self._ledger and other._i == self._i
+
+    def __hash__(self) -> int:
+        return hash((id(self._ledger), self._i))
+
+    def __repr__(self) -> str:
+        return (
+            f"TradeView(id={self.id!r}, symbol={self.symbol!r}, side={self.side!r}, lot_size={self.lot_size}, "
+            f"executed_price={self.executed_price}, tp_price={self.tp_price}, is_pending={self.is_pending}, "
+            f"exit_price={self.exit_price}, ladder_position={self.ladder_position})"
+        )
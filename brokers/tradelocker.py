@@ -2,6 +2,7 @@ from __future__ import annotations
 from asyncio import sleep
 from dataclasses import dataclass
 
+import numpy as np
 import requests
 from datetime import datetime, timedelta, timezone
 import time
@@ -13,8 +14,13 @@ from data.constants.forex_instruments import ForexInstruments
 from models.position import Position
 import runtime_settings as rs
 from models.candle import Candle
+from models.candle_array import CandleArray
 from models.trade import Trade
 from brokers.base import BaseBroker
+from data.ingestion.backfill import TradeLockerHistoryProvider, plan_windows
+from data.store.candle_cache import CandleCache
+from data.store.candle_store import CandleStore
+from utils.latency import LatencyRecorder
 
 @dataclass
 class TLInstrument(ForexInstrument):
@@ -44,6 +50,9 @@ class TradeLockerBroker(BaseBroker):
     This replaces the old TradeLockerClient and the old Broker wrapper entirely.
     """
 
+    # Conservative per-request cap for /trade/history; longer ranges are chunked.
+    max_bars_per_request: int = 5000
+
     def __init__(
         self,
         email: str = rs.TRADELOCKER_EMAIL,
@@ -52,11 +61,15 @@ class TradeLockerBroker(BaseBroker):
         base_url: str = rs.TRADELOCKER_BASE_API_URL,
         instrument_name: str = 'EURUSD',
         account_id: Optional[str] = None,
+        candle_store: Optional[CandleStore] = None,
+        latency: Optional[LatencyRecorder] = None,
     ):
         self.email = email
         self.password = password
         self.server = server
         self.base_url = base_url
+        # when set, every HTTP call is timed under "http METHOD /route"
+        self.latency = latency
 
         self.token: Optional[str] = None
         self.account_id = account_id
@@ -72,6 +85,12 @@ class TradeLockerBroker(BaseBroker):
             self.auto_assign_account()
             
         self.set_instrument_parameters(instrument_name)
+
+        # Optional read-through cache: closed bars are served from the store and
+        # only the missing tail (usually one bar) is requested from TL.
+        self.candle_cache: Optional[CandleCache] = None
+        if candle_store is not None:
+            self.candle_cache = CandleCache(candle_store, provider_factory=lambda: TradeLockerHistoryProvider(self))
         
         
     def refresh(self):
@@ -79,6 +98,19 @@ class TradeLockerBroker(BaseBroker):
         self.set_api_mappings()
 
 
+    # ----------------------------------------------------------------------
+    # HTTP
+    # ----------------------------------------------------------------------
+    def _http(self, method: str, url: str, **kwargs) -> requests.Response:
+        if self.latency is None:
+            return requests.request(method, url, **kwargs)
+        route = url[len(self.base_url):]
+        if self.account_id:
+            route = route.replace(f"/accounts/{self.account_id}/", "/accounts/{id}/")
+        with self.latency.span(f"http {method} {route}"):
+            return requests.request(method, url, **kwargs)
+
+
     # ----------------------------------------------------------------------
     # Authentication
     # ----------------------------------------------------------------------
@@ -91,7 +123,7 @@ class TradeLockerBroker(BaseBroker):
         }
         headers = {"accept": "application/json", "content-type": "application/json"}
 
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._http("POST", url, json=payload, headers=headers)
         if r.status_code != 201:
             raise RuntimeError(f"TradeLocker auth failed: {r.text}")
 
@@ -108,7 +140,7 @@ class TradeLockerBroker(BaseBroker):
         }
         
     def ping(self) -> bool:
-        ping = requests.get(f"{self.base_url}/ping")
+        ping = self._http("GET", f"{self.base_url}/ping")
         accessible = ping.status_code == 200
         return accessible
 
@@ -117,7 +149,7 @@ class TradeLockerBroker(BaseBroker):
     # ----------------------------------------------------------------------
     def auto_assign_account(self):
         url = f"{self.base_url}/auth/jwt/all-accounts"
-        r = requests.get(url, headers=self.get_auth_headers())
+        r = self._http("GET", url, headers=self.get_auth_headers())
 
         if r.status_code != 200:
             raise RuntimeError(f"Could not fetch accounts: {r.text}")
@@ -130,7 +162,7 @@ class TradeLockerBroker(BaseBroker):
 
     def set_instrument_parameters(self, instrument_name: str):
         url = f"{self.base_url}/trade/accounts/{self.account_id}/instruments"
-        r = requests.get(url, headers=self.get_auth_headers())
+        r = self._http("GET", url, headers=self.get_auth_headers())
         if r.status_code != 200:
             raise RuntimeError(f"Could not fetch instruments: {r.text}")
 
@@ -154,7 +186,7 @@ class TradeLockerBroker(BaseBroker):
         mappings = APIMappings()
         url: str = f"{self.base_url}/trade/config"
         headers: dict = self.get_auth_headers()
-        r = requests.get(url, headers=headers)
+        r = self._http("GET", url, headers=headers)
         config_data: dict = r.json()
         mappings.orders_mappings = [field['id'] for field in config_data['d']['ordersConfig']['columns']]
         mappings.filled_orders_mappings = [field['id'] for field in config_data['d']['filledOrdersConfig']['columns']]
@@ -192,6 +224,8 @@ class TradeLockerBroker(BaseBroker):
     ) -> List[Candle]:
         """
         Main candle retrieval method.
+        Ranges longer than `max_bars_per_request` bars are split into
+        consecutive requests so no single call exceeds the history limit.
         """
 
         if date_from.tzinfo is None:
@@ -202,6 +236,21 @@ class TradeLockerBroker(BaseBroker):
         from_ms = int(date_from.timestamp() * 1000)
         to_ms = int(date_to.timestamp() * 1000)
 
+        if self.candle_cache is not None:
+            return self.candle_cache.get_range(self.instrument.symbol, resolution, from_ms, to_ms).to_candles()
+
+        windows = plan_windows(from_ms, to_ms + 1, resolution, self.max_bars_per_request) or [(from_ms, to_ms)]
+        if len(windows) == 1:
+            return self._convert_bars_to_candles(self._get_history_json(resolution, from_ms, to_ms))
+
+        parts = [self.fetch_history_window(resolution, w_from, w_to) for w_from, w_to in windows]
+        return CandleArray.concat(parts).sorted_unique().between(from_ms, to_ms).to_candles()
+
+    def fetch_history_window(self, resolution: str, from_ms: int, to_ms: int) -> CandleArray:
+        """Single /trade/history request returned as a CandleArray (used by the backfill tool)."""
+        return self._convert_bars_to_array(self._get_history_json(resolution, from_ms, to_ms))
+
+    def _get_history_json(self, resolution: str, from_ms: int, to_ms: int) -> dict:
         url = f"{self.base_url}/trade/history"
         params = {
             "routeId": self.instrument.info_route_id,
@@ -211,11 +260,32 @@ class TradeLockerBroker(BaseBroker):
             "tradableInstrumentId": self.instrument.tradable_id,
         }
 
-        r = requests.get(url, headers=self.get_auth_headers(), params=params)
+        r = self._http("GET", url, headers=self.get_auth_headers(), params=params)
         if r.status_code != 200:
             raise RuntimeError(f"Failed to fetch candles: {r.text}")
 
-        return self._convert_bars_to_candles(r.json())
+        return r.json()
+
+    @staticmethod
+    def _extract_bars(data: dict) -> list:
+        if "barDetails" in data:
+            return data["barDetails"]
+        if "d" in data and "barDetails" in data["d"]:
+            return data["d"]["barDetails"]
+        raise RuntimeError(f"Invalid TL candle schema: {data}")
+
+    def _convert_bars_to_array(self, data: dict) -> CandleArray:
+        bars = self._extract_bars(data)
+        if not bars:
+            return CandleArray.empty()
+        return CandleArray(
+            timestamp=np.array([bar["t"] for bar in bars], dtype=np.int64),
+            open=np.array([bar["o"] for bar in bars], dtype=np.float64),
+            high=np.array([bar["h"] for bar in bars], dtype=np.float64),
+            low=np.array([bar["l"] for bar in bars], dtype=np.float64),
+            close=np.array([bar["c"] for bar in bars], dtype=np.float64),
+            volume=np.array([bar.get("v", 0) for bar in bars], dtype=np.float64),
+        )
 
     def _convert_bars_to_candles(self, data: dict) -> List[Candle]:
         bars = []
@@ -267,7 +337,7 @@ class TradeLockerBroker(BaseBroker):
 
         headers = self.get_auth_headers()
 
-        r = requests.get(url, headers=headers, params=params)
+        r = self._http("GET", url, headers=headers, params=params)
         if r.status_code != 200:
             raise RuntimeError(f"Failed to fetch quotes: {r.text}")
 
@@ -333,7 +403,7 @@ class TradeLockerBroker(BaseBroker):
         if bid < entry_price: return ''     # if the immediate price has already gone below our entry_price, we do not buy, return a falsy value
 
         # --- HTTP Request ---
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._http("POST", url, json=payload, headers=headers)
 
         if r.status_code != 200:
             raise RuntimeError(
@@ -391,7 +461,7 @@ class TradeLockerBroker(BaseBroker):
         pending_positions = self.get_all_pending_positions()
         
         url: str = f"{self.base_url}/trade/accounts/{self.account_id}/state"
-        r = requests.get(url, headers=headers)
+        r = self._http("GET", url, headers=headers)
         json: dict = r.json()
         
         keys = self.api_mappings.account_status
@@ -409,7 +479,7 @@ class TradeLockerBroker(BaseBroker):
         }
         
         url: str = f"{self.base_url}/trade/accounts/{self.account_id}/ordersHistory"
-        r = requests.get(url, params=params, headers=headers)
+        r = self._http("GET", url, params=params, headers=headers)
         json: dict = r.json()
         keys = self.api_mappings.orders_history_mappings
         
@@ -446,7 +516,7 @@ class TradeLockerBroker(BaseBroker):
         headers['accountId'] = self.account_id
         headers['tradableInstrumentId'] = str(self.instrument.tradable_id)
         url: str = f"{self.base_url}/trade/accounts/{self.account_id}/orders"
-        r = requests.get(url, headers=headers)
+        r = self._http("GET", url, headers=headers)
         keys = self.api_mappings.orders_mappings
         json: dict = r.json()
         if r.status_code != 200:
@@ -462,7 +532,7 @@ class TradeLockerBroker(BaseBroker):
         headers['accountId'] = self.account_id
         headers['tradableInstrumentId'] = str(self.instrument.tradable_id)
         url: str = f"{self.base_url}/trade/accounts/{self.account_id}/orders"
-        r = requests.delete(url, headers=headers)
+        r = self._http("DELETE", url, headers=headers)
         r.status_code
 
 
@@ -472,12 +542,12 @@ class TradeLockerBroker(BaseBroker):
         headers["tradableInstrumentId"] = str(self.instrument.tradable_id)
 
         url = f"{self.base_url}/trade/accounts/{self.account_id}/positions"
-        requests.delete(url, headers=headers)
+        self._http("DELETE", url, headers=headers)
 
         while True:
             time.sleep(2)
 
-            r = requests.get(url, headers=headers)
+            r = self._http("GET", url, headers=headers)
             json_data = r.json()
             positions = json_data["d"]["positions"]
 
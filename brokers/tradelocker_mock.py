@@ -0,0 +1,507 @@
+"""
+tradelocker_mock.py
+-------------------
+Local stand-in for the TradeLocker REST endpoints TradeLockerBroker uses,
+with injectable latency, errors and rate limiting.
+
+    bars = PricePathGenerator(seed=7).gbm(1_440)
+    with MockTradeLockerServer(bars, clock=SimulatedClock(start)) as server:
+        broker = TradeLockerBroker(email="bench", password="bench", server="MOCK", base_url=server.url)
+        server.faults = Faults(latency_ms=40, jitter_ms=20, error_rate=0.01)
+        ...
+        server.calls            # Counter: {"GET /trade/quotes": 12, ...}
+
+Served routes:
+
+    GET    /ping
+    POST   /auth/jwt/token                      GET  /auth/jwt/all-accounts
+    GET    /trade/config                        GET  /trade/accounts/{id}/instruments
+    GET    /trade/history                       GET  /trade/quotes
+    GET    /trade/accounts/{id}/state
+    GET    /trade/accounts/{id}/orders          POST /trade/accounts/{id}/orders
+    DELETE /trade/accounts/{id}/orders          GET  /trade/accounts/{id}/ordersHistory
+    GET    /trade/accounts/{id}/positions       DELETE /trade/accounts/{id}/positions
+
+Payloads have TradeLocker's shapes: orders, history rows, positions and
+account details are positional lists whose column ids come from
+/trade/config (optionally in a shuffled order, to exercise the client's
+mapping).
+
+The market is a replay of `bars` on `clock`: a bar exists once it has
+closed, bid is the last close and ask adds `spread_pips`. Before every
+request the account catches up with the bars closed since the last one:
+working limit buys fill when a bar trades through their price, and every
+open position whose take-profit the bar reaches closes at the TP.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from data.constants.forex_instruments import ForexInstruments
+from models.candle_array import CandleArray
+from utils.clock import Clock
+from utils.time import dt_to_ms
+
+
+ACCOUNT_ID = "1001"
+TRADABLE_ID = 278
+INFO_ROUTE_ID = 452
+TRADE_ROUTE_ID = 451
+
+ORDER_COLUMNS = [
+    "id", "tradableInstrumentId", "routeId", "qty", "side", "type", "status", "filledQty", "avgPrice",
+    "price", "stopPrice", "validity", "expireDate", "createdDate", "lastModified", "isOpen", "positionId",
+    "stopLoss", "stopLossType", "takeProfit", "takeProfitType", "strategyId",
+]
+POSITION_COLUMNS = [
+    "id", "tradableInstrumentId", "routeId", "side", "qty", "avgPrice", "stopLossId", "takeProfitId",
+    "openDate", "unrealizedPl", "strategyId",
+]
+ACCOUNT_COLUMNS = [
+    "balance", "projectedBalance", "availableFunds", "blockedBalance", "cashBalance", "unsettledCash",
+    "withdrawalAvailable", "stocksValue", "optionValue", "initialMarginReq", "maintMarginReq",
+    "marginWarningLevel", "blockedForStocks", "stockOrdersReq", "stopOutLevel", "warningMarginReq",
+    "marginBeforeWarning", "todayGross", "todayNet", "todayFees", "todayVolume", "todayTradesCount",
+    "openGrossPnL", "openNetPnL", "positionsCount", "ordersCount",
+]
+
+
+@dataclass
+class Faults:
+    """What the server does to every request (all off by default)."""
+    latency_ms: float = 0.0             # fixed delay before answering
+    jitter_ms: float = 0.0              # plus a uniform delay in [0, jitter_ms]
+    error_rate: float = 0.0             # share of requests answered 500
+    rate_limit_rps: Optional[float] = None   # token bucket over all requests, refilled on the
+                                             # server's clock; requests without a token get 429
+    rate_limit_burst: int = 10
+    seed: int = 0
+
+
+@dataclass
+class MockOrder:
+    id: str
+    side: str
+    qty: float
+    price: float
+    created_ms: int
+    status: str = "New"                 # New → Filled / Cancelled
+    type: str = "limit"
+    take_profit: Optional[float] = None
+    strategy_id: Optional[str] = None
+    position_id: Optional[str] = None
+    avg_price: Optional[float] = None
+    modified_ms: int = 0
+
+
+@dataclass
+class MockPosition:
+    id: str
+    qty: float
+    price: float
+    open_ms: int
+    take_profit: Optional[float] = None
+    strategy_id: Optional[str] = None
+
+
+@dataclass
+class MockAccount:
+    """Order and position state of the single mocked account."""
+    balance: float
+    orders: List[MockOrder] = field(default_factory=list)          # working orders
+    history: List[MockOrder] = field(default_factory=list)         # filled / cancelled, creation order
+    positions: Dict[str, MockPosition] = field(default_factory=dict)
+    next_id: int = 7_000_000_000
+
+    def new_id(self) -> str:
+        self.next_id += 1
+        return str(self.next_id)
+
+
+class MockTradeLocker:
+    """Request-independent core: market replay, account state and the JSON bodies."""
+
+    def __init__(
+        self,
+        bars: CandleArray,
+        clock: Clock,
+        symbol: str = "EURUSD",
+        initial_balance: float = 10_000.0,
+        spread_pips: float = 0.2,
+        shuffle_columns: Optional[int] = None,
+    ):
+        self.instrument = getattr(ForexInstruments, symbol)
+        self.bars = bars
+        self.close_ms = bars.timestamp + 60_000
+        self.clock = clock
+        self.spread_pips = spread_pips
+        self.account = MockAccount(balance=initial_balance)
+        self._fed = 0
+
+        self.columns = {
+            "orders": list(ORDER_COLUMNS),
+            "positions": list(POSITION_COLUMNS),
+            "account": list(ACCOUNT_COLUMNS),
+        }
+        if shuffle_columns is not None:
+            rng = random.Random(shuffle_columns)
+            for columns in self.columns.values():
+                rng.shuffle(columns)
+
+    # ----------------------------------------------------------------------
+    # Market
+    # ----------------------------------------------------------------------
+    def now_ms(self) -> int:
+        return dt_to_ms(self.clock.now())
+
+    def closed_bars(self) -> int:
+        return int(np.searchsorted(self.close_ms, self.now_ms(), side="right"))
+
+    def bid_ask(self) -> tuple[float, float]:
+        n = self.closed_bars()
+        if n == 0:
+            raise LookupError("no bar has closed yet")
+        bid = float(self.bars.close[n - 1])
+        return bid, self.instrument.round_price(bid + self.spread_pips * self.instrument.pip_size)
+
+    def sync(self) -> None:
+        """Fill orders and take profits on every bar closed since the last request."""
+        closed = self.closed_bars()
+        account = self.account
+        for i in range(self._fed, closed):
+            low, high = float(self.bars.low[i]), float(self.bars.high[i])
+            bar_ms = int(self.bars.timestamp[i])
+            for order in [o for o in account.orders if low <= o.price <= high]:
+                account.orders.remove(order)
+                order.status, order.avg_price, order.modified_ms = "Filled", order.price, bar_ms
+                order.position_id = account.new_id()
+                account.history.append(order)
+                account.positions[order.position_id] = MockPosition(
+                    order.position_id, order.qty, order.price, bar_ms, order.take_profit, order.strategy_id,
+                )
+            for position in list(account.positions.values()):
+                if position.take_profit is not None and high >= position.take_profit:
+                    self.close_position(position, position.take_profit, bar_ms)
+        self._fed = max(self._fed, closed)
+
+    def close_position(self, position: MockPosition, price: float, at_ms: int) -> None:
+        account = self.account
+        del account.positions[position.id]
+        account.history.append(MockOrder(
+            id=account.new_id(), side="sell", qty=position.qty, price=price, created_ms=at_ms, status="Filled",
+            type="market", position_id=position.id, avg_price=price, modified_ms=at_ms,
+        ))
+        account.balance += self.pnl(position, price)
+
+    def pnl(self, position: MockPosition, price: float) -> float:
+        pips = (price - position.price) / self.instrument.pip_size
+        return round(pips * self.instrument.dollars_per_pip_per_lot * position.qty, 2)
+
+    # ----------------------------------------------------------------------
+    # Rows
+    # ----------------------------------------------------------------------
+    def order_row(self, o: MockOrder) -> list:
+        values = {
+            "id": o.id, "tradableInstrumentId": TRADABLE_ID, "routeId": TRADE_ROUTE_ID, "qty": o.qty,
+            "side": o.side, "type": o.type, "status": o.status,
+            "filledQty": o.qty if o.status == "Filled" else 0.0, "avgPrice": o.avg_price or 0.0,
+            "price": o.price, "stopPrice": None, "validity": "GTC", "expireDate": None,
+            "createdDate": o.created_ms, "lastModified": o.modified_ms or o.created_ms,
+            "isOpen": o.status == "New", "positionId": o.position_id, "stopLoss": None, "stopLossType": None,
+            "takeProfit": o.take_profit, "takeProfitType": "absolute" if o.take_profit else None,
+            "strategyId": o.strategy_id,
+        }
+        return [values[c] for c in self.columns["orders"]]
+
+    def position_row(self, p: MockPosition, bid: float) -> list:
+        values = {
+            "id": p.id, "tradableInstrumentId": TRADABLE_ID, "routeId": TRADE_ROUTE_ID, "side": "buy",
+            "qty": p.qty, "avgPrice": p.price, "stopLossId": None, "takeProfitId": None,
+            "openDate": p.open_ms, "unrealizedPl": self.pnl(p, bid), "strategyId": p.strategy_id,
+        }
+        return [values[c] for c in self.columns["positions"]]
+
+    def account_row(self) -> list:
+        account = self.account
+        bid, _ = self.bid_ask()
+        open_pnl = round(sum(self.pnl(p, bid) for p in account.positions.values()), 2)
+        values = dict.fromkeys(ACCOUNT_COLUMNS, 0.0)
+        values.update(
+            balance=round(account.balance, 2), projectedBalance=round(account.balance + open_pnl, 2),
+            availableFunds=round(account.balance + open_pnl, 2), cashBalance=round(account.balance, 2),
+            openGrossPnL=open_pnl, openNetPnL=open_pnl,
+            positionsCount=len(account.positions), ordersCount=len(account.orders),
+        )
+        return [values[c] for c in self.columns["account"]]
+
+    # ----------------------------------------------------------------------
+    # Endpoints: (status, body)
+    # ----------------------------------------------------------------------
+    def ping(self, query, body):
+        return 200, {"s": "ok"}
+
+    def token(self, query, body):
+        if not body.get("email") or not body.get("password"):
+            return 400, {"s": "error", "errmsg": "email and password are required"}
+        return 201, {"accessToken": "mock-access-token", "refreshToken": "mock-refresh-token",
+                     "expireDate": "2099-01-01T00:00:00.000Z"}
+
+    def accounts(self, query, body):
+        return 200, {"accounts": [{"id": ACCOUNT_ID, "name": "mock", "currency": "USD", "accNum": "2",
+                                   "accountBalance": f"{self.account.balance:.2f}", "status": "ACTIVE"}]}
+
+    def config(self, query, body):
+        def columns(ids):
+            return {"columns": [{"id": c, "description": c} for c in ids]}
+        return 200, {"s": "ok", "d": {
+            "ordersConfig": columns(self.columns["orders"]),
+            "ordersHistoryConfig": columns(self.columns["orders"]),
+            "filledOrdersConfig": columns(self.columns["orders"]),
+            "positionsConfig": columns(self.columns["positions"]),
+            "accountDetailsConfig": columns(self.columns["account"]),
+        }}
+
+    def instruments(self, query, body):
+        return 200, {"s": "ok", "d": {"instruments": [{
+            "tradableInstrumentId": TRADABLE_ID, "name": self.instrument.symbol, "type": "FOREX",
+            "routes": [{"id": INFO_ROUTE_ID, "type": "INFO"}, {"id": TRADE_ROUTE_ID, "type": "TRADE"}],
+        }]}}
+
+    def history(self, query, body):
+        if query.get("resolution", "1m") != "1m":
+            return 400, {"s": "error", "errmsg": "mock serves 1m bars only"}
+        lo = int(np.searchsorted(self.bars.timestamp, int(query["from"]), side="left"))
+        hi = min(int(np.searchsorted(self.bars.timestamp, int(query["to"]), side="right")), self.closed_bars())
+        b = self.bars
+        return 200, {"s": "ok", "d": {"barDetails": [
+            {"t": int(b.timestamp[i]), "o": float(b.open[i]), "h": float(b.high[i]),
+             "l": float(b.low[i]), "c": float(b.close[i]), "v": float(b.volume[i])}
+            for i in range(lo, max(lo, hi))
+        ]}}
+
+    def quotes(self, query, body):
+        bid, ask = self.bid_ask()
+        return 200, {"s": "ok", "d": {"bp": bid, "bs": 1_000_000, "ap": ask, "as": 1_000_000}}
+
+    def state(self, query, body):
+        return 200, {"s": "ok", "d": {"accountDetailsData": self.account_row()}}
+
+    def orders(self, query, body):
+        return 200, {"s": "ok", "d": {"orders": [self.order_row(o) for o in self.account.orders]}}
+
+    def place_order(self, query, body):
+        if body.get("type") != "limit" or body.get("side") != "buy":
+            return 400, {"s": "error", "errmsg": "mock accepts limit buys only"}
+        strategy_id = body.get("strategyId")
+        if strategy_id is not None and len(strategy_id) > 31:
+            return 400, {"s": "error", "errmsg": "strategyId is longer than 31 characters"}
+        order = MockOrder(
+            id=self.account.new_id(), side="buy", qty=float(body["qty"]), price=float(body["price"]),
+            created_ms=self.now_ms(), take_profit=body.get("takeProfit"), strategy_id=strategy_id,
+        )
+        self.account.orders.append(order)
+        return 200, {"s": "ok", "d": {"orderId": order.id}}
+
+    def cancel_orders(self, query, body):
+        now = self.now_ms()
+        for order in self.account.orders:
+            order.status, order.modified_ms = "Cancelled", now
+            self.account.history.append(order)
+        self.account.orders = []
+        return 200, {"s": "ok"}
+
+    def orders_history(self, query, body):
+        lo, hi = int(query.get("from", 0)), int(query.get("to", 2**62))
+        rows = [self.order_row(o) for o in self.account.history if lo <= o.created_ms <= hi]
+        return 200, {"s": "ok", "d": {"ordersHistory": rows, "hasMore": False}}
+
+    def positions(self, query, body):
+        bid, _ = self.bid_ask()
+        return 200, {"s": "ok", "d": {"positions": [self.position_row(p, bid) for p in self.account.positions.values()]}}
+
+    def close_positions(self, query, body):
+        bid, _ = self.bid_ask()
+        now = self.now_ms()
+        for position in list(self.account.positions.values()):
+            self.close_position(position, bid, now)
+        return 200, {"s": "ok"}
+
+
+_ACCOUNT = r"/trade/accounts/[^/]+"
+ROUTES = [
+    ("GET", r"/ping", "ping"),
+    ("POST", r"/auth/jwt/token", "token"),
+    ("GET", r"/auth/jwt/all-accounts", "accounts"),
+    ("GET", r"/trade/config", "config"),
+    ("GET", _ACCOUNT + r"/instruments", "instruments"),
+    ("GET", r"/trade/history", "history"),
+    ("GET", r"/trade/quotes", "quotes"),
+    ("GET", _ACCOUNT + r"/state", "state"),
+    ("GET", _ACCOUNT + r"/orders", "orders"),
+    ("POST", _ACCOUNT + r"/orders", "place_order"),
+    ("DELETE", _ACCOUNT + r"/orders", "cancel_orders"),
+    ("GET", _ACCOUNT + r"/ordersHistory", "orders_history"),
+    ("GET", _ACCOUNT + r"/positions", "positions"),
+    ("DELETE", _ACCOUNT + r"/positions", "close_positions"),
+]
+# (method, compiled path, MockTradeLocker method, label used in `calls`)
+_ROUTES = [
+    (method, re.compile(pattern + "$"), name, f"{method} {pattern.replace(_ACCOUNT, '/trade/accounts/{id}')}")
+    for method, pattern, name in ROUTES
+]
+
+
+class MockTradeLockerServer:
+    """Serves a MockTradeLocker over HTTP on a background thread."""
+
+    def __init__(
+        self,
+        bars: CandleArray,
+        clock: Optional[Clock] = None,
+        faults: Optional[Faults] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        **mock_kwargs,
+    ):
+        self.mock = MockTradeLocker(bars, clock or Clock(), **mock_kwargs)
+        self.calls: Counter = Counter()
+        self.responses: Counter = Counter()       # by status code
+        self._lock = threading.Lock()
+        self.faults = faults or Faults()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> MockTradeLockerServer:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-tradelocker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> MockTradeLockerServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    @property
+    def faults(self) -> Faults:
+        return self._faults
+
+    @faults.setter
+    def faults(self, faults: Faults) -> None:
+        """Swap the fault profile; its random stream and rate-limit bucket start afresh."""
+        with self._lock:
+            self._faults = faults
+            self._rng = random.Random(faults.seed)
+            self._tokens = float(faults.rate_limit_burst)
+            self._refilled = self.mock.clock.monotonic()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.responses.clear()
+
+    # ----------------------------------------------------------------------
+    # Request handling
+    # ----------------------------------------------------------------------
+    def _fault(self) -> tuple[Optional[int], float]:
+        """(injected status or None, delay in seconds) for one request."""
+        f = self.faults
+        with self._lock:
+            delay = (f.latency_ms + self._rng.uniform(0.0, f.jitter_ms)) / 1000
+            if f.rate_limit_rps is not None:
+                now = self.mock.clock.monotonic()
+                self._tokens = min(f.rate_limit_burst, self._tokens + (now - self._refilled) * f.rate_limit_rps)
+                self._refilled = now
+                if self._tokens < 1:
+                    return 429, delay
+                self._tokens -= 1
+            if f.error_rate and self._rng.random() < f.error_rate:
+                return 500, delay
+        return None, delay
+
+    def handle(self, method: str, raw_path: str, body: dict) -> tuple[int, dict]:
+        parsed = urlparse(raw_path)
+        for route_method, pattern, name, label in _ROUTES:
+            if route_method == method and pattern.match(parsed.path):
+                break
+        else:
+            return 404, {"s": "error", "errmsg": f"no route for {method} {parsed.path}"}
+
+        with self._lock:
+            self.calls[label] += 1
+        status, delay = self._fault()
+        if delay:
+            time.sleep(delay)
+        if status == 429:
+            return 429, {"s": "error", "errmsg": "Too many requests"}
+        if status == 500:
+            return 500, {"s": "error", "errmsg": "Internal server error"}
+
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        with self._lock:
+            try:
+                self.mock.sync()
+                return getattr(self.mock, name)(query, body)
+            except LookupError as e:
+                return 503, {"s": "error", "errmsg": str(e)}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    body = {}
+                status, payload = server.handle(method, self.path, body)
+                with server._lock:
+                    server.responses[status] += 1
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def do_DELETE(self):
+                self._serve("DELETE")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
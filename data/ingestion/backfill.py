@@ -0,0 +1,306 @@
+"""
+backfill.py
+-----------
+Parallel, resumable historical candle backfill into the CandleStore.
+
+    store = CandleStore()
+    backfiller = Backfiller(OandaHistoryProvider(), store, max_workers=8, max_requests_per_second=10)
+    report = backfiller.run("EURUSD", "1m", datetime(2022, 1, 1, tzinfo=timezone.utc))
+
+How it works:
+  1. Work out which parts of [start, end) were never fetched (store coverage),
+     plus any holes inside fetched ranges (gap detection).
+  2. Split those ranges into windows that fit the provider's per-request bar limit.
+  3. Fetch windows concurrently under a shared token-bucket rate cap, retrying
+     failures with exponential backoff.
+  4. Write each finished window to the store as soon as it lands. The store
+     marks the window covered only after the bars are on disk, so a crashed or
+     interrupted run resumes exactly where it left off.
+
+Windows that still fail after all retries are reported (never silently dropped)
+and stay uncovered, so the next run picks them up again.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+import runtime_settings as rs
+from data.store.candle_store import CandleStore, Interval, merge_intervals
+from models.candle_array import CandleArray
+from utils.logging import print_info, print_warning
+from utils.time import dt_to_ms, resolution_to_ms
+
+
+# ----------------------------------------------------------------------
+# Window planning
+# ----------------------------------------------------------------------
+def plan_windows(start_ms: int, end_ms: int, resolution: str, max_bars: int) -> List[Interval]:
+    """
+    Split [start_ms, end_ms) into consecutive half-open windows of at most
+    `max_bars` bars each, aligned to bar boundaries.
+    """
+    if max_bars <= 0:
+        raise ValueError("max_bars must be positive.")
+    bar_ms = resolution_to_ms(resolution)
+    start_ms = (start_ms // bar_ms) * bar_ms
+    span = max_bars * bar_ms
+    return [(s, min(s + span, end_ms)) for s in range(start_ms, end_ms, span)]
+
+
+def last_closed_boundary(resolution: str, now: Optional[datetime] = None) -> int:
+    """Epoch ms of the open time of the bar currently forming (everything before it is closed)."""
+    bar_ms = resolution_to_ms(resolution)
+    now_ms = dt_to_ms(now or datetime.now(timezone.utc))
+    return (now_ms // bar_ms) * bar_ms
+
+
+# ----------------------------------------------------------------------
+# Rate limiting
+# ----------------------------------------------------------------------
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` acquisitions per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# ----------------------------------------------------------------------
+# Providers
+# ----------------------------------------------------------------------
+class HistoryProvider(ABC):
+    """
+    One source of historical bars. `fetch` returns closed bars with
+    start_ms <= timestamp < end_ms and raises on any failure (never returns
+    partial data silently).
+    """
+    name: str = ""
+    max_bars_per_request: int = 5000
+
+    @abstractmethod
+    def fetch(self, symbol: str, resolution: str, start_ms: int, end_ms: int) -> CandleArray:
+        pass
+
+
+class OandaHistoryProvider(HistoryProvider):
+    """OANDA v20 mid-price candles (max 5000 bars per request)."""
+
+    name = "oanda"
+    max_bars_per_request = 5000
+
+    GRANULARITIES = {"1m": "M1", "5m": "M5", "15m": "M15", "30m": "M30", "1H": "H1", "4H": "H4", "1D": "D"}
+
+    def __init__(self, api_key: str = rs.OANDA_API_KEY, base_url: str = "https://api-fxpractice.oanda.com/v3"):
+        self.api_key = api_key
+        self.base_url = base_url
+
+    @staticmethod
+    def oanda_symbol(symbol: str) -> str:
+        return symbol if "_" in symbol else f"{symbol[:3]}_{symbol[3:]}"
+
+    def fetch(self, symbol: str, resolution: str, start_ms: int, end_ms: int) -> CandleArray:
+        if not self.api_key:
+            raise RuntimeError("missing OANDA_API_KEY")
+        if resolution not in self.GRANULARITIES:
+            raise ValueError(f"Unsupported OANDA resolution: {resolution}")
+
+        url = f"{self.base_url}/instruments/{self.oanda_symbol(symbol)}/candles"
+        params = {
+            "from": pd.Timestamp(start_ms, unit="ms", tz="UTC").isoformat(),
+            "to": pd.Timestamp(end_ms, unit="ms", tz="UTC").isoformat(),
+            "granularity": self.GRANULARITIES[resolution],
+            "price": "M",
+        }
+        r = requests.get(url, headers={"Authorization": f"Bearer {self.api_key}"}, params=params, timeout=20)
+        r.raise_for_status()
+
+        candles = [c for c in r.json().get("candles", []) if c["complete"]]
+        if not candles:
+            return CandleArray.empty()
+
+        arr = CandleArray(
+            timestamp=pd.to_datetime([c["time"] for c in candles], utc=True).as_unit("ms").asi8,
+            open=np.array([float(c["mid"]["o"]) for c in candles]),
+            high=np.array([float(c["mid"]["h"]) for c in candles]),
+            low=np.array([float(c["mid"]["l"]) for c in candles]),
+            close=np.array([float(c["mid"]["c"]) for c in candles]),
+            volume=np.array([float(c["volume"]) for c in candles]),
+        )
+        return arr.between(start_ms, end_ms - 1)
+
+
+class TradeLockerHistoryProvider(HistoryProvider):
+    """TradeLocker /trade/history through an authenticated TradeLockerBroker."""
+
+    name = "tradelocker"
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.max_bars_per_request = broker.max_bars_per_request
+
+    def fetch(self, symbol: str, resolution: str, start_ms: int, end_ms: int) -> CandleArray:
+        arr = self.broker.fetch_history_window(resolution=resolution, from_ms=start_ms, to_ms=end_ms)
+        return arr.between(start_ms, end_ms - 1)
+
+
+# ----------------------------------------------------------------------
+# Backfill
+# ----------------------------------------------------------------------
+@dataclass
+class BackfillReport:
+    symbol: str
+    resolution: str
+    windows_planned: int = 0
+    windows_fetched: int = 0
+    bars_written: int = 0
+    gaps_refilled: int = 0
+    failed: List[Interval] = field(default_factory=list)
+    elapsed_sec: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.failed
+
+    def __str__(self) -> str:
+        return (
+            f"{self.symbol} {self.resolution} | windows {self.windows_fetched}/{self.windows_planned} | "
+            f"bars {self.bars_written} | gaps refilled {self.gaps_refilled} | "
+            f"failed {len(self.failed)} | {self.elapsed_sec:.1f}s"
+        )
+
+
+class Backfiller:
+    """Fetch missing history for one provider concurrently and checkpoint it into a CandleStore."""
+
+    def __init__(
+        self,
+        provider: HistoryProvider,
+        store: Optional[CandleStore],
+        max_workers: int = 8,
+        max_requests_per_second: float = 10.0,
+        retries: int = 3,
+        backoff_sec: float = 1.0,
+        burst: int = 1,
+    ):
+        """
+        `store` may be None when only fetch_windows is used; run() checkpoints
+        into it and needs one. `burst` requests may go out back to back before
+        the `max_requests_per_second` cap applies.
+        """
+        self.provider = provider
+        self.store = store
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(max_requests_per_second, burst=burst)
+        self.retries = retries
+        self.backoff_sec = backoff_sec
+
+    def _fetch_with_retry(self, symbol: str, resolution: str, window: Interval) -> CandleArray:
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                return self.provider.fetch(symbol, resolution, *window)
+            except Exception:
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                time.sleep(self.backoff_sec * 2 ** (attempt - 1))
+
+    def fetch_windows(self, symbol: str, resolution: str, windows: List[Interval], on_window=None) -> List[Interval]:
+        """
+        Fetch windows concurrently. `on_window(window, bars)` runs on the calling
+        thread as each window completes. Returns the windows that failed.
+        """
+        failed: List[Interval] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._fetch_with_retry, symbol, resolution, w): w for w in windows}
+            for future in as_completed(futures):
+                window = futures[future]
+                try:
+                    bars = future.result()
+                except Exception as e:
+                    print_warning(f"backfill {self.provider.name} {symbol} {resolution} window {window} failed: {e}")
+                    failed.append(window)
+                    continue
+                if on_window is not None:
+                    on_window(window, bars)
+        return sorted(failed)
+
+    def run(
+        self,
+        symbol: str,
+        resolution: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        refill_gaps: bool = True,
+    ) -> BackfillReport:
+        """Backfill [start, end) (end defaults to the last closed bar) into the store."""
+        if self.store is None:
+            raise RuntimeError("Backfiller.run needs a CandleStore to checkpoint into; use fetch_windows without one.")
+        t0 = time.monotonic()
+        report = BackfillReport(symbol=symbol, resolution=resolution)
+
+        start_ms = dt_to_ms(start)
+        end_ms = min(dt_to_ms(end), last_closed_boundary(resolution)) if end else last_closed_boundary(resolution)
+        if end_ms <= start_ms:
+            return report
+
+        ranges = self.store.missing_ranges(symbol, resolution, start_ms, end_ms)
+        gaps: List[Interval] = []
+        if refill_gaps:
+            gaps = self.store.find_gaps(symbol, resolution, start_ms, end_ms)
+        ranges = merge_intervals(ranges + gaps)
+
+        windows: List[Interval] = []
+        for r_start, r_end in ranges:
+            windows.extend(plan_windows(r_start, r_end, resolution, self.provider.max_bars_per_request))
+        report.windows_planned = len(windows)
+        if not windows:
+            report.elapsed_sec = time.monotonic() - t0
+            return report
+
+        print_info(f"backfill {self.provider.name} {symbol} {resolution}: {len(windows)} windows, {len(gaps)} gaps")
+
+        def checkpoint(window: Interval, bars: CandleArray) -> None:
+            self.store.write(symbol, resolution, bars, covered=window)
+            report.windows_fetched += 1
+            report.bars_written += len(bars)
+
+        report.failed = self.fetch_windows(symbol, resolution, windows, on_window=checkpoint)
+
+        if gaps:
+            refetched = [g for g in gaps if not any(f[0] < g[1] and g[0] < f[1] for f in report.failed)]
+            self.store.mark_gaps_checked(symbol, resolution, refetched)
+            report.gaps_refilled = len(refetched)
+
+        report.elapsed_sec = time.monotonic() - t0
+        print_info(f"backfill done: {report}")
+        return report
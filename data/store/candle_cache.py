@@ -0,0 +1,115 @@
+"""
+candle_cache.py
+---------------
+Read-through cache in front of a history provider, backed by the CandleStore.
+
+Closed bars are persisted keyed by (symbol, resolution, timestamp); a request
+only goes to the API for the parts of the range the store has never covered
+(normally just the newest bar or two) plus the still-forming bar if asked for.
+
+    cache = CandleCache(CandleStore(), provider_factory=lambda: TradeLockerHistoryProvider(broker))
+    bars = cache.get_range("EURUSD", "1m", from_ms, to_ms)
+
+The provider is created lazily, so a fully cached range never needs
+credentials or a network connection.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from data.ingestion.backfill import HistoryProvider, last_closed_boundary, plan_windows
+from data.store.candle_store import CandleStore, Interval, in_weekend_closure
+from models.candle_array import CandleArray
+from utils.time import resolution_to_ms
+
+
+class CandleCache:
+
+    def __init__(
+        self,
+        store: CandleStore,
+        provider_factory: Optional[Callable[[], HistoryProvider]] = None,
+    ):
+        """
+        Args:
+            store: where closed bars are persisted.
+            provider_factory: builds the upstream provider on first miss. None = offline.
+
+        The newest closed bars are only marked as cached up to the last one the
+        provider actually returned, so bars that are late to appear in the API
+        (or a slow, empty response) are re-requested next time. Only a tail
+        inside the FX weekend closure is marked covered without bars.
+        """
+        self.store = store
+        self.provider_factory = provider_factory
+        self._provider: Optional[HistoryProvider] = None
+        self.requests_made = 0
+
+    @property
+    def provider(self) -> HistoryProvider:
+        if self._provider is None:
+            if self.provider_factory is None:
+                raise RuntimeError("CandleCache is offline and the requested range is not cached.")
+            self._provider = self.provider_factory()
+        return self._provider
+
+    def _fetch(self, symbol: str, resolution: str, start_ms: int, end_ms: int) -> CandleArray:
+        self.requests_made += 1
+        return self.provider.fetch(symbol, resolution, start_ms, end_ms)
+
+    def get_range(
+        self,
+        symbol: str,
+        resolution: str,
+        from_ms: int,
+        to_ms: int,
+        now: Optional[datetime] = None,
+        offline: bool = False,
+    ) -> CandleArray:
+        """
+        Bars with from_ms <= timestamp <= to_ms. Closed bars come from (and go
+        into) the store; the forming bar, if inside the range, is fetched live
+        and never persisted. With `offline=True` only the store is consulted.
+        """
+        bar_ms = resolution_to_ms(resolution)
+        closed_end = last_closed_boundary(resolution, now)
+        from_ms = -(-from_ms // bar_ms) * bar_ms           # first bar open >= from_ms
+        cacheable_end = min((to_ms // bar_ms + 1) * bar_ms, closed_end)
+
+        missing: List[Interval] = []
+        if cacheable_end > from_ms:
+            missing = self.store.missing_ranges(symbol, resolution, from_ms, cacheable_end)
+        wants_forming = to_ms >= closed_end
+
+        if offline or (not missing and not wants_forming):
+            return self.store.read(symbol, resolution, from_ms, min(to_ms, cacheable_end - 1))
+
+        forming = CandleArray.empty()
+        max_bars = self.provider.max_bars_per_request
+        for m_start, m_end in missing:
+            windows = plan_windows(m_start, m_end, resolution, max_bars)
+            for i, (w_start, w_end) in enumerate(windows):
+                is_tail = m_end == closed_end and i == len(windows) - 1
+                fetch_end = to_ms + 1 if is_tail and wants_forming else w_end
+
+                bars = self._fetch(symbol, resolution, w_start, fetch_end)
+                closed = bars.between(w_start, w_end - 1)
+                if is_tail and wants_forming:
+                    forming = bars.between(closed_end, to_ms)
+                    wants_forming = False
+
+                covered_end = w_end
+                if is_tail:
+                    # don't cache "no bar" after the newest bar returned: it may just be late
+                    last_seen = int(closed.timestamp[-1]) + bar_ms if len(closed) else w_start
+                    if not in_weekend_closure(last_seen, w_end):
+                        covered_end = max(w_start, min(w_end, last_seen))
+                self.store.write(symbol, resolution, closed, covered=(w_start, covered_end) if covered_end > w_start else None)
+
+        if wants_forming:
+            forming = self._fetch(symbol, resolution, closed_end, to_ms + 1).between(closed_end, to_ms)
+
+        cached = self.store.read(symbol, resolution, from_ms, min(to_ms, cacheable_end - 1))
+        return CandleArray.concat([cached, forming])
@@ -0,0 +1,372 @@
+"""
+candle_store.py
+---------------
+On-disk store of closed OHLCV bars, partitioned by instrument / resolution / month.
+
+Layout:
+    <root>/<symbol>/<resolution>/<YYYY-MM>.parquet
+    <root>/<symbol>/<resolution>/_coverage.json
+
+`_coverage.json` records the time ranges that have been fully fetched from a
+provider (even if the market was closed and no bars came back), so callers can
+tell "no data because closed" apart from "never fetched". Partitions and the
+coverage file are written via replace_atomic, so a crash mid-write never
+leaves a half-written checkpoint behind.
+
+Writes read-modify-write a partition and the coverage file without a lock, so
+each series must have a single writer at a time (Backfiller checkpoints on its
+calling thread); concurrent readers are always safe.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.store.excursion_index import ExcursionIndex
+from data.store.resampler import ResampleCache, bucket_starts, resample
+from models.candle_array import CandleArray, OHLCV_COLUMNS
+from utils.files import replace_atomic
+from utils.time import resolution_to_ms
+
+
+DEFAULT_STORE_ROOT = Path("data/candles")
+
+Interval = Tuple[int, int]   # half-open [start_ms, end_ms)
+
+_DAY_MS = 86_400_000
+
+
+# ----------------------------------------------------------------------
+# Interval helpers
+# ----------------------------------------------------------------------
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(start: int, end: int, covered: List[Interval]) -> List[Interval]:
+    """Parts of [start, end) not covered by the (merged) `covered` intervals."""
+    missing: List[Interval] = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end <= cursor:
+            continue
+        if c_start >= end:
+            break
+        if c_start > cursor:
+            missing.append((cursor, c_start))
+        cursor = max(cursor, c_end)
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+def _origin_ms(session_offset: timedelta) -> int:
+    return int(session_offset.total_seconds() * 1000)
+
+
+def _weekday(ms: np.ndarray | int):
+    """Monday=0 .. Sunday=6 (1970-01-01 was a Thursday)."""
+    return (ms // _DAY_MS + 3) % 7
+
+
+# Friday 22:00 .. Sunday 21:00 UTC, from the week's Monday 00:00: closed both in and out of US DST
+_WEEKEND_CLOSE_MS = (4 * 24 + 22) * 3_600_000
+_WEEKEND_OPEN_MS = (6 * 24 + 21) * 3_600_000
+
+
+def in_weekend_closure(start_ms: int, end_ms: int) -> bool:
+    """Whether [start_ms, end_ms) lies inside one FX weekend closure, so no bars exist there."""
+    if end_ms <= start_ms:
+        return True
+    monday = start_ms - start_ms % _DAY_MS - int(_weekday(start_ms)) * _DAY_MS
+    return monday + _WEEKEND_CLOSE_MS <= start_ms and end_ms <= monday + _WEEKEND_OPEN_MS
+
+
+class CandleStore:
+    """Parquet-backed candle store keyed by (symbol, resolution, timestamp)."""
+
+    def __init__(self, root: str | Path = DEFAULT_STORE_ROOT):
+        self.root = Path(root)
+        # (symbol, base_resolution) -> in-memory base series + derived aggregates
+        self._resample_caches: dict[tuple[str, str, timedelta], ResampleCache] = {}
+
+    # ----------------------------------------------------------------------
+    # Paths
+    # ----------------------------------------------------------------------
+    def series_dir(self, symbol: str, resolution: str) -> Path:
+        return self.root / symbol / resolution
+
+    def _coverage_path(self, symbol: str, resolution: str) -> Path:
+        return self.series_dir(symbol, resolution) / "_coverage.json"
+
+    @staticmethod
+    def _month_keys(ms: np.ndarray) -> np.ndarray:
+        return ms.astype("datetime64[ms]").astype("datetime64[M]").astype(str)
+
+    @staticmethod
+    def _month_key(ms: int) -> str:
+        return str(np.datetime64(int(ms), "ms").astype("datetime64[M]"))
+
+    # ----------------------------------------------------------------------
+    # Bars
+    # ----------------------------------------------------------------------
+    def write(
+        self,
+        symbol: str,
+        resolution: str,
+        candles: CandleArray,
+        covered: Interval | None = None,
+    ) -> None:
+        """
+        Merge bars into their monthly partitions (newer values win on duplicate
+        timestamps), then mark `covered` as fetched. Coverage is only recorded
+        after the bars are durable, which is what makes backfills resumable.
+        """
+        series_dir = self.series_dir(symbol, resolution)
+        series_dir.mkdir(parents=True, exist_ok=True)
+
+        if len(candles):
+            months = self._month_keys(candles.timestamp)
+            for month in np.unique(months):
+                part = candles.take(months == month)
+                path = series_dir / f"{month}.parquet"
+                if path.exists():
+                    part = CandleArray.concat([self._read_partition(path), part])
+                part = part.sorted_unique()
+                table = self._to_table(part)
+                replace_atomic(path, lambda tmp: table.to_parquet(tmp, index=False))
+
+        if covered is not None:
+            self.mark_covered(symbol, resolution, *covered)
+
+        for (cached_symbol, base_resolution, _), cache in self._resample_caches.items():
+            if (cached_symbol, base_resolution) == (symbol, resolution):
+                cache.append(candles)
+
+    def _partitions(self, symbol: str, resolution: str, start_ms: int | None, end_ms: int | None) -> List[Path]:
+        """Month partitions that can hold bars between start_ms and end_ms, in time order."""
+        series_dir = self.series_dir(symbol, resolution)
+        if not series_dir.exists():
+            return []
+
+        first_month = self._month_key(start_ms) if start_ms is not None else None
+        last_month = self._month_key(end_ms) if end_ms is not None else None
+
+        paths: List[Path] = []
+        for path in sorted(series_dir.glob("*.parquet")):
+            month = path.stem
+            if first_month is not None and month < first_month:
+                continue
+            if last_month is not None and month > last_month:
+                continue
+            paths.append(path)
+        return paths
+
+    def read(
+        self,
+        symbol: str,
+        resolution: str,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+    ) -> CandleArray:
+        """Bars with start_ms <= timestamp <= end_ms (either bound optional)."""
+        parts = [self._read_partition(p) for p in self._partitions(symbol, resolution, start_ms, end_ms)]
+        arr = CandleArray.concat(parts)
+        lo = start_ms if start_ms is not None else np.iinfo(np.int64).min
+        hi = end_ms if end_ms is not None else np.iinfo(np.int64).max
+        return arr.between(lo, hi)
+
+    def iter_chunks(
+        self,
+        symbol: str,
+        resolution: str,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        chunk_rows: int = 50_000,
+    ) -> Iterator[CandleArray]:
+        """
+        Same bars as read(), as consecutive chunks of at most `chunk_rows`.
+        Only one month partition is held in memory at a time.
+        """
+        lo = start_ms if start_ms is not None else np.iinfo(np.int64).min
+        hi = end_ms if end_ms is not None else np.iinfo(np.int64).max
+        for path in self._partitions(symbol, resolution, start_ms, end_ms):
+            arr = self._read_partition(path).between(lo, hi)
+            for i in range(0, len(arr), chunk_rows):
+                yield arr.take(slice(i, i + chunk_rows))
+
+    def read_resampled(
+        self,
+        symbol: str,
+        resolution: str,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        base_resolution: str = "1m",
+        session_offset: timedelta = timedelta(0),
+    ) -> CandleArray:
+        """
+        Bars at `resolution` derived from the stored base series. The base
+        series is loaded once per store instance; aggregates are cached per
+        resolution and refreshed incrementally by `write()`, so repeated and
+        multi-timeframe reads are lookups rather than full regroupings.
+        Returned bars are those whose bucket starts in [start_ms, end_ms].
+        `session_offset` aligns the buckets as in resample() (e.g.
+        FX_ROLLOVER_OFFSET for 4H / 1D bars); each offset has its own cache.
+        """
+        key = (symbol, base_resolution, session_offset)
+        cache = self._resample_caches.get(key)
+        if cache is None:
+            cache = ResampleCache(self.read(symbol, base_resolution), base_resolution, session_offset)
+            self._resample_caches[key] = cache
+
+        agg = cache.get(resolution)
+        lo = start_ms if start_ms is not None else np.iinfo(np.int64).min
+        hi = end_ms if end_ms is not None else np.iinfo(np.int64).max
+        if start_ms is not None:
+            lo = int(bucket_starts(np.int64(start_ms), resolution_to_ms(resolution), _origin_ms(session_offset)))
+        return agg.between(lo, hi)
+
+    def iter_resampled_chunks(
+        self,
+        symbol: str,
+        resolution: str,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        chunk_rows: int = 50_000,
+        base_resolution: str = "1m",
+        session_offset: timedelta = timedelta(0),
+    ) -> Iterator[CandleArray]:
+        """
+        Same bars as read_resampled(), aggregated chunk by chunk while the
+        base series is streamed with iter_chunks(), so memory stays at one
+        base partition. The base rows of a chunk's last (possibly still
+        incomplete) bucket are carried into the next chunk.
+        """
+        if resolution == base_resolution:
+            yield from self.iter_chunks(symbol, resolution, start_ms, end_ms, chunk_rows)
+            return
+        if resolution_to_ms(resolution) < resolution_to_ms(base_resolution):
+            raise ValueError(f"Cannot derive {resolution} from {base_resolution} bars")
+
+        bar_ms = resolution_to_ms(resolution)
+        origin = _origin_ms(session_offset)
+        lo = int(bucket_starts(np.int64(start_ms), bar_ms, origin)) if start_ms is not None else None
+        hi = int(bucket_starts(np.int64(end_ms), bar_ms, origin)) + bar_ms - 1 if end_ms is not None else None
+        carry = CandleArray.empty()
+        for chunk in self.iter_chunks(symbol, base_resolution, lo, hi, chunk_rows):
+            base = CandleArray.concat([carry, chunk])
+            buckets = bucket_starts(base.timestamp, bar_ms, origin)
+            last = int(np.searchsorted(buckets, buckets[-1], side="left"))
+            carry = base.take(slice(last, None))
+            if last:
+                yield resample(base.take(slice(0, last)), resolution, session_offset)
+        if len(carry):
+            yield resample(carry, resolution, session_offset)
+
+    def excursion_index(self, symbol: str, resolution: str) -> ExcursionIndex:
+        """
+        Sparse-table index over the stored series, loaded from
+        `_excursion.npz` when it matches the stored bars, rebuilt otherwise.
+        """
+        bars = self.read(symbol, resolution)
+        path = self.series_dir(symbol, resolution) / "_excursion.npz"
+        if path.exists():
+            index = ExcursionIndex.load(path)
+            if index.matches(bars):
+                return index
+        index = ExcursionIndex.build(bars)
+        if len(bars):
+            index.save(path)
+        return index
+
+    @staticmethod
+    def _to_table(arr: CandleArray) -> pd.DataFrame:
+        return pd.DataFrame({"timestamp": arr.timestamp, **{c: getattr(arr, c) for c in OHLCV_COLUMNS}})
+
+    @staticmethod
+    def _read_partition(path: Path) -> CandleArray:
+        return CandleArray.from_frame(pd.read_parquet(path))
+
+    # ----------------------------------------------------------------------
+    # Coverage / gaps
+    # ----------------------------------------------------------------------
+    def _load_coverage(self, symbol: str, resolution: str) -> dict:
+        path = self._coverage_path(symbol, resolution)
+        if not path.exists():
+            return {"covered": [], "checked_gaps": []}
+        with open(path) as f:
+            data = json.load(f)
+        data.setdefault("covered", [])
+        data.setdefault("checked_gaps", [])
+        return data
+
+    def _save_coverage(self, symbol: str, resolution: str, data: dict) -> None:
+        path = self._coverage_path(symbol, resolution)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        replace_atomic(path, lambda tmp: tmp.write_text(json.dumps(data)))
+
+    def coverage(self, symbol: str, resolution: str) -> List[Interval]:
+        return [tuple(i) for i in self._load_coverage(symbol, resolution)["covered"]]
+
+    def mark_covered(self, symbol: str, resolution: str, start_ms: int, end_ms: int) -> None:
+        data = self._load_coverage(symbol, resolution)
+        data["covered"] = merge_intervals([tuple(i) for i in data["covered"]] + [(int(start_ms), int(end_ms))])
+        self._save_coverage(symbol, resolution, data)
+
+    def mark_gaps_checked(self, symbol: str, resolution: str, gaps: List[Interval]) -> None:
+        """Record gaps that were re-fetched, so genuine holes (holidays) are not refetched forever."""
+        data = self._load_coverage(symbol, resolution)
+        data["checked_gaps"] = merge_intervals([tuple(i) for i in data["checked_gaps"]] + [tuple(map(int, g)) for g in gaps])
+        self._save_coverage(symbol, resolution, data)
+
+    def missing_ranges(self, symbol: str, resolution: str, start_ms: int, end_ms: int) -> List[Interval]:
+        """Sub-ranges of [start_ms, end_ms) that were never fetched."""
+        return subtract_intervals(start_ms, end_ms, self.coverage(symbol, resolution))
+
+    def find_gaps(
+        self,
+        symbol: str,
+        resolution: str,
+        start_ms: int,
+        end_ms: int,
+        min_missing_bars: int = 5,
+        skip_weekends: bool = True,
+    ) -> List[Interval]:
+        """
+        Holes inside fetched ranges: runs of at least `min_missing_bars` absent
+        bars between two stored bars. FX weekend closures are ignored, as are
+        gaps that were already re-fetched once (see `mark_gaps_checked`).
+        """
+        bar_ms = resolution_to_ms(resolution)
+        ts = self.read(symbol, resolution, start_ms, end_ms - 1).timestamp
+        if len(ts) < 2:
+            return []
+
+        deltas = np.diff(ts)
+        idx = np.nonzero(deltas > (min_missing_bars + 1) * bar_ms - 1)[0]
+        gap_starts = ts[idx] + bar_ms
+        gap_ends = ts[idx + 1]
+
+        if skip_weekends:
+            start_day = _weekday(gap_starts)
+            end_day = _weekday(gap_ends)
+            weekend = np.isin(start_day, (4, 5)) & np.isin(end_day, (5, 6)) & (gap_ends - gap_starts < 3 * _DAY_MS)
+            gap_starts, gap_ends = gap_starts[~weekend], gap_ends[~weekend]
+
+        checked = [tuple(i) for i in self._load_coverage(symbol, resolution)["checked_gaps"]]
+        gaps = [(int(s), int(e)) for s, e in zip(gap_starts, gap_ends)]
+        return [g for g in gaps if subtract_intervals(g[0], g[1], checked)]
@@ -0,0 +1,190 @@
+"""
+excursion_index.py
+------------------
+Sparse tables over a candle series' highs and lows.
+
+    index = ExcursionIndex.build(bars)
+    index.max_high(i, j)               # highest high of bars i..j, O(1)
+    index.first_high_at_or_above(i, x) # first bar > i with high >= x, O(log n)
+    index.excursions(entry_rows, entry_prices, exit_rows)   # MFE / MAE table
+
+Level k of a table holds the extremum of every window of 2**k bars, so any
+range is covered by two overlapping power-of-two windows (range query) and a
+first-passage search descends the levels like a binary search. All query
+methods accept scalars or arrays.
+
+The index is built once per series and saved next to the candle store as
+`_excursion.npz` (see CandleStore.excursion_index) together with a
+fingerprint of the timestamps, highs and lows it was built from; a saved
+index is reused only while the series still has that fingerprint, so a bar
+rewritten in place (a corrected high or low) triggers a rebuild.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from models.candle_array import CandleArray
+from utils.files import replace_atomic
+from utils.fingerprint import fingerprint
+
+
+# ----------------------------------------------------------------------
+# Kernels
+# ----------------------------------------------------------------------
+def _build_table(values: np.ndarray, reduce) -> np.ndarray:
+    n = len(values)
+    levels = max(1, int(n).bit_length())
+    table = np.empty((levels, n), dtype=np.float64)
+    table[0] = values
+    for k in range(1, levels):
+        half = 1 << (k - 1)
+        width = n - (1 << k) + 1
+        table[k, :width] = reduce(table[k - 1, :width], table[k - 1, half:half + width])
+        table[k, width:] = table[k - 1, width:]   # windows running off the end: unused
+    return table
+
+
+@njit(cache=True)
+def _first_passage(table, starts, levels, above, out):
+    """
+    For each query q: first index p >= starts[q] where values[p] >= levels[q]
+    (above) or values[p] <= levels[q] (below); -1 if none.
+    """
+    n = table.shape[1]
+    top = table.shape[0] - 1
+    for q in range(starts.shape[0]):
+        pos = starts[q]
+        x = levels[q]
+        # skip whole 2**k windows that cannot contain a hit, largest first
+        for k in range(top, -1, -1):
+            width = 1 << k
+            if pos + width <= n:
+                v = table[k, pos]
+                if (above and v < x) or ((not above) and v > x):
+                    pos += width
+        out[q] = pos if pos < n else -1
+
+
+def _digest(bars: CandleArray) -> int:
+    return fingerprint(bars.timestamp, bars.high, bars.low)
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+@dataclass(slots=True)
+class ExcursionIndex:
+    timestamp: np.ndarray
+    high_table: np.ndarray   # (levels, n) running max over 2**k bars
+    low_table: np.ndarray    # (levels, n) running min over 2**k bars
+    digest: int | None = None   # utils.fingerprint of (timestamp, high, low); None: unknown
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @staticmethod
+    def build(bars: CandleArray) -> ExcursionIndex:
+        return ExcursionIndex(
+            timestamp=bars.timestamp,
+            high_table=_build_table(bars.high, np.maximum),
+            low_table=_build_table(bars.low, np.minimum),
+            digest=_digest(bars),
+        )
+
+    # ------------------------------------------------------------------
+    # Range extrema (inclusive i..j)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _range(table: np.ndarray, i, j, reduce):
+        i = np.asarray(i, dtype=np.int64)
+        j = np.asarray(j, dtype=np.int64)
+        if np.any(j < i):
+            raise ValueError("range end must be >= start")
+        k = np.floor(np.log2(j - i + 1)).astype(np.int64)
+        return reduce(table[k, i], table[k, j - (1 << k) + 1])
+
+    def max_high(self, i, j):
+        return self._range(self.high_table, i, j, np.maximum)
+
+    def min_low(self, i, j):
+        return self._range(self.low_table, i, j, np.minimum)
+
+    # ------------------------------------------------------------------
+    # First passage (strictly after bar i)
+    # ------------------------------------------------------------------
+    def _passage(self, table: np.ndarray, i, level, above: bool):
+        starts, levels = np.broadcast_arrays(np.asarray(i, dtype=np.int64) + 1, np.asarray(level, dtype=np.float64))
+        out = np.empty(starts.shape, dtype=np.int64)
+        _first_passage(table, starts.ravel().copy(), levels.ravel().copy(), above, out.reshape(-1))
+        return out if out.ndim else int(out)
+
+    def first_high_at_or_above(self, i, level):
+        """First bar after i whose high >= level (-1 if never)."""
+        return self._passage(self.high_table, i, level, above=True)
+
+    def first_low_at_or_below(self, i, level):
+        """First bar after i whose low <= level (-1 if never)."""
+        return self._passage(self.low_table, i, level, above=False)
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+    def excursions(self, entry_rows, entry_prices, exit_rows, side: str = "buy") -> pd.DataFrame:
+        """
+        Maximum favourable / adverse excursion (price units, both >= 0) of each
+        trade over the bars after entry up to and including its exit bar.
+        """
+        entry_rows = np.asarray(entry_rows, dtype=np.int64)
+        entry_prices = np.asarray(entry_prices, dtype=np.float64)
+        exit_rows = np.minimum(np.asarray(exit_rows, dtype=np.int64), len(self) - 1)
+        first = np.minimum(entry_rows + 1, exit_rows)
+
+        best_high = self.max_high(first, exit_rows)
+        worst_low = self.min_low(first, exit_rows)
+        if side == "buy":
+            mfe, mae = best_high - entry_prices, entry_prices - worst_low
+        elif side == "sell":
+            mfe, mae = entry_prices - worst_low, best_high - entry_prices
+        else:
+            raise ValueError(f"Unknown side: {side}")
+
+        return pd.DataFrame({
+            "entry_row": entry_rows,
+            "exit_row": exit_rows,
+            "mfe": np.maximum(mfe, 0.0),
+            "mae": np.maximum(mae, 0.0),
+        })
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def matches(self, bars: CandleArray) -> bool:
+        """True if this index was built from exactly these bar timestamps, highs and lows."""
+        return len(bars) == len(self) and self.digest is not None and _digest(bars) == self.digest
+
+    def save(self, path: str | Path) -> None:
+        digest = {} if self.digest is None else {"digest": np.uint64(self.digest)}
+
+        def write(tmp: Path) -> None:
+            # through a file object: np.savez would append ".npz" to a bare temp path
+            with open(tmp, "wb") as f:
+                np.savez(f, timestamp=self.timestamp, high_table=self.high_table, low_table=self.low_table, **digest)
+
+        replace_atomic(path, write)
+
+    @staticmethod
+    def load(path: str | Path) -> ExcursionIndex:
+        with np.load(path) as data:
+            return ExcursionIndex(
+                timestamp=data["timestamp"],
+                high_table=data["high_table"],
+                low_table=data["low_table"],
+                # indexes saved before the digest existed are never reused
+                digest=int(data["digest"]) if "digest" in data.files else None,
+            )
@@ -0,0 +1,114 @@
+"""
+resampler.py
+------------
+Derive higher-timeframe candles (5m, 15m, 1H, 4H, ...) from a base series.
+
+OHLCV aggregation per bucket: first open, max high, min low, last close,
+summed volume. Buckets are aligned to the UTC epoch by default; pass
+`session_offset=FX_ROLLOVER_OFFSET` to align 4H/1D bars to the 22:00 UTC FX
+rollover instead of midnight (fixed offset, not DST-adjusted). Buckets with no
+base bars (weekends, holidays) are simply absent.
+
+`ResampleCache` keeps one aggregate per resolution and, when new base bars
+arrive, recomputes only the buckets from the first changed bar onwards.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Dict
+
+import numpy as np
+
+from models.candle_array import CandleArray
+from utils.time import resolution_to_ms
+
+
+FX_ROLLOVER_OFFSET = timedelta(hours=22)
+
+
+def bucket_starts(timestamp: np.ndarray, bar_ms: int, origin_ms: int = 0) -> np.ndarray:
+    return ((timestamp - origin_ms) // bar_ms) * bar_ms + origin_ms
+
+
+def resample(arr: CandleArray, resolution: str, session_offset: timedelta = timedelta(0)) -> CandleArray:
+    """Aggregate a sorted base series into `resolution` bars."""
+    if len(arr) == 0:
+        return CandleArray.empty()
+
+    bar_ms = resolution_to_ms(resolution)
+    buckets = bucket_starts(arr.timestamp, bar_ms, int(session_offset.total_seconds() * 1000))
+
+    # start index of every bucket run (base is sorted, so buckets are monotonic)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(arr)] - 1
+
+    return CandleArray(
+        timestamp=buckets[starts],
+        open=arr.open[starts],
+        high=np.maximum.reduceat(arr.high, starts),
+        low=np.minimum.reduceat(arr.low, starts),
+        close=arr.close[ends],
+        volume=np.add.reduceat(arr.volume, starts),
+    )
+
+
+class ResampleCache:
+    """
+    Base series plus cached aggregates per resolution.
+
+        cache = ResampleCache(base_1m)
+        h1 = cache.get("1H")          # computed once
+        cache.append(new_1m_bars)     # only the touched 1H buckets are rebuilt
+        h1 = cache.get("1H")          # cache hit
+    """
+
+    def __init__(self, base: CandleArray, base_resolution: str = "1m", session_offset: timedelta = timedelta(0)):
+        self.base = base
+        self.base_resolution = base_resolution
+        self.session_offset = session_offset
+        self._origin_ms = int(session_offset.total_seconds() * 1000)
+        self._aggregates: Dict[str, CandleArray] = {}
+
+    def get(self, resolution: str) -> CandleArray:
+        if resolution == self.base_resolution:
+            return self.base
+        if resolution_to_ms(resolution) < resolution_to_ms(self.base_resolution):
+            raise ValueError(f"Cannot derive {resolution} from {self.base_resolution} bars")
+        agg = self._aggregates.get(resolution)
+        if agg is None:
+            agg = resample(self.base, resolution, self.session_offset)
+            self._aggregates[resolution] = agg
+        return agg
+
+    def cached_resolutions(self) -> list[str]:
+        return list(self._aggregates)
+
+    def append(self, new_bars: CandleArray) -> None:
+        """
+        Merge new (or corrected) base bars and incrementally refresh every
+        cached aggregate from the bucket containing the earliest new bar.
+        """
+        if len(new_bars) == 0:
+            return
+        new_bars = new_bars.sorted_unique()
+        first_new = int(new_bars.timestamp[0])
+
+        if len(self.base) == 0 or first_new > self.base.timestamp[-1]:
+            self.base = CandleArray.concat([self.base, new_bars])
+        else:
+            self.base = CandleArray.concat([self.base, new_bars]).sorted_unique()
+
+        for resolution, agg in self._aggregates.items():
+            bar_ms = resolution_to_ms(resolution)
+            dirty_from = int(bucket_starts(np.int64(first_new), bar_ms, self._origin_ms))
+            keep = np.searchsorted(agg.timestamp, dirty_from, side="left")
+            base_from = np.searchsorted(self.base.timestamp, dirty_from, side="left")
+            tail = resample(self.base.take(slice(base_from, None)), resolution, self.session_offset)
+            self._aggregates[resolution] = CandleArray.concat([agg.take(slice(0, keep)), tail])
+
+
+def resample_frame(df, resolution: str, session_offset: timedelta = timedelta(0)):
+    """DataFrame convenience wrapper around `resample` (keeps the OHLCV schema)."""
+    return resample(CandleArray.from_frame(df).sorted_unique(), resolution, session_offset).to_frame()
+
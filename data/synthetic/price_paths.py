@@ -0,0 +1,227 @@
+"""
+price_paths.py
+--------------
+Seedable synthetic 1m OHLCV paths for stress-testing ladders.
+
+    gen = PricePathGenerator(seed=7)
+    bars = gen.gbm(43_200)                            # one month of regime-switching GBM bars
+    bars = gen.bootstrap(real_bars, 43_200)           # block bootstrap of real bars
+    for bars in gen.paths(1_000, 43_200): ...         # independent paths, reproducible per seed
+
+Every generator returns a `CandleArray` (epoch-ms timestamps, float64
+prices), so paths can be written with CandleStore.write or fed candle by
+candle to the backtest broker.
+
+The work happens in log-price space with whole-array NumPy operations:
+
+- gbm: volatility regimes switch after geometric durations; close-to-close
+  returns are GBM increments and each bar's high / low is drawn from the
+  exact distribution of a Brownian bridge's maximum / minimum between its
+  open and close.
+- bootstrap: circular blocks of consecutive real bars are replayed as
+  (open gap, high, low, close relative to open) log offsets, so intrabar
+  shape, volume and short-range dependence come from the source series.
+- shocks (both): Poisson-timed gaps jump the open away from the previous
+  close, and trend shocks add a steady drift over a run of bars.
+
+Prices are snapped to `point_size` (1e-5 for EURUSD) unless it is None.
+Timestamps are consecutive bars with no weekend gaps.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from models.candle_array import CandleArray
+
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+
+
+@dataclass(frozen=True)
+class Regime:
+    name: str
+    annual_vol: float        # e.g. 0.08 for 8% annualised
+    annual_drift: float = 0.0
+    mean_bars: float = 1_440  # expected regime length in bars
+
+
+DEFAULT_REGIMES: tuple[Regime, ...] = (
+    Regime("calm", 0.04, mean_bars=2_880),
+    Regime("normal", 0.08, mean_bars=1_440),
+    Regime("volatile", 0.18, mean_bars=360),
+)
+
+
+@dataclass(frozen=True)
+class Shocks:
+    """Rates are expected events per 1 000 bars; sizes are mean pips (exponential)."""
+    gap_rate: float = 0.0
+    gap_pips: float = 10.0
+    trend_rate: float = 0.0
+    trend_pips: float = 30.0
+    trend_bars: int = 120
+    pip_size: float = 0.0001
+
+
+@dataclass
+class PricePathGenerator:
+    seed: int | np.random.SeedSequence | None = None
+    start_price: float = 1.10
+    start: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    bar_minutes: int = 1
+    regimes: Sequence[Regime] = DEFAULT_REGIMES
+    shocks: Shocks = field(default_factory=Shocks)
+    point_size: float | None = 0.00001
+    base_volume: float = 100.0
+    rng: np.random.Generator = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.rng = np.random.default_rng(self.seed)
+
+    # ------------------------------------------------------------------
+    # Building blocks
+    # ------------------------------------------------------------------
+    def regime_path(self, n_bars: int) -> np.ndarray:
+        """Regime index per bar: geometric durations, next regime drawn uniformly among the others."""
+        k = len(self.regimes)
+        states, lengths = [], []
+        state = int(self.rng.integers(k))
+        total = 0
+        while total < n_bars:
+            length = int(self.rng.geometric(1.0 / self.regimes[state].mean_bars))
+            states.append(state)
+            lengths.append(length)
+            total += length
+            if k > 1:
+                state = (state + int(self.rng.integers(1, k))) % k
+        return np.repeat(np.array(states, dtype=np.int8), lengths)[:n_bars]
+
+    def _shock_offsets(self, n_bars: int) -> tuple[np.ndarray, np.ndarray]:
+        """Extra log-return per bar: (on the open gap, on the bar body)."""
+        s = self.shocks
+        gap = np.zeros(n_bars)
+        body = np.zeros(n_bars)
+        log_pip = s.pip_size / self.start_price   # pips as log-returns near the start price
+
+        if s.gap_rate > 0:
+            hits = np.flatnonzero(self.rng.random(n_bars) < s.gap_rate / 1_000)
+            sizes = self.rng.exponential(s.gap_pips, len(hits)) * self.rng.choice((-1.0, 1.0), len(hits))
+            gap[hits] = sizes * log_pip
+
+        if s.trend_rate > 0 and s.trend_bars > 0:
+            hits = np.flatnonzero(self.rng.random(n_bars) < s.trend_rate / 1_000)
+            sizes = self.rng.exponential(s.trend_pips, len(hits)) * self.rng.choice((-1.0, 1.0), len(hits))
+            # spread each shock evenly over its bars via a difference array
+            steps = np.zeros(n_bars + 1)
+            np.add.at(steps, hits, sizes / s.trend_bars)
+            np.add.at(steps, np.minimum(hits + s.trend_bars, n_bars), -sizes / s.trend_bars)
+            body = np.cumsum(steps[:-1]) * log_pip
+        return gap, body
+
+    def _assemble(self, log_open_gap, log_high, log_low, log_close, volume, start_price) -> CandleArray:
+        """Bars from per-bar log offsets: gap vs previous close, and high / low / close vs open."""
+        n = len(log_close)
+        # log open_t = log close_{t-1} + gap_t ;  log close_t = log open_t + body_t
+        log_c = np.log(start_price) + np.cumsum(log_open_gap + log_close)
+        log_o = log_c - log_close
+        bars = CandleArray(
+            timestamp=self._timestamps(n),
+            open=np.exp(log_o),
+            high=np.exp(log_o + log_high),
+            low=np.exp(log_o + log_low),
+            close=np.exp(log_c),
+            volume=volume,
+        )
+        if self.point_size is not None:
+            for col in ("open", "high", "low", "close"):
+                setattr(bars, col, np.round(np.rint(getattr(bars, col) / self.point_size) * self.point_size, 10))
+        return bars
+
+    def _timestamps(self, n_bars: int) -> np.ndarray:
+        start_ms = int(self.start.timestamp() * 1000)
+        return start_ms + np.arange(n_bars, dtype=np.int64) * (self.bar_minutes * 60_000)
+
+    # ------------------------------------------------------------------
+    # Generators
+    # ------------------------------------------------------------------
+    def gbm(self, n_bars: int, start_price: float | None = None) -> CandleArray:
+        """Regime-switching GBM bars with Brownian-bridge highs / lows and optional shocks."""
+        if n_bars <= 0:
+            return CandleArray.empty()
+        dt = self.bar_minutes / MINUTES_PER_YEAR
+        regime = self.regime_path(n_bars)
+        vol = np.array([r.annual_vol for r in self.regimes])[regime]
+        drift = np.array([r.annual_drift for r in self.regimes])[regime]
+        sigma = vol * np.sqrt(dt)
+
+        body = (drift - 0.5 * vol**2) * dt + sigma * self.rng.standard_normal(n_bars)
+        gap, trend = self._shock_offsets(n_bars)
+        body += trend
+
+        # max / min of a Brownian bridge from 0 to `body` with variance sigma^2:
+        # (b ± sqrt(b^2 - 2 sigma^2 ln U)) / 2, U uniform on (0, 1]
+        spread = np.sqrt(body**2 - 2.0 * sigma**2 * np.log1p(-self.rng.random((2, n_bars))))
+        high = 0.5 * (body + spread[0])
+        low = 0.5 * (body - spread[1])
+
+        volume = np.rint(self.base_volume * (vol / vol.mean()) * self.rng.lognormal(0.0, 0.5, n_bars))
+        return self._assemble(gap, high, low, body, volume, start_price or self.start_price)
+
+    def bootstrap(
+        self,
+        source: CandleArray,
+        n_bars: int,
+        block_size: int = 60,
+        start_price: float | None = None,
+    ) -> CandleArray:
+        """Circular block bootstrap of a real bar series, plus optional shocks."""
+        if len(source) < 2:
+            raise ValueError("bootstrap needs at least two source bars")
+        if n_bars <= 0:
+            return CandleArray.empty()
+
+        log_o = np.log(source.open)
+        gaps = np.empty(len(source))
+        gaps[0] = 0.0
+        gaps[1:] = log_o[1:] - np.log(source.close[:-1])
+        highs = np.log(source.high) - log_o
+        lows = np.log(source.low) - log_o
+        bodies = np.log(source.close) - log_o
+
+        block_size = max(1, min(block_size, len(source)))
+        n_blocks = -(-n_bars // block_size)
+        starts = self.rng.integers(0, len(source), size=(n_blocks, 1))
+        idx = ((starts + np.arange(block_size)) % len(source)).ravel()[:n_bars]
+
+        gap, trend = self._shock_offsets(n_bars)
+        body = bodies[idx] + trend
+        high = np.maximum(highs[idx], np.maximum(body, 0.0))
+        low = np.minimum(lows[idx], np.minimum(body, 0.0))
+        return self._assemble(gaps[idx] + gap, high, low, body, source.volume[idx].copy(), start_price or self.start_price)
+
+    def paths(
+        self,
+        n_paths: int,
+        n_bars: int,
+        source: CandleArray | None = None,
+        block_size: int = 60,
+    ) -> Iterator[CandleArray]:
+        """
+        `n_paths` independent paths (bootstrap of `source` if given, else
+        GBM). Path i only depends on (seed, i), so a stress run can be split
+        across processes and reproduced path by path.
+        """
+        seed = self.seed
+        if isinstance(seed, np.random.SeedSequence):
+            # a fresh copy: spawn() advances the sequence it is called on
+            seed = np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size)
+        else:
+            seed = np.random.SeedSequence(seed)
+        for child in seed.spawn(n_paths):
+            gen = replace(self, seed=child)
+            yield gen.gbm(n_bars) if source is None else gen.bootstrap(source, n_bars, block_size)
@@ -0,0 +1,44 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from data.ingestion.backfill import HistoryProvider
+from models.candle_array import CandleArray
+
+MIN = 60_000
+
+
+def ms(dt: datetime) -> int:
+    return int(dt.timestamp() * 1000)
+
+
+def make_bars(start_ms: int, n: int, step_ms: int = MIN, price: float = 1.1) -> CandleArray:
+    """`n` bars every `step_ms` from `start_ms`, closes rising 0.1 pip a bar from `price`."""
+    ts = start_ms + np.arange(n, dtype=np.int64) * step_ms
+    closes = price + np.arange(n) * 1e-5
+    return CandleArray(timestamp=ts, open=closes, high=closes + 1e-4, low=closes - 1e-4, close=closes, volume=np.ones(n))
+
+
+class FakeProvider(HistoryProvider):
+    """
+    Serves a continuous 1m series and records every requested window.
+    `now` cuts the series off after its forming bar; `fail_windows` raise.
+    """
+    name = "fake"
+
+    def __init__(self, now: datetime | None = None, fail_windows=(), max_bars_per_request: int = 500):
+        self.now = now
+        self.fail_windows = set(fail_windows)
+        self.max_bars_per_request = max_bars_per_request
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch(self, symbol, resolution, start_ms, end_ms):
+        with self._lock:
+            self.calls.append((start_ms, end_ms))
+        if (start_ms, end_ms) in self.fail_windows:
+            raise RuntimeError("boom")
+        if self.now is not None:
+            end_ms = min(end_ms, (ms(self.now) // MIN + 1) * MIN)
+        return make_bars(start_ms, max(-(-(end_ms - start_ms) // MIN), 0))
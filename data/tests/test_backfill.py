@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from data.ingestion.backfill import Backfiller, RateLimiter, plan_windows
+from data.store.candle_store import CandleStore
+from data.tests.helpers import MIN, FakeProvider, ms
+
+START = datetime(2024, 1, 8, tzinfo=timezone.utc)   # a Monday
+END = START + timedelta(days=2)
+
+
+def test_plan_windows_respects_bar_limit():
+    start_ms = ms(START)
+    windows = plan_windows(start_ms, start_ms + 1234 * MIN, "1m", 500)
+    assert len(windows) == 3
+    assert all((e - s) // MIN <= 500 for s, e in windows)
+    assert windows[0][0] == start_ms and windows[-1][1] == start_ms + 1234 * MIN
+
+
+def test_rate_limiter_caps_throughput():
+    limiter = RateLimiter(rate=50, burst=1)
+    t0 = datetime.now()
+    for _ in range(11):
+        limiter.acquire()
+    assert (datetime.now() - t0).total_seconds() >= 0.18
+
+
+def test_backfill_fetches_everything_in_parallel(tmp_path):
+    store = CandleStore(tmp_path)
+    provider = FakeProvider()
+    report = Backfiller(provider, store, max_workers=4, max_requests_per_second=1000).run("EURUSD", "1m", START, END)
+
+    assert report.complete
+    assert report.windows_planned == report.windows_fetched == len(provider.calls)
+    assert len(store.read("EURUSD", "1m")) == 2 * 24 * 60
+
+
+def test_backfill_resumes_only_missing_windows(tmp_path):
+    store = CandleStore(tmp_path)
+    start_ms = ms(START)
+    bad = (start_ms + 500 * MIN, start_ms + 1000 * MIN)
+
+    first = Backfiller(FakeProvider(fail_windows=[bad]), store, max_requests_per_second=1000, retries=1, backoff_sec=0)
+    report = first.run("EURUSD", "1m", START, END)
+    assert report.failed == [bad]
+
+    # "crash" and resume: only the failed window is fetched again
+    provider = FakeProvider()
+    report = Backfiller(provider, store, max_requests_per_second=1000).run("EURUSD", "1m", START, END)
+    assert report.complete
+    assert provider.calls == [bad]
+    assert len(store.read("EURUSD", "1m")) == 2 * 24 * 60
+
+    # nothing left to do
+    again = FakeProvider()
+    Backfiller(again, store, max_requests_per_second=1000).run("EURUSD", "1m", START, END)
+    assert again.calls == []
+
+
+def test_backfill_refills_detected_gaps(tmp_path):
+    store = CandleStore(tmp_path)
+    start_ms = ms(START)
+    Backfiller(FakeProvider(), store, max_requests_per_second=1000).run("EURUSD", "1m", START, END)
+
+    # punch a hole into already-covered data
+    full = store.read("EURUSD", "1m")
+    keep = (full.timestamp < start_ms + 100 * MIN) | (full.timestamp >= start_ms + 200 * MIN)
+    for p in store.series_dir("EURUSD", "1m").glob("*.parquet"):
+        p.unlink()
+    store.write("EURUSD", "1m", full.take(keep))
+
+    provider = FakeProvider()
+    report = Backfiller(provider, store, max_requests_per_second=1000).run("EURUSD", "1m", START, END)
+    assert report.gaps_refilled == 1
+    assert provider.calls == [(start_ms + 100 * MIN, start_ms + 200 * MIN)]
+    assert len(store.read("EURUSD", "1m")) == 2 * 24 * 60
+
+
+def test_failed_gap_window_is_not_counted_as_refilled(tmp_path):
+    store = CandleStore(tmp_path)
+    start_ms = ms(START)
+    Backfiller(FakeProvider(), store, max_requests_per_second=1000).run("EURUSD", "1m", START, END)
+
+    full = store.read("EURUSD", "1m")
+    hole = (start_ms + 100 * MIN, start_ms + 200 * MIN)
+    for p in store.series_dir("EURUSD", "1m").glob("*.parquet"):
+        p.unlink()
+    store.write("EURUSD", "1m", full.take((full.timestamp < hole[0]) | (full.timestamp >= hole[1])))
+
+    provider = FakeProvider(fail_windows=[hole])
+    report = Backfiller(provider, store, max_requests_per_second=1000, retries=1, backoff_sec=0).run(
+        "EURUSD", "1m", START, END
+    )
+    assert report.failed == [hole]
+    assert report.gaps_refilled == 0
+
+
+def test_backfill_run_without_store_raises():
+    backfiller = Backfiller(FakeProvider(), store=None)
+    assert backfiller.limiter.capacity == 1
+    with pytest.raises(RuntimeError, match="CandleStore"):
+        backfiller.run("EURUSD", "1m", START, END)
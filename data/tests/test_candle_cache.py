@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from data.store.candle_cache import CandleCache
+from data.store.candle_store import CandleStore
+from data.tests.helpers import MIN, FakeProvider, ms
+
+NOW = datetime(2024, 1, 10, 12, 0, 30, tzinfo=timezone.utc)   # a Wednesday, mid-minute
+
+
+@pytest.fixture
+def provider():
+    return FakeProvider(now=NOW, max_bars_per_request=1000)
+
+
+def test_live_polling_shrinks_to_single_bar(tmp_path, provider):
+    cache = CandleCache(CandleStore(tmp_path), provider_factory=lambda: provider)
+
+    first = cache.get_range("EURUSD", "1m", ms(NOW - timedelta(minutes=70)), ms(NOW), now=NOW)
+    assert len(provider.calls) == 1
+    assert len(first) == 70   # 69 closed bars + the forming one
+
+    later = NOW + timedelta(minutes=1)
+    provider.now = later
+    second = cache.get_range("EURUSD", "1m", ms(later - timedelta(minutes=70)), ms(later), now=later)
+
+    assert len(provider.calls) == 2
+    start, end = provider.calls[-1]
+    # one request: the bar that just closed + the new forming bar
+    assert (end - start) <= 2 * MIN
+    assert second.timestamp[-1] == (ms(later) // MIN) * MIN
+    assert np.all(np.diff(second.timestamp) == MIN)
+
+
+def test_forming_bar_is_not_persisted(tmp_path, provider):
+    store = CandleStore(tmp_path)
+    cache = CandleCache(store, provider_factory=lambda: provider)
+    cache.get_range("EURUSD", "1m", ms(NOW - timedelta(minutes=10)), ms(NOW), now=NOW)
+
+    stored = store.read("EURUSD", "1m")
+    assert stored.timestamp[-1] < (ms(NOW) // MIN) * MIN
+
+
+def test_cached_history_runs_offline(tmp_path, provider):
+    store = CandleStore(tmp_path)
+    start, end = NOW - timedelta(days=1), NOW - timedelta(hours=1)
+    CandleCache(store, provider_factory=lambda: provider).get_range("EURUSD", "1m", ms(start), ms(end), now=NOW)
+
+    offline = CandleCache(store, provider_factory=None)
+    bars = offline.get_range("EURUSD", "1m", ms(start), ms(end), now=NOW)
+    assert len(bars) == 23 * 60
+    assert offline.requests_made == 0
+
+
+def test_only_gaps_are_fetched(tmp_path, provider):
+    store = CandleStore(tmp_path)
+    cache = CandleCache(store, provider_factory=lambda: provider)
+    base = NOW.replace(second=0) - timedelta(hours=5)
+    cache.get_range("EURUSD", "1m", ms(base), ms(base + timedelta(hours=1)), now=NOW)
+    cache.get_range("EURUSD", "1m", ms(base + timedelta(hours=2)), ms(base + timedelta(hours=3)), now=NOW)
+    provider.calls.clear()
+
+    bars = cache.get_range("EURUSD", "1m", ms(base), ms(base + timedelta(hours=3)), now=NOW)
+    assert provider.calls == [(ms(base + timedelta(hours=1)) + MIN, ms(base + timedelta(hours=2)))]
+    assert len(bars) == 3 * 60 + 1
+
+
+def test_lagging_provider_leaves_the_tail_uncovered(tmp_path, provider):
+    store = CandleStore(tmp_path)
+    cache = CandleCache(store, provider_factory=lambda: provider)
+    base = NOW.replace(second=0)
+    start, end = base - timedelta(hours=1), base - timedelta(minutes=1)
+
+    provider.now = base - timedelta(minutes=21)          # the API's newest bar is 20 minutes old
+    lagging = cache.get_range("EURUSD", "1m", ms(start), ms(end), now=NOW)
+    assert len(lagging) == 40
+    assert store.missing_ranges("EURUSD", "1m", ms(start), ms(base)) == [(ms(base) - 20 * MIN, ms(base))]
+
+    provider.now = NOW
+    caught_up = cache.get_range("EURUSD", "1m", ms(start), ms(end), now=NOW)
+    assert provider.calls[-1] == (ms(base) - 20 * MIN, ms(base))
+    assert len(caught_up) == 60 and np.all(np.diff(caught_up.timestamp) == MIN)
+
+
+def test_weekend_tail_is_covered_without_bars(tmp_path, provider):
+    store = CandleStore(tmp_path)
+    cache = CandleCache(store, provider_factory=lambda: provider)
+    friday_close = datetime(2024, 1, 12, 22, 0, tzinfo=timezone.utc)
+    saturday = friday_close + timedelta(hours=14)
+
+    provider.now = friday_close - timedelta(seconds=30)  # no bars after the Friday close
+    bars = cache.get_range("EURUSD", "1m", ms(friday_close - timedelta(hours=1)), ms(saturday) - 1, now=saturday)
+    assert bars.timestamp[-1] == ms(friday_close) - MIN
+    assert store.missing_ranges("EURUSD", "1m", ms(friday_close - timedelta(hours=1)), ms(saturday)) == []
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from data.store.candle_store import CandleStore, merge_intervals, subtract_intervals
+from data.tests.helpers import MIN, make_bars
+from models.candle_array import CandleArray
+
+
+# Monday 2024-01-08 00:00 UTC
+MONDAY_MS = int(pd.Timestamp("2024-01-08", tz="UTC").timestamp() * 1000)
+
+
+def test_interval_helpers():
+    assert merge_intervals([(5, 10), (0, 3), (3, 6)]) == [(0, 10)]
+    assert subtract_intervals(0, 20, [(2, 5), (10, 15)]) == [(0, 2), (5, 10), (15, 20)]
+    assert subtract_intervals(0, 10, [(0, 10)]) == []
+
+
+def test_write_read_roundtrip_and_dedup(tmp_path):
+    store = CandleStore(tmp_path)
+    bars = make_bars(MONDAY_MS, 100)
+    store.write("EURUSD", "1m", bars)
+
+    # overlapping rewrite: newer values win, no duplicates
+    newer = make_bars(MONDAY_MS + 50 * MIN, 100, price=1.2)
+    store.write("EURUSD", "1m", newer)
+
+    out = store.read("EURUSD", "1m")
+    assert len(out) == 150
+    assert np.all(np.diff(out.timestamp) > 0)
+    assert out.close[50] == newer.close[0]
+
+    sliced = store.read("EURUSD", "1m", MONDAY_MS + 10 * MIN, MONDAY_MS + 19 * MIN)
+    assert len(sliced) == 10
+
+
+def test_write_across_month_boundary(tmp_path):
+    store = CandleStore(tmp_path)
+    start = int(pd.Timestamp("2024-01-31 23:00", tz="UTC").timestamp() * 1000)
+    store.write("EURUSD", "1m", make_bars(start, 120))
+    files = sorted(p.name for p in store.series_dir("EURUSD", "1m").glob("*.parquet"))
+    assert files == ["2024-01.parquet", "2024-02.parquet"]
+    assert len(store.read("EURUSD", "1m")) == 120
+
+
+def test_coverage_and_missing_ranges(tmp_path):
+    store = CandleStore(tmp_path)
+    store.write("EURUSD", "1m", make_bars(MONDAY_MS, 10), covered=(MONDAY_MS, MONDAY_MS + 10 * MIN))
+    store.mark_covered("EURUSD", "1m", MONDAY_MS + 20 * MIN, MONDAY_MS + 30 * MIN)
+
+    missing = store.missing_ranges("EURUSD", "1m", MONDAY_MS, MONDAY_MS + 40 * MIN)
+    assert missing == [(MONDAY_MS + 10 * MIN, MONDAY_MS + 20 * MIN), (MONDAY_MS + 30 * MIN, MONDAY_MS + 40 * MIN)]
+
+
+def test_find_gaps_ignores_weekends_and_checked(tmp_path):
+    store = CandleStore(tmp_path)
+    # weekday hole of 30 bars
+    first = make_bars(MONDAY_MS, 60)
+    second = make_bars(MONDAY_MS + 90 * MIN, 60)
+    store.write("EURUSD", "1m", CandleArray.concat([first, second]))
+
+    gaps = store.find_gaps("EURUSD", "1m", MONDAY_MS, MONDAY_MS + 200 * MIN)
+    assert gaps == [(MONDAY_MS + 60 * MIN, MONDAY_MS + 90 * MIN)]
+
+    store.mark_gaps_checked("EURUSD", "1m", gaps)
+    assert store.find_gaps("EURUSD", "1m", MONDAY_MS, MONDAY_MS + 200 * MIN) == []
+
+    # Friday 21:00 -> Sunday 22:00 closure is not a gap
+    friday = MONDAY_MS + 4 * 86_400_000 + 20 * 3_600_000
+    sunday = MONDAY_MS + 6 * 86_400_000 + 22 * 3_600_000
+    store.write("GBPJPY", "1m", CandleArray.concat([make_bars(friday, 60), make_bars(sunday, 60)]))
+    assert store.find_gaps("GBPJPY", "1m", friday, sunday + 60 * MIN) == []
+
+
+def test_iter_chunks_matches_read(tmp_path):
+    store = CandleStore(tmp_path)
+    # spans a month boundary: 2024-01-31 .. 2024-02-01
+    start = int(pd.Timestamp("2024-01-31", tz="UTC").timestamp() * 1000)
+    store.write("EURUSD", "1m", make_bars(start, 2_000))
+
+    lo, hi = start + 100 * MIN, start + 1_900 * MIN
+    chunks = list(store.iter_chunks("EURUSD", "1m", lo, hi, chunk_rows=500))
+    assert max(len(c) for c in chunks) == 500
+    joined = CandleArray.concat(chunks)
+    np.testing.assert_array_equal(joined.timestamp, store.read("EURUSD", "1m", lo, hi).timestamp)
+    assert list(store.iter_chunks("GBPJPY", "1m")) == []
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from data.store.candle_store import CandleStore
+from data.store.excursion_index import ExcursionIndex
+from data.synthetic.price_paths import PricePathGenerator
+from models.candle_array import CandleArray
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 333])
+def test_range_extrema_match_brute_force(n):
+    bars = PricePathGenerator(seed=0).gbm(n)
+    index = ExcursionIndex.build(bars)
+    rng = np.random.default_rng(1)
+    i, j = np.sort(rng.integers(0, n, (2, 200)), axis=0)
+
+    np.testing.assert_array_equal(index.max_high(i, j), [bars.high[a:b + 1].max() for a, b in zip(i, j)])
+    np.testing.assert_array_equal(index.min_low(i, j), [bars.low[a:b + 1].min() for a, b in zip(i, j)])
+    assert index.max_high(0, n - 1) == bars.high.max()
+
+
+def test_first_passage_matches_linear_scan():
+    bars = PricePathGenerator(seed=0).gbm(500)
+    index = ExcursionIndex.build(bars)
+    rng = np.random.default_rng(2)
+    starts = rng.integers(0, 500, 300)
+    up = bars.close[starts] + rng.random(300) * 2e-3
+    down = bars.close[starts] - rng.random(300) * 2e-3
+
+    def scan(values, i, hit):
+        return next((p for p in range(i + 1, len(values)) if hit(values[p])), -1)
+
+    expected_up = [scan(bars.high, i, lambda v, x=x: v >= x) for i, x in zip(starts, up)]
+    expected_down = [scan(bars.low, i, lambda v, x=x: v <= x) for i, x in zip(starts, down)]
+    np.testing.assert_array_equal(index.first_high_at_or_above(starts, up), expected_up)
+    np.testing.assert_array_equal(index.first_low_at_or_below(starts, down), expected_down)
+    assert index.first_high_at_or_above(0, 10.0) == -1
+
+
+def test_excursions_buy_and_sell():
+    bars = PricePathGenerator(seed=0).gbm(50)
+    index = ExcursionIndex.build(bars)
+    entry, exit_ = np.array([3, 10]), np.array([8, 30])
+    price = bars.close[entry]
+
+    buy = index.excursions(entry, price, exit_)
+    assert buy.loc[0, "mfe"] == pytest.approx(max(bars.high[4:9].max() - price[0], 0))
+    assert buy.loc[1, "mae"] == pytest.approx(max(price[1] - bars.low[11:31].min(), 0))
+
+    sell = index.excursions(entry, price, exit_, side="sell")
+    assert sell.loc[0, "mae"] == pytest.approx(max(bars.high[4:9].max() - price[0], 0))
+
+
+def test_store_persists_and_rebuilds_on_change(tmp_path):
+    store = CandleStore(tmp_path)
+    bars = PricePathGenerator(seed=0).gbm(200)
+    store.write("EURUSD", "1m", bars.take(slice(0, 150)))
+
+    first = store.excursion_index("EURUSD", "1m")
+    assert (tmp_path / "EURUSD" / "1m" / "_excursion.npz").exists()
+    assert len(first) == 150
+    assert len(store.excursion_index("EURUSD", "1m")) == 150
+
+    store.write("EURUSD", "1m", bars.take(slice(150, 200)))
+    rebuilt = store.excursion_index("EURUSD", "1m")
+    assert len(rebuilt) == 200
+    assert rebuilt.max_high(0, 199) == bars.high.max()
+
+
+def test_store_rebuilds_when_a_bar_is_corrected_in_place(tmp_path):
+    store = CandleStore(tmp_path)
+    bars = PricePathGenerator(seed=0).gbm(100)
+    store.write("EURUSD", "1m", bars)
+    assert store.excursion_index("EURUSD", "1m").max_high(0, 99) == bars.high.max()
+
+    # same timestamp, corrected high: CandleStore.write keeps the newer bar
+    peak = int(np.argmax(bars.high))
+    one = slice(peak, peak + 1)
+    fixed = CandleArray(
+        timestamp=bars.timestamp[one], open=bars.open[one], high=bars.high[one] + 0.01,
+        low=bars.low[one], close=bars.close[one], volume=bars.volume[one],
+    )
+    store.write("EURUSD", "1m", fixed)
+
+    index = store.excursion_index("EURUSD", "1m")
+    assert index.max_high(0, 99) == pytest.approx(bars.high[peak] + 0.01)
+    assert ExcursionIndex.load(tmp_path / "EURUSD" / "1m" / "_excursion.npz").matches(store.read("EURUSD", "1m"))
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from data.store.candle_store import CandleStore
+from data.synthetic.price_paths import PricePathGenerator, Regime, Shocks
+from data.tests.helpers import MIN
+from models.candle_array import CandleArray
+
+
+def assert_valid_bars(bars: CandleArray) -> None:
+    assert (bars.high >= np.maximum(bars.open, bars.close)).all()
+    assert (bars.low <= np.minimum(bars.open, bars.close)).all()
+    assert (np.diff(bars.timestamp) == MIN).all()
+    assert (bars.close > 0).all()
+
+
+def test_gbm_bars_are_valid_and_seeded():
+    a = PricePathGenerator(seed=5).gbm(20_000)
+    b = PricePathGenerator(seed=5).gbm(20_000)
+    assert len(a) == 20_000
+    assert_valid_bars(a)
+    np.testing.assert_array_equal(a.close, b.close)
+    # snapped to the 1e-5 point grid
+    np.testing.assert_allclose(a.close * 1e5, np.rint(a.close * 1e5), atol=1e-6)
+    assert not np.array_equal(a.close, PricePathGenerator(seed=6).gbm(20_000).close)
+
+
+def test_gbm_volatility_follows_the_regime():
+    gen = PricePathGenerator(seed=1, regimes=(Regime("only", 0.10),), point_size=None)
+    bars = gen.gbm(200_000)
+    returns = np.diff(np.log(bars.close))
+    assert returns.std() * np.sqrt(365 * 24 * 60) == pytest.approx(0.10, rel=0.02)
+    # open of each bar is the previous close when there are no gap shocks
+    np.testing.assert_allclose(bars.open[1:], bars.close[:-1])
+
+
+def test_regime_path_switches_between_regimes():
+    gen = PricePathGenerator(seed=2)
+    regimes = gen.regime_path(100_000)
+    assert set(np.unique(regimes)) == {0, 1, 2}
+    assert (regimes[1:] != regimes[:-1]).sum() > 10
+
+
+def test_shocks_add_gaps_and_trends():
+    shocks = Shocks(gap_rate=5.0, gap_pips=20.0, trend_rate=1.0, trend_pips=50.0, trend_bars=60)
+    bars = PricePathGenerator(seed=3, shocks=shocks, point_size=None).gbm(20_000)
+    assert_valid_bars(bars)
+    gaps = np.abs(bars.open[1:] - bars.close[:-1])
+    assert (gaps > 5 * 0.0001).sum() > 20
+
+
+def test_bootstrap_replays_blocks_of_source_bars():
+    source = PricePathGenerator(seed=4).gbm(5_000)
+    bars = PricePathGenerator(seed=9).bootstrap(source, 12_000, block_size=50, start_price=source.open[0])
+    assert len(bars) == 12_000
+    assert_valid_bars(bars)
+
+    src_body = np.round(np.log(source.close / source.open), 6)
+    body = np.round(np.log(bars.close / bars.open), 6)
+    # every bootstrapped bar body exists in the source (up to point rounding)
+    assert np.isin(body[:50], src_body).mean() > 0.9
+    assert set(bars.volume) <= set(source.volume)
+
+
+def test_paths_are_independent_and_reproducible(tmp_path):
+    gen = PricePathGenerator(seed=11)
+    first = [p.close[-1] for p in gen.paths(4, 1_000)]
+    again = [p.close[-1] for p in PricePathGenerator(seed=11).paths(4, 1_000)]
+    assert first == again
+    assert len(set(first)) == 4
+
+    store = CandleStore(tmp_path)
+    bars = next(PricePathGenerator(seed=11).paths(1, 3_000))
+    store.write("SYNTH", "1m", bars)
+    np.testing.assert_array_equal(store.read("SYNTH", "1m").close, bars.close)
+
+
+def test_paths_of_a_path_generator_are_reproducible():
+    child = PricePathGenerator(seed=np.random.SeedSequence(11).spawn(1)[0])
+    first = [p.close[-1] for p in child.paths(3, 500)]
+    assert [p.close[-1] for p in child.paths(3, 500)] == first
+    assert len(set(first)) == 3
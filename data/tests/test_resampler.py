@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.store.candle_store import CandleStore
+from data.store.resampler import FX_ROLLOVER_OFFSET, ResampleCache, resample
+from data.tests.helpers import MIN
+from models.candle_array import CandleArray
+
+START_MS = int(pd.Timestamp("2024-01-08", tz="UTC").timestamp() * 1000)
+
+
+def random_bars(n: int, start_ms: int = START_MS, seed: int = 0) -> CandleArray:
+    rng = np.random.default_rng(seed)
+    ts = start_ms + np.arange(n, dtype=np.int64) * MIN
+    ts = ts[rng.random(n) > 0.1]  # some missing minutes
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, len(ts)))
+    open_ = close + rng.normal(0, 5e-5, len(ts))
+    high = np.maximum(open_, close) + rng.random(len(ts)) * 1e-4
+    low = np.minimum(open_, close) - rng.random(len(ts)) * 1e-4
+    return CandleArray(timestamp=ts, open=open_, high=high, low=low, close=close, volume=rng.integers(1, 100, len(ts)).astype(float))
+
+
+def pandas_reference(arr: CandleArray, rule: str, offset: str | None = None) -> pd.DataFrame:
+    df = arr.to_frame().set_index("timestamp")
+    agg = df.resample(rule, offset=offset).agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    )
+    return agg.dropna(subset=["open"]).reset_index()
+
+
+@pytest.mark.parametrize("resolution,rule", [("5m", "5min"), ("15m", "15min"), ("1H", "1h"), ("4H", "4h")])
+def test_resample_matches_pandas(resolution, rule):
+    base = random_bars(5000)
+    ours = resample(base, resolution).to_frame()
+    ref = pandas_reference(base, rule)
+    pd.testing.assert_frame_equal(ours, ref, check_dtype=False, check_freq=False)
+
+
+def test_session_offset_alignment():
+    base = random_bars(3000)
+    ours = resample(base, "4H", session_offset=FX_ROLLOVER_OFFSET)
+    hours = (ours.timestamp // 3_600_000) % 24
+    assert set(hours) <= {22, 2, 6, 10, 14, 18}
+    ref = pandas_reference(base, "4h", offset="22h")
+    np.testing.assert_allclose(ours.high, ref["high"].to_numpy())
+
+
+def test_incremental_append_matches_full_recompute():
+    full = random_bars(4000)
+    head, tail = full.take(slice(0, 2500)), full.take(slice(2500, None))
+
+    cache = ResampleCache(head)
+    cache.get("15m")
+    cache.get("1H")
+    cache.append(tail)
+
+    for resolution in ("15m", "1H"):
+        expected = resample(full, resolution)
+        got = cache.get(resolution)
+        np.testing.assert_array_equal(got.timestamp, expected.timestamp)
+        np.testing.assert_allclose(got.close, expected.close)
+        np.testing.assert_allclose(got.volume, expected.volume)
+
+
+def test_store_derives_and_refreshes_resolutions(tmp_path):
+    store = CandleStore(tmp_path)
+    full = random_bars(3000)
+    store.write("EURUSD", "1m", full.take(slice(0, 2000)))
+
+    h1 = store.read_resampled("EURUSD", "1H")
+    assert len(h1) == len(resample(full.take(slice(0, 2000)), "1H"))
+
+    store.write("EURUSD", "1m", full.take(slice(2000, None)))
+    h1 = store.read_resampled("EURUSD", "1H")
+    np.testing.assert_allclose(h1.close, resample(full, "1H").close)
+
+    window = store.read_resampled("EURUSD", "15m", START_MS + 7 * MIN, START_MS + 60 * MIN)
+    assert window.timestamp[0] == START_MS
+    assert window.timestamp[-1] == START_MS + 60 * MIN
+
+
+def test_streamed_resample_matches_read_resampled(tmp_path):
+    store = CandleStore(tmp_path)
+    store.write("EURUSD", "1m", random_bars(3000))
+
+    lo, hi = START_MS + 7 * MIN, START_MS + 2_500 * MIN
+    for resolution in ("5m", "1H"):
+        chunks = list(store.iter_resampled_chunks("EURUSD", resolution, lo, hi, chunk_rows=333))
+        expected = store.read_resampled("EURUSD", resolution, lo, hi)
+        joined = CandleArray.concat(chunks)
+        np.testing.assert_array_equal(joined.timestamp, expected.timestamp)
+        for col in ("open", "high", "low", "close", "volume"):
+            np.testing.assert_allclose(getattr(joined, col), getattr(expected, col))
+    assert list(store.iter_resampled_chunks("GBPJPY", "5m")) == []
+
+
+def test_store_and_csv_reads_pass_the_session_offset(tmp_path):
+    from brokers.backtest import BacktestBroker
+
+    base = random_bars(3000)
+    store = CandleStore(tmp_path)
+    store.write("EURUSD", "1m", base.take(slice(0, 2000)))
+    utc = store.read_resampled("EURUSD", "4H")
+    store.read_resampled("EURUSD", "4H", session_offset=FX_ROLLOVER_OFFSET)   # cached separately
+    assert set((utc.timestamp // 3_600_000) % 24) <= {0, 4, 8, 12, 16, 20}
+
+    # write() refreshes the offset aggregate too
+    store.write("EURUSD", "1m", base.take(slice(2000, None)))
+    fx = store.read_resampled("EURUSD", "4H", session_offset=FX_ROLLOVER_OFFSET)
+    expected = resample(base, "4H", session_offset=FX_ROLLOVER_OFFSET)
+    np.testing.assert_array_equal(fx.timestamp, expected.timestamp)
+    np.testing.assert_allclose(fx.high, expected.high)
+    streamed = CandleArray.concat(list(store.iter_resampled_chunks(
+        "EURUSD", "4H", START_MS + 600 * MIN, None, chunk_rows=250, session_offset=FX_ROLLOVER_OFFSET,
+    )))
+    np.testing.assert_array_equal(
+        streamed.timestamp, store.read_resampled("EURUSD", "4H", START_MS + 600 * MIN, session_offset=FX_ROLLOVER_OFFSET).timestamp,
+    )
+
+    csv_path = tmp_path / "bars.csv"
+    frame = base.to_frame()
+    frame.to_csv(csv_path, index=False)
+    candles = BacktestBroker(csv_path=None).get_candles_range_from_csv(
+        str(csv_path), "4H", frame["timestamp"].iloc[0], frame["timestamp"].iloc[-1], session_offset=FX_ROLLOVER_OFFSET,
+    )
+    assert [int(c.timestamp.timestamp() * 1000) for c in candles] == expected.timestamp.tolist()
+
+
+def test_cannot_derive_finer_resolution():
+    with pytest.raises(ValueError):
+        ResampleCache(random_bars(10), base_resolution="5m").get("1m")
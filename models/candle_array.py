@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from models.candle import Candle
+from models.forex_instrument import ForexInstrument
+
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(slots=True)
+class CandleArray:
+    """
+    Columnar OHLCV series.
+
+    Timestamps are candle open times in UTC epoch milliseconds (int64), which is
+    what TradeLocker and the candle store use natively. Prices are float64.
+    This is the bulk counterpart of `Candle`: use it wherever more than a
+    handful of bars move around (backfills, caches, resampling).
+    """
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    # ----------------------------------------------------------------------
+    # Constructors
+    # ----------------------------------------------------------------------
+    @staticmethod
+    def empty() -> CandleArray:
+        return CandleArray(
+            timestamp=np.empty(0, dtype=np.int64),
+            open=np.empty(0),
+            high=np.empty(0),
+            low=np.empty(0),
+            close=np.empty(0),
+            volume=np.empty(0),
+        )
+
+    @staticmethod
+    def from_candles(candles: Iterable[Candle]) -> CandleArray:
+        candles = list(candles)
+        if not candles:
+            return CandleArray.empty()
+        return CandleArray(
+            timestamp=np.array([int(c.timestamp.timestamp() * 1000) for c in candles], dtype=np.int64),
+            open=np.array([c.open for c in candles], dtype=np.float64),
+            high=np.array([c.high for c in candles], dtype=np.float64),
+            low=np.array([c.low for c in candles], dtype=np.float64),
+            close=np.array([c.close for c in candles], dtype=np.float64),
+            volume=np.array([c.volume for c in candles], dtype=np.float64),
+        )
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame) -> CandleArray:
+        """Build from a DataFrame with a `timestamp` column (datetime-like or epoch ms)."""
+        if df.empty:
+            return CandleArray.empty()
+        ts = df["timestamp"]
+        if pd.api.types.is_integer_dtype(ts):
+            ms = ts.to_numpy(dtype=np.int64)
+        else:
+            ms = pd.to_datetime(ts, utc=True).dt.as_unit("ms").astype("int64").to_numpy()
+        return CandleArray(
+            timestamp=ms,
+            **{col: df[col].to_numpy(dtype=np.float64) if col in df else np.zeros(len(df)) for col in OHLCV_COLUMNS},
+        )
+
+    @staticmethod
+    def concat(parts: List[CandleArray]) -> CandleArray:
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return CandleArray.empty()
+        return CandleArray(
+            timestamp=np.concatenate([p.timestamp for p in parts]),
+            **{col: np.concatenate([getattr(p, col) for p in parts]) for col in OHLCV_COLUMNS},
+        )
+
+    # ----------------------------------------------------------------------
+    # Conversions
+    # ----------------------------------------------------------------------
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(self.timestamp, unit="ms", utc=True),
+            **{col: getattr(self, col) for col in OHLCV_COLUMNS},
+        })
+
+    def to_points(self, instrument: ForexInstrument, dtype=np.int32) -> PointCandleArray:
+        """Fixed-point copy: OHLC as integer multiples of `instrument.point_size`."""
+        prices = {col: to_points(getattr(self, col), instrument.point_size, dtype) for col in ("open", "high", "low", "close")}
+        return PointCandleArray(
+            timestamp=self.timestamp,
+            volume=self.volume.astype(np.float32),
+            point_size=instrument.point_size,
+            **prices,
+        )
+
+    def to_candles(self) -> List[Candle]:
+        return [
+            Candle(
+                timestamp=datetime.fromtimestamp(int(t) / 1000, tz=timezone.utc),
+                open=float(o),
+                high=float(h),
+                low=float(l),
+                close=float(c),
+                volume=float(v),
+            )
+            for t, o, h, l, c, v in zip(self.timestamp, self.open, self.high, self.low, self.close, self.volume)
+        ]
+
+    # ----------------------------------------------------------------------
+    # Slicing / normalization
+    # ----------------------------------------------------------------------
+    def take(self, idx) -> CandleArray:
+        return CandleArray(
+            timestamp=self.timestamp[idx],
+            **{col: getattr(self, col)[idx] for col in OHLCV_COLUMNS},
+        )
+
+    def between(self, start_ms: int, end_ms: int) -> CandleArray:
+        """Bars with start_ms <= timestamp <= end_ms. Assumes sorted timestamps."""
+        lo = np.searchsorted(self.timestamp, start_ms, side="left")
+        hi = np.searchsorted(self.timestamp, end_ms, side="right")
+        return self.take(slice(lo, hi))
+
+    def sorted_unique(self) -> CandleArray:
+        """Sort by timestamp and drop duplicate timestamps (last occurrence wins)."""
+        if len(self) == 0:
+            return self
+        # reverse so np.unique's "first occurrence" is the last written bar
+        rev_ts = self.timestamp[::-1]
+        _, first = np.unique(rev_ts, return_index=True)
+        idx = (len(self) - 1) - first
+        return self.take(idx)
+
+
+def to_points(prices: np.ndarray, point_size: float, dtype=np.int32) -> np.ndarray:
+    """Round float prices to integer points, refusing silent int32 overflow."""
+    points = np.rint(np.asarray(prices, dtype=np.float64) / point_size)
+    info = np.iinfo(dtype)
+    if len(points) and (points.max() > info.max or points.min() < info.min):
+        raise OverflowError(f"prices do not fit in {np.dtype(dtype).name} points of {point_size}")
+    return points.astype(dtype)
+
+
+@dataclass(slots=True)
+class PointCandleArray:
+    """
+    Fixed-point OHLCV series: prices are integer points (e.g. 1e-5 for EURUSD),
+    so fill / TP comparisons are exact and identical on every machine. int32
+    points cover any FX price below ~21k at 1e-5 and halve memory vs float64.
+    """
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    point_size: float
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def to_prices(self) -> CandleArray:
+        return CandleArray(
+            timestamp=self.timestamp,
+            open=np.round(self.open * self.point_size, 10),
+            high=np.round(self.high * self.point_size, 10),
+            low=np.round(self.low * self.point_size, 10),
+            close=np.round(self.close * self.point_size, 10),
+            volume=self.volume.astype(np.float64),
+        )
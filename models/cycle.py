@@ -8,3 +8,9 @@ class Cycle:
     symbol: str
     positions: list[Position]
 
+    @property
+    def is_closed(self) -> bool:
+        """Simulated cycles: closed once something filled and every filled trade has exited."""
+        filled = [t for t in self.positions if not t.is_pending]
+        return bool(filled) and all(t.exit_price is not None for t in filled)
+
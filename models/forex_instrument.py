@@ -7,3 +7,24 @@ class ForexInstrument:
     pip_size: float            # minimum price movement (pip definition)
     dollars_per_pip_per_lot: float  # pip value for 1 standard lot
     description: str = ""
+    point_size: float = 0.0    # quote precision (fractional pip); defaults to pip_size / 10
+
+    def __post_init__(self):
+        if not self.point_size:
+            self.point_size = self.pip_size / 10
+
+    # ----------------------------------------------------------------------
+    # Fixed-point helpers: prices as integer multiples of point_size
+    # ----------------------------------------------------------------------
+    def to_points(self, price: float) -> int:
+        return int(round(price / self.point_size))
+
+    def from_points(self, points: int) -> float:
+        return round(points * self.point_size, 10)
+
+    def pips_to_points(self, pips: float) -> int:
+        return int(round(pips * self.pip_size / self.point_size))
+
+    def round_price(self, price: float) -> float:
+        """Snap a float price onto the instrument's quote grid."""
+        return self.from_points(self.to_points(price))
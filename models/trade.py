@@ -32,6 +32,13 @@ class Trade:
 
     # Raw provider payload for debugging
     raw: dict = field(default_factory=dict)
+
+    # Simulation state (set by BacktestBroker)
+    ladder_position: int = 0
+    is_pending: bool = False
+    exit_price: Optional[float] = None
+    close_time: Optional[datetime] = None
+    realized_pnl: Optional[float] = None
     
     @staticmethod
     def from_tradelocker_order_history_row(
@@ -4,6 +4,10 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from dataclasses import dataclass
+from typing import Iterable
+
+from strategies.llm_trader.core.labeler import LabelGrid
+from utils.metrics_accumulator import MetricsAccumulator
 
 
 # ------------------------------------------------------------------ #
@@ -132,6 +136,100 @@ class Backtester:
 
         return metrics
 
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def run_streaming(
+        chunks: Iterable[pd.DataFrame],
+        reward_pips: float,
+        risk_pips: float,
+        accumulator: MetricsAccumulator | None = None,
+    ) -> MetricsAccumulator:
+        """
+        run() metrics over labeled chunks (e.g. pd.read_csv(..., chunksize=)
+        or per-day frames) in constant memory. Trade returns are in R, so the
+        accumulator's expectancy / profit factor / Sharpe equal run()'s on the
+        concatenated frame and its max_drawdown is in R. Pass `accumulator`
+        to continue a previous stream.
+        """
+        if reward_pips <= 0 or risk_pips <= 0:
+            raise ValueError("reward_pips and risk_pips must be positive nonzero values.")
+        rr_ratio = reward_pips / risk_pips
+        acc = accumulator if accumulator is not None else MetricsAccumulator()
+        for chunk in chunks:
+            if "outcome" not in chunk.columns:
+                raise ValueError("DataFrame must contain an 'outcome' column")
+            outcome = chunk["outcome"].to_numpy(dtype=np.float64)
+            outcome = outcome[(outcome == 0) | (outcome == 1)]
+            acc = acc.merge(MetricsAccumulator.from_array(np.where(outcome == 1, rr_ratio, -1.0)))
+        return acc
+
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def run_many(
+        grid: LabelGrid,
+        initial_balance: float,
+        risk_per_trade: float,
+    ) -> pd.DataFrame:
+        """
+        Metrics for every combo of a LabelGrid, one row per combo.
+
+        Row c carries the same numbers as run() on label column c (as_dict
+        fields) plus the combo parameters and final_balance. Outcomes are
+        binary, so every metric follows from the win / loss counts (see
+        metrics_from_sums) and no equity curve is materialised.
+        """
+        if initial_balance <= 0:
+            raise ValueError("initial_balance must be positive.")
+        if not (0 < risk_per_trade <= 1):
+            raise ValueError("risk_per_trade must be between 0 and 1.")
+        if (grid.reward_pips <= 0).any() or (grid.risk_pips <= 0).any():
+            raise ValueError("reward_pips and risk_pips must be positive nonzero values.")
+
+        wins = (grid.outcomes == 1).sum(axis=0)
+        losses = (grid.outcomes == 0).sum(axis=0)
+        rr = grid.reward_pips / grid.risk_pips
+
+        table = grid.combos
+        metrics = Backtester.metrics_from_sums(wins, losses, wins * rr - losses, wins * rr**2 + losses, rr)
+        for col in metrics.columns:
+            table[col] = metrics[col].to_numpy()
+        table["final_balance"] = initial_balance + (wins * rr - losses) * initial_balance * risk_per_trade
+        return table
+
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def metrics_from_sums(wins, losses, r_sum, r_sq_sum, rr) -> pd.DataFrame:
+        """
+        Vectorized run() metrics from per-sample aggregates: win / loss
+        counts, the sum of trade returns in R and the sum of squared returns.
+        These aggregates are additive, so callers can get them for any range
+        of trades from prefix sums. One row per element of the inputs.
+        """
+        wins, losses, r_sum, r_sq_sum, rr = np.broadcast_arrays(
+            *(np.asarray(a, dtype=np.float64) for a in (wins, losses, r_sum, r_sq_sum, rr))
+        )
+        total = wins + losses
+        has_trades = total > 0
+        mixed = (wins > 0) & (losses > 0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            win_rate = np.where(has_trades, wins / total, 0.0)
+            profit_factor = np.where(losses > 0, wins * rr / losses, np.inf)
+            # sample std (ddof=1) of the trade returns
+            var = (r_sq_sum - r_sum**2 / total) / (total - 1)
+            sharpe = (r_sum / total) / np.sqrt(var) * np.sqrt(total)
+
+        return pd.DataFrame({
+            "total_trades": total.astype(np.int64),
+            "win_rate": win_rate,
+            "expectancy": np.where(has_trades, win_rate * rr - (1.0 - win_rate), 0.0),
+            "profit_factor": np.where(has_trades, profit_factor, 0.0),
+            "sharpe_ratio": np.where(mixed & (var > 0), sharpe, 0.0),
+            "average_win": np.where(wins > 0, rr, 0.0),
+            "average_loss": np.where(losses > 0, 1.0, 0.0),
+            "rr_ratio": np.where(has_trades, rr, 0.0),
+        })
+
     # ------------------------------------------------------------------ #
     @staticmethod
     def _compute_equity_curve(
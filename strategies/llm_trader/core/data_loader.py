@@ -13,13 +13,17 @@ REQUIRED_COLS = ["timestamp", "open", "high", "low", "close", "volume"]
 import pandas as pd
 from pathlib import Path
 
+from data.store.resampler import resample_frame
 
-def load_ohlcv(path: str | Path) -> pd.DataFrame:
+
+def load_ohlcv(path: str | Path, resolution: str | None = None) -> pd.DataFrame:
     """
     Load OHLCV data from CSV or Parquet file automatically.
 
     Args:
         path: Path to .csv or .parquet file.
+        resolution: Optional coarser bar size ("5m", "15m", "1H", "4H") to
+            derive from the file's bars, e.g. 5m bars from a 1m file.
 
     Returns:
         DataFrame with standard OHLCV columns.
@@ -41,5 +45,8 @@ def load_ohlcv(path: str | Path) -> pd.DataFrame:
     if not required_cols.issubset(df.columns):
         raise ValueError(f"Missing required OHLC columns in {path.name}")
 
+    if resolution is not None and not df.empty:
+        df = resample_frame(df, resolution)
+
     return df
 
@@ -5,6 +5,7 @@ Usage:
     export OANDA_ACCOUNT_ID="your_account_id"
     python -m llm_trader.core.data_streamer_oanda --backfill
     python -m llm_trader.core.data_streamer_oanda --stream
+    python -m llm_trader.core.data_streamer_oanda --backfill-store 2023-01-01
 """
 
 import os
@@ -15,10 +16,15 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import argparse
 import runtime_settings as rt
+from data.ingestion.backfill import Backfiller, OandaHistoryProvider, plan_windows
+from data.store.candle_store import CandleStore, DEFAULT_STORE_ROOT
+from models.candle_array import CandleArray
+from utils.time import dt_to_ms
 
 # ---------------- CONFIG ----------------
 SYMBOL = "EUR_USD"
 GRANULARITY = "M5"
+RESOLUTION = "5m"
 DATA_PATH = Path("data/raw/eurusd_5m.csv")
 OANDA_API_KEY = rt.OANDA_API_KEY
 OANDA_ACCOUNT_ID = rt.OANDA_ACCOUNT_ID
@@ -34,71 +40,50 @@ def _headers():
 
 
 # ---------- HISTORICAL BACKFILL ----------
-def fetch_history(start=None, end=None):
+def fetch_history(start=None, end=None, max_workers=8, max_requests_per_second=10.0):
     """
     Fetch historical candles from OANDA between start and end datetimes.
-    Automatically paginates if more than 5000 bars are needed.
+    The range is split into windows under OANDA's 5000-bar limit which are
+    fetched concurrently under a rate cap; failed windows are retried and, if
+    they still fail, raise instead of leaving silent holes.
     Example:
         fetch_history(datetime(2025,3,1, tzinfo=timezone.utc))
-    """
-    from datetime import datetime, timedelta, timezone
 
+    For multi-year, resumable backfills into the candle store use
+    `data.ingestion.backfill.Backfiller` directly (see `--backfill-store`).
+    """
     print(f"fetching {SYMBOL} {GRANULARITY} data from OANDA...")
 
     if start is None:
-        # default: pull last 30 days
+        # default: pull last 250 days
         start = datetime.now(timezone.utc) - timedelta(days=250)
     if end is None:
         end = datetime.now(timezone.utc)
 
-    BASE_URL = f"https://api-fxpractice.oanda.com/v3/instruments/{SYMBOL}/candles"
-    step = timedelta(days=17)  # 17 days ≈ 5000 M5 candles
-    current = start
-    all_rows = []
-
-    while current < end:
-        next_end = min(current + step, end)
-        params = {
-            "from": current.isoformat(),
-            "to": next_end.isoformat(),
-            "granularity": GRANULARITY,
-            "price": "M",
-        }
-        try:
-            r = requests.get(BASE_URL, headers=_headers(), params=params, timeout=20)
-            r.raise_for_status()
-            candles = r.json().get("candles", [])
-            if not candles:
-                print(f"no data returned for {current.date()} -> {next_end.date()}")
-            else:
-                rows = [
-                    {
-                        "timestamp": pd.to_datetime(c["time"], utc=True),
-                        "open": float(c["mid"]["o"]),
-                        "high": float(c["mid"]["h"]),
-                        "low": float(c["mid"]["l"]),
-                        "close": float(c["mid"]["c"]),
-                        "volume": c["volume"],
-                    }
-                    for c in candles
-                    if c["complete"]
-                ]
-                all_rows.extend(rows)
-                print(f"{len(rows):>5} bars {current.date()} → {next_end.date()}")
-        except Exception as e:
-            print(f"error {current.date()} → {next_end.date()}: {e}")
-
-        current = next_end
-        time.sleep(0.25)  # tiny delay to avoid rate-limit
-
-    if not all_rows:
+    provider = OandaHistoryProvider(api_key=OANDA_API_KEY)
+    backfiller = Backfiller(provider, store=None, max_workers=max_workers, max_requests_per_second=max_requests_per_second)
+    windows = plan_windows(dt_to_ms(start), dt_to_ms(end), RESOLUTION, provider.max_bars_per_request)
+
+    parts = []
+    failed = backfiller.fetch_windows(SYMBOL, RESOLUTION, windows, on_window=lambda window, bars: parts.append(bars))
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(windows)} windows failed: {failed}")
+
+    candles = CandleArray.concat(parts).sorted_unique()
+    if not len(candles):
         raise RuntimeError("no data retrieved.")
 
-    df = pd.DataFrame(all_rows).sort_values("timestamp")
+    df = candles.to_frame()
     print(f"Total bars retrieved: {len(df)}")
     return df
 
 
+def backfill_store(start, end=None, store_root=DEFAULT_STORE_ROOT):
+    """Resumable backfill of SYMBOL/RESOLUTION into the candle store."""
+    backfiller = Backfiller(OandaHistoryProvider(api_key=OANDA_API_KEY), CandleStore(store_root))
+    return backfiller.run(SYMBOL.replace("_", ""), RESOLUTION, start, end)
+
+
 # ---------- FORWARD STREAMING ----------
 def append_latest(df_existing):
     """Fetch most recent candle and append if new."""
@@ -140,6 +125,7 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--backfill", action="store_true", help="Fetch historical data")
     parser.add_argument("--stream", action="store_true", help="Stream new candles")
+    parser.add_argument("--backfill-store", metavar="START", help="Resumable backfill into the candle store from START (ISO date)")
     args = parser.parse_args()
 
     Path("data/raw").mkdir(parents=True, exist_ok=True)
@@ -149,6 +135,14 @@ def main():
         df.to_csv(DATA_PATH, index=False)
         print(f"saved to {DATA_PATH}!")
 
+    if args.backfill_store:
+        start = datetime.fromisoformat(args.backfill_store)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        report = backfill_store(start)
+        if not report.complete:
+            print(f"incomplete backfill, rerun to resume: {report}")
+
     if args.stream:
         run_stream()
 
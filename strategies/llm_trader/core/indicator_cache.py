@@ -0,0 +1,192 @@
+"""
+indicator_cache.py
+------------------
+Disk cache of indicator columns, shared across runs and processes.
+
+    cache = IndicatorCache("data/cache/indicators", max_bytes=512 * 2**20)
+    rsi = cache.get(df, "rsi", window=7)          # computed once, then memory-mapped
+    indicator_engine.add_rsi(df, window=7, inplace=True, cache=cache)
+
+Entries are keyed by (series fingerprint, indicator, params) and stored as
+`<key>.npy` (loaded with mmap_mode="r") plus `<key>.json` holding the bar
+count, a fingerprint of every input bar (utils.fingerprint), the caller's
+`source` identity and the kernel state after the last bar. When the same
+series comes back with bars appended, only the new bars are computed
+(resumed from the saved state) and only they are hashed into the stored
+fingerprint.
+
+The key is the first bar. A frame passed with the `source` identity the
+entry was saved with (e.g. the pipeline's source-file fingerprint) is
+trusted to start with the entry's bars: the same bar count is a hit without
+reading its columns, O(1) whatever the history length, and a longer frame
+only computes and hashes its appended bars. Otherwise the entry is reused for a frame of at least its length
+only if the frame's first `n` bars still have the stored fingerprint (one
+compiled pass over the cached columns, about the cost of an RSI pass), so a
+revision anywhere in the cached history is recomputed. Least recently used
+entries are evicted once the .npy files exceed `max_bytes`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from strategies.llm_trader.core import kernels
+from utils.files import replace_atomic
+from utils.fingerprint import extend
+
+
+DEFAULT_INDICATOR_CACHE_DIR = Path("data/cache/indicators")
+
+# name -> (input columns, resumable kernel, state size)
+INDICATORS: Dict[str, Tuple[Tuple[str, ...], object, int]] = {
+    "rsi": (("close",), kernels.rsi_resume, kernels.RSI_STATE),
+    "ema": (("close",), kernels.ema_resume, kernels.EMA_STATE),
+    "atr": (("high", "low", "close"), kernels.atr_resume, kernels.ATR_STATE),
+    "adx": (("high", "low", "close"), kernels.adx_resume, kernels.ADX_STATE),
+}
+
+
+def _extend_hash(h: int, arrays, lo: int, hi: int) -> int:
+    """Fingerprint `h` of bars [0, lo) extended with bars [lo, hi) (row number first, so order counts)."""
+    return extend(h, np.arange(lo, hi), *(a[lo:hi] for a in arrays))
+
+
+class IndicatorCache:
+
+    def __init__(self, root: str | Path = DEFAULT_INDICATOR_CACHE_DIR, max_bytes: int = 512 * 2**20):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.extensions = 0
+        self.misses = 0
+
+    def _key(self, arrays, indicator: str, params: dict, series: str) -> str:
+        first = [float(a[0]) for a in arrays]
+        payload = {"series": series, "first": first, "indicator": indicator, "params": params}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:24]
+
+    def get(
+        self,
+        df: pd.DataFrame,
+        indicator: str,
+        window: int,
+        series: str = "",
+        source: str | None = None,
+    ) -> np.ndarray:
+        """
+        Indicator values for every row of `df` (read-only when served from disk).
+        `series` optionally namespaces entries, e.g. "EURUSD/5m". `source`
+        identifies the contents of `df`: a frame passed with the source an
+        entry was saved with holds that entry's bars, possibly with more
+        appended (e.g. one lineage of an append-only dataset).
+        """
+        if indicator not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {indicator}")
+        columns, kernel, state_size = INDICATORS[indicator]
+        arrays = [kernels.as_float_array(df[c]) for c in columns]
+        n = len(df)
+        if n == 0:
+            return np.empty(0)
+
+        key = self._key(arrays, indicator, {"window": window}, series)
+        data_path = self.root / f"{key}.npy"
+        meta_path = self.root / f"{key}.json"
+
+        meta = self._load_meta(meta_path)
+        if meta is not None and data_path.exists():
+            cached_n = meta["n"]
+            trusted = source is not None and meta.get("source") == source and cached_n <= n
+            if trusted and cached_n == n:
+                self.hits += 1
+                os.utime(meta_path)
+                return np.load(data_path, mmap_mode="r")
+
+            if trusted:
+                prefix_hash = int(meta["hash"], 16)
+            else:
+                prefix_hash = _extend_hash(0, arrays, 0, cached_n) if cached_n <= n else None
+            if prefix_hash is not None and f"{prefix_hash:016x}" == meta.get("hash"):
+                stored = np.load(data_path, mmap_mode="r")
+                if cached_n == n:
+                    self.hits += 1
+                    if source is not None:      # next lookup with this source skips the hash
+                        replace_atomic(meta_path, lambda tmp: tmp.write_text(json.dumps({**meta, "source": source})))
+                    else:
+                        os.utime(meta_path)
+                    return stored
+                out = np.empty(n)
+                out[:cached_n] = stored
+                del stored
+                state = np.asarray(meta["state"], dtype=np.float64)
+                kernel(*arrays, window, out, cached_n, state)
+                self.extensions += 1
+                self._save(data_path, meta_path, out, state, _extend_hash(prefix_hash, arrays, cached_n, n), source)
+                return out
+
+        out = np.empty(n)
+        state = np.zeros(state_size)
+        kernel(*arrays, window, out, 0, state)
+        self.misses += 1
+        # never replace a longer entry with a shorter one
+        if meta is None or meta["n"] < n:
+            self._save(data_path, meta_path, out, state, _extend_hash(0, arrays, 0, n), source)
+        return out
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _load_meta(path: Path) -> dict | None:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _save(
+        self,
+        data_path: Path,
+        meta_path: Path,
+        values: np.ndarray,
+        state: np.ndarray,
+        prefix_hash: int,
+        source: str | None,
+    ) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        def write_values(tmp: Path) -> None:
+            with open(tmp, "wb") as f:    # a file object: np.save would append .npy to a path
+                np.save(f, values)
+
+        meta = {"n": len(values), "hash": f"{prefix_hash:016x}", "source": source, "state": state.tolist()}
+        replace_atomic(data_path, write_values)
+        replace_atomic(meta_path, lambda tmp: tmp.write_text(json.dumps(meta)))
+
+        self._evict(keep=data_path.stem)
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("*.npy"))
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        for data_path in self.root.glob("*.npy"):
+            meta_path = data_path.with_suffix(".json")
+            last_used = meta_path.stat().st_mtime if meta_path.exists() else 0.0
+            entries.append((last_used, data_path.stat().st_size, data_path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, data_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if data_path.stem == keep:
+                continue
+            data_path.unlink(missing_ok=True)
+            data_path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
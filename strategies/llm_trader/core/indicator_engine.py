@@ -1,53 +1,198 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
 import ta
 
+from strategies.llm_trader.core import kernels
+
+if TYPE_CHECKING:
+    from strategies.llm_trader.core.indicator_cache import IndicatorCache
+
 
 # ---------- Individual indicator methods ---------- #
+#
+# Every add_* takes `inplace`: False (default) returns a copy with the new
+# column(s) computed by `ta`; True writes the column(s) into `df` itself using
+# the compiled kernels (same values) and returns `df`, so a long pipeline never
+# duplicates the frame. Passing an IndicatorCache serves the values from disk;
+# `source` then identifies the frame's contents (IndicatorCache.get).
+
+def _attach(df: pd.DataFrame, columns: dict[str, np.ndarray], inplace: bool) -> pd.DataFrame:
+    out = df if inplace else df.copy()
+    for col, values in columns.items():
+        out[col] = np.array(values)   # detach from any read-only memmap
+    return out
+
 
-def add_rsi(df: pd.DataFrame, window: int) -> pd.DataFrame:
+def add_rsi(
+    df: pd.DataFrame, window: int, inplace: bool = False, cache: IndicatorCache | None = None, source: str | None = None,
+) -> pd.DataFrame:
     """Add RSI indicator."""
+    if cache is not None:
+        return _attach(df, {"rsi": cache.get(df, "rsi", window, source=source)}, inplace)
+    if inplace:
+        out = np.empty(len(df))
+        kernels.rsi_into(kernels.as_float_array(df["close"]), window, out)
+        df["rsi"] = out
+        return df
     out = df.copy()
     out["rsi"] = ta.momentum.RSIIndicator(out["close"], window=window).rsi()
     return out
 
 
-def add_ema(df: pd.DataFrame, fast: int, slow: int) -> pd.DataFrame:
+def add_ema(
+    df: pd.DataFrame, fast: int, slow: int, inplace: bool = False, cache: IndicatorCache | None = None, source: str | None = None,
+) -> pd.DataFrame:
     """Add fast and slow EMAs."""
+    if cache is not None:
+        columns = {"ema_fast": cache.get(df, "ema", fast, source=source), "ema_slow": cache.get(df, "ema", slow, source=source)}
+        return _attach(df, columns, inplace)
+    if inplace:
+        close = kernels.as_float_array(df["close"])
+        for col, window in (("ema_fast", fast), ("ema_slow", slow)):
+            out = np.empty(len(df))
+            kernels.ema_into(close, window, out)
+            df[col] = out
+        return df
     out = df.copy()
     out["ema_fast"] = ta.trend.EMAIndicator(out["close"], window=fast).ema_indicator()
     out["ema_slow"] = ta.trend.EMAIndicator(out["close"], window=slow).ema_indicator()
     return out
 
 
-def add_adx(df: pd.DataFrame, window: int) -> pd.DataFrame:
+def add_adx(
+    df: pd.DataFrame, window: int, inplace: bool = False, cache: IndicatorCache | None = None, source: str | None = None,
+) -> pd.DataFrame:
     """Add ADX (trend strength) indicator."""
+    if cache is not None:
+        return _attach(df, {"adx": cache.get(df, "adx", window, source=source)}, inplace)
+    if inplace:
+        out = np.empty(len(df))
+        kernels.adx_into(*_hlc(df), window, out)
+        df["adx"] = out
+        return df
     out = df.copy()
     out["adx"] = ta.trend.ADXIndicator(out["high"], out["low"], out["close"], window=window).adx()
     return out
 
 
-def add_atr(df: pd.DataFrame, window: int) -> pd.DataFrame:
+def add_atr(
+    df: pd.DataFrame, window: int, inplace: bool = False, cache: IndicatorCache | None = None, source: str | None = None,
+) -> pd.DataFrame:
     """Add ATR (volatility) indicator."""
+    if cache is not None:
+        return _attach(df, {"atr": cache.get(df, "atr", window, source=source)}, inplace)
+    if inplace:
+        out = np.empty(len(df))
+        kernels.atr_into(*_hlc(df), window, out)
+        df["atr"] = out
+        return df
     out = df.copy()
     out["atr"] = ta.volatility.AverageTrueRange(high=out["high"], low=out["low"], close=out["close"], window=window).average_true_range()
     return out
 
 
+def _hlc(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return (
+        kernels.as_float_array(df["high"]),
+        kernels.as_float_array(df["low"]),
+        kernels.as_float_array(df["close"]),
+    )
+
+
+# ---------- Multi-period sweeps ---------- #
+
+def _grid_out(n: int, windows: np.ndarray, out: np.ndarray | None) -> np.ndarray:
+    # the kernels index out[i, k] unchecked: a wrong shape would write past the buffer
+    if len(windows) == 0 or windows.min() < 1:
+        raise ValueError(f"windows must be a non-empty list of periods >= 1, got {windows.tolist()}")
+    if out is None:
+        return np.empty((n, len(windows)))
+    if out.shape != (n, len(windows)) or out.dtype != np.float64 or not out.flags.c_contiguous:
+        raise ValueError(
+            f"out must be a C-contiguous float64 array of shape {(n, len(windows))}, "
+            f"got {out.dtype} {out.shape}"
+        )
+    return out
+
+
+def rsi_grid(df: pd.DataFrame, windows, out: np.ndarray | None = None) -> np.ndarray:
+    """RSI for several windows in one pass: array of shape (bars, len(windows)), optionally into `out`."""
+    windows = np.asarray(windows, dtype=np.int64)
+    out = _grid_out(len(df), windows, out)
+    kernels.rsi_multi(kernels.as_float_array(df["close"]), windows, out)
+    return out
+
+
+def ema_grid(df: pd.DataFrame, windows, out: np.ndarray | None = None) -> np.ndarray:
+    """EMA for several windows in one pass: array of shape (bars, len(windows)), optionally into `out`."""
+    windows = np.asarray(windows, dtype=np.int64)
+    out = _grid_out(len(df), windows, out)
+    kernels.ema_multi(kernels.as_float_array(df["close"]), windows, out)
+    return out
+
+
+def add_rsi_grid(df: pd.DataFrame, windows, inplace: bool = False) -> pd.DataFrame:
+    """Add one `rsi_<window>` column per window (see rsi_grid)."""
+    values = rsi_grid(df, windows)
+    return _attach(df, {f"rsi_{w}": values[:, k] for k, w in enumerate(windows)}, inplace)
+
+
 # ---------- Composite helper ---------- #
 
-def add_indicators(df: pd.DataFrame, rsi_window: int, ema_fast: int, ema_slow: int, adx_window: int, atr_window: int) -> pd.DataFrame:
+def add_indicators(
+    df: pd.DataFrame,
+    rsi_window: int,
+    ema_fast: int,
+    ema_slow: int,
+    adx_window: int,
+    atr_window: int,
+    inplace: bool = False,
+    cache: IndicatorCache | None = None,
+    source: str | None = None,
+) -> pd.DataFrame:
     """
     Compose all key indicators (RSI, EMA, ADX, ATR) into one DataFrame.
 
     Args:
         df: price DataFrame with ['open','high','low','close','volume'].
+        inplace: compute all five columns in one compiled call into a shared
+            buffer and attach them to `df` instead of copying the frame per
+            indicator. The warm-up rows are then dropped by slicing.
+        cache: serve each indicator column from an IndicatorCache.
+        source: identity of `df`'s contents for the cache (IndicatorCache.get).
 
     Returns:
         DataFrame with added indicator columns.
     """
-    out = df.copy()
-    out = add_rsi(out, window=rsi_window)
-    out = add_ema(out, fast=ema_fast, slow=ema_slow)
-    out = add_adx(out, window=adx_window)
-    out = add_atr(out, window=atr_window)
-    return out.dropna().reset_index(drop=True)
+    if cache is not None:
+        out = df if inplace else df.copy()
+        add_rsi(out, window=rsi_window, inplace=True, cache=cache, source=source)
+        add_ema(out, fast=ema_fast, slow=ema_slow, inplace=True, cache=cache, source=source)
+        add_adx(out, window=adx_window, inplace=True, cache=cache, source=source)
+        add_atr(out, window=atr_window, inplace=True, cache=cache, source=source)
+        return out.dropna().reset_index(drop=True)
+
+    if not inplace:
+        out = df.copy()
+        out = add_rsi(out, window=rsi_window)
+        out = add_ema(out, fast=ema_fast, slow=ema_slow)
+        out = add_adx(out, window=adx_window)
+        out = add_atr(out, window=atr_window)
+        return out.dropna().reset_index(drop=True)
+
+    buf = np.empty((len(kernels.INDICATOR_COLUMNS), len(df)))
+    kernels.fused_indicators(*_hlc(df), rsi_window, ema_fast, ema_slow, adx_window, atr_window, buf)
+    for row, col in enumerate(kernels.INDICATOR_COLUMNS):
+        df[col] = buf[row]
+
+    # indicator NaNs are a leading warm-up block; only fall back to dropna()
+    # if the input itself carries NaNs
+    warmup = max(rsi_window, ema_fast, ema_slow) - 1
+    out = df.iloc[warmup:]
+    if out.isna().to_numpy().any():
+        out = out.dropna()
+    return out.reset_index(drop=True)
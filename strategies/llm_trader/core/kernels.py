@@ -0,0 +1,362 @@
+"""
+kernels.py
+----------
+Compiled (numba) single-pass kernels behind the no-copy paths of
+indicator_engine / setup_detector.
+
+Every indicator kernel walks the price arrays once, front to back, and writes
+into caller-provided output arrays, so nothing is allocated per indicator and
+no DataFrame is copied; fused_indicators runs all five of them in one compiled
+call (one pass each, no Python round trips in between). Values match the
+`ta` implementations used by the default paths (same warm-up NaNs / zeros,
+same Wilder smoothing), so the two modes are interchangeable.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit
+
+
+# Row order of the fused indicator buffer (see fused_indicators)
+RSI, EMA_FAST, EMA_SLOW, ADX, ATR = range(5)
+INDICATOR_COLUMNS = ("rsi", "ema_fast", "ema_slow", "adx", "atr")
+
+
+# ----------------------------------------------------------------------
+# Single indicators
+#
+# Each *_resume kernel fills out[start:] given the state left behind after
+# bar start-1 (all zeros for a fresh series) and leaves the state after the
+# last bar in `state`, so a cached series can be extended bar-exactly when
+# new bars are appended. The *_into wrappers compute a whole series.
+# ----------------------------------------------------------------------
+RSI_STATE, EMA_STATE, ATR_STATE, ADX_STATE = 2, 1, 2, 5
+
+
+@njit(cache=True)
+def rsi_resume(close, window, out, start, state):
+    """Wilder RSI (ewm alpha=1/window, adjust=False); NaN for the first window-1 rows."""
+    alpha = 1.0 / window
+    up = state[0]
+    down = state[1]
+    for i in range(start, close.shape[0]):
+        if i > 0:
+            diff = close[i] - close[i - 1]
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff < 0 else 0.0
+            up = (1 - alpha) * up + alpha * gain
+            down = (1 - alpha) * down + alpha * loss
+        if i < window - 1:
+            out[i] = np.nan
+        elif down == 0:
+            out[i] = 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + up / down)
+    state[0] = up
+    state[1] = down
+
+
+@njit(cache=True)
+def ema_resume(close, window, out, start, state):
+    """EMA (span=window, adjust=False); NaN for the first window-1 rows."""
+    alpha = 2.0 / (window + 1)
+    ema = state[0]
+    for i in range(start, close.shape[0]):
+        ema = close[i] if i == 0 else alpha * close[i] + (1 - alpha) * ema
+        out[i] = ema if i >= window - 1 else np.nan
+    state[0] = ema
+
+
+@njit(cache=True)
+def atr_resume(high, low, close, window, out, start, state):
+    """Wilder ATR seeded with the mean of the first `window` true ranges; 0 before that."""
+    acc = state[0]
+    atr = state[1]
+    for i in range(start, close.shape[0]):
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = max(tr, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        if i < window - 1:
+            acc += tr
+            out[i] = 0.0
+        elif i == window - 1:
+            atr = (acc + tr) / window
+            out[i] = atr
+        else:
+            atr = (atr * (window - 1) + tr) / window
+            out[i] = atr
+    state[0] = acc
+    state[1] = atr
+
+
+@njit(cache=True)
+def adx_resume(high, low, close, window, out, start, state):
+    """
+    ADX with the exact indexing of ta.trend.ADXIndicator: TR / +DM / -DM sums
+    are seeded from the first bars, smoothed from bar window+1 on, and the
+    ADX itself starts at row 2*window-1 (0 before that).
+    """
+    w = window
+    trs = state[0]
+    dip = state[1]
+    din = state[2]
+    dx_sum = state[3]
+    adx = state[4]
+    for j in range(start, close.shape[0]):
+        # true range against the previous close (first bar: high - low)
+        tr = high[j] - low[j]
+        if j > 0:
+            tr = max(high[j], close[j - 1]) - min(low[j], close[j - 1])
+        pos = 0.0
+        neg = 0.0
+        if j > 0:
+            up = high[j] - high[j - 1]
+            dn = low[j - 1] - low[j]
+            if up > dn and up > 0:
+                pos = up
+            if dn > up and dn > 0:
+                neg = dn
+
+        out[j] = 0.0
+
+        # seed sums: TR over bars [0, w), DM over bars [1, w]
+        if j < w:
+            trs += tr
+        if 1 <= j <= w:
+            dip += pos
+            din += neg
+        if j > w:                     # like ta, bar w itself is not smoothed in
+            trs = trs - trs / w + tr
+            dip = dip - dip / w + pos
+            din = din - din / w + neg
+        if j < w:
+            continue
+
+        # directional index k = j - w
+        k = j - w
+        di_pos = 100.0 * dip / trs if trs != 0 else 0.0
+        di_neg = 100.0 * din / trs if trs != 0 else 0.0
+        s = di_pos + di_neg
+        dx = 100.0 * abs(di_pos - di_neg) / s if s != 0 else 0.0
+
+        if k < w - 1:
+            dx_sum += dx
+        elif k == w - 1:
+            adx = (dx_sum + dx) / w
+            out[j] = adx
+        else:
+            adx = (adx * (w - 1) + dx) / w
+            out[j] = adx
+    state[0] = trs
+    state[1] = dip
+    state[2] = din
+    state[3] = dx_sum
+    state[4] = adx
+
+
+@njit(cache=True)
+def rsi_into(close, window, out):
+    rsi_resume(close, window, out, 0, np.zeros(RSI_STATE))
+
+
+@njit(cache=True)
+def ema_into(close, window, out):
+    ema_resume(close, window, out, 0, np.zeros(EMA_STATE))
+
+
+@njit(cache=True)
+def atr_into(high, low, close, window, out):
+    atr_resume(high, low, close, window, out, 0, np.zeros(ATR_STATE))
+
+
+@njit(cache=True)
+def adx_into(high, low, close, window, out):
+    adx_resume(high, low, close, window, out, 0, np.zeros(ADX_STATE))
+
+
+# ----------------------------------------------------------------------
+# Multi-period (bars x windows)
+#
+# out is C-ordered (bars, windows): each bar's values for all windows are one
+# contiguous row. The first max(windows) - 1 bars (row 0 and the NaN warm-up)
+# run their branches once; past them the loop over windows is branch-free
+# (selects only, and error_model="numpy" drops the zero-division checks), so
+# it compiles to SIMD over windows. The bars x windows output then has to be
+# written to memory, and writing it is most of the cost: RSI for 20 windows
+# takes about half as long as 20 rsi_into calls, not as long as one.
+# ----------------------------------------------------------------------
+@njit(cache=True, error_model="numpy")
+def rsi_multi(close, windows, out):
+    """rsi_into for every window at once into out[:, k] (bit-identical)."""
+    n = close.shape[0]
+    m = windows.shape[0]
+    alpha = np.empty(m)
+    keep = np.empty(m)
+    for k in range(m):
+        alpha[k] = 1.0 / windows[k]
+        keep[k] = 1 - alpha[k]
+    up = np.zeros(m)
+    down = np.zeros(m)
+    warm = min(max(windows.max() - 1, 1), n)
+    for i in range(warm):
+        gain = 0.0
+        loss = 0.0
+        if i > 0:
+            diff = close[i] - close[i - 1]
+            gain = max(diff, 0.0)
+            loss = max(-diff, 0.0)
+        for k in range(m):
+            if i > 0:
+                up[k] = keep[k] * up[k] + alpha[k] * gain
+                down[k] = keep[k] * down[k] + alpha[k] * loss
+            if i < windows[k] - 1:
+                out[i, k] = np.nan
+            elif down[k] == 0:
+                out[i, k] = 100.0
+            else:
+                out[i, k] = 100.0 - 100.0 / (1.0 + up[k] / down[k])
+    for i in range(warm, n):
+        diff = close[i] - close[i - 1]
+        gain = max(diff, 0.0)
+        loss = max(-diff, 0.0)
+        row = out[i]
+        for k in range(m):
+            u = keep[k] * up[k] + alpha[k] * gain
+            d = keep[k] * down[k] + alpha[k] * loss
+            up[k] = u
+            down[k] = d
+            rsi = 100.0 - 100.0 / (1.0 + u / d)
+            row[k] = 100.0 if d == 0 else rsi
+
+
+@njit(cache=True, error_model="numpy")
+def ema_multi(close, windows, out):
+    """ema_into for every window at once into out[:, k] (bit-identical)."""
+    n = close.shape[0]
+    m = windows.shape[0]
+    alpha = np.empty(m)
+    keep = np.empty(m)
+    for k in range(m):
+        alpha[k] = 2.0 / (windows[k] + 1)
+        keep[k] = 1 - alpha[k]
+    ema = np.zeros(m)
+    warm = min(max(windows.max() - 1, 1), n)
+    for i in range(warm):
+        x = close[i]
+        for k in range(m):
+            ema[k] = x if i == 0 else alpha[k] * x + keep[k] * ema[k]
+            out[i, k] = ema[k] if i >= windows[k] - 1 else np.nan
+    for i in range(warm, n):
+        x = close[i]
+        row = out[i]
+        for k in range(m):
+            e = alpha[k] * x + keep[k] * ema[k]
+            ema[k] = e
+            row[k] = e
+
+
+# ----------------------------------------------------------------------
+# Fused pass
+# ----------------------------------------------------------------------
+@njit(cache=True)
+def fused_indicators(high, low, close, rsi_window, ema_fast, ema_slow, adx_window, atr_window, out):
+    """
+    RSI, fast/slow EMA, ADX and ATR in one compiled call (one pass per
+    indicator), written into the rows of a preallocated (5, n) buffer (see
+    INDICATOR_COLUMNS for the row order).
+    """
+    rsi_into(close, rsi_window, out[RSI])
+    ema_into(close, ema_fast, out[EMA_FAST])
+    ema_into(close, ema_slow, out[EMA_SLOW])
+    adx_into(high, low, close, adx_window, out[ADX])
+    atr_into(high, low, close, atr_window, out[ATR])
+
+
+# ----------------------------------------------------------------------
+# Labeling
+# ----------------------------------------------------------------------
+@njit(cache=True)
+def first_passage_outcomes(high, low, entries, rows, reward, risk, lookahead, out):
+    """
+    For each setup row `rows[k]` entered at `entries[k]`, scan the next
+    `lookahead` bars for the first bar with high >= entry + reward (win, 1)
+    or low <= entry - risk (loss, 0); -1 if neither. A bar that hits both
+    counts as a loss.
+    """
+    for k in range(rows.shape[0]):
+        i = rows[k]
+        target = entries[k] + reward
+        stop = entries[k] - risk
+        outcome = -1.0
+        for j in range(i + 1, i + 1 + lookahead):
+            if low[j] <= stop:
+                outcome = 0.0
+                break
+            if high[j] >= target:
+                outcome = 1.0
+                break
+        out[k] = outcome
+
+
+@njit(cache=True)
+def first_passage_grid(high, low, entries, rows, reward, risk, lookahead, out):
+    """
+    Batched first_passage_outcomes over combos (reward[c], risk[c], lookahead[c]).
+
+    Per setup, one forward scan of max(lookahead) bars builds the running
+    max-high / min-low; every combo is then two binary searches on those
+    monotonic runs. `out` is (setups, combos); combos whose window runs past
+    the end of the series are left NaN.
+    """
+    n = high.shape[0]
+    max_look = 0
+    for c in range(lookahead.shape[0]):
+        max_look = max(max_look, lookahead[c])
+    run_high = np.empty(max_look)
+    neg_run_low = np.empty(max_look)
+
+    for k in range(rows.shape[0]):
+        i = rows[k]
+        span = min(max_look, n - 1 - i)
+        hi = -np.inf
+        lo = np.inf
+        for d in range(span):
+            hi = max(hi, high[i + 1 + d])
+            lo = min(lo, low[i + 1 + d])
+            run_high[d] = hi
+            neg_run_low[d] = -lo
+
+        for c in range(lookahead.shape[0]):
+            look = lookahead[c]
+            if look > span:
+                out[k, c] = np.nan
+                continue
+            # first bar offset reaching target / stop (== look when never)
+            t = np.searchsorted(run_high[:look], entries[k] + reward[c])
+            s = np.searchsorted(neg_run_low[:look], -(entries[k] - risk[c]))
+            if t == look and s == look:
+                out[k, c] = -1.0
+            elif t < s:
+                out[k, c] = 1.0
+            else:
+                out[k, c] = 0.0
+
+
+# ----------------------------------------------------------------------
+# Setup helpers
+# ----------------------------------------------------------------------
+@njit(cache=True)
+def cooldown_mask(cond, cooldown, out):
+    """Keep a True in `cond` only if more than `cooldown` bars passed since the last kept one."""
+    last_trigger = -999
+    for i in range(cond.shape[0]):
+        active = cond[i] and i - last_trigger > cooldown
+        out[i] = active
+        if active:
+            last_trigger = i
+
+
+def as_float_array(values) -> np.ndarray:
+    """Contiguous float64 view of a column (copies only if the dtype/layout requires it)."""
+    return np.ascontiguousarray(values, dtype=np.float64)
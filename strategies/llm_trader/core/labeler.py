@@ -1,46 +1,131 @@
+from dataclasses import dataclass
+
 import numpy as np
 import pandas as pd
 
+from strategies.llm_trader.core import kernels
+
+
 def label_trades(
     df: pd.DataFrame,
     reward_pips: float,
     risk_pips: float,
     lookahead: int,
     pip_size: float = 0.0001,
+    inplace: bool = False,
 ) -> pd.DataFrame:
     """
     Labels only rows with `setup == True` as win(1), loss(0), or expired(-1).
-    All other rows remain NaN.
+    All other rows remain NaN. With inplace=True the 'outcome' column is
+    written into `df` instead of a copy.
+
+    A trade is a win if the target (entry + reward) is reached on an earlier
+    bar than the stop (entry - risk) within the next `lookahead` bars; a bar
+    that reaches both counts as a loss. Setups in the last `lookahead` rows
+    have no complete window and stay NaN.
     """
-    df = df.copy()
-    df["outcome"] = np.nan
-
-    for i in range(len(df) - lookahead):
-        # skip any row that is not a setup
-        if not bool(df.iloc[i]["setup"]):
-            continue
-
-        entry = df.iloc[i]["close"]
-        stop = entry - risk_pips * pip_size
-        target = entry + reward_pips * pip_size
-
-        highs = df["high"].iloc[i + 1 : i + 1 + lookahead]
-        lows = df["low"].iloc[i + 1 : i + 1 + lookahead]
-
-        hit_target_idx = highs[highs >= target].index.min()
-        hit_stop_idx = lows[lows <= stop].index.min()
-
-        # only assign outcome if this row is a setup
-        if pd.isna(hit_target_idx) and pd.isna(hit_stop_idx):
-            df.at[df.index[i], "outcome"] = -1  # expired
-        elif pd.isna(hit_stop_idx):
-            df.at[df.index[i], "outcome"] = 1
-        elif pd.isna(hit_target_idx):
-            df.at[df.index[i], "outcome"] = 0
-        elif hit_target_idx < hit_stop_idx:
-            df.at[df.index[i], "outcome"] = 1
-        else:
-            df.at[df.index[i], "outcome"] = 0
-
-    # leave all non-setup rows untouched (NaN)
+    if not inplace:
+        df = df.copy()
+
+    n = len(df)
+    outcome = np.full(n, np.nan)
+
+    setup = df["setup"].to_numpy(dtype=bool, na_value=True)
+    rows = np.flatnonzero(setup[: max(n - lookahead, 0)])
+    if len(rows):
+        labels = np.empty(len(rows))
+        kernels.first_passage_outcomes(
+            kernels.as_float_array(df["high"]),
+            kernels.as_float_array(df["low"]),
+            kernels.as_float_array(df["close"])[rows],
+            rows,
+            reward_pips * pip_size,
+            risk_pips * pip_size,
+            lookahead,
+            labels,
+        )
+        outcome[rows] = labels
+
+    df["outcome"] = outcome
     return df
+
+
+@dataclass(slots=True)
+class LabelGrid:
+    """Outcomes of every setup row under every (reward, risk, lookahead) combo."""
+    rows: np.ndarray          # positional index of each setup row
+    reward_pips: np.ndarray   # per combo
+    risk_pips: np.ndarray     # per combo
+    lookahead: np.ndarray     # per combo
+    outcomes: np.ndarray      # (setups, combos): 1 / 0 / -1, NaN if unlabeled
+
+    @property
+    def combos(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "reward_pips": self.reward_pips,
+            "risk_pips": self.risk_pips,
+            "lookahead": self.lookahead,
+        })
+
+    def column(self, combo: int, n_rows: int) -> np.ndarray:
+        """One combo as a full-length 'outcome' column, as label_trades would produce it."""
+        outcome = np.full(n_rows, np.nan)
+        outcome[self.rows] = self.outcomes[:, combo]
+        return outcome
+
+
+def label_trades_grid(
+    df: pd.DataFrame,
+    reward_pips,
+    risk_pips,
+    lookahead,
+    pip_size: float = 0.0001,
+) -> LabelGrid:
+    """
+    label_trades for many parameter combos at once. The three arguments are
+    broadcast against each other, so pass equal-length arrays for explicit
+    combos or use np.meshgrid(...) for a full grid:
+
+        r, k, la = np.meshgrid([2, 3, 5], [1, 2, 3], [12, 24], indexing="ij")
+        grid = label_trades_grid(df, r.ravel(), k.ravel(), la.ravel())
+        table = Backtester.run_many(grid, initial_balance=10_000, risk_per_trade=0.01)
+
+    Column c of the result equals label_trades(df, reward_pips[c], risk_pips[c], lookahead[c]).
+    """
+    return label_grid_arrays(
+        kernels.as_float_array(df["high"]),
+        kernels.as_float_array(df["low"]),
+        kernels.as_float_array(df["close"]),
+        df["setup"].to_numpy(dtype=bool, na_value=True),
+        reward_pips,
+        risk_pips,
+        lookahead,
+        pip_size,
+    )
+
+
+def label_grid_arrays(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    setup: np.ndarray,
+    reward_pips,
+    risk_pips,
+    lookahead,
+    pip_size: float = 0.0001,
+) -> LabelGrid:
+    """label_trades_grid on bare float64 price arrays and a boolean setup mask."""
+    reward, risk, look = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(reward_pips, dtype=np.float64)),
+        np.atleast_1d(np.asarray(risk_pips, dtype=np.float64)),
+        np.atleast_1d(np.asarray(lookahead, dtype=np.int64)),
+    )
+    reward, risk, look = reward.copy(), risk.copy(), look.copy()
+
+    n = len(setup)
+    rows = np.flatnonzero(setup[: max(n - int(look.min()), 0)])
+
+    outcomes = np.empty((len(rows), len(look)))
+    if len(rows):
+        kernels.first_passage_grid(high, low, close[rows], rows, reward * pip_size, risk * pip_size, look, outcomes)
+    return LabelGrid(rows=rows, reward_pips=reward, risk_pips=risk, lookahead=look, outcomes=outcomes)
@@ -0,0 +1,236 @@
+"""
+monte_carlo.py
+--------------
+Bootstrap robustness of a backtest's trade sequence.
+
+Backtester.run reports one Sharpe / expectancy per outcome sequence. This
+module resamples the trade returns (in R) into thousands of alternative
+sequences and reports the spread of the path statistics:
+
+    returns = trade_returns(labeled_df, reward_pips=3, risk_pips=1)
+    result = simulate(returns, initial_balance=10_000, risk_per_trade=0.01,
+                      n_paths=10_000, method="block", block_size=20, seed=7)
+    result.intervals        # lower / estimate / upper per statistic
+    result.risk_of_ruin
+
+Equity follows Backtester._compute_equity_curve: a fixed risk amount of
+initial_balance * risk_per_trade per trade, cumulated from the initial
+balance. Paths are drawn as a (paths x trades) index matrix in one NumPy
+call per chunk of paths, and a compiled kernel reduces every row to its
+statistics in a single pass, so the equity curves are never materialised.
+
+"iid" draws every trade independently; "block" is the circular block
+bootstrap, drawing runs of `block_size` consecutive trades so streaks and
+other serial dependence survive the resampling.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+
+METHODS = ("iid", "block")
+CHUNK_ELEMENTS = 4_000_000   # path x trade cells evaluated per batch
+
+
+@dataclass(slots=True)
+class MonteCarloResult:
+    final_equity: np.ndarray    # per path
+    max_drawdown: np.ndarray    # per path, fraction of the running peak
+    sharpe_ratio: np.ndarray    # per path, as Backtester._compute_sharpe
+    ruined: np.ndarray          # per path: equity fell to the ruin level
+    confidence: float
+
+    @property
+    def n_paths(self) -> int:
+        return len(self.final_equity)
+
+    @property
+    def risk_of_ruin(self) -> float:
+        return float(self.ruined.mean()) if self.n_paths else 0.0
+
+    @property
+    def intervals(self) -> pd.DataFrame:
+        """
+        Central `confidence` interval and median of every path statistic;
+        risk of ruin gets the Wilson score interval of the ruin frequency.
+        """
+        tail = (1.0 - self.confidence) / 2.0
+        rows = {}
+        for name in ("final_equity", "max_drawdown", "sharpe_ratio"):
+            values = getattr(self, name)
+            lower, median, upper = np.quantile(values, [tail, 0.5, 1.0 - tail])
+            rows[name] = (lower, median, upper)
+        rows["risk_of_ruin"] = _wilson_interval(int(self.ruined.sum()), self.n_paths, self.confidence)
+        return pd.DataFrame.from_dict(rows, orient="index", columns=["lower", "estimate", "upper"])
+
+
+# ----------------------------------------------------------------------
+# Inputs
+# ----------------------------------------------------------------------
+def trade_returns(df: pd.DataFrame, reward_pips: float, risk_pips: float) -> np.ndarray:
+    """Per-trade returns in R of a labeled frame, as Backtester.run uses them."""
+    if "outcome" not in df.columns:
+        raise ValueError("DataFrame must contain an 'outcome' column")
+    outcome = df["outcome"].to_numpy(dtype=np.float64)
+    outcome = outcome[(outcome == 0) | (outcome == 1)]
+    return np.where(outcome == 1, reward_pips / risk_pips, -1.0)
+
+
+def resample_indices(
+    n_trades: int,
+    n_paths: int,
+    rng: np.random.Generator,
+    method: str = "iid",
+    block_size: int = 20,
+    length: int | None = None,
+) -> np.ndarray:
+    """(n_paths, length) int32 indices into a sequence of n_trades trades."""
+    length = n_trades if length is None else length
+    if method == "iid":
+        return rng.integers(0, n_trades, size=(n_paths, length), dtype=np.int32)
+    if method == "block":
+        block_size = max(1, min(block_size, n_trades))
+        n_blocks = -(-length // block_size)
+        starts = rng.integers(0, n_trades, size=(n_paths, n_blocks, 1), dtype=np.int32)
+        offsets = np.arange(block_size, dtype=np.int32)
+        idx = (starts + offsets) % n_trades   # circular: blocks wrap around the end
+        return idx.reshape(n_paths, n_blocks * block_size)[:, :length]
+    raise ValueError(f"Unknown bootstrap method: {method} (expected one of {METHODS})")
+
+
+# ----------------------------------------------------------------------
+# Batched path statistics
+# ----------------------------------------------------------------------
+def equity_curves(returns: np.ndarray, risk_amount: float, initial_balance: float) -> np.ndarray:
+    """Backtester._compute_equity_curve for every row of a (paths, trades) return matrix."""
+    curves = np.empty((returns.shape[0], returns.shape[1] + 1))
+    curves[:, 0] = initial_balance
+    np.multiply(returns, risk_amount, out=curves[:, 1:])
+    return np.cumsum(curves, axis=1, out=curves)
+
+
+@njit(cache=True)
+def _path_statistics(source, idx, risk_amount, initial_balance, ruin_level, final, drawdown, sharpe, ruined):
+    """
+    One pass per row of `idx`: the equity curve source[idx[p]] * risk_amount
+    cumulated from initial_balance (as equity_curves), its max drawdown from
+    the running peak, the trade-level Sharpe and whether it hit ruin_level.
+    """
+    n = idx.shape[1]
+    for p in range(idx.shape[0]):
+        equity = initial_balance
+        peak = initial_balance
+        worst = 0.0
+        lowest = initial_balance
+        r_sum = 0.0
+        r_sq = 0.0
+        for t in range(n):
+            r = source[idx[p, t]]
+            r_sum += r
+            r_sq += r * r
+            equity += r * risk_amount
+            if equity > peak:
+                peak = equity
+            elif (peak - equity) / peak > worst:
+                worst = (peak - equity) / peak
+            if equity < lowest:
+                lowest = equity
+        final[p] = equity
+        drawdown[p] = worst
+        ruined[p] = lowest <= ruin_level
+
+        sharpe[p] = 0.0
+        if n >= 2:
+            mean = r_sum / n
+            var = (r_sq - r_sum * mean) / (n - 1)
+            if var > 1e-12 * max(1.0, r_sq / n):
+                sharpe[p] = mean / np.sqrt(var) * np.sqrt(n)
+
+
+def _wilson_interval(successes: int, n: int, confidence: float) -> tuple[float, float, float]:
+    if n == 0:
+        return (0.0, 0.0, 0.0)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    p = successes / n
+    denom = 1.0 + z**2 / n
+    centre = (p + z**2 / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denom
+    lower = 0.0 if successes == 0 else max(0.0, centre - half)
+    upper = 1.0 if successes == n else min(1.0, centre + half)
+    return (lower, p, upper)
+
+
+def simulate(
+    trade_returns: np.ndarray,
+    initial_balance: float,
+    risk_per_trade: float,
+    n_paths: int = 10_000,
+    method: str = "iid",
+    block_size: int = 20,
+    n_trades: int | None = None,
+    ruin_fraction: float = 0.5,
+    confidence: float = 0.95,
+    seed: int | None = None,
+) -> MonteCarloResult:
+    """
+    Bootstrap `n_paths` trade sequences from `trade_returns` (R per trade).
+
+    Args:
+        n_trades: trades per path; defaults to the length of the input.
+        ruin_fraction: a path is ruined once equity is at or below
+            initial_balance * (1 - ruin_fraction).
+        confidence: width of the reported intervals.
+        seed: makes the resampling reproducible.
+    """
+    if initial_balance <= 0:
+        raise ValueError("initial_balance must be positive.")
+    if not (0 < risk_per_trade <= 1):
+        raise ValueError("risk_per_trade must be between 0 and 1.")
+    if not (0 < confidence < 1):
+        raise ValueError("confidence must be between 0 and 1.")
+
+    source = np.asarray(trade_returns, dtype=np.float64)
+    if len(source) == 0 or n_paths <= 0:
+        empty = np.empty(0)
+        return MonteCarloResult(empty, empty, empty, np.empty(0, dtype=bool), confidence)
+
+    length = len(source) if n_trades is None else n_trades
+    risk_amount = initial_balance * risk_per_trade
+    ruin_level = initial_balance * (1.0 - ruin_fraction)
+    rng = np.random.default_rng(seed)
+
+    final_equity = np.empty(n_paths)
+    max_drawdown = np.empty(n_paths)
+    sharpe = np.empty(n_paths)
+    ruined = np.empty(n_paths, dtype=bool)
+
+    chunk = max(1, CHUNK_ELEMENTS // max(length, 1))
+    for lo in range(0, n_paths, chunk):
+        hi = min(lo + chunk, n_paths)
+        idx = resample_indices(len(source), hi - lo, rng, method, block_size, length)
+        _path_statistics(
+            source, idx, risk_amount, initial_balance, ruin_level,
+            final_equity[lo:hi], max_drawdown[lo:hi], sharpe[lo:hi], ruined[lo:hi],
+        )
+
+    return MonteCarloResult(final_equity, max_drawdown, sharpe, ruined, confidence)
+
+
+def simulate_backtest(
+    df: pd.DataFrame,
+    initial_balance: float,
+    risk_per_trade: float,
+    reward_pips: float,
+    risk_pips: float,
+    **kwargs,
+) -> MonteCarloResult:
+    """simulate() on the trades of a labeled frame (same arguments as Backtester.run)."""
+    if reward_pips <= 0 or risk_pips <= 0:
+        raise ValueError("reward_pips and risk_pips must be positive nonzero values.")
+    return simulate(trade_returns(df, reward_pips, risk_pips), initial_balance, risk_per_trade, **kwargs)
@@ -0,0 +1,178 @@
+"""
+pipeline.py
+-----------
+Memoized load -> indicators -> setups -> labels pipeline.
+
+Each stage declares the parameters it consumes. A stage's cache key is the
+hash of the upstream key, the stage name / version and the stage's own
+parameter values, with the source file's fingerprint (path, size, mtime) at
+the root of the chain. Outputs are stored as Parquet under
+`<cache_dir>/<stage>/<key>.parquet`.
+
+Because keys only depend on parameters, a run first works out every key,
+finds the deepest stage already on disk, loads it and computes only the
+stages after it. Changing `lookahead` therefore reuses the cached indicator
+and setup frames and recomputes labels only.
+
+    pipeline = Pipeline(LLM_TRADER_STAGES, cache_dir=DEFAULT_CACHE_DIR)
+    df = pipeline.run("data/raw/eurusd_5m.csv", rsi_window=7, reward_pips=3, risk_pips=3, lookahead=5)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from strategies.llm_trader.core import data_loader, indicator_engine, labeler, setup_registry
+from strategies.llm_trader.core.indicator_cache import IndicatorCache
+from utils.files import replace_atomic
+
+
+DEFAULT_CACHE_DIR = Path("data/cache/pipeline")
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One pipeline step. `fn(df, **params)` receives the upstream frame (which
+    it may modify in place) and the values of the parameters named in
+    `params`, falling back to the defaults given there.
+    """
+    name: str
+    fn: Callable[..., pd.DataFrame]
+    params: Dict[str, Any] = field(default_factory=dict)
+    version: str = "1"   # bump when fn's output changes for the same params
+    uses_indicator_cache: bool = False   # fn also takes indicator_cache= and indicator_source=
+
+    def resolve(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: values.get(name, default) for name, default in self.params.items()}
+
+
+# ----------------------------------------------------------------------
+# Default llm_trader stages
+# ----------------------------------------------------------------------
+def _indicators(
+    df: pd.DataFrame,
+    rsi_window: int,
+    indicator_cache: Optional[IndicatorCache] = None,
+    indicator_source: Optional[str] = None,
+) -> pd.DataFrame:
+    return indicator_engine.add_rsi(df, window=rsi_window, inplace=True, cache=indicator_cache, source=indicator_source)
+
+
+def _setups(df: pd.DataFrame, rsi_threshold: float, lookback: int, cooldown: int) -> pd.DataFrame:
+    df["setup"] = setup_registry.setup_mask(
+        df, "rsi_reversal_breakout", rsi_threshold=rsi_threshold, lookback=lookback, cooldown=cooldown
+    )
+    return df
+
+
+def _labels(df: pd.DataFrame, reward_pips: float, risk_pips: float, lookahead: int, pip_size: float) -> pd.DataFrame:
+    return labeler.label_trades(
+        df, reward_pips=reward_pips, risk_pips=risk_pips, lookahead=lookahead, pip_size=pip_size, inplace=True
+    )
+
+
+LLM_TRADER_STAGES: List[Stage] = [
+    Stage("indicators", _indicators, {"rsi_window": 14}, uses_indicator_cache=True),
+    Stage("setups", _setups, {"rsi_threshold": 30.0, "lookback": 3, "cooldown": 0}, version="2"),
+    Stage("labels", _labels, {"reward_pips": 3.0, "risk_pips": 3.0, "lookahead": 5, "pip_size": 0.0001}),
+]
+
+
+# ----------------------------------------------------------------------
+# Keys
+# ----------------------------------------------------------------------
+def fingerprint_file(path: str | Path) -> str:
+    """Identity of a source file's current contents (path, size, mtime)."""
+    path = Path(path).resolve()
+    st = path.stat()
+    return _digest({"path": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+
+
+def _digest(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+
+# ----------------------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------------------
+class Pipeline:
+    """
+    Runs the stages over a source file, memoizing each stage's output under
+    `cache_dir`. Entry points pass DEFAULT_CACHE_DIR to share those outputs
+    across runs, or None (their default) to run every stage and write nothing.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage] = LLM_TRADER_STAGES,
+        cache_dir: Optional[str | Path] = DEFAULT_CACHE_DIR,
+        loader: Callable[[Path], pd.DataFrame] = data_loader.load_ohlcv,
+    ):
+        """
+        Args:
+            stages: steps run in order after loading.
+            cache_dir: where stage outputs are kept (indicator columns go to
+                its `indicators/` IndicatorCache). None disables caching.
+            loader: reads the source file into an OHLCV frame.
+        """
+        self.stages = list(stages)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.indicator_cache = IndicatorCache(self.cache_dir / "indicators") if self.cache_dir is not None else None
+        self.loader = loader
+        # stage name -> "cached" | "computed" for the most recent run
+        self.last_run: Dict[str, str] = {}
+
+    def keys(self, source: str | Path, **params) -> List[str]:
+        """Cache key of every stage for this source and parameter set."""
+        key = fingerprint_file(source)
+        keys = []
+        for stage in self.stages:
+            key = _digest({"up": key, "stage": stage.name, "v": stage.version, "params": stage.resolve(params)})
+            keys.append(key)
+        return keys
+
+    def _path(self, stage: Stage, key: str) -> Path:
+        return self.cache_dir / stage.name / f"{key}.parquet"
+
+    def run(self, source: str | Path, **params) -> pd.DataFrame:
+        """Output of the last stage, loading the deepest cached stage and computing the rest."""
+        keys = self.keys(source, **params)
+        self.last_run = {}
+
+        start = 0
+        df: Optional[pd.DataFrame] = None
+        if self.cache_dir is not None:
+            for idx in range(len(self.stages) - 1, -1, -1):
+                path = self._path(self.stages[idx], keys[idx])
+                if path.exists():
+                    df = pd.read_parquet(path)
+                    start = idx + 1
+                    break
+        for stage in self.stages[:start]:
+            self.last_run[stage.name] = "cached"
+
+        if df is None:
+            df = self.loader(Path(source))
+
+        inputs = [fingerprint_file(source), *keys[:-1]]     # identity of the frame each stage receives
+        for stage, key, upstream in zip(self.stages[start:], keys[start:], inputs[start:]):
+            extra = {}
+            if stage.uses_indicator_cache:
+                extra = {"indicator_cache": self.indicator_cache, "indicator_source": upstream}
+            df = stage.fn(df, **stage.resolve(params), **extra)
+            self.last_run[stage.name] = "computed"
+            if self.cache_dir is not None:
+                self._store(self._path(stage, key), df)
+        return df
+
+    @staticmethod
+    def _store(path: Path, df: pd.DataFrame) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        replace_atomic(path, lambda tmp: df.to_parquet(tmp, index=False))
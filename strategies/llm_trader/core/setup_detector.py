@@ -1,14 +1,18 @@
+import numpy as np
 import pandas as pd
 
+from strategies.llm_trader.core import kernels
 
-def detect_rsi_reversals(df: pd.DataFrame, threshold: float = 30.0) -> pd.DataFrame:
+
+def detect_rsi_reversals(df: pd.DataFrame, threshold: float = 30.0, inplace: bool = False) -> pd.DataFrame:
     """
     Identify RSI cross-unders below threshold.
 
     Returns:
-        DataFrame with boolean 'setup' column.
+        DataFrame with boolean 'setup' column (written into `df` if inplace).
     """
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
     crosses = (df["rsi"].shift(1) >= threshold) & (df["rsi"] < threshold)
     df["setup"] = crosses
     return df
@@ -20,13 +24,19 @@ def detect_rsi_reversal_breakout(
     rsi_threshold: float = 30.0,
     lookback: int = 3,
     cooldown: int = 0,
+    inplace: bool = False,
 ) -> pd.DataFrame:
     """
     Detect setups where RSI recently dipped below threshold within the last lookback bars
     AND the current high breaks the previous candle's high.
     Fires only once per RSI recovery (prevents repeated triggers while RSI stays elevated).
+
+    With inplace=True the columns are written into `df` instead of a copy.
+    For sweeps over many parameter sets without helper columns, see
+    setup_registry.evaluate.
     """
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
 
     if rsi_col not in df.columns:
         raise KeyError(f"Column '{rsi_col}' not found in DataFrame")
@@ -47,20 +57,10 @@ def detect_rsi_reversal_breakout(
         # & (df[rsi_col].shift(1) <= rsi_threshold)
     )
 
-    # Optional cooldown to avoid overlapping entries
+    # Optional cooldown to avoid overlapping entries (compiled, by position)
     if cooldown > 0:
-        active = False
-        last_trigger = -999
-        for i in range(len(df)):
-            if cond.iloc[i] and i - last_trigger > cooldown:
-                active = True
-            else:
-                active = False
-            df.at[i, "setup"] = active
-            if active:
-                last_trigger = i
+        setup = np.empty(len(df), dtype=np.bool_)
+        kernels.cooldown_mask(cond.to_numpy(dtype=np.bool_), cooldown, setup)
+        df["setup"] = setup
 
     return df
-
-
-
@@ -0,0 +1,163 @@
+"""
+setup_registry.py
+-----------------
+Registry of compiled setup detectors.
+
+A detector is a numba kernel over the shared price / RSI arrays that fills a
+(bars x variants) boolean matrix, one column per parameter set, in a single
+pass over the bars. `evaluate` groups the requested variants by detector, so
+dozens of variants of the same detector cost one pass, and returns one
+boolean mask column per variant without adding anything to the input frame.
+
+    variants = [
+        SetupVariant("brk_3", "rsi_reversal_breakout", {"lookback": 3}),
+        SetupVariant("brk_5_cd10", "rsi_reversal_breakout", {"lookback": 5, "cooldown": 10}),
+        SetupVariant("cross_25", "rsi_cross_under", {"threshold": 25.0}),
+    ]
+    masks = evaluate(df, variants)      # DataFrame of bool columns brk_3, brk_5_cd10, cross_25
+
+New detectors are added with `register(Detector(...))`; the kernel signature
+is kernel(high, low, close, rsi, params, out) where params is a float64
+(variants x len(Detector.params)) matrix in the declared parameter order.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from strategies.llm_trader.core import kernels
+
+
+@dataclass(frozen=True)
+class Detector:
+    name: str
+    kernel: Callable
+    params: Dict[str, float]   # parameter name -> default, in kernel column order
+
+
+@dataclass(frozen=True)
+class SetupVariant:
+    label: str
+    detector: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+REGISTRY: Dict[str, Detector] = {}
+
+
+def register(detector: Detector) -> Detector:
+    REGISTRY[detector.name] = detector
+    return detector
+
+
+# ----------------------------------------------------------------------
+# Kernels
+# ----------------------------------------------------------------------
+@njit(cache=True)
+def _rsi_cross_under(high, low, close, rsi, params, out):
+    """Same as setup_detector.detect_rsi_reversals. params: [threshold]."""
+    for i in range(rsi.shape[0]):
+        for v in range(params.shape[0]):
+            out[i, v] = i > 0 and rsi[i - 1] >= params[v, 0] and rsi[i] < params[v, 0]
+
+
+@njit(cache=True)
+def _rsi_reversal_breakout(high, low, close, rsi, params, out):
+    """
+    Same as setup_detector.detect_rsi_reversal_breakout.
+    params: [rsi_threshold, lookback, cooldown].
+    """
+    m = params.shape[0]
+    last_trigger = np.full(m, -999)
+    for i in range(rsi.shape[0]):
+        breakout = i > 0 and high[i] > high[i - 1] and low[i] > low[i - 1]
+        for v in range(m):
+            threshold = params[v, 0]
+            lookback = int(params[v, 1])
+            cooldown = int(params[v, 2])
+
+            cond = False
+            if breakout:
+                # rolling min over the last `lookback` RSI values, NaNs skipped
+                recent_min = np.inf
+                for j in range(max(0, i - lookback + 1), i + 1):
+                    if rsi[j] < recent_min:
+                        recent_min = rsi[j]
+                cond = recent_min < threshold
+
+            if cooldown > 0:
+                cond = cond and i - last_trigger[v] > cooldown
+                if cond:
+                    last_trigger[v] = i
+            out[i, v] = cond
+
+
+register(Detector("rsi_cross_under", _rsi_cross_under, {"threshold": 30.0}))
+register(Detector(
+    "rsi_reversal_breakout",
+    _rsi_reversal_breakout,
+    {"rsi_threshold": 30.0, "lookback": 3, "cooldown": 0},
+))
+
+
+# ----------------------------------------------------------------------
+# Evaluation
+# ----------------------------------------------------------------------
+def _params_matrix(detector: Detector, variants: Sequence[SetupVariant]) -> np.ndarray:
+    rows = []
+    for variant in variants:
+        unknown = set(variant.params) - set(detector.params)
+        if unknown:
+            raise KeyError(f"{detector.name} has no parameter(s) {sorted(unknown)}")
+        rows.append([float(variant.params.get(name, default)) for name, default in detector.params.items()])
+    return np.array(rows, dtype=np.float64).reshape(len(variants), len(detector.params))
+
+
+def evaluate_arrays(
+    detector: str,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    rsi: np.ndarray,
+    variants: Sequence[SetupVariant],
+) -> np.ndarray:
+    """(bars x variants) boolean matrix of one detector over bare float64 arrays."""
+    if detector not in REGISTRY:
+        raise KeyError(f"Unknown setup detector: {detector}")
+    det = REGISTRY[detector]
+    out = np.empty((len(rsi), len(variants)), dtype=np.bool_)
+    det.kernel(high, low, close, rsi, _params_matrix(det, variants), out)
+    return out
+
+
+def evaluate(df: pd.DataFrame, variants: Sequence[SetupVariant], rsi_col: str = "rsi") -> pd.DataFrame:
+    """One boolean column per variant label, aligned with df.index."""
+    n = len(df)
+    high = kernels.as_float_array(df["high"])
+    low = kernels.as_float_array(df["low"])
+    close = kernels.as_float_array(df["close"]) if "close" in df else np.full(n, np.nan)
+    rsi = kernels.as_float_array(df[rsi_col]) if rsi_col in df else np.full(n, np.nan)
+
+    by_detector: Dict[str, List[SetupVariant]] = {}
+    for variant in variants:
+        if variant.detector not in REGISTRY:
+            raise KeyError(f"Unknown setup detector: {variant.detector}")
+        by_detector.setdefault(variant.detector, []).append(variant)
+
+    masks: Dict[str, np.ndarray] = {}
+    for name, group in by_detector.items():
+        out = evaluate_arrays(name, high, low, close, rsi, group)
+        for k, variant in enumerate(group):
+            masks[variant.label] = out[:, k]
+
+    return pd.DataFrame({v.label: masks[v.label] for v in variants}, index=df.index)
+
+
+def setup_mask(df: pd.DataFrame, detector: str, rsi_col: str = "rsi", **params) -> np.ndarray:
+    """Boolean setup mask of a single detector / parameter set."""
+    return evaluate(df, [SetupVariant("setup", detector, params)], rsi_col=rsi_col)["setup"].to_numpy()
@@ -2,7 +2,7 @@ import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from pathlib import Path
-from strategies.llm_trader.core import data_loader, indicator_engine, setup_detector, labeler
+from strategies.llm_trader.core.pipeline import Pipeline
 
 
 def preview_rsi_setups(
@@ -12,11 +12,11 @@ def preview_rsi_setups(
     reward_pips: float = 3.0,
     risk_pips: float = 3.0,
     lookahead: int = 5,
+    cache_dir: str | Path | None = None,   # reuse stage outputs across previews; nothing is written by default
 ) -> None:
-    df = data_loader.load_ohlcv(str(path))
-    df = indicator_engine.add_rsi(df, window=rsi_window)
-    df = setup_detector.detect_rsi_reversal_breakout(df)
-    df = labeler.label_trades(df, reward_pips=reward_pips, risk_pips=risk_pips, lookahead=lookahead)
+    df = Pipeline(cache_dir=cache_dir).run(
+        path, rsi_window=rsi_window, reward_pips=reward_pips, risk_pips=risk_pips, lookahead=lookahead
+    )
     df = df.tail(n).reset_index(drop=True)
 
     winners = df[df["outcome"] == 1]
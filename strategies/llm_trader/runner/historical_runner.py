@@ -2,12 +2,47 @@
 historical_runner.py
 --------------------
 Runs rolling-window backtests over historical data and saves performance metrics.
+
+With `incremental=True` every window's metrics are kept in a Parquet dataset
+under `<output_dir>/historical_metrics/params=<param key>/part-NNNNNN.parquet`.
+Each row carries a `data_key` fingerprinting the bars the window depends on
+(bars [0, window end + lookahead)), and `_manifest.json` next to the parts
+holds the bookkeeping: the bar count and fingerprint of the stored history,
+a digest of its last bar, the keys of the current and of all stored
+windows, and the first window still open (whose lookahead reaches the last
+bar).
+
+A refresh where the last stored bar is unchanged is an append. Only the
+appended bars are hashed, and windows before the open one keep their rows.
+The pipeline stages rerun from the open window's first bar minus the setup
+warm-up: RSI resumes from an IndicatorCache under the partition, and the
+setups and labels only see that tail. The loader still reads the whole
+file, but the rest costs O(new bars + open windows). A setup cooldown has
+no fixed warm-up (each accepted setup suppresses the next ones, back to the
+first bar), so with cooldown > 0 the setups and labels rerun over the whole
+history and only the hashing and window metrics stay incremental.
+
+Any other change (fewer bars, a revised last bar) re-keys every window and
+recomputes those whose key is not stored yet. Edits to older bars are only
+seen with `verify_history=True`, which re-fingerprints the stored history on
+every refresh (one compiled pass, O(history)).
 """
 
 from __future__ import annotations
+import hashlib
+import json
+import uuid
 from pathlib import Path
+from typing import Sequence
+import numpy as np
 import pandas as pd
-from strategies.llm_trader.core import data_loader, indicator_engine, setup_detector, labeler, backtester
+from strategies.llm_trader.core import backtester
+from strategies.llm_trader.core.indicator_cache import IndicatorCache
+from strategies.llm_trader.core.pipeline import LLM_TRADER_STAGES, Pipeline, Stage
+from utils.files import replace_atomic
+from utils.fingerprint import fingerprint, prefix_hashes
+
+DAY_NS = 86_400 * 10**9
 
 
 class HistoricalRunner:
@@ -26,6 +61,10 @@ class HistoricalRunner:
         pip_size: float,
         initial_balance: float,
         risk_per_trade: float,
+        cache_dir: str | Path | None = None,   # stage outputs of full runs (incremental runs keep their own IndicatorCache)
+        incremental: bool = False,             # append new windows to the dataset instead of rewriting
+        verify_history: bool = False,          # re-fingerprint the stored bars on update to catch edits to old bars
+        stages: Sequence[Stage] = LLM_TRADER_STAGES,
     ) -> None:
         self.data_path = Path(data_path)
         self.output_dir = Path(output_dir)
@@ -38,52 +77,308 @@ class HistoricalRunner:
         self.pip_size = pip_size
         self.initial_balance = initial_balance
         self.risk_per_trade = risk_per_trade
+        self.pipeline = Pipeline(stages, cache_dir=cache_dir)
+        self.incremental = incremental
+        self.verify_history = verify_history
+        self.dataset_dir = self.output_dir / "historical_metrics"
+        self.indicator_cache = IndicatorCache(self.partition_dir / "indicators")
 
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _sorted_outcomes(df: pd.DataFrame) -> tuple[pd.Series, np.ndarray, np.ndarray]:
+        timestamps = pd.to_datetime(df["timestamp"])
+        ts = timestamps.dt.as_unit("ns").astype("int64").to_numpy()
+        outcome = df["outcome"].to_numpy(dtype=np.float64)
+        if not np.all(ts[1:] >= ts[:-1]):
+            order = np.argsort(ts, kind="stable")
+            ts, outcome = ts[order], outcome[order]
+        return timestamps, ts, outcome
+
+    def _window_bounds(self, ts: np.ndarray, origin: int | None = None, first: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Row range [lo, hi) of windows first, first + 1, ... over sorted int64 ns
+        timestamps. Window j starts at origin + j * step (origin: the first
+        timestamp unless given), and there are as many as steps fit in the span.
+        """
+        if origin is None:
+            origin = int(ts[0]) if len(ts) else 0
+        span = int(ts[-1]) - origin if len(ts) else 0
+        n_windows = -(-span // (self.step_size_days * DAY_NS)) if span > 0 else 0
+        starts = origin + np.arange(first, max(n_windows, first), dtype=np.int64) * (self.step_size_days * DAY_NS)
+        lo = np.searchsorted(ts, starts, side="left")
+        hi = np.searchsorted(ts, starts + self.window_size_days * DAY_NS, side="left")
+        return lo, hi
+
+    def rolling_metrics(
+        self, df: pd.DataFrame, windows: np.ndarray | None = None, origin: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        Backtester.run metrics for every rolling window of a labeled frame
+        (or only the window numbers in `windows`). `origin` (int64 ns) is the
+        start of window 0 when `df` is only the tail of the history.
+
+        Window boundaries are resolved once with searchsorted on the sorted
+        int64 time index, and every window's win / loss counts and R sums
+        come from prefix sums, so the cost is O(n + windows) no matter how
+        much the windows overlap.
+        """
+        timestamps, ts, outcome = self._sorted_outcomes(df)
+        first = int(np.min(windows)) if windows is not None and len(windows) else 0
+        lo, hi = self._window_bounds(ts, origin, first)
+        k = np.arange(first, first + len(lo)) if windows is None else np.asarray(windows, dtype=np.int64)
+        lo, hi = lo[k - first], hi[k - first]
+
+        rr = self.reward_pips / self.risk_pips
+        win = outcome == 1
+        loss = outcome == 0
+        r = np.where(win, rr, np.where(loss, -1.0, 0.0))
+
+        def window_sum(values: np.ndarray) -> np.ndarray:
+            prefix = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+            return prefix[hi] - prefix[lo]
+
+        wins = np.rint(window_sum(win)).astype(np.int64)
+        losses = np.rint(window_sum(loss)).astype(np.int64)
+        metrics = backtester.Backtester.metrics_from_sums(wins, losses, window_sum(r), window_sum(r * r), rr)
+
+        keep = (hi - lo) > 10  # skip empty/small slices
+        start_date = timestamps.min()
+        if origin is not None:
+            start_date = pd.Timestamp(origin, tz=start_date.tz).as_unit(start_date.unit)
+        starts = [start_date + pd.Timedelta(days=self.step_size_days * int(j)) for j in k[keep]]
+        result = metrics[keep].reset_index(drop=True)
+        result.insert(0, "end", [s + pd.Timedelta(days=self.window_size_days) for s in starts])
+        result.insert(0, "start", starts)
+        return result
+
+    # ------------------------------------------------------------------ #
+    # Incremental dataset
+    # ------------------------------------------------------------------ #
+    @property
+    def param_key(self) -> str:
+        """Fingerprint of everything besides the data that window metrics depend on."""
+        payload = {
+            "window_size_days": self.window_size_days,
+            "step_size_days": self.step_size_days,
+            "rsi_window": self.rsi_window,
+            "reward_pips": self.reward_pips,
+            "risk_pips": self.risk_pips,
+            "lookahead": self.lookahead,
+            "pip_size": self.pip_size,
+            "stages": [(stage.name, stage.version, stage.resolve(self._params)) for stage in self.pipeline.stages],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+    @property
+    def partition_dir(self) -> Path:
+        return self.dataset_dir / f"params={self.param_key}"
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.partition_dir / "_manifest.json"
+
+    def _load_manifest(self) -> dict | None:
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except FileNotFoundError:
+            return None
+
+    @property
+    def _params(self) -> dict:
+        return {
+            "rsi_window": self.rsi_window,
+            "reward_pips": self.reward_pips,
+            "risk_pips": self.risk_pips,
+            "lookahead": self.lookahead,
+            "pip_size": self.pip_size,
+        }
+
+    @property
+    def warmup(self) -> int | None:
+        """
+        Bars before a recomputed row that the stages after the indicators
+        read: the setup lookback and the previous bar. None with a setup
+        cooldown, whose suppression chains back through every earlier
+        accepted setup, so only a run from the first bar reproduces it.
+        """
+        resolved = {}
+        for stage in self.pipeline.stages:
+            resolved.update(stage.resolve(self._params))
+        if int(resolved.get("cooldown", 0)) > 0:
+            return None
+        return int(resolved.get("lookback", 0)) + 1
+
+    @staticmethod
+    def _bars(df: pd.DataFrame) -> tuple[np.ndarray, ...]:
+        """The columns data keys fingerprint: (timestamp as int64 ns, high, low, close)."""
+        ts = pd.to_datetime(df["timestamp"]).dt.as_unit("ns").astype("int64").to_numpy()
+        return ts, *(df[col].to_numpy(dtype=np.float64) for col in ("high", "low", "close"))
+
+    def _extends(self, df: pd.DataFrame, manifest: dict) -> bool:
+        """Whether `df` is the stored history with bars appended (only its last bar is checked unless verify_history)."""
+        n = manifest["n"]
+        if len(df) < n:
+            return False
+        if self.verify_history:
+            return fingerprint(*self._bars(df.iloc[:n])) == int(manifest["hash"], 16)
+        return fingerprint(*self._bars(df.iloc[n - 1:n])) == int(manifest["tail"], 16)
+
+    def _labeled(self, df: pd.DataFrame, start: int, lineage: str) -> pd.DataFrame:
+        """
+        Rows [start, n) of `df` run through the pipeline stages. Stages on the
+        IndicatorCache see the whole frame and, with `lineage` naming this
+        append-only history, only compute the bars appended since the last
+        update; the other stages only see the slice.
+        """
+        frame, sliced = df, False
+        for stage in self.pipeline.stages:
+            extra = {}
+            if stage.uses_indicator_cache:
+                extra = {"indicator_cache": self.indicator_cache, "indicator_source": f"historical:{lineage}"}
+            elif not sliced:
+                frame, sliced = frame.iloc[start:].reset_index(drop=True), True
+            frame = stage.fn(frame, **stage.resolve(self._params), **extra)
+        return frame if sliced else frame.iloc[start:].reset_index(drop=True)
+
+    def _data_keys(self, windows: np.ndarray, hi: np.ndarray, n: int, prefix: np.ndarray, base: int) -> np.ndarray:
+        """
+        Per window: its number, and the count and fingerprint of every bar its
+        metrics depend on. Indicators run over the whole history and labels
+        look `lookahead` bars past the window, so that is bars
+        [0, hi + lookahead). `prefix[i]` fingerprints bars [0, base + i).
+        """
+        dep = np.minimum(hi + self.lookahead, n)
+        return np.array([f"{k}:{d}:{prefix[d - base]:016x}" for k, d in zip(windows.tolist(), dep.tolist())], dtype=object)
+
+    def _stored_parts(self) -> list[Path]:
+        return sorted(self.partition_dir.glob("part-*.parquet"))
+
+    @property
+    def part_count(self) -> int:
+        """Part files in this parameter set's partition (one per update that computed windows)."""
+        return len(self._stored_parts())
+
+    def load_results(self) -> pd.DataFrame:
+        """Stored rows of the windows of the latest update, by start."""
+        parts = self._stored_parts()
+        manifest = self._load_manifest()
+        if not parts or manifest is None:
+            return pd.DataFrame()
+        current = set(manifest["keys"])
+        stored = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        stored = stored[stored["data_key"].isin(current)].drop_duplicates("data_key", keep="last")
+        return stored.sort_values("start").reset_index(drop=True)
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Bring the dataset up to date with `df`, the full history (OHLCV, or
+        already labeled), and append the windows computed as one part file.
+
+        When `df` extends the stored history, windows before the open one
+        are kept as they are, only the appended bars are hashed, and only
+        bars from the open window on (minus the warm-up, or from the first
+        bar with a setup cooldown) are labeled and measured. Otherwise every
+        window is re-keyed under a new lineage, so the IndicatorCache
+        re-verifies its entries, and the windows whose key is not stored are
+        computed.
+        """
+        if not df["timestamp"].is_monotonic_increasing:
+            df = df.sort_values("timestamp", kind="stable")
+        df = df.reset_index(drop=True)
+        n = len(df)
+        manifest = self._load_manifest()
+        if n == 0:
+            return pd.DataFrame()
+
+        if manifest is not None and self._extends(df, manifest):
+            if manifest["n"] == n:
+                return pd.DataFrame()
+            first, row, base, base_hash = manifest["open"], manifest["open_row"], manifest["n"], int(manifest["hash"], 16)
+            lineage, origin = manifest["lineage"], manifest["origin"]
+            current = [key for key in manifest["keys"] if int(key.split(":")[0]) < first]
+        else:
+            first = row = base = base_hash = 0
+            lineage, origin = uuid.uuid4().hex[:16], None
+            current = []
+        stored = set(manifest["stored"]) if manifest is not None else set()
+
+        warmup = self.warmup
+        start = max(row - warmup, 0) if warmup is not None else 0
+        labeled = self._labeled(df, start, lineage)
+        _, ts, _ = self._sorted_outcomes(labeled)
+        if origin is None:
+            origin = int(ts[0])
+        lo, hi = self._window_bounds(ts, origin, first)
+        windows = np.arange(first, first + len(lo))
+        kept = (hi - lo) > 10   # same filter as rolling_metrics
+
+        prefix = prefix_hashes(*self._bars(df.iloc[base:])) + np.uint64(base_hash)   # wraps like extend()
+        keys = self._data_keys(windows[kept], hi[kept] + start, n, prefix, base)
+        new = np.array([key not in stored for key in keys], dtype=bool)
+
+        self.partition_dir.mkdir(parents=True, exist_ok=True)
+        run_id = manifest["next_run"] if manifest is not None else 0
+        result = self.rolling_metrics(labeled, windows=windows[kept][new], origin=origin)
+        if not result.empty:
+            result["data_key"] = keys[new]
+            result["run_id"] = run_id
+            path = self.partition_dir / f"part-{run_id:06d}.parquet"
+            replace_atomic(path, lambda tmp: result.to_parquet(tmp, index=False))
+            run_id += 1
+
+        # the first window whose lookahead reaches the last bar is the first one an append can change
+        reach = np.flatnonzero(hi + start + self.lookahead >= n)
+        open_window = first + (int(reach[0]) if len(reach) else len(lo))
+        open_row = start + int(np.searchsorted(ts, origin + (open_window * self.step_size_days * DAY_NS), side="left"))
+        self._write_manifest({
+            "n": n,
+            "hash": f"{int(prefix[-1]):016x}",
+            "tail": f"{fingerprint(*self._bars(df.iloc[n - 1:])):016x}",
+            "origin": origin,
+            "open": open_window,
+            "open_row": open_row,
+            "lineage": lineage,
+            "next_run": run_id,
+            "keys": current + keys.tolist(),
+            "stored": sorted(stored.union(keys[new])),
+        })
+        return result
+
+    def _write_manifest(self, manifest: dict) -> None:
+        replace_atomic(self.manifest_path, lambda tmp: tmp.write_text(json.dumps(manifest)))
+
+    def compact(self) -> None:
+        """Rewrite the partition as a single part file holding only the current rows."""
+        parts = self._stored_parts()
+        if len(parts) <= 1:
+            return
+        current = self.load_results()
+        replace_atomic(parts[-1], lambda tmp: current.to_parquet(tmp, index=False))
+        for part in parts[:-1]:
+            part.unlink()
+        manifest = self._load_manifest()
+        self._write_manifest({**manifest, "stored": sorted(manifest["keys"])})
+
     # ------------------------------------------------------------------ #
     def run(self) -> pd.DataFrame:
         """Run backtests across rolling windows and save metrics."""
-        df = data_loader.load_ohlcv(self.data_path)
+        if self.incremental:
+            bars = self.pipeline.loader(self.data_path)
+            if bars.empty:
+                print("⚠️ No data found.")
+                return pd.DataFrame()
+            appended = self.update(bars)
+            print(f"✅ Appended {len(appended)} window(s) to {self.partition_dir}")
+            return self.load_results()
+
+        df = self.pipeline.run(self.data_path, **self._params)
         if df.empty:
             print("⚠️ No data found.")
             return pd.DataFrame()
 
-        # Add indicators and setups
-        df = indicator_engine.add_rsi(df, window=self.rsi_window)
-        df = setup_detector.detect_rsi_reversal_breakout(df)
-        df = labeler.label_trades(
-            df,
-            reward_pips=self.reward_pips,
-            risk_pips=self.risk_pips,
-            lookahead=self.lookahead,
-            pip_size=self.pip_size,
-        )
-
-        # Rolling-window backtests
-        metrics_records: list[dict[str, float]] = []
-        timestamps = pd.to_datetime(df["timestamp"])
-        start_date = timestamps.min()
-        end_date = timestamps.max()
-
-        current_start = start_date
-        while current_start < end_date:
-            window_end = current_start + pd.Timedelta(days=self.window_size_days)
-            window_df = df[(timestamps >= current_start) & (timestamps < window_end)]
-            if len(window_df) > 10:  # skip empty/small slices
-                metrics = backtester.Backtester.run(
-                    df=window_df,
-                    initial_balance=self.initial_balance,
-                    risk_per_trade=self.risk_per_trade,
-                    reward_pips=self.reward_pips,
-                    risk_pips=self.risk_pips,
-                )
-                metrics_records.append(
-                    {"start": current_start, "end": window_end, **metrics.as_dict}
-                )
-            current_start += pd.Timedelta(days=self.step_size_days)
-
-        result_df = pd.DataFrame(metrics_records)
+        result_df = self.rolling_metrics(df)
         if result_df.empty:
             print("⚠️ No metrics generated.")
             return result_df
@@ -0,0 +1,323 @@
+"""
+walk_forward.py
+---------------
+Walk-forward parameter optimization on top of the compiled label / metrics path.
+
+For every in-sample window the optimizer scores each candidate of a parameter
+grid (RSI window, detector parameters, reward / risk / lookahead), picks the
+best one by `objective` and reports how that choice did on the following
+out-of-sample window.
+
+    optimizer = WalkForwardOptimizer(
+        "data/raw/eurusd_5m.parquet", "reports/walk_forward",
+        in_sample_days=60, out_of_sample_days=20,
+        param_grid={"rsi_window": [7, 14], "rsi_threshold": [25, 30], "lookback": [3, 5],
+                    "reward_pips": [3, 5], "risk_pips": [2, 3]},
+        objective="expectancy",
+    )
+    report = optimizer.run()
+
+The price series is written once as .npy files and every worker process
+memory-maps them, so the pool never pickles the data. Work is split by RSI
+window (and, with spare workers, by detector variants): a task computes its
+RSI once, all its detector variants in one registry pass, labels the union of
+their setup rows for every (reward, risk, lookahead) combo once, and gets the
+metrics of every (window, candidate) pair from prefix sums.
+
+A setup only counts towards a window if its whole lookahead horizon lies
+inside that window, so in-sample scores never peek at out-of-sample bars.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from strategies.llm_trader.core import data_loader, kernels, labeler, setup_registry
+from strategies.llm_trader.core.backtester import Backtester
+
+
+LABEL_PARAMS = ("reward_pips", "risk_pips", "lookahead")
+
+DEFAULT_PARAM_GRID: Dict[str, Sequence] = {
+    "rsi_window": [7, 14],
+    "rsi_threshold": [25.0, 30.0],
+    "lookback": [3, 5],
+    "reward_pips": [3.0, 5.0],
+    "risk_pips": [3.0],
+    "lookahead": [12],
+}
+
+_ARRAY_NAMES = ("high", "low", "close")
+
+# per-process memmaps, keyed by the shared directory
+_shared_arrays: Dict[str, Dict[str, np.ndarray]] = {}
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+def _load_shared(shared_dir: str) -> Dict[str, np.ndarray]:
+    if shared_dir not in _shared_arrays:
+        _shared_arrays[shared_dir] = {
+            name: np.asarray(np.load(Path(shared_dir) / f"{name}.npy", mmap_mode="r"))
+            for name in _ARRAY_NAMES
+        }
+    return _shared_arrays[shared_dir]
+
+
+def _window_sums(rows: np.ndarray, outcomes: np.ndarray, lo: np.ndarray, hi: np.ndarray, look: np.ndarray):
+    """Win / loss counts per (window, combo) of setups with row >= lo and row + look < hi."""
+    zero = np.zeros((1, outcomes.shape[1]), dtype=np.int64)
+    win_prefix = np.concatenate((zero, np.cumsum(outcomes == 1, axis=0)))
+    loss_prefix = np.concatenate((zero, np.cumsum(outcomes == 0, axis=0)))
+
+    a = np.searchsorted(rows, lo, side="left")[:, None]                       # (windows, 1)
+    b = np.searchsorted(rows, hi[:, None] - look[None, :], side="left")      # (windows, combos)
+    a = np.broadcast_to(a, b.shape)
+    b = np.maximum(a, b)
+
+    def take(prefix):
+        return np.take_along_axis(prefix, b, axis=0) - np.take_along_axis(prefix, a, axis=0)
+
+    return take(win_prefix), take(loss_prefix)
+
+
+def _evaluate_task(
+    shared_dir: str,
+    detector: str,
+    rsi_window: int,
+    variants: List[Dict[str, float]],
+    combos: Dict[str, np.ndarray],
+    pip_size: float,
+    lo: np.ndarray,
+    hi: np.ndarray,
+) -> pd.DataFrame:
+    """Metrics of every (window, variant, label combo) for one RSI window."""
+    arrays = _load_shared(shared_dir)
+    high, low, close = arrays["high"], arrays["low"], arrays["close"]
+
+    rsi = np.empty(len(close))
+    kernels.rsi_into(close, rsi_window, rsi)
+    masks = setup_registry.evaluate_arrays(
+        detector, high, low, close, rsi,
+        [setup_registry.SetupVariant(str(k), detector, params) for k, params in enumerate(variants)],
+    )
+
+    # label every row that is a setup for any variant once, then slice per variant
+    grid = labeler.label_grid_arrays(
+        high, low, close, masks.any(axis=1),
+        combos["reward_pips"], combos["risk_pips"], combos["lookahead"], pip_size,
+    )
+    rr = grid.reward_pips / grid.risk_pips
+
+    frames = []
+    for k, params in enumerate(variants):
+        keep = masks[grid.rows, k]
+        wins, losses = _window_sums(grid.rows[keep], grid.outcomes[keep], lo, hi, grid.lookahead)
+        wins, losses = wins.ravel(), losses.ravel()
+        rr_flat = np.tile(rr, len(lo))
+        metrics = Backtester.metrics_from_sums(
+            wins, losses, wins * rr_flat - losses, wins * rr_flat**2 + losses, rr_flat,
+        )
+        candidate = pd.DataFrame({
+            "window": np.repeat(np.arange(len(lo)), len(rr)),
+            "rsi_window": rsi_window,
+            **{name: value for name, value in params.items()},
+            **{name: np.tile(combos[name], len(lo)) for name in LABEL_PARAMS},
+        })
+        frames.append(pd.concat([candidate, metrics], axis=1))
+    return pd.concat(frames, ignore_index=True)
+
+
+# ----------------------------------------------------------------------
+# Optimizer
+# ----------------------------------------------------------------------
+class WalkForwardOptimizer:
+    """Rolling in-sample selection / out-of-sample evaluation of a parameter grid."""
+
+    def __init__(
+        self,
+        data_path: str | Path,
+        output_dir: str | Path,
+        in_sample_days: int,
+        out_of_sample_days: int,
+        param_grid: Optional[Dict[str, Sequence]] = None,
+        objective: str = "expectancy",
+        min_trades: int = 10,
+        detector: str = "rsi_reversal_breakout",
+        pip_size: float = 0.0001,
+        anchored: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            param_grid: values per parameter; the candidates are the full
+                product. Keys are rsi_window, reward_pips, risk_pips,
+                lookahead and the detector's own parameters; missing keys
+                take DEFAULT_PARAM_GRID / detector defaults.
+            objective: Backtester metric column to maximise in-sample.
+            min_trades: candidates with fewer in-sample trades are not eligible.
+            detector: setup_registry detector name.
+            anchored: in-sample windows all start at the first bar
+                (expanding) instead of rolling forward.
+            max_workers: process pool size; 1 runs everything in-process.
+        """
+        if detector not in setup_registry.REGISTRY:
+            raise KeyError(f"Unknown setup detector: {detector}")
+        self.detector = detector
+        detector_params = setup_registry.REGISTRY[detector].params
+
+        grid = {
+            name: values for name, values in DEFAULT_PARAM_GRID.items()
+            if name == "rsi_window" or name in LABEL_PARAMS or name in detector_params
+        }
+        grid.update(param_grid or {})
+        unknown = set(grid) - {"rsi_window", *LABEL_PARAMS, *detector_params}
+        if unknown:
+            raise KeyError(f"Unknown walk-forward parameter(s) {sorted(unknown)}")
+
+        self.data_path = Path(data_path)
+        self.output_dir = Path(output_dir)
+        self.in_sample_days = in_sample_days
+        self.out_of_sample_days = out_of_sample_days
+        self.param_grid = {name: list(values) for name, values in grid.items()}
+        self.objective = objective
+        self.min_trades = min_trades
+        self.pip_size = pip_size
+        self.anchored = anchored
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # (window, sample, candidate params) metrics table of the last run
+        self.candidates = pd.DataFrame()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------ #
+    def windows(self, ts: np.ndarray) -> pd.DataFrame:
+        """In-sample / out-of-sample boundaries (int64 ns) over sorted timestamps."""
+        day_ns = 86_400 * 10**9
+        is_ns = self.in_sample_days * day_ns
+        oos_ns = self.out_of_sample_days * day_ns
+        if len(ts) == 0 or ts[-1] - ts[0] < is_ns:
+            return pd.DataFrame(columns=["is_start", "is_end", "oos_start", "oos_end"], dtype=np.int64)
+
+        n = -(-int(ts[-1] - ts[0] - is_ns + 1) // oos_ns)
+        is_end = ts[0] + is_ns + np.arange(n, dtype=np.int64) * oos_ns
+        is_start = np.full(n, ts[0]) if self.anchored else is_end - is_ns
+        return pd.DataFrame({"is_start": is_start, "is_end": is_end, "oos_start": is_end, "oos_end": is_end + oos_ns})
+
+    def _tasks(self) -> List[tuple]:
+        detector_params = setup_registry.REGISTRY[self.detector].params
+        variant_keys = [name for name in self.param_grid if name in detector_params]
+        variants = [
+            dict(zip(variant_keys, values))
+            for values in itertools.product(*(self.param_grid[name] for name in variant_keys))
+        ]
+        label_values = np.array(list(itertools.product(*(self.param_grid[name] for name in LABEL_PARAMS))))
+        combos = {
+            name: label_values[:, k].astype(np.int64 if name == "lookahead" else np.float64)
+            for k, name in enumerate(LABEL_PARAMS)
+        }
+
+        rsi_windows = self.param_grid["rsi_window"]
+        chunks = max(1, min(len(variants), -(-self.max_workers // len(rsi_windows))))
+        return [
+            (int(w), [variants[i] for i in idx], combos)
+            for w in rsi_windows
+            for idx in np.array_split(np.arange(len(variants)), chunks)
+        ]
+
+    def evaluate_candidates(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Metrics of every candidate on every in-sample and out-of-sample window."""
+        df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+        ts = pd.to_datetime(df["timestamp"]).dt.as_unit("ns").astype("int64").to_numpy()
+        windows = self.windows(ts)
+        if windows.empty:
+            return pd.DataFrame()
+
+        n_windows = len(windows)
+        bounds = np.concatenate((windows[["is_start", "is_end"]].to_numpy(), windows[["oos_start", "oos_end"]].to_numpy()))
+        lo = np.searchsorted(ts, bounds[:, 0], side="left")
+        hi = np.searchsorted(ts, bounds[:, 1], side="left")
+
+        with tempfile.TemporaryDirectory(prefix="walk_forward_") as shared_dir:
+            for name in _ARRAY_NAMES:
+                np.save(Path(shared_dir) / f"{name}.npy", kernels.as_float_array(df[name]))
+
+            args = [
+                (shared_dir, self.detector, w, variants, combos, self.pip_size, lo, hi)
+                for w, variants, combos in self._tasks()
+            ]
+            if self.max_workers == 1:
+                frames = [_evaluate_task(*a) for a in args]
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                    frames = list(pool.map(_evaluate_task, *zip(*args)))
+            _shared_arrays.pop(shared_dir, None)
+
+        table = pd.concat(frames, ignore_index=True)
+        in_sample = table["window"] < n_windows
+        table.insert(1, "sample", np.where(in_sample, "in", "out"))
+        table["window"] = np.where(in_sample, table["window"], table["window"] - n_windows)
+        return table
+
+    # ------------------------------------------------------------------ #
+    def select(self, table: pd.DataFrame, windows: pd.DataFrame) -> pd.DataFrame:
+        """Best eligible in-sample candidate per window joined with its out-of-sample metrics."""
+        params = [c for c in self.param_grid if c in table.columns]
+        metrics = [c for c in table.columns if c not in ("window", "sample", *params)]
+
+        in_sample = table[(table["sample"] == "in") & (table["total_trades"] >= self.min_trades)]
+        if in_sample.empty:
+            return pd.DataFrame()
+        # idxmax keeps the first (grid order) candidate on ties
+        best = in_sample.loc[in_sample.groupby("window")[self.objective].idxmax()]
+
+        out_sample = table[table["sample"] == "out"]
+        report = best[["window", *params, self.objective, "total_trades"]].rename(
+            columns={self.objective: f"is_{self.objective}", "total_trades": "is_total_trades"}
+        )
+        report = report.merge(
+            out_sample[["window", *params, *metrics]].rename(columns={m: f"oos_{m}" for m in metrics}),
+            on=["window", *params],
+            how="left",
+        )
+
+        bounds = windows.iloc[report["window"].to_numpy()].reset_index(drop=True)
+        for col in reversed(bounds.columns):
+            report.insert(1, col, pd.to_datetime(bounds[col].to_numpy(), unit="ns"))
+        return report.reset_index(drop=True)
+
+    # ------------------------------------------------------------------ #
+    def run(self) -> pd.DataFrame:
+        """Optimize every in-sample window, evaluate out-of-sample and save the report."""
+        df = data_loader.load_ohlcv(self.data_path)
+        if df.empty:
+            print("⚠️ No data found.")
+            return pd.DataFrame()
+
+        self.candidates = self.evaluate_candidates(df)
+        if self.candidates.empty:
+            print("⚠️ Not enough data for one in-sample window.")
+            return pd.DataFrame()
+
+        ts = pd.to_datetime(df["timestamp"]).sort_values().dt.as_unit("ns").astype("int64").to_numpy()
+        report = self.select(self.candidates, self.windows(ts))
+        if report.empty:
+            print(f"⚠️ No candidate reached {self.min_trades} in-sample trades.")
+            return report
+
+        parquet_path = self.output_dir / "walk_forward.parquet"
+        json_path = self.output_dir / "walk_forward.json"
+        report.to_parquet(parquet_path, index=False)
+        report.to_json(json_path, orient="records", indent=2, date_format="iso")
+
+        print(f"✅ Saved walk-forward report: {parquet_path} and {json_path}")
+        return report
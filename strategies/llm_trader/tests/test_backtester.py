@@ -147,3 +147,30 @@ def test_compute_metrics_values_reasonable(sample_df: pd.DataFrame):
     assert 0.0 <= metrics.expectancy <= 3.0
     assert metrics.profit_factor > 0
     assert isinstance(metrics.sharpe_ratio, float)
+
+
+# ------------------------------------------------------------------ #
+#   Batched metrics over a label grid
+# ------------------------------------------------------------------ #
+def test_run_many_matches_run():
+    from strategies.llm_trader.core import labeler
+
+    rng = np.random.default_rng(11)
+    n = 400
+    close = np.round(1.1 + np.cumsum(rng.normal(0, 1e-4, n)), 4)
+    df = pd.DataFrame({
+        "high": close + rng.integers(0, 4, n) * 1e-4,
+        "low": close - rng.integers(0, 4, n) * 1e-4,
+        "close": close,
+        "setup": rng.random(n) < 0.25,
+    })
+    grid = labeler.label_trades_grid(df, [2.0, 3.0, 1.0], [1.0, 2.0, 1.0], [5, 20, 8])
+    table = Backtester.run_many(grid, initial_balance=10_000, risk_per_trade=0.01)
+
+    assert len(table) == 3
+    for c in range(3):
+        single = df.assign(outcome=grid.column(c, n))
+        metrics = Backtester.run(single, 10_000, 0.01, grid.reward_pips[c], grid.risk_pips[c])
+        for key, value in metrics.as_dict.items():
+            assert table.loc[c, key] == pytest.approx(value)
+        assert table.loc[c, "final_balance"] == pytest.approx(metrics.equity_curve[-1])
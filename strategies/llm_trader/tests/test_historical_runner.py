@@ -5,6 +5,7 @@ and writes valid output files (Parquet + JSON).
 """
 
 import pandas as pd
+import pytest
 import numpy as np
 from pathlib import Path
 from strategies.llm_trader.runner.historical_runner import HistoricalRunner
@@ -79,3 +80,170 @@ def test_historical_runner_handles_empty_data(tmp_path: Path):
     result_df = runner.run()
     assert isinstance(result_df, pd.DataFrame)
     assert result_df.empty
+
+
+def test_rolling_metrics_match_per_window_backtests(tmp_path: Path):
+    """Prefix-sum window metrics equal a Backtester.run per window slice."""
+    from strategies.llm_trader.core.backtester import Backtester
+
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="15min"),
+        "outcome": np.where(rng.random(n) < 0.2, rng.choice([0, 1, -1], n), np.nan),
+    })
+    runner = HistoricalRunner(
+        data_path=tmp_path / "unused.parquet",
+        output_dir=tmp_path,
+        window_size_days=3,
+        step_size_days=1,
+        rsi_window=7,
+        reward_pips=3,
+        risk_pips=1,
+        lookahead=3,
+        pip_size=0.0001,
+        initial_balance=10000,
+        risk_per_trade=0.01,
+    )
+    result = runner.rolling_metrics(df)
+    assert len(result) > 0
+
+    for _, row in result.iterrows():
+        window = df[(df["timestamp"] >= row["start"]) & (df["timestamp"] < row["end"])]
+        expected = Backtester.run(window, 10000, 0.01, 3, 1).as_dict
+        for key, value in expected.items():
+            assert row[key] == pytest.approx(value)
+
+
+def _random_walk(n: int, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 2e-4, n))
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="h"),
+        "open": close,
+        "high": close + rng.random(n) * 3e-4,
+        "low": close - rng.random(n) * 3e-4,
+        "close": close,
+        "volume": 1000,
+    })
+
+
+def test_incremental_run_appends_only_touched_windows(tmp_path: Path, monkeypatch):
+    from strategies.llm_trader.runner import historical_runner
+
+    data_path = tmp_path / "eurusd_1h.parquet"
+    full = _random_walk(24 * 60)
+
+    def runner(**kwargs) -> HistoricalRunner:
+        return HistoricalRunner(
+            data_path=data_path,
+            output_dir=tmp_path / "out",
+            window_size_days=5,
+            step_size_days=1,
+            rsi_window=7,
+            reward_pips=3,
+            risk_pips=3,
+            lookahead=5,
+            pip_size=0.0001,
+            initial_balance=10000,
+            risk_per_trade=0.01,
+            incremental=True,
+            **kwargs,
+        )
+
+    full.iloc[: 24 * 50].to_parquet(data_path)
+    first = runner().run()
+
+    # an append hashes and labels only the bars after the first open window
+    hashed, labeled = [], []
+    prefix_hashes = historical_runner.prefix_hashes
+    monkeypatch.setattr(historical_runner, "prefix_hashes", lambda *cols: hashed.append(len(cols[0])) or prefix_hashes(*cols))
+    full.to_parquet(data_path)
+    r = runner()
+    label = r._labeled
+    monkeypatch.setattr(r, "_labeled", lambda df, start, lineage: labeled.append(len(df) - start) or label(df, start, lineage))
+    appended = r.update(r.pipeline.run(data_path, rsi_window=7, reward_pips=3, risk_pips=3, lookahead=5))
+    monkeypatch.undo()
+    assert hashed == [24 * 10] and labeled[0] < 24 * 16
+    assert r.indicator_cache.extensions == 1
+    assert 0 < len(appended) < len(first)
+    assert appended["start"].min() >= first["start"].max() - pd.Timedelta(days=5)
+
+    expected = r.rolling_metrics(r.pipeline.run(data_path, rsi_window=7, reward_pips=3, risk_pips=3, lookahead=5))
+    result = r.load_results()
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+
+    # nothing new: nothing appended
+    r = runner()
+    assert r.run()["run_id"].max() == 1
+    assert r.part_count == 2
+
+    # a revised last bar re-keys the windows and recomputes the ones whose lookahead reaches it
+    changed = full.copy()
+    changed.loc[len(changed) - 1, "high"] += 0.01
+    changed.to_parquet(data_path)
+    r = runner()
+    result = r.run()
+    assert r.part_count == 3
+    recomputed = result.loc[result["run_id"] == 2, "start"]
+    assert recomputed.tolist() == result.loc[result["end"] + pd.Timedelta(hours=5) > changed["timestamp"].iloc[-1], "start"].tolist()
+
+    # an edit to an older bar is only seen when the stored history is verified
+    edited = changed.loc[24 * 40, "timestamp"]
+    changed.loc[24 * 40, "high"] += 0.01
+    changed.to_parquet(data_path)
+    assert runner().run()["run_id"].max() == 2
+    r = runner(verify_history=True)
+    result = r.run()
+    assert r.part_count == 4
+    recomputed = result.loc[result["run_id"] == 3, "start"]
+    assert recomputed.tolist() == result.loc[result["end"] + pd.Timedelta(hours=5) > edited, "start"].tolist()
+    expected = r.rolling_metrics(r.pipeline.run(data_path, rsi_window=7, reward_pips=3, risk_pips=3, lookahead=5))
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+
+    r.compact()
+    assert r.part_count == 1
+    pd.testing.assert_frame_equal(r.load_results(), result)
+
+
+def test_incremental_run_with_setup_cooldown_matches_full_run(tmp_path: Path):
+    from dataclasses import replace
+    from strategies.llm_trader.core.pipeline import LLM_TRADER_STAGES
+
+    # a high RSI threshold makes raw setups dense, so the cooldown chains through the whole history
+    stages = [
+        replace(stage, params={**stage.params, "rsi_threshold": 60.0, "cooldown": 10}) if stage.name == "setups" else stage
+        for stage in LLM_TRADER_STAGES
+    ]
+    data_path = tmp_path / "eurusd_1h.parquet"
+    full = _random_walk(24 * 60, seed=2)
+
+    def runner() -> HistoricalRunner:
+        return HistoricalRunner(
+            data_path=data_path,
+            output_dir=tmp_path / "out",
+            window_size_days=5,
+            step_size_days=1,
+            rsi_window=7,
+            reward_pips=3,
+            risk_pips=3,
+            lookahead=5,
+            pip_size=0.0001,
+            initial_balance=10000,
+            risk_per_trade=0.01,
+            incremental=True,
+            stages=stages,
+        )
+
+    assert runner().param_key != HistoricalRunner(data_path, tmp_path, 5, 1, 7, 3, 3, 5, 0.0001, 10000, 0.01).param_key
+    assert runner().warmup is None
+
+    for days in (20, 33, 47, 60):
+        full.iloc[: 24 * days].to_parquet(data_path)
+        result = runner().run()
+
+    r = runner()
+    labeled = r.pipeline.run(data_path, rsi_window=7, reward_pips=3, risk_pips=3, lookahead=5)
+    assert labeled["setup"].sum() > 50
+    expected = r.rolling_metrics(labeled)
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.llm_trader.core import indicator_engine, kernels
+from strategies.llm_trader.core.indicator_cache import IndicatorCache
+
+
+def make_df(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, n))
+    return pd.DataFrame({
+        "open": close,
+        "high": close + rng.random(n) * 1e-4,
+        "low": close - rng.random(n) * 1e-4,
+        "close": close,
+    })
+
+
+def reference(df, indicator, window):
+    out = np.empty(len(df))
+    if indicator in ("rsi", "ema"):
+        getattr(kernels, f"{indicator}_into")(df["close"].to_numpy(), window, out)
+    else:
+        getattr(kernels, f"{indicator}_into")(df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy(), window, out)
+    return out
+
+
+@pytest.mark.parametrize("indicator", ["rsi", "ema", "atr", "adx"])
+def test_hit_and_incremental_extension_are_exact(tmp_path, indicator):
+    full = make_df(600)
+    cache = IndicatorCache(tmp_path)
+
+    first = cache.get(full.iloc[:400], indicator, 14)
+    np.testing.assert_array_equal(first, reference(full.iloc[:400], indicator, 14))
+    assert cache.misses == 1
+
+    again = cache.get(full.iloc[:400], indicator, 14)
+    assert isinstance(again, np.memmap) and cache.hits == 1
+
+    # 200 bars appended: resumed from the saved state, identical to a full recompute
+    extended = cache.get(full, indicator, 14)
+    assert cache.extensions == 1
+    np.testing.assert_array_equal(extended, reference(full, indicator, 14))
+
+    # a second process / cache instance sees the extended entry
+    other = IndicatorCache(tmp_path)
+    other.get(full, indicator, 14)
+    assert other.hits == 1
+
+
+def test_changed_history_is_recomputed(tmp_path):
+    df = make_df(300)
+    cache = IndicatorCache(tmp_path)
+    cache.get(df, "rsi", 7)
+
+    revised = df.copy()
+    revised.loc[290, "close"] += 1e-3
+    np.testing.assert_array_equal(cache.get(revised, "rsi", 7), reference(revised, "rsi", 7))
+    assert cache.misses == 2
+
+
+def test_revision_early_in_a_long_history_is_recomputed(tmp_path):
+    df = make_df(1_000)
+    cache = IndicatorCache(tmp_path)
+    cache.get(df.iloc[:800], "ema", 7)
+
+    # far before the end of the cached bars, then extended: no stale prefix is reused
+    revised = df.copy()
+    revised.loc[100, "close"] += 1e-3
+    np.testing.assert_array_equal(cache.get(revised, "ema", 7), reference(revised, "ema", 7))
+    assert (cache.misses, cache.extensions) == (2, 0)
+
+    # the rewritten entry extends from its own fingerprint
+    np.testing.assert_array_equal(cache.get(revised, "ema", 7), reference(revised, "ema", 7))
+    assert cache.hits == 1
+
+
+def test_lru_eviction_respects_budget(tmp_path):
+    df = make_df(1000)
+    entry_bytes = 1000 * 8 + 128
+    cache = IndicatorCache(tmp_path, max_bytes=2 * entry_bytes + 100)
+    for window in (5, 6, 7):
+        cache.get(df, "rsi", window)
+    assert len(list(tmp_path.glob("*.npy"))) == 2
+    assert cache.size_bytes() <= cache.max_bytes
+
+    cache.get(df, "rsi", 5)    # the oldest entry was evicted
+    assert cache.misses == 4
+
+
+def test_add_indicators_with_cache_matches_plain(tmp_path):
+    df = make_df(400)
+    expected = indicator_engine.add_indicators(df, 7, 10, 50, 14, 14)
+    got = indicator_engine.add_indicators(df, 7, 10, 50, 14, 14, cache=IndicatorCache(tmp_path))
+    pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-9)
+    assert "rsi" not in df.columns
+
+
+def test_hit_with_the_saved_source_reads_no_columns(tmp_path, monkeypatch):
+    from strategies.llm_trader.core import indicator_cache
+
+    df = make_df(500)
+    cache = IndicatorCache(tmp_path)
+    cache.get(df, "adx", 14, source="eurusd@1")
+    cache.get(df, "rsi", 7)
+    cache.get(df, "rsi", 7, source="eurusd@1")     # verified by hash once, then remembers the source
+
+    def no_hashing(*args):
+        raise AssertionError("a hit with the saved source must not hash the bars")
+
+    monkeypatch.setattr(indicator_cache, "_extend_hash", no_hashing)
+    for indicator, window in (("adx", 14), ("rsi", 7)):
+        hit = cache.get(df, indicator, window, source="eurusd@1")
+        np.testing.assert_array_equal(hit, reference(df, indicator, window))
+    assert cache.hits == 3
+
+
+def test_extension_with_the_saved_source_hashes_only_new_bars(tmp_path, monkeypatch):
+    from strategies.llm_trader.core import indicator_cache
+
+    df = make_df(800)
+    cache = IndicatorCache(tmp_path)
+    cache.get(df.iloc[:500], "rsi", 7, source="lineage")
+
+    hashed = []
+    extend_hash = indicator_cache._extend_hash
+    monkeypatch.setattr(indicator_cache, "_extend_hash", lambda h, arrays, lo, hi: hashed.append((lo, hi)) or extend_hash(h, arrays, lo, hi))
+    out = cache.get(df, "rsi", 7, source="lineage")
+    np.testing.assert_array_equal(out, reference(df, "rsi", 7))
+    assert cache.extensions == 1 and hashed == [(500, 800)]
+
+    # the stored fingerprint still verifies for callers without the source
+    monkeypatch.undo()
+    cache.get(df, "rsi", 7)
+    assert cache.hits == 1
@@ -1,4 +1,5 @@
 import pandas as pd
+import pytest
 import numpy as np
 from strategies.llm_trader.core import indicator_engine
 
@@ -24,3 +25,48 @@ def test_add_all_indicators_shape():
     assert expected_cols.issubset(df.columns)
     assert len(df) > 0
 
+
+def test_inplace_matches_default_and_does_not_copy():
+    df = make_mock_df(400)
+    expected = indicator_engine.add_indicators(df.copy(), 7, 10, 140, 14, 14)
+
+    source = df.copy()
+    got = indicator_engine.add_indicators(source, 7, 10, 140, 14, 14, inplace=True)
+    assert {"rsi", "ema_fast", "ema_slow", "adx", "atr"}.issubset(source.columns)
+    pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-9)
+
+def test_single_indicator_inplace_matches_default():
+    df = make_mock_df(200)
+    for add, kwargs, cols in [
+        (indicator_engine.add_rsi, {"window": 7}, ["rsi"]),
+        (indicator_engine.add_ema, {"fast": 10, "slow": 50}, ["ema_fast", "ema_slow"]),
+        (indicator_engine.add_adx, {"window": 14}, ["adx"]),
+        (indicator_engine.add_atr, {"window": 14}, ["atr"]),
+    ]:
+        expected = add(df, **kwargs)
+        target = df.copy()
+        assert add(target, inplace=True, **kwargs) is target
+        for col in cols:
+            np.testing.assert_allclose(target[col], expected[col], rtol=1e-9, equal_nan=True)
+
+def test_multi_period_grids_match_single_window_indicators():
+    df = make_mock_df(300)
+    windows = [5, 7, 14, 21]
+    rsi = indicator_engine.rsi_grid(df, windows)
+    ema = indicator_engine.ema_grid(df, windows)
+    assert rsi.shape == ema.shape == (300, 4)
+    for k, w in enumerate(windows):
+        np.testing.assert_allclose(rsi[:, k], indicator_engine.add_rsi(df, window=w)["rsi"], rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(ema[:, k], indicator_engine.add_ema(df, fast=w, slow=w)["ema_fast"], rtol=1e-9, equal_nan=True)
+
+    out = indicator_engine.add_rsi_grid(df, windows)
+    assert {"rsi_5", "rsi_21"}.issubset(out.columns) and "rsi_5" not in df.columns
+
+    # a transposed or mis-sized buffer is rejected before the kernel writes into it
+    for bad in (np.empty((4, 300)), np.empty((300, 3)), np.empty((300, 4), dtype=np.float32)):
+        with pytest.raises(ValueError):
+            indicator_engine.rsi_grid(df, windows, out=bad)
+    into = np.empty((300, 4))
+    assert indicator_engine.ema_grid(df, windows, out=into) is into
+    np.testing.assert_array_equal(into, ema)
+
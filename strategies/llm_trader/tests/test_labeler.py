@@ -21,3 +21,43 @@ def test_label_trades_target_hits_first():
     })
     labeled = labeler.label_trades(df, reward_pips=3, risk_pips=3, lookahead=3)
     assert labeled.loc[0, "outcome"] == 1
+
+def test_label_trades_same_bar_tie_is_loss():
+    df = pd.DataFrame({
+        "high": [1.1000, 1.1005, 1.1000],
+        "low": [1.1000, 1.0995, 1.1000],
+        "close": [1.1000, 1.1000, 1.1000],
+        "setup": [True, False, False],
+    })
+    labeled = labeler.label_trades(df, reward_pips=3, risk_pips=3, lookahead=2)
+    assert labeled.loc[0, "outcome"] == 0
+
+def test_label_trades_expired_and_tail_rows():
+    df = pd.DataFrame({
+        "high": [1.1001] * 6,
+        "low": [1.0999] * 6,
+        "close": [1.1000] * 6,
+        "setup": [True, False, False, False, True, True],
+    })
+    labeled = labeler.label_trades(df, reward_pips=3, risk_pips=3, lookahead=2)
+    assert labeled.loc[0, "outcome"] == -1
+    # setups without a full lookahead window stay unlabeled
+    assert labeled.loc[4:, "outcome"].isna().all()
+
+def test_label_trades_grid_matches_single_runs():
+    import numpy as np
+    rng = np.random.default_rng(7)
+    n = 500
+    close = np.round(1.1 + np.cumsum(rng.normal(0, 1e-4, n)), 4)
+    df = pd.DataFrame({
+        "high": close + rng.integers(0, 4, n) * 1e-4,
+        "low": close - rng.integers(0, 4, n) * 1e-4,
+        "close": close,
+        "setup": rng.random(n) < 0.2,
+    })
+    r, k, la = np.meshgrid([2, 3], [1, 3], [3, 10], indexing="ij")
+    grid = labeler.label_trades_grid(df, r.ravel(), k.ravel(), la.ravel())
+    assert grid.outcomes.shape == (len(grid.rows), 8)
+    for c in range(8):
+        single = labeler.label_trades(df, grid.reward_pips[c], grid.risk_pips[c], int(grid.lookahead[c]))
+        np.testing.assert_array_equal(grid.column(c, n), single["outcome"].to_numpy())
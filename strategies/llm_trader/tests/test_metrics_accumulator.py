@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.llm_trader.core.backtester import Backtester
+from utils.metrics_accumulator import MetricsAccumulator
+
+
+def _reference(pnls: np.ndarray) -> dict:
+    equity = np.cumsum(np.insert(pnls, 0, 0.0))
+    win = pnls > 0
+    runs = "".join("W" if w else "L" for w in win)
+    return {
+        "total_trades": len(pnls),
+        "win_rate": win.mean(),
+        "expectancy": pnls.mean(),
+        "profit_factor": pnls[win].sum() / -pnls[~win].sum(),
+        "sharpe_ratio": Backtester._compute_sharpe(pnls),
+        "max_drawdown": (np.maximum.accumulate(equity) - equity).max(),
+        "max_win_streak": max(len(r) for r in runs.split("L")),
+        "max_loss_streak": max(len(r) for r in runs.split("W")),
+    }
+
+
+@pytest.fixture
+def pnls() -> np.ndarray:
+    rng = np.random.default_rng(11)
+    return np.round(rng.normal(0.1, 1.0, 500), 2)
+
+
+def test_update_matches_batch_reference(pnls):
+    acc = MetricsAccumulator()
+    for pnl in pnls:
+        acc.update(pnl)
+    for key, value in _reference(pnls).items():
+        assert acc.as_dict[key] == pytest.approx(value)
+    assert acc.as_dict == pytest.approx(MetricsAccumulator.from_array(pnls).as_dict)
+
+
+@pytest.mark.parametrize("cuts", [[1], [250], [3, 4, 5, 499], list(range(10, 500, 37))])
+def test_merge_of_ordered_shards_equals_whole(pnls, cuts):
+    shards = np.split(pnls, cuts)
+    merged = MetricsAccumulator()
+    for shard in shards:
+        merged = merged.merge(MetricsAccumulator.from_array(shard))
+    assert merged.as_dict == pytest.approx(MetricsAccumulator.from_array(pnls).as_dict)
+
+
+def test_merge_joins_streaks_across_the_boundary():
+    a = MetricsAccumulator.from_array([-1, 1, 1])
+    b = MetricsAccumulator.from_array([1, 1, -1])
+    merged = a.merge(b)
+    assert merged.max_win_streak == 4
+    assert merged.streak == -1
+
+    all_losses = MetricsAccumulator.from_array([-1, -1]).merge(MetricsAccumulator.from_array([-2, 3]))
+    assert all_losses.first_streak == -3
+    assert all_losses.max_loss_streak == 3
+
+
+def test_run_streaming_matches_run():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({"outcome": np.where(rng.random(3000) < 0.3, rng.choice([0, 1, -1], 3000), np.nan)})
+    expected = Backtester.run(df, 10_000, 0.01, 3, 1).as_dict
+
+    acc = Backtester.run_streaming((df.iloc[i:i + 256] for i in range(0, len(df), 256)), 3, 1)
+    for key in ("total_trades", "win_rate", "expectancy", "profit_factor", "sharpe_ratio", "average_win", "average_loss"):
+        assert acc.as_dict[key] == pytest.approx(expected[key])
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.llm_trader.core import monte_carlo
+from strategies.llm_trader.core.backtester import Backtester
+
+
+@pytest.fixture
+def returns() -> np.ndarray:
+    rng = np.random.default_rng(3)
+    return np.where(rng.random(400) < 0.45, 2.0, -1.0)
+
+
+def test_path_statistics_match_backtester_semantics(returns):
+    idx = monte_carlo.resample_indices(len(returns), 50, np.random.default_rng(1), "block", block_size=7)
+    final, dd, sharpe = np.empty(50), np.empty(50), np.empty(50)
+    ruined = np.empty(50, dtype=bool)
+    monte_carlo._path_statistics(returns, idx, 100.0, 10_000.0, 9_000.0, final, dd, sharpe, ruined)
+
+    curves = monte_carlo.equity_curves(returns[idx], 100.0, 10_000.0)
+    for p in range(50):
+        expected = Backtester._compute_equity_curve(returns[idx[p]], 100.0, 10_000.0)
+        np.testing.assert_array_equal(curves[p], expected)
+        peaks = np.maximum.accumulate(expected)
+        assert final[p] == expected[-1]
+        assert dd[p] == pytest.approx(np.max((peaks - expected) / peaks))
+        assert sharpe[p] == pytest.approx(Backtester._compute_sharpe(returns[idx[p]]))
+        assert ruined[p] == (expected.min() <= 9_000.0)
+
+
+def test_block_bootstrap_draws_circular_runs():
+    idx = monte_carlo.resample_indices(10, 20, np.random.default_rng(0), "block", block_size=4, length=10)
+    assert idx.shape == (20, 10)
+    blocks = idx[:, :8].reshape(20, 2, 4)
+    assert ((np.diff(blocks, axis=2) % 10) == 1).all()
+
+    with pytest.raises(ValueError):
+        monte_carlo.resample_indices(10, 2, np.random.default_rng(0), "stationary")
+
+
+def test_simulate_intervals_and_reproducibility(returns):
+    a = monte_carlo.simulate(returns, 10_000, 0.01, n_paths=2_000, method="block", seed=5)
+    b = monte_carlo.simulate(returns, 10_000, 0.01, n_paths=2_000, method="block", seed=5)
+    np.testing.assert_array_equal(a.final_equity, b.final_equity)
+
+    table = a.intervals
+    assert list(table.index) == ["final_equity", "max_drawdown", "sharpe_ratio", "risk_of_ruin"]
+    assert (table["lower"] <= table["estimate"]).all() and (table["estimate"] <= table["upper"]).all()
+    # iid resampling keeps the expected final equity of the original sequence
+    expected_final = Backtester._compute_equity_curve(returns, 100.0, 10_000)[-1]
+    iid = monte_carlo.simulate(returns, 10_000, 0.01, n_paths=2_000, seed=5)
+    assert iid.final_equity.mean() == pytest.approx(expected_final, rel=0.02)
+
+
+def test_risk_of_ruin_extremes():
+    losing = monte_carlo.simulate(np.full(100, -1.0), 10_000, 0.01, n_paths=100, ruin_fraction=0.5, seed=0)
+    assert losing.risk_of_ruin == 1.0
+    np.testing.assert_allclose(losing.max_drawdown, 1.0)
+
+    winning = monte_carlo.simulate(np.full(100, 2.0), 10_000, 0.01, n_paths=100, seed=0)
+    assert winning.risk_of_ruin == 0.0
+    assert (winning.sharpe_ratio == 0.0).all()   # zero variance, as _compute_sharpe
+
+
+def test_simulate_backtest_uses_labeled_trades():
+    df = pd.DataFrame({"outcome": [1, 0, np.nan, -1, 1, 0, 0]})
+    np.testing.assert_array_equal(monte_carlo.trade_returns(df, 3, 1), [3.0, -1.0, 3.0, -1.0, -1.0])
+    result = monte_carlo.simulate_backtest(df, 10_000, 0.01, 3, 1, n_paths=64, seed=1)
+    assert result.n_paths == 64
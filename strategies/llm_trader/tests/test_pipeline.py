@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from strategies.llm_trader.core import indicator_engine, labeler, setup_detector
+from strategies.llm_trader.core.pipeline import Pipeline
+
+
+def _write_data(path, n=300):
+    rng = np.random.default_rng(5)
+    close = 1.1 + np.cumsum(rng.normal(0, 2e-4, n))
+    pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="5min"),
+        "open": close,
+        "high": close + 2e-4,
+        "low": close - 2e-4,
+        "close": close,
+        "volume": 100.0,
+    }).to_parquet(path)
+
+
+def test_pipeline_matches_direct_calls(tmp_path):
+    data = tmp_path / "eurusd.parquet"
+    _write_data(data)
+
+    out = Pipeline(cache_dir=tmp_path / "cache").run(data, rsi_window=7, lookahead=4)
+
+    expected = pd.read_parquet(data)
+    expected = indicator_engine.add_rsi(expected, window=7)
+    expected = setup_detector.detect_rsi_reversal_breakout(expected)
+    expected = expected.drop(columns=["rsi_recent_min", "prev_high", "prev_low"])
+    expected = labeler.label_trades(expected, reward_pips=3.0, risk_pips=3.0, lookahead=4)
+    pd.testing.assert_frame_equal(out, expected, check_exact=False, rtol=1e-9)
+
+
+def test_changing_downstream_param_reuses_upstream_stages(tmp_path):
+    data = tmp_path / "eurusd.parquet"
+    _write_data(data)
+    pipeline = Pipeline(cache_dir=tmp_path / "cache")
+
+    pipeline.run(data, rsi_window=7, lookahead=4)
+    assert set(pipeline.last_run.values()) == {"computed"}
+
+    first = pipeline.run(data, rsi_window=7, lookahead=4)
+    assert pipeline.last_run == {"indicators": "cached", "setups": "cached", "labels": "cached"}
+
+    changed = pipeline.run(data, rsi_window=7, lookahead=8)
+    assert pipeline.last_run == {"indicators": "cached", "setups": "cached", "labels": "computed"}
+    assert not changed["outcome"].equals(first["outcome"])
+
+    pipeline.run(data, rsi_window=14, lookahead=8)
+    assert pipeline.last_run["indicators"] == "computed"
+
+    # new data invalidates everything
+    _write_data(data, n=320)
+    pipeline.run(data, rsi_window=7, lookahead=4)
+    assert set(pipeline.last_run.values()) == {"computed"}
+
+
+def test_pipeline_without_cache_dir_writes_nothing(tmp_path):
+    data = tmp_path / "eurusd.parquet"
+    _write_data(data)
+    Pipeline(cache_dir=None).run(data)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["eurusd.parquet"]
@@ -23,3 +23,20 @@ def test_detect_rsi_reversal_breakout_no_trigger_when_flat():
     })
     df = setup_detector.detect_rsi_reversal_breakout(df)
     assert not df["setup"].any()
+
+
+def test_inplace_cooldown_matches_default():
+    rng = np.random.default_rng(3)
+    n = 300
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, n))
+    df = pd.DataFrame({
+        "high": close + 1e-4,
+        "low": close - 1e-4,
+        "close": close,
+        "rsi": rng.uniform(10, 60, n),
+    })
+    expected = setup_detector.detect_rsi_reversal_breakout(df, cooldown=4)
+    target = df.copy()
+    assert setup_detector.detect_rsi_reversal_breakout(target, cooldown=4, inplace=True) is target
+    assert target["setup"].tolist() == expected["setup"].tolist()
+    assert target["setup"].dtype == bool
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.llm_trader.core import setup_detector, setup_registry
+from strategies.llm_trader.core.setup_registry import SetupVariant
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(9)
+    n = 1000
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, n))
+    rsi = rng.uniform(10, 70, n)
+    rsi[:5] = np.nan
+    return pd.DataFrame({
+        "high": close + rng.random(n) * 1e-4,
+        "low": close - rng.random(n) * 1e-4,
+        "close": close,
+        "rsi": rsi,
+    })
+
+
+def test_registry_matches_dataframe_detectors(df):
+    variants = [
+        SetupVariant(f"brk_{lb}_{cd}", "rsi_reversal_breakout", {"lookback": lb, "cooldown": cd, "rsi_threshold": 25.0})
+        for lb in (1, 3, 6) for cd in (0, 5)
+    ] + [SetupVariant("cross", "rsi_cross_under", {"threshold": 35.0})]
+    columns_before = list(df.columns)
+
+    masks = setup_registry.evaluate(df, variants)
+
+    assert list(df.columns) == columns_before
+    assert list(masks.columns) == [v.label for v in variants]
+    assert all(masks[c].dtype == bool for c in masks.columns)
+    for lb in (1, 3, 6):
+        for cd in (0, 5):
+            expected = setup_detector.detect_rsi_reversal_breakout(df, rsi_threshold=25.0, lookback=lb, cooldown=cd)
+            assert masks[f"brk_{lb}_{cd}"].tolist() == expected["setup"].tolist()
+    assert masks["cross"].tolist() == setup_detector.detect_rsi_reversals(df, threshold=35.0)["setup"].tolist()
+
+
+def test_setup_mask_and_unknown_names(df):
+    mask = setup_registry.setup_mask(df, "rsi_reversal_breakout")
+    assert mask.dtype == bool and len(mask) == len(df)
+    with pytest.raises(KeyError):
+        setup_registry.setup_mask(df, "nope")
+    with pytest.raises(KeyError):
+        setup_registry.setup_mask(df, "rsi_cross_under", lookback=3)
@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.llm_trader.core import indicator_engine, labeler, setup_registry
+from strategies.llm_trader.core.backtester import Backtester
+from strategies.llm_trader.runner.walk_forward import WalkForwardOptimizer
+
+
+GRID = {
+    "rsi_window": [5, 9],
+    "rsi_threshold": [35.0, 45.0],
+    "lookback": [2, 4],
+    "reward_pips": [2.0, 4.0],
+    "risk_pips": [2.0],
+    "lookahead": [6, 10],
+}
+
+
+@pytest.fixture
+def data_path(tmp_path: Path) -> Path:
+    rng = np.random.default_rng(4)
+    n = 4000
+    close = 1.1 + np.cumsum(rng.normal(0, 2e-4, n))
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="15min"),
+        "open": close,
+        "high": close + rng.random(n) * 3e-4,
+        "low": close - rng.random(n) * 3e-4,
+        "close": close,
+        "volume": 1000,
+    })
+    path = tmp_path / "eurusd_15m.parquet"
+    df.to_parquet(path)
+    return path
+
+
+def _optimizer(data_path: Path, out: Path, **kwargs) -> WalkForwardOptimizer:
+    return WalkForwardOptimizer(
+        data_path, out, in_sample_days=8, out_of_sample_days=4, param_grid=GRID, min_trades=5, **kwargs
+    )
+
+
+def test_candidate_metrics_match_per_window_backtests(data_path, tmp_path):
+    optimizer = _optimizer(data_path, tmp_path / "out", max_workers=1)
+    df = pd.read_parquet(data_path)
+    table = optimizer.evaluate_candidates(df)
+    ts = df["timestamp"].dt.as_unit("ns").astype("int64").to_numpy()
+    windows = optimizer.windows(ts)
+
+    assert set(table["sample"]) == {"in", "out"}
+    assert len(table) == 2 * len(windows) * 2 ** 5
+
+    rng = np.random.default_rng(0)
+    for _, row in table.iloc[rng.choice(len(table), 40, replace=False)].iterrows():
+        frame = indicator_engine.add_rsi(df, window=int(row["rsi_window"]))
+        frame["setup"] = setup_registry.setup_mask(
+            frame, "rsi_reversal_breakout", rsi_threshold=row["rsi_threshold"], lookback=row["lookback"]
+        )
+        frame = labeler.label_trades(
+            frame, reward_pips=row["reward_pips"], risk_pips=row["risk_pips"], lookahead=int(row["lookahead"])
+        )
+        prefix = "is" if row["sample"] == "in" else "oos"
+        start, end = windows.loc[row["window"], [f"{prefix}_start", f"{prefix}_end"]]
+        positions = np.arange(len(frame))
+        last = np.searchsorted(ts, end) - int(row["lookahead"])
+        inside = (ts >= start) & (positions < last)
+
+        expected = Backtester.run(frame[inside], 10_000, 0.01, row["reward_pips"], row["risk_pips"]).as_dict
+        for key, value in expected.items():
+            assert row[key] == pytest.approx(value)
+
+
+def test_process_pool_matches_in_process(data_path, tmp_path):
+    df = pd.read_parquet(data_path)
+    serial = _optimizer(data_path, tmp_path / "a", max_workers=1).evaluate_candidates(df)
+    parallel = _optimizer(data_path, tmp_path / "b", max_workers=3).evaluate_candidates(df)
+
+    key = ["sample", "window", *GRID]
+    pd.testing.assert_frame_equal(
+        serial.sort_values(key).reset_index(drop=True),
+        parallel.sort_values(key).reset_index(drop=True),
+    )
+
+
+def test_run_picks_in_sample_best_and_saves_report(data_path, tmp_path):
+    out = tmp_path / "out"
+    optimizer = _optimizer(data_path, out, max_workers=2)
+    report = optimizer.run()
+
+    assert not report.empty
+    assert (out / "walk_forward.parquet").exists()
+    assert (out / "walk_forward.json").exists()
+    assert {"is_start", "is_end", "oos_start", "oos_end", "is_expectancy", "oos_expectancy"}.issubset(report.columns)
+    assert (report["oos_start"] == report["is_end"]).all()
+
+    table = optimizer.candidates
+    for _, row in report.iterrows():
+        eligible = table[(table["sample"] == "in") & (table["window"] == row["window"]) & (table["total_trades"] >= 5)]
+        assert row["is_expectancy"] == eligible["expectancy"].max()
+        assert row["is_total_trades"] >= 5
+
+
+def test_unknown_parameter_rejected(data_path, tmp_path):
+    with pytest.raises(KeyError):
+        WalkForwardOptimizer(data_path, tmp_path, 8, 4, param_grid={"threshold": [30]})
@@ -1,24 +1,35 @@
 # rules_based/strategies/rsi_lowrider/backtest.py
 
 from __future__ import annotations
+import textwrap
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 
 from brokers.tradelocker import TradeLockerBroker
 from models.candle import Candle
+from models.candle_array import CandleArray
 from models.forex_instrument import ForexInstrument
-from brokers.backtest import BacktestBroker
+from brokers.backtest import BacktestBroker, read_csv_rows
+from data.store.candle_store import CandleStore
 from models.cycle import Cycle
 from models.trade import Trade
+from strategies.llm_trader.core.kernels import rsi_into
 from strategies.rules_based.rsi_lowrider.dto.backtest_results_dto import LowriderBacktestResultsDto, LowriderCandleState
 from strategies.rules_based.rsi_lowrider.market_signals import RSILowriderSignals
 from strategies.rules_based.rsi_lowrider.logger import BacktestLogger
+from strategies.rules_based.rsi_lowrider.series_sink import LazySeries, SeriesSink
+from strategies.rules_based.rsi_lowrider.snapshots import BacktestSnapshotStore, LowriderRunState
 from web.trader_backend.schemas.backtest import BacktestRequest, RsiLowriderBacktestRequest
 
 
+JSON_OUTPUT_PATH = Path(__file__).parent / "../../../data/raw/lowrider_backtest_output.json"
+JSON_SERIES_END = b"\n  ]\n}"     # how json.dump(indent=2) closes {"series": [...]}
+
+
 @dataclass
 class BacktestResult:
     candles: list[Candle]
@@ -37,8 +48,23 @@ class PositionEvents:
 
 class RSILowriderBacktester:
 
-    def __init__(self):
-        self.strategy = RSILowriderSignals()
+    def __init__(
+        self,
+        strategy_factory: Optional[Callable[[], object]] = None,
+        csv_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            strategy_factory: zero-argument callable returning an object with
+                on_candle_just_closed(broker, candle) and an rsi_list;
+                defaults to RSILowriderSignals.
+            csv_path: 1m candle CSV read by get_backtest_results; defaults to
+                data/raw/lowrider_1m_backtest_tradelocker_output.csv.
+        """
+        self.strategy_factory = strategy_factory
+        self.csv_path = csv_path
+        self.json_output_path = JSON_OUTPUT_PATH
+        self.strategy = self._new_strategy()
         self.instrument = ForexInstrument(
                             symbol="EURUSD",
                             pip_size=0.0001,
@@ -46,6 +72,10 @@ class RSILowriderBacktester:
                             description="Euro vs US Dollar"
                         )
 
+    def _new_strategy(self, **kwargs):
+        """A fresh strategy; `kwargs` only apply to the default RSILowriderSignals."""
+        return self.strategy_factory() if self.strategy_factory else RSILowriderSignals(**kwargs)
+
     # ------------------------------------------------------------
     # CSV of real TL 1m candles
     # ------------------------------------------------------------
@@ -66,9 +96,19 @@ class RSILowriderBacktester:
             )
         return candles
     
-    async def get_backtest_results(self, request: RsiLowriderBacktestRequest) -> LowriderBacktestResultsDto:
-
-        strategy = RSILowriderSignals()
+    async def get_backtest_results(
+        self,
+        request: RsiLowriderBacktestRequest,
+        snapshots: Optional[BacktestSnapshotStore] = None,
+    ) -> LowriderBacktestResultsDto:
+        """
+        Candle-by-candle Lowrider states for the request's range. With a
+        snapshot store, a run that extends an earlier one (same parameters,
+        later end date) resumes from its saved state: it only reads the CSV
+        from the snapshot's last candle on, simulates the new candles,
+        returns the series lazily from the snapshot's parts and appends the
+        new rows to the JSON output.
+        """
         broker = BacktestBroker()
 
         # -------------------------
@@ -76,152 +116,195 @@ class RSILowriderBacktester:
         # -------------------------
         import os
         BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        CSV_PATH = os.path.join(
+        CSV_PATH = self.csv_path or os.path.join(
             BASE_DIR,
             "../../../data/raw/lowrider_1m_backtest_tradelocker_output.csv"
         )
 
-        candles = broker.get_candles_range_from_csv(
-            file_path=CSV_PATH,
-            resolution=request.frequency,
-            date_from=request.date_from,
-            date_to=request.date_to
-        )
+        if snapshots is None:
+            candles = broker.get_candles_range_from_csv(
+                file_path=CSV_PATH,
+                resolution=request.frequency,
+                date_from=request.date_from,
+                date_to=request.date_to
+            )
+            state = LowriderRunState(strategy=self._new_strategy(), broker=broker)
+            dto = LowriderBacktestResultsDto(series=[self._step(state, candle) for candle in candles])
+            self.save_backtest_results_to_json(dto)
+            return dto
 
-        series: list[LowriderCandleState] = []
+        # -------------------------
+        # Resume from a snapshot: read the CSV from its last candle on
+        # -------------------------
+        params = {**request.model_dump(exclude={"date_to"}), "source": os.path.normpath(CSV_PATH)}
+        key = snapshots.key(params)
+        meta = snapshots.meta(key)
+        offset, first = snapshots.resume_point(meta)
+        rows = read_csv_rows(CSV_PATH, offset)
+        candles = broker.candles_in_range(rows, request.frequency, request.date_from, request.date_to)
+        state = snapshots.load(key, meta, candles, first)
+        if state is None:
+            meta = None
+            if first:
+                rows = read_csv_rows(CSV_PATH)
+                candles = broker.candles_in_range(rows, request.frequency, request.date_from, request.date_to)
+                first = 0
+            state = LowriderRunState(strategy=self._new_strategy(), broker=broker)
 
-        # ------------------------------------------------------------
-        # EVENT TRACKING SUPPORT
-        # ------------------------------------------------------------
+        # ============================================================
+        # 3. MAIN LOOP
+        # ============================================================
+        candles = candles[state.n_bars - first:]
+        new = [self._step(state, candle) for candle in candles]
 
-        def detect_anchor(previous_position_state, current_position_state) -> bool:
-            """Position went from None → active (first trade is anchor). In other words, a position was just opened."""
-            return previous_position_state is None and current_position_state is not None
+        series = None
+        if state.n_bars:
+            series = snapshots.save(key, state, meta, new, candles, self._row_offset(rows, candles))
+        appended_from = meta["n"] if meta is not None else 0
+        dto = LowriderBacktestResultsDto(series=series if series is not None else new)
 
-        def detect_tp_hit(previous_num_closed_trades, current_num_closed_trades) -> bool: 
-            """Closed-trade count increased → TP triggered."""
-            if current_num_closed_trades > previous_num_closed_trades:
-                t = 0
-            return current_num_closed_trades > previous_num_closed_trades
+        self.save_backtest_results_to_json(dto, series_key=key, appended_from=appended_from)
+        return dto
 
-        # For detecting rung creation and fills:
-        def count_pending_rungs(position: Cycle):
-            if not position:
-                return 0
-            return sum(1 for t in position.positions if t.is_pending)
+    @staticmethod
+    def _row_offset(rows: pd.DataFrame, candles: list[Candle]) -> Optional[int]:
+        """Byte offset of the first CSV row of the last simulated candle (None if the CSV is not in time order)."""
+        if not candles or not rows["timestamp"].is_monotonic_increasing:
+            return None
+        last = pd.Timestamp(candles[-1].timestamp)
+        last = last.tz_localize("UTC") if last.tzinfo is None else last
+        return int(rows["offset"].iloc[rows["timestamp"].searchsorted(last, side="left")])
+
+    def stream_backtest_results(
+        self,
+        request: RsiLowriderBacktestRequest,
+        output_path: str | Path,
+        store: Optional[CandleStore] = None,
+        chunk_rows: int = 50_000,
+    ) -> LazySeries:
+        """
+        Constant-memory variant of get_backtest_results: candles are read
+        chunk by chunk from the candle store (request.asset's 1m bars,
+        resampled to request.frequency as they stream, like the CSV in
+        get_backtest_results), each candle state is appended to a parquet
+        sink at `output_path`, and the series is returned unread. The broker
+        drops closed cycles and the strategy keeps only the last RSI values,
+        so memory does not grow with the length of the range.
+        """
+        store = store or CandleStore()
+        broker = BacktestBroker(symbol=request.asset, csv_path=None, candle_store=store, keep_closed_cycles=False)
+        state = LowriderRunState(strategy=self._new_strategy(rsi_history=2), broker=broker)
+
+        start_ms = int(request.date_from.timestamp() * 1000)
+        end_ms = int(request.date_to.timestamp() * 1000)
+        with SeriesSink(output_path) as sink:
+            for chunk in store.iter_resampled_chunks(request.asset, request.frequency, start_ms, end_ms, chunk_rows):
+                for candle in chunk.to_candles():
+                    sink.append(self._step(state, candle))
+        return sink.series
 
-        def count_active_rungs(position: Cycle):
-            if not position:
-                return 0
-            return sum(1 for t in position.positions if not t.is_pending and t.exit_price is None)
+    # ------------------------------------------------------------
+    # EVENT TRACKING SUPPORT
+    # ------------------------------------------------------------
+    @staticmethod
+    def _count_pending_rungs(position: Cycle | None) -> int:
+        if not position:
+            return 0
+        return sum(1 for t in position.positions if t.is_pending)
+
+    @staticmethod
+    def _count_active_rungs(position: Cycle | None) -> int:
+        if not position:
+            return 0
+        return sum(1 for t in position.positions if not t.is_pending and t.exit_price is None)
+
+    def _step(self, state: LowriderRunState, candle: Candle) -> LowriderCandleState:
+        """Advance the simulation by one candle and return its state."""
+        strategy, broker = state.strategy, state.broker
+
+        # Order: STRATEGY FIRST, then BROKER processing
+        strategy.on_candle_just_closed(broker, candle)
+        broker.process_candle(candle)
+        state.n_bars += 1
 
-        # Track previous state for event comparisons
-        previous_position = None
-        previous_num_closed_trades = 0
-        previous_pending_rungs = 0
+        # -------------------------
+        # Compute RSI for DTO
+        # -------------------------
+        rsi_value = strategy.rsi_list[-1] if strategy.rsi_list else 0.0
 
-        # ============================================================
-        # 3. MAIN LOOP
-        # ============================================================
-        for candle in candles:
+        # -------------------------
+        # Current broker state
+        # -------------------------
+        current_position = broker.get_active_cycle()
+        active_trades = broker.get_open_trades()
 
-            # Order: STRATEGY FIRST, then BROKER processing
-            strategy.on_candle_just_closed(broker, candle)
-            broker.process_candle(candle)
+        num_active_trades = len([t for t in active_trades if not t.is_pending])
+        num_pending_trades = len([t for t in active_trades if t.is_pending])
+        current_num_closed_trades = broker.closed_trade_count()
 
-            # -------------------------
-            # Compute RSI for DTO
-            # -------------------------
-            rsi_value = strategy.rsi_list[-1] if strategy.rsi_list else 0.0
-
-            # -------------------------
-            # Current broker state
-            # -------------------------
-            current_position = broker.get_active_cycle()
-            active_trades = broker.get_open_trades()
-
-            num_active_trades = len([t for t in active_trades if not t.is_pending])
-            num_pending_trades = len([t for t in active_trades if t.is_pending])
-            current_num_closed_trades = sum(
-                1 for p in broker.positions for t in p.positions if t.exit_price is not None
-            )
+        # Rungs
+        num_active_rungs = self._count_active_rungs(current_position)
+        num_pending_rungs = self._count_pending_rungs(current_position)
 
-            # Rungs
-            num_active_rungs = count_active_rungs(current_position)
-            num_pending_rungs = count_pending_rungs(current_position)
-
-            # PnL & Equity
-            unrealized_pnl = broker.unrealized_pnl(candle.close)
-            realized_pnl = broker.realized_pnl()
-            equity = realized_pnl + unrealized_pnl
-
-            # -------------------------
-            # EVENT DETECTION
-            # -------------------------
-            events: list[str] = []
-
-            # Detect anchor
-            if detect_anchor(previous_position, current_position):
-                events.append(PositionEvents.ANCHOR)
-
-            # Detect TP hit
-            if detect_tp_hit(previous_num_closed_trades, current_num_closed_trades):
-                events.append(PositionEvents.TP_HIT)
-
-            # Detect rung creation (increase in pending trades)
-            if current_position and num_pending_rungs > previous_pending_rungs:
-                events.append(PositionEvents.RUNG_ADDED)
-
-            # Detect rung filled (pending reduced because one filled)
-            if current_position and num_pending_rungs < previous_pending_rungs:
-                events.append(PositionEvents.RUNG_FILLED)
-
-            # Detect full close
-            if previous_position is not None and current_position is None:
-                events.append(PositionEvents.POSITION_CLOSED)
-
-            # -------------------------
-            # Store the candle state
-            # -------------------------
-            state = LowriderCandleState(
-                timestamp=str(candle.timestamp),
-                open=candle.open,
-                high=candle.high,
-                low=candle.low,
-                close=candle.close,
-                volume=candle.volume,
-
-                current_rsi_value=rsi_value,
-                events=events,
-
-                num_active_rungs=num_active_rungs,
-                num_pending_rungs=num_pending_rungs,
-
-                num_active_trades=num_active_trades,
-                num_pending_trades=num_pending_trades,
-                num_closed_trades=current_num_closed_trades,
-
-                realized_pnl=realized_pnl,
-                unrealized_pnl=unrealized_pnl,
-                equity=equity,
-            )
+        # PnL & Equity
+        unrealized_pnl = broker.unrealized_pnl(candle.close)
+        realized_pnl = broker.realized_pnl()
+        equity = realized_pnl + unrealized_pnl
 
-            series.append(state)
+        # -------------------------
+        # EVENT DETECTION
+        # -------------------------
+        events: list[str] = []
 
-            # -------------------------
-            # Update previous snapshot
-            # -------------------------
-            previous_position = current_position
-            previous_num_closed_trades = current_num_closed_trades
-            previous_pending_rungs = num_pending_rungs
+        # Anchor: position went from None → active (a position was just opened)
+        if state.previous_position is None and current_position is not None:
+            events.append(PositionEvents.ANCHOR)
 
-        # Wrap result
-        dto = LowriderBacktestResultsDto(series=series)
+        # TP hit: closed-trade count increased
+        if current_num_closed_trades > state.previous_num_closed_trades:
+            events.append(PositionEvents.TP_HIT)
 
-        # Save if needed
-        self.save_backtest_results_to_json(dto)
+        # Detect rung creation (increase in pending trades)
+        if current_position and num_pending_rungs > state.previous_pending_rungs:
+            events.append(PositionEvents.RUNG_ADDED)
 
-        return dto
+        # Detect rung filled (pending reduced because one filled)
+        if current_position and num_pending_rungs < state.previous_pending_rungs:
+            events.append(PositionEvents.RUNG_FILLED)
+
+        # Detect full close
+        if state.previous_position is not None and current_position is None:
+            events.append(PositionEvents.POSITION_CLOSED)
+
+        # -------------------------
+        # Update previous snapshot
+        # -------------------------
+        state.previous_position = current_position
+        state.previous_num_closed_trades = current_num_closed_trades
+        state.previous_pending_rungs = num_pending_rungs
+
+        return LowriderCandleState(
+            timestamp=str(candle.timestamp),
+            open=candle.open,
+            high=candle.high,
+            low=candle.low,
+            close=candle.close,
+            volume=candle.volume,
+
+            current_rsi_value=rsi_value,
+            events=events,
+
+            num_active_rungs=num_active_rungs,
+            num_pending_rungs=num_pending_rungs,
+
+            num_active_trades=num_active_trades,
+            num_pending_trades=num_pending_trades,
+            num_closed_trades=current_num_closed_trades,
+
+            realized_pnl=realized_pnl,
+            unrealized_pnl=unrealized_pnl,
+            equity=equity,
+        )
 
     # ------------------------------------------------------------
     # MAIN BACKTEST LOOP
@@ -315,17 +398,15 @@ class RSILowriderBacktester:
             ax2.legend(loc="upper right")
             
             # ------------------------ RSI LINE ------------------------
-            # Full price series
-            price_series = pd.Series(closes)
-
-            # Compute RSI
-            rsi_raw = ta.rsi(price_series, length=self.strategy.config.rsi_period)
+            # Compute RSI (compiled Wilder kernel, same as the indicator cache)
+            rsi_raw = np.empty(len(closes))
+            rsi_into(np.asarray(closes, dtype=np.float64), self.strategy.config.rsi_period, rsi_raw)
 
             # Drop NaNs (warm-up period)
-            valid = ~rsi_raw.isna()
+            valid = ~np.isnan(rsi_raw)
 
             rsi_series = rsi_raw[valid]
-            times_rsi = [times[i] for i in range(len(times)) if valid.iloc[i]]
+            times_rsi = [times[i] for i in range(len(times)) if valid[i]]
 
             # Plot RSI
             fig_rsi, ax_rsi = plt.subplots(figsize=(14, 3))
@@ -344,6 +425,52 @@ class RSILowriderBacktester:
 
         return result
 
+    # ------------------------------------------------------------
+    # STRESS TEST OVER SYNTHETIC PATHS
+    # ------------------------------------------------------------
+    def stress_test(
+        self,
+        paths: Iterable[CandleArray],
+        strategy_factory: Optional[Callable[[], object]] = None,
+    ) -> pd.DataFrame:
+        """
+        Run the ladder over every path (e.g. data.synthetic.price_paths.
+        PricePathGenerator(seed=1).paths(1_000, 43_200)) with a fresh strategy
+        and fixed-point broker each, and return one row per path: deepest
+        filled rung, max drawdown of realized + unrealized equity, final
+        equity and number of cycles. The describe() / quantiles of the
+        columns are the depth and drawdown distributions.
+
+        `strategy_factory` builds the strategy of each path (any object with
+        on_candle_just_closed(broker, candle)); defaults to the backtester's.
+        """
+        rows = []
+        for path_id, bars in enumerate(paths):
+            strategy = strategy_factory() if strategy_factory else self._new_strategy()
+            broker = BacktestBroker(symbol=self.instrument.symbol, csv_path=None, fixed_point=True)
+
+            equity = peak = max_drawdown = 0.0
+            for candle in bars.to_candles():
+                strategy.on_candle_just_closed(broker, candle)
+                broker.process_candle(candle)
+                equity = broker.realized_pnl() + broker.unrealized_pnl(candle.close)
+                peak = max(peak, equity)
+                max_drawdown = max(max_drawdown, peak - equity)
+
+            depths = [
+                max((t.ladder_position for t in cycle.positions if not t.is_pending), default=0)
+                for cycle in broker.positions
+            ]
+            rows.append({
+                "path": path_id,
+                "bars": len(bars),
+                "cycles": len(broker.positions),
+                "max_depth": max(depths, default=0),
+                "max_drawdown": max_drawdown,
+                "final_equity": equity,
+            })
+        return pd.DataFrame(rows)
+
     # def _build_candle_state(
     #     self,
     #     candle: Candle,
@@ -425,28 +552,48 @@ class RSILowriderBacktester:
             return {k: self._json_safe(v) for k, v in asdict(value).items()}
 
         # list → list of safe values
-        if isinstance(value, list):
+        if isinstance(value, (list, LazySeries)):
             return [self._json_safe(v) for v in value]
 
         # everything else returned as-is
         return value
 
 
-    def save_backtest_results_to_json(self, dto):
+    def save_backtest_results_to_json(self, dto, series_key: Optional[str] = None, appended_from: int = 0):
         """
         Serialize a LowriderBacktestResultsDto to a JSON file safely.
         Converts timestamps and nested dataclasses properly.
+
+        With `series_key` (the snapshot entry the series belongs to), a file
+        last written for that key with exactly `appended_from` rows only gets
+        the rows after them appended; `<name>.rows.json` records the key, row
+        count and file size after every write.
         """
         import os
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        CSV_PATH = os.path.join(BASE_DIR, "../../../data/raw/lowrider_backtest_output.json")
         import json
-        safe_dict = self._json_safe(dto)
-
-        with open(CSV_PATH, "w") as f:
-            json.dump(safe_dict, f, indent=2)
-
-        return CSV_PATH
+        path = Path(self.json_output_path)
+        rows_path = path.with_name(path.stem + ".rows.json")
+
+        written = None
+        if series_key is not None and appended_from and path.exists() and rows_path.exists():
+            written = json.loads(rows_path.read_text())
+            if written != {"key": series_key, "n": appended_from, "size": path.stat().st_size}:
+                written = None
+
+        if written is None:
+            with open(path, "w") as f:
+                json.dump(self._json_safe(dto), f, indent=2)
+        elif len(dto.series) > appended_from:
+            new = dto.series.iter_rows(appended_from) if isinstance(dto.series, LazySeries) else dto.series[appended_from:]
+            text = ",\n".join(textwrap.indent(json.dumps(self._json_safe(row), indent=2), " " * 4) for row in new)
+            with open(path, "r+b") as f:
+                f.seek(-len(JSON_SERIES_END), os.SEEK_END)
+                f.write((",\n" + text).encode() + JSON_SERIES_END)
+
+        if series_key is not None:
+            record = {"key": series_key, "n": len(dto.series), "size": path.stat().st_size}
+            rows_path.write_text(json.dumps(record))
+        return str(path)
 
         
 
@@ -1,4 +1,5 @@
-from typing import List
+from collections import deque
+from typing import Deque, List, Optional
 import pandas as pd
 import pandas_ta as ta
 
@@ -9,9 +10,11 @@ rsi_lowrider_config = config.RSI_LOWRIDER_CONFIG
 
 class RSILowriderSignals:
 
-    def __init__(self):
-        self.candles: List[Candle] = []
-        self.rsi_list: List[float] = []
+    def __init__(self, rsi_history: Optional[int] = None):
+        # the last FETCH_COUNT closed candles, the window the live Session sees
+        self.candles: Deque[Candle] = deque(maxlen=config.FETCH_COUNT)
+        # rsi_history bounds rsi_list to the last N values (long streaming runs)
+        self.rsi_list: List[float] = deque(maxlen=rsi_history) if rsi_history else []
 
     # -----------------------------------------------------
     # Compute RSI for current candle
@@ -42,4 +45,38 @@ class RSILowriderSignals:
             enter_position = ((was_below and curled_up) or was_very_low)
         
         return enter_position
-    
\ No newline at end of file
+
+    # -----------------------------------------------------
+    # Backtest adapter (same rules as Session.loop)
+    # -----------------------------------------------------
+    def on_candle_just_closed(self, broker, candle: Candle) -> None:
+        """
+        Called by the backtesters on every closed candle, before
+        broker.process_candle(candle). Once the Session's candle window is
+        full, checks the RSI entry; on a signal, or while a cycle is active,
+        places every missing rung (depth 0 at the close, then
+        POSITION_DISTANCE_IN_PIPS apart, each with its TP) via broker.add_rung.
+        Prices are computed in integer points, as in Session.
+        """
+        self.candles.append(candle)
+        if len(self.candles) < self.candles.maxlen:
+            return
+        should_go_long = self.should_enter_long_position(list(self.candles))
+
+        cycle = broker.current_position      # includes a ladder whose rungs are all still pending
+        existing_depths = {t.ladder_position for t in cycle.positions} if cycle is not None else set()
+        if not (should_go_long or existing_depths):
+            return
+
+        instrument = broker.instrument
+        anchor_pts = instrument.to_points(candle.close)
+        step_pts = instrument.pips_to_points(rsi_lowrider_config.POSITION_DISTANCE_IN_PIPS)
+        tp_pts = instrument.pips_to_points(rsi_lowrider_config.TP_TARGET_IN_PIPS)
+        for depth in sorted(set(range(config.MAX_ALLOWABLE_SIMULTANEOUS_POSITIONS)) - existing_depths):
+            entry_pts = anchor_pts - depth * step_pts
+            broker.add_rung(
+                entry_price=instrument.from_points(entry_pts),
+                tp_price=instrument.from_points(entry_pts + tp_pts),
+                lot_size=rsi_lowrider_config.LOT_SIZE,
+                ladder_position=depth,
+            )
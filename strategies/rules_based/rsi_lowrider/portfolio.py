@@ -0,0 +1,334 @@
+"""
+portfolio.py
+------------
+Multi-instrument RSI Lowrider backtest: one BacktestBroker + strategy per
+symbol, each in its own worker process, merged into one account.
+
+    backtester = PortfolioBacktester(["EURUSD", "GBPJPY"], limits=PortfolioLimits(max_concurrent_cycles=1))
+    result = backtester.run_from_store(CandleStore(), "1m", start_ms, end_ms)
+    result.frame                 # combined equity / margin / open cycles per timestamp
+    result.cycles                # every cycle with its PnL and whether the account took it
+
+Symbols are independent until the merge, so the per-symbol simulations (the
+expensive part) scale across cores. Each worker records, per bar, the cycle
+that was active, that cycle's PnL in account currency (realized +
+unrealized, via the instrument's pip value) and its open lots.
+
+The merge puts every symbol on the union of their timestamps (values carry
+forward over a symbol's missing bars) and applies the account limits in
+start-time order: a cycle is taken only if fewer than
+`max_concurrent_cycles` accepted cycles are still open, and the margin of
+its full ladder plus that of the open cycles fits within
+`max_margin_fraction` of the realized balance. A rejected cycle contributes
+nothing to equity or exposure. The strategy of that symbol does not learn
+about the rejection, so it would not have re-anchored during that cycle's
+lifetime; treat limit-heavy runs as an approximation.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from brokers.backtest import BacktestBroker
+from data.constants.forex_instruments import ForexInstruments
+from data.store.candle_store import CandleStore
+from models.candle_array import CandleArray
+from models.cycle import Cycle
+from models.forex_instrument import ForexInstrument
+
+
+@dataclass(frozen=True)
+class PortfolioLimits:
+    initial_balance: float = 10_000.0
+    max_concurrent_cycles: Optional[int] = None     # across all symbols; None = unlimited
+    margin_per_lot: Mapping[str, float] | float = 1_000.0
+    max_margin_fraction: float = 1.0                # of the realized balance
+
+    def margin(self, symbol: str) -> float:
+        if isinstance(self.margin_per_lot, Mapping):
+            return float(self.margin_per_lot[symbol])
+        return float(self.margin_per_lot)
+
+
+@dataclass
+class SymbolRun:
+    """Per-bar state of one symbol's unconstrained simulation."""
+    symbol: str
+    timestamp: np.ndarray     # int64 epoch ms
+    cycle: np.ndarray         # int32 index of the cycle active on the bar, -1 if none
+    cycle_pnl: np.ndarray     # that cycle's PnL at the bar close (account currency)
+    open_lots: np.ndarray     # filled, not yet exited lots of that cycle
+    cycle_start: np.ndarray   # bar index of each cycle's first order
+    cycle_end: np.ndarray     # bar index it closed on (last bar if still open)
+    cycle_lots: np.ndarray    # total lots ordered by each cycle (its full ladder)
+
+    @property
+    def cycle_final_pnl(self) -> np.ndarray:
+        return self.cycle_pnl[self.cycle_end]
+
+
+@dataclass
+class PortfolioResult:
+    timestamp: np.ndarray
+    equity: np.ndarray                           # initial balance + PnL of accepted cycles
+    open_cycles: np.ndarray
+    margin_used: np.ndarray
+    symbol_equity: Dict[str, np.ndarray] = field(default_factory=dict)    # PnL per symbol
+    symbol_exposure: Dict[str, np.ndarray] = field(default_factory=dict)  # open lots per symbol
+    cycles: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        df = pd.DataFrame({
+            "timestamp": pd.to_datetime(self.timestamp, unit="ms", utc=True),
+            "equity": self.equity,
+            "open_cycles": self.open_cycles,
+            "margin_used": self.margin_used,
+        })
+        for symbol in self.symbol_equity:
+            df[f"{symbol}_pnl"] = self.symbol_equity[symbol]
+            df[f"{symbol}_lots"] = self.symbol_exposure[symbol]
+        return df
+
+    @property
+    def max_drawdown(self) -> float:
+        peaks = np.maximum.accumulate(self.equity)
+        return float(np.max((peaks - self.equity) / peaks)) if len(self.equity) else 0.0
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+def _default_strategy():
+    from strategies.rules_based.rsi_lowrider.market_signals import RSILowriderSignals
+    return RSILowriderSignals()
+
+
+def _cycle_state(cycle: Cycle, close: float, instrument: ForexInstrument) -> tuple[float, float]:
+    """(PnL in account currency, open lots) of a cycle at `close`."""
+    pnl = lots = 0.0
+    for t in cycle.positions:
+        if t.is_pending:
+            continue
+        exit_price = t.exit_price if t.exit_price is not None else close
+        if t.exit_price is None:
+            lots += t.lot_size
+        sign = 1.0 if t.side == "buy" else -1.0
+        pnl += sign * (exit_price - t.executed_price) / instrument.pip_size * t.lot_size * instrument.dollars_per_pip_per_lot
+    return pnl, lots
+
+
+def simulate_symbol(
+    symbol: str,
+    bars: CandleArray,
+    strategy_factory: Optional[Callable[[], object]] = None,
+    fixed_point: bool = True,
+) -> SymbolRun:
+    """Drive one broker + strategy over `bars` (strategy first, then the broker, as RSILowriderBacktester)."""
+    strategy = (strategy_factory or _default_strategy)()
+    broker = BacktestBroker(symbol=symbol, csv_path=None, fixed_point=fixed_point)
+    instrument = broker.instrument
+
+    n = len(bars)
+    cycle = np.full(n, -1, dtype=np.int32)
+    cycle_pnl = np.zeros(n)
+    open_lots = np.zeros(n)
+    starts: List[int] = []
+    ends: List[int] = []
+
+    for i, candle in enumerate(bars.to_candles()):
+        strategy.on_candle_just_closed(broker, candle)
+        active = broker.current_position
+        if active is not None and len(broker.positions) > len(starts):
+            starts.append(i)
+        broker.process_candle(candle)
+
+        if active is not None:
+            cycle[i] = len(starts) - 1
+            cycle_pnl[i], open_lots[i] = _cycle_state(active, candle.close, instrument)
+            if broker.current_position is None:
+                ends.append(i)
+
+    ends += [n - 1] * (len(starts) - len(ends))
+    return SymbolRun(
+        symbol=symbol,
+        timestamp=np.asarray(bars.timestamp, dtype=np.int64),
+        cycle=cycle,
+        cycle_pnl=cycle_pnl,
+        open_lots=open_lots,
+        cycle_start=np.array(starts, dtype=np.int64),
+        cycle_end=np.array(ends, dtype=np.int64),
+        cycle_lots=np.array([sum(t.lot_size for t in c.positions) for c in broker.positions], dtype=np.float64),
+    )
+
+
+def _simulate_from_store(
+    root: str,
+    symbol: str,
+    resolution: str,
+    start_ms: Optional[int],
+    end_ms: Optional[int],
+    strategy_factory: Optional[Callable[[], object]],
+    fixed_point: bool,
+) -> SymbolRun:
+    """Worker entry point that reads its own bars, so the pool never pickles candle data."""
+    bars = CandleStore(root).read(symbol, resolution, start_ms, end_ms)
+    return simulate_symbol(symbol, bars, strategy_factory, fixed_point)
+
+
+# ----------------------------------------------------------------------
+# Portfolio
+# ----------------------------------------------------------------------
+class PortfolioBacktester:
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        limits: PortfolioLimits = PortfolioLimits(),
+        strategy_factory: Optional[Callable[[], object]] = None,
+        fixed_point: bool = True,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            symbols: instruments defined in ForexInstruments.
+            limits: account-level balance, concurrency and margin limits.
+            strategy_factory: picklable zero-argument callable returning an
+                object with on_candle_just_closed(broker, candle); defaults
+                to RSILowriderSignals.
+            fixed_point: run every broker on the instrument's point grid.
+            max_workers: process pool size; 1 runs everything in-process.
+        """
+        unknown = [s for s in symbols if not isinstance(getattr(ForexInstruments, s, None), ForexInstrument)]
+        if unknown:
+            raise ValueError(f"Unknown instruments: {unknown}")
+        self.symbols = list(symbols)
+        self.limits = limits
+        self.strategy_factory = strategy_factory
+        self.fixed_point = fixed_point
+        self.max_workers = max_workers or min(len(self.symbols), os.cpu_count() or 1)
+
+    # ------------------------------------------------------------------ #
+    def run(self, bars: Mapping[str, CandleArray]) -> PortfolioResult:
+        """Backtest in-memory bars (one CandleArray per symbol)."""
+        args = [(s, bars[s], self.strategy_factory, self.fixed_point) for s in self.symbols]
+        return self.merge(self._map(simulate_symbol, args))
+
+    def run_from_store(
+        self,
+        store: CandleStore,
+        resolution: str = "1m",
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+    ) -> PortfolioResult:
+        """Backtest bars from a candle store; each worker loads its own symbol."""
+        args = [
+            (str(Path(store.root)), s, resolution, start_ms, end_ms, self.strategy_factory, self.fixed_point)
+            for s in self.symbols
+        ]
+        return self.merge(self._map(_simulate_from_store, args))
+
+    def _map(self, fn, args: list) -> List[SymbolRun]:
+        if self.max_workers == 1 or len(args) == 1:
+            return [fn(*a) for a in args]
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(fn, *zip(*args)))
+
+    # ------------------------------------------------------------------ #
+    def admit(self, runs: Sequence[SymbolRun]) -> pd.DataFrame:
+        """Every cycle of every symbol, in start order, with the account's accept / reject decision."""
+        limits = self.limits
+        frames = [
+            pd.DataFrame({
+                "symbol": run.symbol,
+                "cycle": np.arange(len(run.cycle_start)),
+                "start": run.timestamp[run.cycle_start],
+                "end": run.timestamp[run.cycle_end],
+                "lots": run.cycle_lots,
+                "pnl": run.cycle_final_pnl,
+                "order": order,
+            })
+            for order, run in enumerate(runs)
+        ]
+        cycles = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if cycles.empty:
+            return cycles.assign(accepted=pd.Series(dtype=bool), reason=pd.Series(dtype=object))
+        cycles = cycles.sort_values(["start", "order"], kind="stable").reset_index(drop=True)
+
+        balance = limits.initial_balance
+        reserved = 0.0
+        open_heap: list[tuple[int, int, float, float]] = []   # (end, row, pnl, margin)
+        accepted = np.zeros(len(cycles), dtype=bool)
+        reasons: list[Optional[str]] = [None] * len(cycles)
+
+        for row in cycles.itertuples():
+            # a cycle that closed on an earlier bar frees its slot and books its PnL
+            while open_heap and open_heap[0][0] < row.start:
+                _, _, pnl, margin = heapq.heappop(open_heap)
+                balance += pnl
+                reserved -= margin
+
+            margin = row.lots * limits.margin(row.symbol)
+            if limits.max_concurrent_cycles is not None and len(open_heap) >= limits.max_concurrent_cycles:
+                reasons[row.Index] = "max_concurrent_cycles"
+            elif reserved + margin > limits.max_margin_fraction * balance:
+                reasons[row.Index] = "margin"
+            else:
+                accepted[row.Index] = True
+                reserved += margin
+                heapq.heappush(open_heap, (row.end, row.Index, row.pnl, margin))
+
+        return cycles.drop(columns="order").assign(accepted=accepted, reason=reasons)
+
+    def merge(self, runs: Sequence[SymbolRun]) -> PortfolioResult:
+        """Combine per-symbol runs into one account on the union timeline."""
+        cycles = self.admit(runs)
+        timeline = np.unique(np.concatenate([r.timestamp for r in runs])) if runs else np.empty(0, dtype=np.int64)
+        n = len(timeline)
+
+        symbol_equity: Dict[str, np.ndarray] = {}
+        symbol_exposure: Dict[str, np.ndarray] = {}
+        open_cycles = np.zeros(n, dtype=np.int64)
+        margin_used = np.zeros(n)
+
+        for run in runs:
+            rows = cycles[cycles["symbol"] == run.symbol]
+            accepted = np.zeros(len(run.cycle_start), dtype=bool)
+            accepted[rows["cycle"].to_numpy()] = rows["accepted"].to_numpy()
+            booked = np.concatenate(([0.0], np.cumsum(np.where(accepted, run.cycle_final_pnl, 0.0))))
+
+            # PnL on the symbol's own bars: accepted cycles closed before + the active one
+            active = run.cycle >= 0
+            live = active & accepted[np.maximum(run.cycle, 0)]
+            started = np.searchsorted(run.cycle_start, np.arange(len(run.timestamp)), side="right")
+            pnl = np.where(active, booked[np.maximum(run.cycle, 0)], booked[started])
+            pnl = pnl + np.where(live, run.cycle_pnl, 0.0)
+            lots = np.where(live, run.open_lots, 0.0)
+
+            # carry onto the union timeline (zero before the symbol's first bar)
+            idx = np.searchsorted(run.timestamp, timeline, side="right") - 1
+            seen = idx >= 0
+            idx = np.maximum(idx, 0)
+            symbol_equity[run.symbol] = np.where(seen, pnl[idx], 0.0)
+            symbol_exposure[run.symbol] = np.where(seen, lots[idx], 0.0)
+            open_cycles += seen & live[idx]
+            margin_used += symbol_exposure[run.symbol] * self.limits.margin(run.symbol)
+
+        equity = self.limits.initial_balance + sum(symbol_equity.values(), np.zeros(n))
+        return PortfolioResult(
+            timestamp=timeline,
+            equity=equity,
+            open_cycles=open_cycles,
+            margin_used=margin_used,
+            symbol_equity=symbol_equity,
+            symbol_exposure=symbol_exposure,
+            cycles=cycles,
+        )
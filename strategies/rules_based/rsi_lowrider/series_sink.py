@@ -0,0 +1,142 @@
+"""
+series_sink.py
+--------------
+Append-only parquet sink for per-candle Lowrider states, read back lazily.
+
+    with SeriesSink("reports/lowrider_series.parquet") as sink:
+        for state in states:
+            sink.append(state)          # buffered, flushed every `batch_rows` rows
+    series = sink.series                # LazySeries: nothing loaded yet
+    len(series); for state in series: ...; series.to_frame(["timestamp", "equity"])
+
+Rows are buffered column by column and written as one parquet row group per
+batch, so memory is bounded by `batch_rows` however long the run. The file
+is written under a temp name and renamed on close; a crashed run never
+leaves a truncated series behind.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from strategies.rules_based.rsi_lowrider.dto.backtest_results_dto import LowriderCandleState
+
+
+SCHEMA = pa.schema([
+    ("timestamp", pa.string()),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.float64()),
+    ("current_rsi_value", pa.float64()),
+    ("events", pa.list_(pa.string())),
+    ("num_active_rungs", pa.int64()),
+    ("num_pending_rungs", pa.int64()),
+    ("num_active_trades", pa.int64()),
+    ("num_pending_trades", pa.int64()),
+    ("num_closed_trades", pa.int64()),
+    ("realized_pnl", pa.float64()),
+    ("unrealized_pnl", pa.float64()),
+    ("equity", pa.float64()),
+])
+
+
+class LazySeries:
+    """A stored series, one parquet file or parts read back to back; rows are only read when iterated."""
+
+    def __init__(self, path: str | Path | Sequence[str | Path], batch_rows: int = 10_000):
+        self.paths = [Path(path)] if isinstance(path, (str, Path)) else [Path(p) for p in path]
+        self.batch_rows = batch_rows
+
+    def __len__(self) -> int:
+        return sum(pq.ParquetFile(p).metadata.num_rows for p in self.paths)
+
+    def iter_frames(self, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        for path in self.paths:
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self.batch_rows, columns=columns):
+                yield batch.to_pandas()
+
+    def __iter__(self) -> Iterator[LowriderCandleState]:
+        return self.iter_rows()
+
+    def iter_rows(self, start: int = 0) -> Iterator[LowriderCandleState]:
+        """Rows from `start` on; whole parts before it are skipped by their row counts."""
+        for path in self.paths:
+            file = pq.ParquetFile(path)
+            if start >= file.metadata.num_rows:
+                start -= file.metadata.num_rows
+                continue
+            for batch in file.iter_batches(batch_size=self.batch_rows):
+                rows = batch.to_pylist()
+                for row in rows[start:]:
+                    yield LowriderCandleState(**row)
+                start = max(start - len(rows), 0)
+
+    def __getitem__(self, i: int) -> LowriderCandleState:
+        if i < 0:
+            i += len(self)
+        for state in self.iter_rows(i):
+            return state
+        raise IndexError(i)
+
+    def to_frame(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Whole series (or some columns) in memory at once."""
+        columns = list(columns) if columns else None
+        return pd.concat([pd.read_parquet(p, columns=columns) for p in self.paths], ignore_index=True)
+
+
+class SeriesSink:
+
+    def __init__(self, path: str | Path, batch_rows: int = 10_000):
+        self.path = Path(path)
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._buffer: Dict[str, List] = {name: [] for name in SCHEMA.names}
+        self._buffered = 0
+
+    def append(self, state: LowriderCandleState) -> None:
+        for name, column in self._buffer.items():
+            column.append(getattr(state, name))
+        self._buffered += 1
+        if self._buffered >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self._tmp, SCHEMA)
+        if self._buffered:
+            self._writer.write_table(pa.Table.from_pydict(self._buffer, schema=SCHEMA))
+            self.rows += self._buffered
+            self._buffer = {name: [] for name in SCHEMA.names}
+            self._buffered = 0
+
+    def close(self) -> LazySeries:
+        self.flush()
+        self._writer.close()
+        os.replace(self._tmp, self.path)
+        return self.series
+
+    @property
+    def series(self) -> LazySeries:
+        return LazySeries(self.path, self.batch_rows)
+
+    def __enter__(self) -> SeriesSink:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        if self._writer is not None:
+            self._writer.close()
+        self._tmp.unlink(missing_ok=True)
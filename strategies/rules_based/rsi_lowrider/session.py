@@ -1,29 +1,55 @@
 import asyncio
-from datetime import datetime, timedelta, timezone
-import time
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
 import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-import winsound
+try:
+    import winsound
+except ImportError:     # not on Windows (replays, CI): no audible alerts
+    winsound = None
 
 from brokers.base import BaseBroker
 from models.account_snapshot import AccountSnapshot
 from models.candle import Candle
 import session_config as config
 from strategies.rules_based.rsi_lowrider.market_signals import RSILowriderSignals
-import session_config as config
+from utils.clock import Clock
+from utils.latency import LatencyRecorder
 from utils.logging import print_and_log_info, print_and_log_milestone, print_and_log_warning
+from utils.metrics_accumulator import MetricsAccumulator
+from utils.time import resolution_to_ms
 
 rsi_lowrider_config = config.RSI_LOWRIDER_CONFIG
 
 class Session:
     
-    def __init__(self, broker: BaseBroker, createPhysicalLogs: bool=False) -> None:
+    def __init__(
+        self,
+        broker: BaseBroker,
+        createPhysicalLogs: bool=False,
+        clock: Optional[Clock]=None,
+        alerts: bool=True,
+        latency: Optional[LatencyRecorder]=None,
+        latency_log_path: Optional[str]=None,
+    ) -> None:
         self.last_seen_timestamp: datetime = None
         self.broker = broker
+        # all "now" / sleeping goes through the clock so replays can run on virtual time
+        self.clock = clock or Clock()
+        self.alerts = alerts
         self.signals = RSILowriderSignals()
         self.createPhysicalLogs = createPhysicalLogs
         self.log_file_path = ''
+        # running stats over every position closed this session (net PnL, account currency)
+        self.metrics = MetricsAccumulator()
+        # per-stage timings of the current cycle; summarised to the cycle log and
+        # appended to latency_log_path (JSONL) whenever a cycle ends
+        self.latency = latency or LatencyRecorder()
+        if hasattr(broker, "latency") and broker.latency is None:
+            broker.latency = self.latency       # TradeLockerBroker: one span per HTTP call
+        if latency_log_path is None and createPhysicalLogs:
+            latency_log_path = f"{BASE_DIR}/logs/latency.jsonl"
+        self.latency_log_path = latency_log_path
         
     
     async def run(self) -> None:
@@ -54,14 +80,14 @@ class Session:
 
         # Mark the start of THIS cycle
         self.broker.refresh()
-        self.current_cycle_start: datetime = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=2)
+        self.current_cycle_start: datetime = self.clock.now().replace(microsecond=0) - timedelta(seconds=2)
         safe_timestamp = self.current_cycle_start.strftime("%Y-%m-%d_%H-%M-%S")
         self.current_cycle_id = f"RSILR_{safe_timestamp[:19]}"
         if self.createPhysicalLogs: self.log_file_path = f"{BASE_DIR}/logs/{safe_timestamp}.txt"
         
         print_and_log_milestone(f"\n=== New Cycle started at {self.current_cycle_start} ===", self.log_file_path)
         
-        now: datetime = datetime.now(timezone.utc)
+        now: datetime = self.clock.now()
         self.initial_snapshot: AccountSnapshot = self.broker.get_account_snapshot(
             date_from=self.current_cycle_start,
             date_to=now
@@ -73,12 +99,17 @@ class Session:
         while not cycle_finished:
             print_and_log_milestone(f"\n------------------------- Loop {loop_num} ------------------------- ", self.log_file_path)
             loop_num += 1
-            cycle_finished = await self.loop()
-            if cycle_finished: break
+            self.latency.last.clear()
+            with self.latency.span("loop"):
+                cycle_finished = await self.loop()
+            self.log_loop_latency()
+            if cycle_finished:
+                self.report_latency(loop_num)
+                break
 
             # Wait for the next opening candle
             sleep_sec: float = self.seconds_until_next_boundary(config.INTERVAL_MINUTES)
-            await asyncio.sleep(sleep_sec)
+            await self.clock.asleep(sleep_sec)
 
 
     async def loop(self) -> bool:
@@ -94,14 +125,17 @@ class Session:
         8. Log state
         """
         actions_taken = []
+        latency = self.latency
+        loop_started: float = latency.timer()
         # -------------------------------------------------
         # 1. INITIAL SNAPSHOT
         # -------------------------------------------------
-        now: datetime = datetime.now(timezone.utc)
-        initial_snapshot: AccountSnapshot = self.broker.get_account_snapshot(
-            date_from=self.current_cycle_start,
-            date_to=now
-        )
+        now: datetime = self.clock.now()
+        with latency.span("loop.snapshot"):
+            initial_snapshot: AccountSnapshot = self.broker.get_account_snapshot(
+                date_from=self.current_cycle_start,
+                date_to=now
+            )
 
         # -------------------------------------------------
         # 2. Detect cycle termination
@@ -113,9 +147,13 @@ class Session:
             self.log_state(Candle.empty(), initial_snapshot, [])
             print_and_log_milestone(f"[{now}] Cycle TERMINATED. Closing all orders...", self.log_file_path)
             print_and_log_milestone(f"Final Cycle PnL: {self.initial_balance - initial_snapshot.account_balance}", self.log_file_path)
+            for p in sorted(initial_snapshot.activated_positions, key=lambda p: p.close_time):
+                self.metrics.update(p.net_pnl)
+            print_and_log_milestone(f"Session stats: {self.metrics}", self.log_file_path)
 
             # Close all TL positions + cancel all pending orders
-            cycle_closed = await self.broker.close_all()
+            with latency.span("loop.close_all"):
+                cycle_closed = await self.broker.close_all()
 
             # Exit this loop iteration and let parent loop restart cleanly
             return cycle_closed
@@ -129,7 +167,8 @@ class Session:
         # -------------------------------------------------
         date_from_candles: datetime = now - timedelta(minutes=config.FETCH_COUNT)
         
-        candles = self.get_candles(date_from=date_from_candles, date_to=now)
+        with latency.span("loop.candles"):
+            candles = self.get_candles(date_from=date_from_candles, date_to=now)
 
         if not candles:
             print_and_log_warning("No candles returned; will try again on next boundary.", self.log_file_path)
@@ -142,8 +181,9 @@ class Session:
         # -------------------------------------------------
         if self.last_seen_timestamp is not None and latest_candle.timestamp == self.last_seen_timestamp:
             print_and_log_warning(f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] No new closed candle. Trying again...", self.log_file_path)
-            time.sleep(2)
-            candles = self.get_candles(date_from=date_from_candles, date_to=now)
+            with latency.span("loop.candles_retry"):
+                self.clock.sleep(2)
+                candles = self.get_candles(date_from=date_from_candles, date_to=now)
             latest_candle: Candle = candles[-1]
 
         self.last_seen_timestamp = latest_candle.timestamp
@@ -151,17 +191,19 @@ class Session:
         # -------------------------------------------------
         # 5. Spread gate
         # -------------------------------------------------
-        spread: float = self.broker.get_current_spread()
+        with latency.span("loop.spread"):
+            spread: float = self.broker.get_current_spread()
         spread_is_acceptable = spread <= config.MAX_SPREAD_PIPS
         
         # -------------------------------------------------
         # 6. Strategy signal (pure: no broker inside)
         # -------------------------------------------------
-        should_go_long: bool = self.signals.should_enter_long_position(candles)
+        with latency.span("loop.signal"):
+            should_go_long: bool = self.signals.should_enter_long_position(candles)
         if should_go_long:
             print_and_log_milestone(f"should_go_long: {should_go_long}", self.log_file_path)
             
-            winsound.Beep(500, 1000)  # frequency=1000Hz, duration=1000ms
+            self.beep(500, 1000)  # frequency=1000Hz, duration=1000ms
 
         # -------------------------------------------------
         # 7. Ladder patching logic
@@ -170,50 +212,63 @@ class Session:
         expected_depths: set[int] = set(range(max_depth))
         missing_depths: set[int] = expected_depths - existing_depths
 
-        anchor_price: float = latest_candle.close
-        pip: float = self.broker.instrument.pip_size
+        # Rung prices are computed in integer points so every rung lands exactly
+        # on the quote grid (no drift from repeated float pip arithmetic).
+        instrument = self.broker.instrument
+        anchor_pts: int = instrument.to_points(latest_candle.close)
+        step_pts: int = instrument.pips_to_points(config.RSI_LOWRIDER_CONFIG.POSITION_DISTANCE_IN_PIPS)
+        tp_pts: int = instrument.pips_to_points(config.RSI_LOWRIDER_CONFIG.TP_TARGET_IN_PIPS)
 
         # Only patch if RSI says start ladder (should_go_long) OR ladder already started (cycle_touched)
         if (should_go_long or cycle_touched) and spread_is_acceptable:
             if missing_depths:
                 print_and_log_milestone(f"missing_depths: {missing_depths}", self.log_file_path)
-                for depth in sorted(missing_depths):
-                    entry_price: float = anchor_price - depth * config.RSI_LOWRIDER_CONFIG.POSITION_DISTANCE_IN_PIPS * pip
-                    tp: float = entry_price + config.RSI_LOWRIDER_CONFIG.TP_TARGET_IN_PIPS * pip
-
-                    bid, _ = self.broker.get_current_bid_ask()
-                    if bid < entry_price:
-                        continue
-
-                    self.broker.place_limit_buy(
-                        entry_price=entry_price,
-                        lot_size=config.RSI_LOWRIDER_CONFIG.LOT_SIZE,
-                        tp_price=tp,
-                        strategy_id=f"{self.current_cycle_id}_{depth}",
-                    )
-                    winsound.Beep(1000, 1000)  # frequency=1000Hz, duration=500ms
-                    
-                    actions_taken.append(f"Limit buy {config.RSI_LOWRIDER_CONFIG.LOT_SIZE} lots at {entry_price} with TP {tp}")
+                # time-to-order counts from the close of the candle that triggered it
+                candle_close: datetime = latest_candle.timestamp + timedelta(milliseconds=resolution_to_ms(config.CANDLES_RESOLUTION))
+                woke_after: float = (now - candle_close).total_seconds()
+                with latency.span("loop.orders"):
+                    for depth in sorted(missing_depths):
+                        entry_pts: int = anchor_pts - depth * step_pts
+                        entry_price: float = instrument.from_points(entry_pts)
+                        tp: float = instrument.from_points(entry_pts + tp_pts)
+
+                        bid, _ = self.broker.get_current_bid_ask()
+                        if instrument.to_points(bid) < entry_pts:
+                            continue
+
+                        order_id = self.broker.place_limit_buy(
+                            entry_price=entry_price,
+                            lot_size=config.RSI_LOWRIDER_CONFIG.LOT_SIZE,
+                            tp_price=tp,
+                            strategy_id=f"{self.current_cycle_id}_{depth}",
+                        )
+                        if order_id:
+                            latency.record("time_to_order", woke_after + latency.timer() - loop_started)
+                        self.beep(1000, 1000)  # frequency=1000Hz, duration=500ms
+
+                        actions_taken.append(f"Limit buy {config.RSI_LOWRIDER_CONFIG.LOT_SIZE} lots at {entry_price} with TP {tp}")
 
         # -------------------------------------------------
         # 1. FINAL SNAPSHOT
         # -------------------------------------------------
-        now: datetime = datetime.now(timezone.utc)
-        final_snapshot: AccountSnapshot = self.broker.get_account_snapshot(
-            date_from=self.current_cycle_start,
-            date_to=now
-        )
+        now: datetime = self.clock.now()
+        with latency.span("loop.final_snapshot"):
+            final_snapshot: AccountSnapshot = self.broker.get_account_snapshot(
+                date_from=self.current_cycle_start,
+                date_to=now
+            )
         
         # -------------------------------------------------
         # 8. Logging
         # -------------------------------------------------
-        self.log_state(latest_candle, final_snapshot, actions_taken)
+        with latency.span("loop.log"):
+            self.log_state(latest_candle, final_snapshot, actions_taken)
         return False
 
 
     def seconds_until_next_boundary(self, interval_minutes: int) -> float:
         """Seconds until the next time where minute % interval == 0 and second == 0."""
-        now = datetime.now(timezone.utc)
+        now = self.clock.now()
         # Next "rounded down" minute
         base = now.replace(second=0, microsecond=0)
 
@@ -227,6 +282,34 @@ class Session:
         return (candidate - now).total_seconds()
     
     
+    def beep(self, frequency: int, duration_ms: int) -> None:
+        if self.alerts and winsound is not None:
+            winsound.Beep(frequency, duration_ms)
+
+
+    def log_loop_latency(self) -> None:
+        """One line with the duration of every stage the last loop went through."""
+        stages = [(name, seconds) for name, seconds in self.latency.last.items() if name.startswith("loop")]
+        line = " | ".join(f"{name.removeprefix('loop.')} {seconds * 1000:.0f}" for name, seconds in stages)
+        print_and_log_info(f"Latency (ms): {line}", self.log_file_path)
+
+
+    def report_latency(self, loops: int) -> dict:
+        """Percentiles of this cycle's spans → cycle log + latency JSONL; starts the next cycle's histograms afresh."""
+        print_and_log_milestone(f"Latency over {loops} loops:", self.log_file_path)
+        for line in self.latency.format():
+            print_and_log_info(f"  {line}", self.log_file_path)
+        record = self.latency.write_jsonl(
+            self.latency_log_path,
+            cycle_id=self.current_cycle_id,
+            started=self.current_cycle_start.isoformat(),
+            ended=self.clock.now().isoformat(),
+            loops=loops,
+        )
+        self.latency.reset()
+        return record
+
+
     def get_candles(self, date_from, date_to):
         candles: List[Candle] = self.broker.get_candles_range(
             symbol=config.INSTRUMENT.symbol,
@@ -282,5 +365,6 @@ async def main(broker: BaseBroker) -> None:
 
 if __name__ == "__main__":
     from brokers.tradelocker import TradeLockerBroker
-    asyncio.run(main(TradeLockerBroker()))
+    from data.store.candle_store import CandleStore
+    asyncio.run(main(TradeLockerBroker(candle_store=CandleStore())))
     
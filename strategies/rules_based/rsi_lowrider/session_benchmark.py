@@ -0,0 +1,155 @@
+"""
+session_benchmark.py
+--------------------
+Wall time and HTTP calls of Session.loop against the local TradeLocker mock.
+
+    python -m strategies.rules_based.rsi_lowrider.session_benchmark          # every scenario
+    result = benchmark_session(bars, Faults(latency_ms=40), loops=60)
+    result.p95_ms, result.calls_per_loop, result.calls.most_common(3)
+
+Each run starts a MockTradeLockerServer whose market and the Session share
+one SimulatedClock: the waits for the next minute cost nothing, while every
+HTTP round trip through TradeLockerBroker (and the injected latency) is
+real wall time. The client does not retry, so injected 500s and 429s show
+up as failed loops; the Session carries on with the next minute as
+`Session.run` would after a restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import Counter
+from contextlib import ExitStack, redirect_stdout
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from brokers.tradelocker import TradeLockerBroker
+from brokers.tradelocker_mock import Faults, MockTradeLockerServer
+from models.candle_array import CandleArray
+import session_config as config
+from strategies.rules_based.rsi_lowrider.session import Session
+from utils.clock import SimulatedClock
+from utils.time import ms_to_dt
+
+
+SCENARIOS: Dict[str, Faults] = {
+    "local": Faults(),
+    "wan": Faults(latency_ms=40, jitter_ms=20),
+    "flaky": Faults(latency_ms=40, jitter_ms=20, error_rate=0.02),
+    "throttled": Faults(latency_ms=10, rate_limit_rps=5, rate_limit_burst=12),
+}
+
+
+@dataclass
+class SessionBenchmark:
+    scenario: str
+    wall_ms: np.ndarray          # one entry per Session.loop call
+    failed: Counter              # exception type → loops
+    calls: Counter               # "METHOD /route" → requests
+    responses: Counter           # status code → responses
+
+    @property
+    def loops(self) -> int:
+        return len(self.wall_ms)
+
+    @property
+    def p50_ms(self) -> float:
+        return float(np.percentile(self.wall_ms, 50))
+
+    @property
+    def p95_ms(self) -> float:
+        return float(np.percentile(self.wall_ms, 95))
+
+    @property
+    def max_ms(self) -> float:
+        return float(self.wall_ms.max())
+
+    @property
+    def calls_per_loop(self) -> float:
+        return sum(self.calls.values()) / self.loops
+
+    def summary(self) -> str:
+        top = ", ".join(f"{route} {n / self.loops:.1f}" for route, n in self.calls.most_common(4))
+        return (
+            f"{self.scenario:<10} {self.loops:>5} {sum(self.failed.values()):>6} "
+            f"{self.p50_ms:>8.1f} {self.p95_ms:>8.1f} {self.max_ms:>8.1f} {self.calls_per_loop:>10.1f}   {top}"
+        )
+
+
+class _Done(Exception):
+    pass
+
+
+class _LoopTimer:
+    """Stands in for session.loop: times every call and turns failures into a skipped minute."""
+
+    def __init__(self, session: Session, loops: int):
+        self._loop = session.loop
+        self.loops = loops
+        self.wall: List[float] = []
+        self.failed: Counter = Counter()
+        session.loop = self
+
+    async def __call__(self) -> bool:
+        if len(self.wall) == self.loops:
+            raise _Done
+        started = time.perf_counter()
+        try:
+            return await self._loop()
+        except Exception as e:
+            self.failed[type(e).__name__] += 1
+            return False
+        finally:
+            self.wall.append((time.perf_counter() - started) * 1000)
+
+
+async def _run(bars: CandleArray, faults: Faults, loops: int, warmup_bars: int) -> tuple:
+    clock = SimulatedClock(ms_to_dt(int(bars.timestamp[warmup_bars - 1]) + 60_000))
+    with ExitStack() as stack:
+        stack.enter_context(redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        server = stack.enter_context(MockTradeLockerServer(bars, clock=clock))
+        broker = TradeLockerBroker(email="bench", password="bench", server="MOCK", base_url=server.url)
+        session = Session(broker, clock=clock, alerts=False)
+        timer = _LoopTimer(session, loops)
+
+        server.faults = faults
+        server.reset_counters()
+        while True:
+            try:
+                await session.run_cycle()
+            except _Done:
+                break
+            except Exception as e:           # failed before the first loop (refresh / initial snapshot)
+                timer.failed[type(e).__name__] += 1
+                await clock.asleep(60)
+        return timer, Counter(server.calls), Counter(server.responses)
+
+
+def benchmark_session(
+    bars: CandleArray,
+    faults: Faults,
+    loops: int = 60,
+    warmup_bars: int = config.FETCH_COUNT,
+    scenario: str = "custom",
+) -> SessionBenchmark:
+    if len(bars) < warmup_bars + loops:
+        raise ValueError(f"need at least {warmup_bars + loops} bars for {loops} loops")
+    timer, calls, responses = asyncio.run(_run(bars, faults, loops, warmup_bars))
+    return SessionBenchmark(scenario, np.array(timer.wall), timer.failed, calls, responses)
+
+
+def run_scenarios(bars: CandleArray, loops: int = 60) -> List[SessionBenchmark]:
+    return [benchmark_session(bars, faults, loops, scenario=name) for name, faults in SCENARIOS.items()]
+
+
+if __name__ == "__main__":
+    from data.synthetic.price_paths import PricePathGenerator
+
+    results = run_scenarios(PricePathGenerator(seed=7).gbm(1_440))
+    print(f"{'scenario':<10} {'loops':>5} {'failed':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'calls/loop':>10}   top routes (per loop)")
+    for result in results:
+        print(result.summary())
@@ -0,0 +1,193 @@
+"""
+snapshots.py
+------------
+Resumable RSI Lowrider backtests.
+
+    snapshots = BacktestSnapshotStore("data/cache/backtest_snapshots")
+    dto = await RSILowriderBacktester().get_backtest_results(request, snapshots=snapshots)
+
+At the end of a run the full simulation state (strategy, broker with its
+cycles, the event trackers) is pickled and zlib-compressed, and the
+per-candle series is appended as a parquet part holding only the bars that
+run simulated. A later request for the same parameters and a later end date
+restores the state and only simulates the bars after the snapshot.
+
+Entries are keyed by the request parameters except `date_to`, the data
+source and SNAPSHOT_VERSION. Next to the candle count, the meta keeps the fingerprint of the
+candles (utils.fingerprint, over every OHLCV column, extended with each
+run's new candles), a digest of the last candle and the byte offset in the
+source CSV of that candle's first row. A resumed run reads the CSV from
+that offset only, and continues the entry if the first candle it reads
+still has the stored digest, i.e. the data was only extended. The result
+series is read back lazily from the parts (series_sink.LazySeries).
+
+A revised last candle, or a shorter run, simulates from the first bar; a
+shorter run never replaces a longer entry. Revisions further back are only
+seen with `verify_history=True`, which reads the whole source and checks
+the fingerprint of all the entry's candles (O(history) per resume).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+from brokers.backtest import BacktestBroker
+from models.candle import Candle
+from models.candle_array import CandleArray
+from models.cycle import Cycle
+from strategies.rules_based.rsi_lowrider.dto.backtest_results_dto import LowriderCandleState
+from strategies.rules_based.rsi_lowrider.series_sink import LazySeries, SeriesSink
+from utils.files import replace_atomic
+from utils.fingerprint import extend
+
+
+DEFAULT_SNAPSHOT_DIR = Path("data/cache/backtest_snapshots")
+
+# Bump when the pickled run state (LowriderRunState, the strategy, broker and
+# ledger classes) or the series columns change, so older entries are ignored
+SNAPSHOT_VERSION = 1
+
+
+def candle_fingerprint(candles: Sequence[Candle], h: int = 0) -> int:
+    """Fingerprint `h` extended with `candles` by timestamp and OHLCV."""
+    arr = CandleArray.from_candles(candles)
+    return extend(h, arr.timestamp, arr.open, arr.high, arr.low, arr.close, arr.volume)
+
+
+@dataclass
+class LowriderRunState:
+    """Everything the candle loop carries from one candle to the next."""
+    strategy: object
+    broker: BacktestBroker
+    previous_position: Optional[Cycle] = None
+    previous_num_closed_trades: int = 0
+    previous_pending_rungs: int = 0
+    n_bars: int = 0
+
+
+class BacktestSnapshotStore:
+
+    def __init__(self, root: str | Path = DEFAULT_SNAPSHOT_DIR, verify_history: bool = False):
+        self.root = Path(root)
+        self.verify_history = verify_history
+        self.hits = 0
+        self.extensions = 0
+        self.misses = 0
+
+    def key(self, params: dict) -> str:
+        """Entry key: request parameters (without the end date), data source and SNAPSHOT_VERSION."""
+        versioned = {"params": params, "version": SNAPSHOT_VERSION}
+        return hashlib.sha256(json.dumps(versioned, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+    # ------------------------------------------------------------------
+    # Load / save
+    # ------------------------------------------------------------------
+    def meta(self, key: str) -> dict | None:
+        return self._load_meta(self.root / key / "meta.json")
+
+    def resume_point(self, meta: dict | None) -> tuple[int, int]:
+        """
+        (byte offset in the source CSV, index of the first candle read from
+        it) to read a run that may continue `meta`: the entry's last candle
+        on, or everything when there is no entry or the history is verified.
+        """
+        if meta is None or self.verify_history or meta.get("offset") is None:
+            return 0, 0
+        return meta["offset"], meta["n"] - 1
+
+    def load(self, key: str, meta: dict | None, candles: Sequence[Candle], first: int) -> Optional[LowriderRunState]:
+        """
+        Saved state if `candles` (the run's candles from index `first` on, as
+        read at resume_point) extend or equal the entry's candles, else None.
+        """
+        if meta is None or not self._continues(meta, candles, first):
+            self.misses += 1
+            return None
+        state: LowriderRunState = pickle.loads(zlib.decompress((self.root / key / "state.pkl.z").read_bytes()))
+        if meta["n"] == first + len(candles):
+            self.hits += 1
+        else:
+            self.extensions += 1
+        return state
+
+    def _continues(self, meta: dict, candles: Sequence[Candle], first: int) -> bool:
+        n = meta["n"]
+        if first + len(candles) < n:
+            return False
+        if first == 0:
+            return f"{candle_fingerprint(candles[:n]):016x}" == meta["hash"]
+        return f"{candle_fingerprint(candles[n - 1 - first:n - first]):016x}" == meta["tail"]
+
+    def save(
+        self,
+        key: str,
+        state: LowriderRunState,
+        meta: dict | None,
+        new: Sequence[LowriderCandleState],
+        candles: Sequence[Candle],
+        offset: int | None,
+    ) -> Optional[LazySeries]:
+        """
+        Store `state` after `state.n_bars` candles and return the stored
+        series. `meta` is the entry the run continued (None for a run from
+        the first bar), `new` / `candles` the states and candles simulated
+        after it, and `offset` the byte offset of the last candle's first
+        CSV row (None if unknown). Returns None if a longer entry is kept.
+        """
+        entry = self.root / key
+        n = state.n_bars
+        if meta is not None and meta["n"] == n:
+            return self.series(key, meta)    # nothing simulated: the entry is unchanged
+        if meta is None:
+            stored = self.meta(key)
+            if stored is not None and stored["n"] > n:
+                return None    # never replace a longer entry with a shorter one
+            meta = {"n": 0, "hash": f"{0:016x}", "parts": []}
+
+        entry.mkdir(parents=True, exist_ok=True)
+        parts = list(meta["parts"])
+        fingerprint = f"{candle_fingerprint(candles, int(meta['hash'], 16)):016x}"
+        if n > meta["n"]:
+            # named after the new fingerprint too, so it never overwrites a part the current meta still lists
+            name = f"series-{meta['n']:09d}-{n:09d}-{fingerprint[:8]}.parquet"
+            with SeriesSink(entry / name) as sink:
+                for s in new:
+                    sink.append(s)
+            parts.append(name)
+
+        blob = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        replace_atomic(entry / "state.pkl.z", lambda tmp: tmp.write_bytes(blob))
+        new_meta = {
+            "n": n,
+            "hash": fingerprint,
+            "tail": f"{candle_fingerprint(candles[-1:]):016x}",
+            "offset": offset,
+            "parts": parts,
+        }
+        replace_atomic(entry / "meta.json", lambda tmp: tmp.write_text(json.dumps(new_meta)))
+        # parts of a replaced entry go only once the new meta no longer lists them
+        for stale in entry.glob("series-*.parquet"):
+            if stale.name not in parts:
+                stale.unlink()
+        return self.series(key, new_meta)
+
+    def series(self, key: str, meta: dict) -> LazySeries:
+        """The entry's series, read from its parts only when iterated."""
+        return LazySeries([self.root / key / name for name in meta["parts"]])
+
+    # ------------------------------------------------------------------
+    # Storage helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _load_meta(path: Path) -> dict | None:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture
+def csv_backtester(monkeypatch):
+    """Builds RSILowriderBacktester(strategy, csv_path) with the JSON dump switched off."""
+    from strategies.rules_based.rsi_lowrider.backtest import RSILowriderBacktester
+
+    def build(csv_path, strategy):
+        engine = RSILowriderBacktester(strategy, csv_path=csv_path)
+        monkeypatch.setattr(engine, "save_backtest_results_to_json", lambda dto, **kwargs: None)
+        return engine
+    return build
@@ -0,0 +1,58 @@
+from functools import partial
+
+from web.trader_backend.schemas.backtest import RsiLowriderBacktestRequest
+
+
+class Ladder:
+    """
+    Stand-in for RSILowriderSignals: every `every` idle bars, anchors `rungs`
+    buy rungs at the close, `spacing_pips` apart on the point grid, each with
+    a `tp_pips` take-profit. Records the close as a fake RSI.
+    """
+
+    def __init__(self, rungs: int = 2, spacing_pips: float = 2.0, every: int = 10, tp_pips: float = 2.0, lot: float = 0.1):
+        self.rungs = rungs
+        self.spacing_pips = spacing_pips
+        self.every = every
+        self.tp_pips = tp_pips
+        self.lot = lot
+        self.idle = 0
+        self.rsi_list = []
+
+    def on_candle_just_closed(self, broker, candle):
+        self.rsi_list.append(candle.close * 10)
+        if broker.current_position is not None:
+            return
+        self.idle += 1
+        if self.idle % self.every:
+            return
+        inst = broker.instrument
+        anchor = inst.to_points(candle.close)
+        for depth in range(self.rungs):
+            entry = anchor - depth * inst.pips_to_points(self.spacing_pips)
+            tp = entry + inst.pips_to_points(self.tp_pips)
+            broker.add_rung(inst.from_points(entry), inst.from_points(tp), self.lot, depth)
+
+
+def ladder(**params) -> partial:
+    """Picklable zero-argument strategy factory, e.g. ``ladder(rungs=3, every=5)``."""
+    return partial(Ladder, **params)
+
+
+def write_csv(path, frame):
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def backtest_request(frame, n_bars):
+    """A 1m EURUSD request over the first `n_bars` rows of `frame`."""
+    return RsiLowriderBacktestRequest(
+        asset="EURUSD",
+        frequency="1m",
+        date_from=frame["timestamp"].iloc[0].to_pydatetime(),
+        date_to=frame["timestamp"].iloc[n_bars - 1].to_pydatetime(),
+        rsi_period=7,
+        rsi_oversold_level=30,
+        rung_size_in_pips=2.0,
+        tp_target_in_pips=2.0,
+    )
@@ -7,7 +7,7 @@ from web.trader_backend.schemas.backtest import RsiLowriderBacktestRequest
 
 
 @pytest.mark.asyncio
-async def test_lowrider_anchor_trigger_logic():
+async def test_lowrider_anchor_trigger_logic(tmp_path):
     """
     This test ensures:
     1. RSI dip (<= oversold) followed by curl-up (RSI increases)
@@ -34,6 +34,7 @@ async def test_lowrider_anchor_trigger_logic():
     # Run backtest
     # -------------------------
     backtester = RSILowriderBacktester()
+    backtester.json_output_path = tmp_path / "out.json"     # keep the tracked output file untouched
     dto = await backtester.get_backtest_results(request)
 
     series = dto.series
@@ -35,11 +35,16 @@
 
 from datetime import datetime, timedelta
 
+import pytest
+
 from strategies.rules_based.rsi_lowrider.market_signals import (
     RSILowriderSignals,
 )
 from brokers.backtest import BacktestBroker
 from models.candle import Candle
+import session_config as config
+
+cfg = config.RSI_LOWRIDER_CONFIG
 
 
 # ---------------------------------------------------------
@@ -70,57 +75,70 @@ def build_candles(prices, start=None):
 
 
 # ---------------------------------------------------------
-# Test 1 — anchor triggers when RSI < oversold then curls up
+# Helper: a full candle window falling every bar (RSI 0), then rising
 # ---------------------------------------------------------
-def test_anchor_trigger_rsi_curl():
-    """
-    Construct a price series that produces a clear RSI-dip then curl-up.
-    Verify the strategy fires exactly one anchor entry.
-    """
+FALLING = config.FETCH_COUNT + 5
 
-    strategy = RSILowriderSignals()
-    broker = BacktestBroker()
 
-    # Prices falling then rising → clear RSI dip then curl-up
-    prices = [1.1000, 1.0990, 1.0980, 1.0990, 1.1000, 1.1010]
-    candles = build_candles(prices)
+def dip_then_curl(rising=3):
+    falling = [1.1000 - 0.0001 * i for i in range(FALLING)]
+    return falling + [falling[-1] + 0.0002 * (i + 1) for i in range(rising)]
 
-    anchor_count = 0
 
+def run(strategy, broker, candles):
     for candle in candles:
         strategy.on_candle_just_closed(broker, candle)
         broker.process_candle(candle)
 
-        if len(broker.positions) > 0 and broker.positions[0].positions:
-            # Anchor = first BUY trade created
-            if broker.positions[0].positions[0].ladder_position == 0:
-                anchor_count = 1
-
-    assert anchor_count == 1, "Anchor entry should trigger exactly once"
-
 
 # ---------------------------------------------------------
-# Test 2 — ladder adds next rung ONLY after deepest rung fills
+# Test 1 — anchor triggers when RSI < oversold then curls up
 # ---------------------------------------------------------
-def test_ladder_adds_next_rung_only_after_fill():
-
+def test_anchor_trigger_rsi_curl():
+    """
+    A window of falling closes keeps RSI at 0 (oversold, never "very low");
+    the first higher close curls it up and anchors exactly one cycle.
+    """
     strategy = RSILowriderSignals()
-    broker = BacktestBroker()
+    broker = BacktestBroker(csv_path=None)
+    candles = build_candles(dip_then_curl())
 
-    # Trigger anchor: RSI dip & curl
-    prices = [1.2000, 1.1990, 1.1980, 1.1990]  # dip → curl-up
-    candles = build_candles(prices)
+    run(strategy, broker, candles[:FALLING])
+    assert broker.positions == []
 
-    for candle in candles:
-        strategy.on_candle_just_closed(broker, candle)
-        broker.process_candle(candle)
+    run(strategy, broker, candles[FALLING:])
+    assert len(broker.positions) == 1, "Anchor entry should trigger exactly once"
+    anchor = broker.positions[0].positions[0]
+    assert anchor.ladder_position == 0
+    assert anchor.executed_price == candles[FALLING].close
+
+
+# ---------------------------------------------------------
+# Test 2 — the anchor places the whole ladder, deeper rungs pending
+# (as Session does; rungs are not added one at a time)
+# ---------------------------------------------------------
+def test_anchor_places_the_full_ladder():
+    strategy = RSILowriderSignals()
+    broker = BacktestBroker(csv_path=None, fixed_point=True)
+    candles = build_candles(dip_then_curl(rising=1))
+    run(strategy, broker, candles)
 
     position = broker.get_active_cycle()
     assert position is not None
-    assert len(position.positions) == 2  # anchor + rung1
+    rungs = position.positions
+    assert [t.ladder_position for t in rungs] == list(range(config.MAX_ALLOWABLE_SIMULTANEOUS_POSITIONS))
 
-    rung1 = position.positions[1]
-    assert rung1.is_pending, "First rung should be pending until price fills"
+    step = cfg.POSITION_DISTANCE_IN_PIPS * 0.0001
+    for t in rungs:
+        assert t.executed_price == pytest.approx(candles[-1].close - t.ladder_position * step)
+        assert t.tp_price == pytest.approx(t.executed_price + cfg.TP_TARGET_IN_PIPS * 0.0001)
+        assert t.lot_size == cfg.LOT_SIZE
+    assert not rungs[0].is_pending
+    assert all(t.is_pending for t in rungs[1:]), "Deeper rungs stay pending until price fills them"
+
+    # another entry signal while the ladder is complete adds nothing
+    run(strategy, broker, build_candles([candles[-1].close + 0.00005], start=candles[-1].timestamp + timedelta(minutes=1)))
+    assert len(position.positions) == config.MAX_ALLOWABLE_SIMULTANEOUS_POSITIONS
 
 
 # ---------------------------------------------------------
@@ -129,33 +147,19 @@ def test_ladder_adds_next_rung_only_after_fill():
 def test_tp_hit_detected_by_closed_trade_change():
 
     strategy = RSILowriderSignals()
-    broker = BacktestBroker()
-
-    # Prices dipping then rising so anchor triggers early
-    prices = [1.1000, 1.0990, 1.0980, 1.0990]  # dip -> curl
-    candles = build_candles(prices)
-
-    # Run enough candles to get anchor + rung
-    for candle in candles:
-        strategy.on_candle_just_closed(broker, candle)
-        broker.process_candle(candle)
+    broker = BacktestBroker(csv_path=None)
+    candles = build_candles(dip_then_curl(rising=1))
+    run(strategy, broker, candles)
 
     position = broker.get_active_cycle()
     assert position is not None
 
     # Now produce a high enough candle to hit TP
     tp_price = position.positions[0].tp_price
-    hit_tp_candle = make_candle(datetime(2024, 1, 1, 0, 20), tp_price + 0.0001)
+    hit_tp_candle = make_candle(candles[-1].timestamp + timedelta(minutes=1), tp_price + 0.0001)
 
-    prev_closed = sum(
-        1 for p in broker.positions for t in p.positions if t.exit_price is not None
-    )
-
-    strategy.on_candle_just_closed(broker, hit_tp_candle)
-    broker.process_candle(hit_tp_candle)
-
-    now_closed = sum(
-        1 for p in broker.positions for t in p.positions if t.exit_price is not None
-    )
+    prev_closed = broker.closed_trade_count()
+    run(strategy, broker, [hit_tp_candle])
 
-    assert now_closed == prev_closed + 1, "A TP hit should increment closed trades by 1"
+    assert broker.closed_trade_count() == prev_closed + 1, "A TP hit should increment closed trades by 1"
+    assert position.positions[0].exit_price == tp_price
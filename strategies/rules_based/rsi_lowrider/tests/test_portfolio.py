@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from data.store.candle_store import CandleStore
+from data.synthetic.price_paths import PricePathGenerator
+from strategies.rules_based.rsi_lowrider.portfolio import PortfolioBacktester, PortfolioLimits, simulate_symbol
+from strategies.rules_based.rsi_lowrider.tests.helpers import ladder
+
+
+@pytest.fixture
+def bars():
+    eurusd = PricePathGenerator(seed=1).gbm(3_000)
+    gbpjpy = PricePathGenerator(seed=2, start_price=190.0, point_size=0.001).gbm(3_000)
+    gbpjpy.timestamp = gbpjpy.timestamp + 30 * 60_000    # starts half an hour later
+    return {"EURUSD": eurusd, "GBPJPY": gbpjpy}
+
+
+@pytest.fixture
+def strategy():
+    return ladder(spacing_pips=3.0, every=4)
+
+
+def test_symbol_run_matches_broker_pnl(bars, strategy):
+    run = simulate_symbol("GBPJPY", bars["GBPJPY"], strategy)
+    assert len(run.cycle_start) > 10
+    assert (run.cycle_end >= run.cycle_start).all()
+    assert (run.cycle_start[1:] > run.cycle_end[:-1]).all()
+    np.testing.assert_allclose(run.cycle_lots, 0.2)
+    # a winning rung on GBPJPY is worth 2 pips * 0.1 lots * 9.17
+    closed = run.cycle_final_pnl[:-1]
+    assert (np.round(closed / (2 * 0.1 * 9.17)) >= 1).all()
+
+
+def test_unlimited_portfolio_is_the_sum_of_symbols(bars, strategy):
+    result = PortfolioBacktester(["EURUSD", "GBPJPY"], strategy_factory=strategy, max_workers=1).run(bars)
+    assert result.cycles["accepted"].all()
+    assert len(result.timestamp) == 3_030
+    # GBPJPY contributes nothing before its first bar
+    assert (result.symbol_equity["GBPJPY"][:30] == 0).all()
+
+    total = 10_000.0
+    for symbol in ("EURUSD", "GBPJPY"):
+        run = simulate_symbol(symbol, bars[symbol], strategy)
+        assert result.symbol_equity[symbol][-1] == pytest.approx(run.cycle_final_pnl.sum())
+        total += run.cycle_final_pnl.sum()
+    assert result.equity[-1] == pytest.approx(total)
+    assert result.open_cycles.max() == 2
+
+
+def test_limits_reject_overlapping_cycles(bars, strategy):
+    limits = PortfolioLimits(max_concurrent_cycles=1)
+    result = PortfolioBacktester(["EURUSD", "GBPJPY"], limits, strategy, max_workers=1).run(bars)
+    cycles = result.cycles
+    taken = cycles[cycles["accepted"]].sort_values("start")
+    assert (taken["start"].to_numpy()[1:] > taken["end"].to_numpy()[:-1]).all()
+    assert set(cycles.loc[~cycles["accepted"], "reason"]) == {"max_concurrent_cycles"}
+    assert result.open_cycles.max() == 1
+    assert result.equity[-1] == pytest.approx(10_000.0 + taken["pnl"].sum())
+
+    # margin for one 0.2-lot ladder only
+    tight = PortfolioLimits(margin_per_lot={"EURUSD": 1_000.0, "GBPJPY": 1_500.0}, max_margin_fraction=0.04)
+    margin = PortfolioBacktester(["EURUSD", "GBPJPY"], tight, strategy, max_workers=1).run(bars)
+    assert set(margin.cycles.loc[~margin.cycles["accepted"], "reason"]) == {"margin"}
+    assert margin.margin_used.max() <= 0.04 * margin.equity.max()
+    assert margin.open_cycles.max() == 1
+
+
+def test_workers_match_in_process_run(bars, strategy, tmp_path):
+    store = CandleStore(tmp_path)
+    for symbol, arr in bars.items():
+        store.write(symbol, "1m", arr)
+
+    limits = PortfolioLimits(max_concurrent_cycles=1)
+    serial = PortfolioBacktester(["EURUSD", "GBPJPY"], limits, strategy, max_workers=1).run(bars)
+    pooled = PortfolioBacktester(["EURUSD", "GBPJPY"], limits, strategy, max_workers=2).run_from_store(store)
+    np.testing.assert_array_equal(serial.equity, pooled.equity)
+    np.testing.assert_array_equal(serial.cycles["accepted"], pooled.cycles["accepted"])
+    assert list(pooled.frame.columns) == [
+        "timestamp", "equity", "open_cycles", "margin_used", "EURUSD_pnl", "EURUSD_lots", "GBPJPY_pnl", "GBPJPY_lots",
+    ]
+
+    with pytest.raises(ValueError):
+        PortfolioBacktester(["EURUSD", "XAUUSD"])
+
+
+def test_default_strategy_runs_the_rsi_ladder(tmp_path):
+    from session_config import FETCH_COUNT, MAX_ALLOWABLE_SIMULTANEOUS_POSITIONS, RSI_LOWRIDER_CONFIG as cfg
+
+    bars = {"EURUSD": PricePathGenerator(seed=1).gbm(1_000)}
+    store = CandleStore(tmp_path)
+    store.write("EURUSD", "1m", bars["EURUSD"])
+    result = PortfolioBacktester(["EURUSD"], max_workers=1).run_from_store(store)
+    np.testing.assert_array_equal(result.equity, PortfolioBacktester(["EURUSD"], max_workers=1).run(bars).equity)
+
+    run = simulate_symbol("EURUSD", bars["EURUSD"])
+    assert len(run.cycle_start) > 2
+    assert run.cycle_start[0] >= FETCH_COUNT - 1      # no signal before the candle window is full
+    np.testing.assert_allclose(run.cycle_lots, MAX_ALLOWABLE_SIMULTANEOUS_POSITIONS * cfg.LOT_SIZE)
+    # closed cycles take whole TPs on EURUSD: 1.3 pips * 0.01 lots * $10
+    tps = run.cycle_final_pnl[:-1] / (cfg.TP_TARGET_IN_PIPS * cfg.LOT_SIZE * 10.0)
+    np.testing.assert_allclose(tps, np.round(tps), atol=1e-9)
+    assert (np.round(tps) >= 1).all()
+    assert result.equity[-1] == pytest.approx(10_000.0 + run.cycle_final_pnl.sum())
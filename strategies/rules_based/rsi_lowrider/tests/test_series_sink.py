@@ -0,0 +1,38 @@
+import pytest
+
+from strategies.rules_based.rsi_lowrider.dto.backtest_results_dto import LowriderCandleState
+from strategies.rules_based.rsi_lowrider.series_sink import SeriesSink
+
+
+def state(i: int) -> LowriderCandleState:
+    return LowriderCandleState(
+        timestamp=f"2024-01-08 00:{i % 60:02d}:00+00:00", open=1.1, high=1.1002, low=1.0998, close=1.1 + i * 1e-5,
+        volume=float(i), current_rsi_value=50.0, events=["ANCHOR", "TP_HIT"] if i % 7 == 0 else [],
+        num_active_rungs=i % 3, num_pending_rungs=1, num_active_trades=i % 3, num_pending_trades=1,
+        num_closed_trades=i // 7, realized_pnl=i * 0.5, unrealized_pnl=-0.25, equity=i * 0.5 - 0.25,
+    )
+
+
+def test_sink_writes_row_groups_and_reads_back_lazily(tmp_path):
+    path = tmp_path / "series.parquet"
+    with SeriesSink(path, batch_rows=64) as sink:
+        for i in range(1_000):
+            sink.append(state(i))
+        assert not path.exists()        # only renamed into place on close
+
+    series = sink.series
+    assert len(series) == 1_000
+    assert list(series) == [state(i) for i in range(1_000)]
+    frames = list(series.iter_frames(columns=["equity"]))
+    assert len(frames) == 16 and list(frames[0].columns) == ["equity"]
+    assert series.to_frame(["num_closed_trades"])["num_closed_trades"].iloc[-1] == 999 // 7
+
+
+def test_failed_run_leaves_no_file(tmp_path):
+    path = tmp_path / "series.parquet"
+    with pytest.raises(RuntimeError):
+        with SeriesSink(path, batch_rows=10) as sink:
+            for i in range(25):
+                sink.append(state(i))
+            raise RuntimeError("simulation failed")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,15 @@
+from brokers.tradelocker_mock import Faults
+from data.synthetic.price_paths import PricePathGenerator
+from strategies.rules_based.rsi_lowrider.session_benchmark import benchmark_session
+
+
+def test_benchmark_times_every_loop_and_counts_its_requests():
+    bars = PricePathGenerator(seed=7).gbm(200)
+    result = benchmark_session(bars, Faults(), loops=5, warmup_bars=70, scenario="local")
+
+    assert result.loops == 5
+    assert not result.failed
+    assert (result.wall_ms > 0).all()
+    assert result.calls["GET /trade/quotes"] > 0
+    assert set(result.responses) == {200}
+    assert result.summary().startswith("local")
@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from data.synthetic.price_paths import PricePathGenerator
+from strategies.rules_based.rsi_lowrider.session_replay import SessionReplay
+
+
+@pytest.mark.asyncio
+async def test_each_cycle_appends_its_stage_percentiles(tmp_path):
+    replay = SessionReplay(PricePathGenerator(seed=7).gbm(1_440), warmup_bars=70)
+    replay.session.latency_log_path = str(tmp_path / "latency.jsonl")
+    result = await replay.run(max_cycles=2)
+
+    records = [json.loads(line) for line in (tmp_path / "latency.jsonl").read_text().splitlines()]
+    assert len(records) == result.cycles == 2
+    first = records[0]
+    assert first["cycle_id"].startswith("RSILR_")
+    spans = first["spans"]
+    assert spans["loop"]["count"] == first["loops"]
+    assert spans["loop.snapshot"]["count"] == first["loops"]
+    assert spans["loop.close_all"]["count"] == 1
+
+    # one time-to-order per order placed in the cycle, measured from the candle close
+    orders = sum(1 for _, sid in replay.broker.orders if sid.startswith(first["cycle_id"]))
+    assert spans["time_to_order"]["count"] == orders > 0
+    assert 0 <= spans["time_to_order"]["max_ms"] < 60_000
+
+    # histograms start afresh with every cycle
+    assert records[1]["spans"]["loop"]["count"] == records[1]["loops"]
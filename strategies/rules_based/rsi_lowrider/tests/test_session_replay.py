@@ -0,0 +1,31 @@
+import pytest
+
+from data.synthetic.price_paths import PricePathGenerator
+from strategies.rules_based.rsi_lowrider.session_replay import SessionReplay
+
+
+@pytest.mark.asyncio
+async def test_session_replays_a_day_of_bars_in_virtual_time():
+    bars = PricePathGenerator(seed=7).gbm(1_440)
+    replay = SessionReplay(bars, warmup_bars=70)
+    result = await replay.run()
+
+    # every bar was fed, one loop per minute boundary, without waiting for any of them
+    assert result.bars == len(bars)
+    assert result.virtual_seconds == pytest.approx((len(bars) - 70 + 1) * 60, abs=120)
+    assert result.wall_seconds < result.virtual_seconds / 100
+
+    # the Session traded through the broker adapter; the seeded path gives fixed results
+    trades = result.trades
+    assert result.orders == len(trades) == 95
+    assert result.cycles == 4
+    assert sorted(trades["depth"].unique()) == list(range(10))
+    closed = trades[trades["exit"].notna()]
+    assert len(closed) == 26
+    # every exit is a 1.3-pip TP on 0.01 lots ($0.13)
+    assert result.final_balance == pytest.approx(10_000 + 26 * 0.13)
+    assert result.metrics.count == 13
+    assert result.metrics.win_rate == 1.0
+    assert result.metrics.expectancy == pytest.approx(0.13)
+    sids = [sid for _, sid in replay.broker.orders]
+    assert all(sid.startswith("RSILR_") for sid in sids)
@@ -0,0 +1,106 @@
+import json
+from dataclasses import asdict
+
+import pytest
+
+from data.synthetic.price_paths import PricePathGenerator
+from strategies.rules_based.rsi_lowrider.backtest import RSILowriderBacktester
+from strategies.rules_based.rsi_lowrider.series_sink import LazySeries
+from strategies.rules_based.rsi_lowrider.snapshots import BacktestSnapshotStore
+from strategies.rules_based.rsi_lowrider.tests.helpers import backtest_request, ladder, write_csv
+
+
+@pytest.mark.asyncio
+async def test_extended_run_resumes_and_matches_a_full_run(tmp_path, monkeypatch, csv_backtester):
+    from strategies.rules_based.rsi_lowrider import backtest
+
+    frame = PricePathGenerator(seed=3).gbm(3_000).to_frame()
+    engine = csv_backtester(write_csv(tmp_path / "bars.csv", frame), ladder())
+    store = BacktestSnapshotStore(tmp_path / "snapshots")
+
+    await engine.get_backtest_results(backtest_request(frame, 2_000), snapshots=store)
+    assert store.misses == 1
+
+    # the resume only parses the CSV from the snapshot's last candle on
+    read = []
+    read_csv_rows = backtest.read_csv_rows
+    monkeypatch.setattr(backtest, "read_csv_rows", lambda path, offset=0: read.append(rows := read_csv_rows(path, offset)) or rows)
+    resumed = await engine.get_backtest_results(backtest_request(frame, 3_000), snapshots=store)
+    assert store.extensions == 1
+    assert [len(rows) for rows in read] == [1_001]
+    # only the new bars were written as a second part, and the series is read back from the parts
+    assert len(list(store.root.glob("*/series-*.parquet"))) == 2
+    assert isinstance(resumed.series, LazySeries)
+
+    full = await engine.get_backtest_results(backtest_request(frame, 3_000))
+    assert len(full.series) == 3_000
+    assert [asdict(s) for s in resumed.series] == [asdict(s) for s in full.series]
+    assert asdict(resumed.series[2_500]) == asdict(full.series[2_500])
+    assert sum("ANCHOR" in s.events for s in full.series) > 20
+
+    # same range again is served entirely from the snapshot
+    again = await engine.get_backtest_results(backtest_request(frame, 3_000), snapshots=store)
+    assert store.hits == 1
+    assert len(again.series) == 3_000
+
+
+@pytest.mark.asyncio
+async def test_revised_or_shorter_data_does_not_resume(tmp_path, csv_backtester):
+    frame = PricePathGenerator(seed=4).gbm(1_500).to_frame()
+    csv_path = write_csv(tmp_path / "bars.csv", frame)
+    engine = csv_backtester(csv_path, ladder())
+    store = BacktestSnapshotStore(tmp_path / "snapshots")
+    await engine.get_backtest_results(backtest_request(frame, 1_000), snapshots=store)
+
+    # a revised last candle is seen from its digest
+    frame.loc[999, ["high", "close"]] += 0.0001
+    write_csv(csv_path, frame)
+    await engine.get_backtest_results(backtest_request(frame, 1_200), snapshots=store)
+    assert store.misses == 2 and store.extensions == 0
+
+    # a correction far before the snapshot end needs the verified history
+    store = BacktestSnapshotStore(tmp_path / "snapshots", verify_history=True)
+    await engine.get_backtest_results(backtest_request(frame, 1_000), snapshots=store)
+    assert store.misses == 1
+    frame.loc[10, ["high", "close"]] += 0.0001
+    write_csv(csv_path, frame)
+    revised = await engine.get_backtest_results(backtest_request(frame, 1_500), snapshots=store)
+    assert store.misses == 2 and store.extensions == 0
+    assert revised.series[10].close == pytest.approx(frame["close"].iloc[10])
+    # the recomputed entry replaced the stale one and its parts
+    assert len(list(store.root.glob("*/series-*.parquet"))) == 1
+    fresh = await engine.get_backtest_results(backtest_request(frame, 1_500))
+    assert [asdict(s) for s in revised.series] == [asdict(s) for s in fresh.series]
+
+    await engine.get_backtest_results(backtest_request(frame, 800), snapshots=store)
+    assert store.misses == 3
+    await engine.get_backtest_results(backtest_request(frame, 1_500), snapshots=store)
+    assert store.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_resumed_run_appends_to_the_json_output(tmp_path):
+    frame = PricePathGenerator(seed=6).gbm(900).to_frame()
+    engine = RSILowriderBacktester(ladder(), csv_path=write_csv(tmp_path / "bars.csv", frame))
+    engine.json_output_path = tmp_path / "out.json"
+    store = BacktestSnapshotStore(tmp_path / "snapshots")
+
+    await engine.get_backtest_results(backtest_request(frame, 500), snapshots=store)
+    head = (tmp_path / "out.json").read_bytes()
+    resumed = await engine.get_backtest_results(backtest_request(frame, 900), snapshots=store)
+    appended = (tmp_path / "out.json").read_bytes()
+    assert appended[: len(head) - 6] == head[:-6]
+
+    engine.save_backtest_results_to_json(resumed)
+    assert (tmp_path / "out.json").read_bytes() == appended
+    assert len(json.loads(appended)["series"]) == 900
+
+
+def test_snapshot_version_changes_the_key(tmp_path, monkeypatch):
+    from strategies.rules_based.rsi_lowrider import snapshots
+
+    store = BacktestSnapshotStore(tmp_path)
+    params = {"rsi_period": 7, "source": "bars.csv"}
+    before = store.key(params)
+    monkeypatch.setattr(snapshots, "SNAPSHOT_VERSION", snapshots.SNAPSHOT_VERSION + 1)
+    assert store.key(params) != before
@@ -0,0 +1,30 @@
+from dataclasses import asdict
+
+import pytest
+
+from data.store.candle_store import CandleStore
+from data.synthetic.price_paths import PricePathGenerator
+from strategies.rules_based.rsi_lowrider.tests.helpers import backtest_request, ladder, write_csv
+
+
+@pytest.mark.asyncio
+async def test_stream_resamples_store_bars_like_the_csv_run(tmp_path, csv_backtester):
+    bars = PricePathGenerator(seed=5).gbm(6_000)
+    frame = bars.to_frame()
+    store = CandleStore(tmp_path / "candles")
+    store.write("EURUSD", "1m", bars)
+
+    engine = csv_backtester(write_csv(tmp_path / "bars.csv", frame), ladder())
+    five = backtest_request(frame, 6_000).model_copy(update={"frequency": "5m"})
+
+    streamed = engine.stream_backtest_results(five, tmp_path / "series.parquet", store=store, chunk_rows=1_000)
+    expected = (await engine.get_backtest_results(five)).series
+    assert len(streamed) == len(expected) == 1_200
+    assert sum("ANCHOR" in s.events for s in expected) > 10
+
+    rows = list(streamed)
+    for got, want in zip(rows, expected):
+        got, want = asdict(got), asdict(want)
+        for pnl in ("realized_pnl", "unrealized_pnl", "equity"):
+            assert got.pop(pnl) == pytest.approx(want.pop(pnl), abs=1e-9)
+        assert got == want
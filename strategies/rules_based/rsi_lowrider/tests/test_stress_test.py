@@ -0,0 +1,20 @@
+from data.synthetic.price_paths import PricePathGenerator
+from strategies.rules_based.rsi_lowrider.backtest import RSILowriderBacktester
+from strategies.rules_based.rsi_lowrider.portfolio import simulate_symbol
+from strategies.rules_based.rsi_lowrider.tests.helpers import ladder
+
+
+def test_stress_test_reports_every_path():
+    three_rungs = ladder(rungs=3, every=5)
+    paths = list(PricePathGenerator(seed=3).paths(3, 2_000))
+    report = RSILowriderBacktester().stress_test(paths, three_rungs)
+
+    assert list(report["path"]) == [0, 1, 2]
+    assert (report["bars"] == 2_000).all()
+    assert report["max_depth"].between(1, 2).all()
+    assert (report["max_drawdown"] >= 0).all()
+    for row, bars in zip(report.itertuples(), paths):
+        assert row.cycles == len(simulate_symbol("EURUSD", bars, three_rungs).cycle_start)
+
+    again = RSILowriderBacktester().stress_test(paths, three_rungs)
+    assert again.equals(report)
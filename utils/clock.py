@@ -0,0 +1,69 @@
+"""
+clock.py
+--------
+Time source for code that runs on the wall clock live and on virtual time
+in replays.
+
+    clock = Clock()                        # live: datetime.now / time.sleep / asyncio.sleep
+    clock = SimulatedClock(start)          # replay: sleeping advances virtual time instantly
+
+    now = clock.now()
+    clock.sleep(2)
+    await clock.asleep(seconds)
+
+`SimulatedClock.asleep` still yields to the event loop once, so other tasks
+get scheduled in the same order they would be live.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class Clock:
+    """The wall clock (UTC)."""
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    async def asleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    """Virtual UTC time that only moves when slept on (or advanced)."""
+
+    def __init__(self, start: datetime):
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        self._now = start
+        self._elapsed = 0.0
+        self.slept = 0.0        # total virtual seconds slept
+
+    def now(self) -> datetime:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def advance(self, seconds: float) -> None:
+        if seconds < 0:
+            raise ValueError("SimulatedClock cannot go backwards")
+        self._now += timedelta(seconds=seconds)
+        self._elapsed += seconds
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(max(seconds, 0.0))
+        self.slept += max(seconds, 0.0)
+
+    async def asleep(self, seconds: float) -> None:
+        self.sleep(seconds)
+        await asyncio.sleep(0)
@@ -0,0 +1,28 @@
+"""
+files.py
+--------
+Crash-safe replacement of cache files.
+
+    replace_atomic(path, lambda tmp: frame.to_parquet(tmp, index=False))
+    replace_atomic(meta_path, lambda tmp: tmp.write_text(json.dumps(meta)))
+
+`write` fills a temporary file next to `path`, named after the process so
+concurrent writers never share one, which is then moved over `path` with
+os.replace: readers see either the old or the new file, never a partial one.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable
+
+
+def replace_atomic(path: str | Path, write: Callable[[Path], object]) -> None:
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
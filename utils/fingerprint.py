@@ -0,0 +1,90 @@
+"""
+fingerprint.py
+--------------
+Order-sensitive fingerprints of columnar bar data, for on-disk caches that
+must notice when any bar they were built from changes.
+
+    prefix = prefix_hashes(ts, high, low, close)   # prefix[i] fingerprints rows [0, i), O(1) per lookup
+    h = fingerprint(ts, high, low)                 # == prefix_hashes(ts, high, low)[-1]
+    h = extend(h, ts[n:], high[n:], low[n:])       # the same value once rows n.. are appended
+
+Every row is hashed on its own (splitmix64 over the raw 64-bit values of
+its columns, the first column seeding the row) and the fingerprint of a
+range is the wrapping uint64 sum of its rows. So a fingerprint can be
+extended with appended rows without rehashing the prefix, and prefix
+fingerprints of every length come from one cumulative sum. The first column
+should identify the row's position (a timestamp or the row number) so
+that reordering rows changes the fingerprint.
+
+extend() / fingerprint() sum the row hashes in one compiled pass without
+temporaries (about 2 ns per row and column, on the order of one RSI pass).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit
+
+
+def _mix(x: np.ndarray) -> np.ndarray:   # splitmix64 finalizer
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+@njit(cache=True)
+def _mix_one(x):
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+@njit(cache=True)
+def _sum_row_hashes(columns):
+    """row_hashes(*columns).sum() (wrapping) for a tuple of uint64 columns."""
+    first = columns[0]
+    total = np.uint64(0)
+    for i in range(first.shape[0]):
+        h = _mix_one(first[i])
+        for c in range(1, len(columns)):
+            h = _mix_one(h ^ columns[c][i])
+        total += h
+    return total
+
+
+def _bits(column) -> np.ndarray:
+    column = np.asarray(column)
+    if np.issubdtype(column.dtype, np.integer):
+        return np.ascontiguousarray(column, dtype=np.int64).view(np.uint64)
+    return np.ascontiguousarray(column, dtype=np.float64).view(np.uint64)
+
+
+def _readonly(bits: np.ndarray) -> np.ndarray:
+    # one array type for the whole tuple, whether the column came from a
+    # writable frame or a read-only memmap
+    view = bits.view()
+    view.flags.writeable = False
+    return view
+
+
+def row_hashes(*columns) -> np.ndarray:
+    """uint64 hash of every row of equally long columns."""
+    h = _mix(_bits(columns[0]))
+    for column in columns[1:]:
+        h = _mix(h ^ _bits(column))
+    return h
+
+
+def prefix_hashes(*columns) -> np.ndarray:
+    """n + 1 fingerprints: entry i covers rows [0, i)."""
+    return np.concatenate((np.zeros(1, dtype=np.uint64), np.cumsum(row_hashes(*columns), dtype=np.uint64)))
+
+
+def extend(h: int, *columns) -> int:
+    """Fingerprint `h` with the rows of `columns` appended."""
+    return (int(h) + int(_sum_row_hashes(tuple(_readonly(_bits(c)) for c in columns)))) % 2**64
+
+
+def fingerprint(*columns) -> int:
+    """Fingerprint of all rows of `columns`."""
+    return extend(0, *columns)
@@ -0,0 +1,206 @@
+"""
+metrics_accumulator.py
+----------------------
+Constant-memory performance metrics over a stream of closed trades.
+
+    acc = MetricsAccumulator()
+    for pnl in closed_trade_pnls:
+        acc.update(pnl)                 # O(1)
+    acc.as_dict                         # win rate, expectancy, PF, Sharpe, drawdown, streaks
+
+Shards are combined with `merge`, which is exact as long as the shards are
+merged in trade order (drawdown and streaks span the boundary):
+
+    total = MetricsAccumulator.from_array(day_1_pnls).merge(MetricsAccumulator.from_array(day_2_pnls))
+
+The mean / variance use Welford's update (and Chan's formula to merge). The
+drawdown is tracked on the cumulative PnL relative to the start of the
+accumulator, so its units are whatever the PnL is in: R for backtests,
+account currency for live sessions. A trade with pnl > 0 is a win, anything
+else a loss.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class MetricsAccumulator:
+    count: int = 0
+    wins: int = 0
+    losses: int = 0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0      # positive
+    mean: float = 0.0
+    m2: float = 0.0              # sum of squared deviations from the mean
+    equity: float = 0.0          # cumulative PnL
+    peak: float = 0.0            # highest cumulative PnL, start included
+    trough: float = 0.0          # lowest cumulative PnL, start included
+    max_drawdown: float = 0.0    # largest peak-to-valley drop, positive
+    first_streak: int = 0        # signed length of the leading run (+ wins / - losses)
+    streak: int = 0              # signed length of the current run
+    max_win_streak: int = 0
+    max_loss_streak: int = 0
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def update(self, pnl: float) -> MetricsAccumulator:
+        """Add one closed trade."""
+        pnl = float(pnl)
+        self.count += 1
+        delta = pnl - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (pnl - self.mean)
+
+        win = pnl > 0
+        if win:
+            self.wins += 1
+            self.gross_profit += pnl
+            self.streak = self.streak + 1 if self.streak > 0 else 1
+            self.max_win_streak = max(self.max_win_streak, self.streak)
+        else:
+            self.losses += 1
+            self.gross_loss -= pnl
+            self.streak = self.streak - 1 if self.streak < 0 else -1
+            self.max_loss_streak = max(self.max_loss_streak, -self.streak)
+        if abs(self.streak) == self.count:
+            self.first_streak = self.streak
+
+        self.equity += pnl
+        self.peak = max(self.peak, self.equity)
+        self.trough = min(self.trough, self.equity)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.equity)
+        return self
+
+    @staticmethod
+    def from_array(pnls) -> MetricsAccumulator:
+        """Accumulator of a whole batch of trades at once (vectorized)."""
+        pnls = np.asarray(pnls, dtype=np.float64)
+        acc = MetricsAccumulator()
+        n = len(pnls)
+        if n == 0:
+            return acc
+
+        win = pnls > 0
+        acc.count = n
+        acc.wins = int(win.sum())
+        acc.losses = n - acc.wins
+        acc.gross_profit = float(pnls[win].sum())
+        acc.gross_loss = float(-pnls[~win].sum())
+        acc.mean = float(pnls.mean())
+        acc.m2 = float(((pnls - acc.mean) ** 2).sum())
+
+        equity = np.cumsum(pnls)
+        peaks = np.maximum.accumulate(np.maximum(equity, 0.0))
+        acc.equity = float(equity[-1])
+        acc.peak = float(peaks[-1])
+        acc.trough = float(min(equity.min(), 0.0))
+        acc.max_drawdown = float((peaks - equity).max())
+
+        # runs of equal win / loss flags
+        edges = np.flatnonzero(win[1:] != win[:-1]) + 1
+        starts = np.concatenate(([0], edges))
+        lengths = np.diff(np.concatenate((starts, [n])))
+        signs = np.where(win[starts], 1, -1)
+        acc.first_streak = int(signs[0] * lengths[0])
+        acc.streak = int(signs[-1] * lengths[-1])
+        acc.max_win_streak = int(lengths[signs > 0].max(initial=0))
+        acc.max_loss_streak = int(lengths[signs < 0].max(initial=0))
+        return acc
+
+    def merge(self, other: MetricsAccumulator) -> MetricsAccumulator:
+        """New accumulator of this shard's trades followed by `other`'s."""
+        if other.count == 0:
+            return replace(self)
+        if self.count == 0:
+            return replace(other)
+
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        joined = self.streak + other.first_streak if self.streak * other.first_streak > 0 else 0
+
+        return MetricsAccumulator(
+            count=n,
+            wins=self.wins + other.wins,
+            losses=self.losses + other.losses,
+            gross_profit=self.gross_profit + other.gross_profit,
+            gross_loss=self.gross_loss + other.gross_loss,
+            mean=self.mean + delta * other.count / n,
+            m2=self.m2 + other.m2 + delta * delta * self.count * other.count / n,
+            equity=self.equity + other.equity,
+            peak=max(self.peak, self.equity + other.peak),
+            trough=min(self.trough, self.equity + other.trough),
+            max_drawdown=max(self.max_drawdown, other.max_drawdown, self.peak - (self.equity + other.trough)),
+            first_streak=joined if abs(self.first_streak) == self.count and joined else self.first_streak,
+            streak=joined if abs(other.streak) == other.count and joined else other.streak,
+            max_win_streak=max(self.max_win_streak, other.max_win_streak, joined),
+            max_loss_streak=max(self.max_loss_streak, other.max_loss_streak, -joined),
+        )
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.count if self.count else 0.0
+
+    @property
+    def expectancy(self) -> float:
+        """Mean PnL per trade."""
+        return self.mean if self.count else 0.0
+
+    @property
+    def profit_factor(self) -> float:
+        if not self.count:
+            return 0.0
+        return self.gross_profit / self.gross_loss if self.gross_loss > 0 else math.inf
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1) of the trade PnL."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def sharpe_ratio(self) -> float:
+        """Trade-level Sharpe, as Backtester._compute_sharpe."""
+        std = self.std
+        if self.count < 2 or std <= 1e-12 * max(1.0, abs(self.mean)):
+            return 0.0
+        return self.mean / std * math.sqrt(self.count)
+
+    @property
+    def average_win(self) -> float:
+        return self.gross_profit / self.wins if self.wins else 0.0
+
+    @property
+    def average_loss(self) -> float:
+        return self.gross_loss / self.losses if self.losses else 0.0
+
+    @property
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "total_trades": self.count,
+            "win_rate": self.win_rate,
+            "expectancy": self.expectancy,
+            "profit_factor": self.profit_factor,
+            "sharpe_ratio": self.sharpe_ratio,
+            "average_win": self.average_win,
+            "average_loss": self.average_loss,
+            "max_drawdown": self.max_drawdown,
+            "max_win_streak": self.max_win_streak,
+            "max_loss_streak": self.max_loss_streak,
+            "current_streak": self.streak,
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"Trades: {self.count} | WinRate: {self.win_rate*100:.1f}% | "
+            f"Expectancy: {self.expectancy:.3f} | PF: {self.profit_factor:.2f} | "
+            f"Sharpe: {self.sharpe_ratio:.2f} | MaxDD: {self.max_drawdown:.2f} | "
+            f"Streaks: +{self.max_win_streak}/-{self.max_loss_streak}"
+        )
@@ -1,4 +1,18 @@
 from datetime import datetime, timezone
 
 def ms_to_dt(ms: str | int) -> datetime:
-    return datetime.fromtimestamp(int(ms) / 1000, tz=timezone.utc)
\ No newline at end of file
+    return datetime.fromtimestamp(int(ms) / 1000, tz=timezone.utc)
+
+def dt_to_ms(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+_RESOLUTION_UNITS_MS = {"m": 60_000, "H": 3_600_000, "D": 86_400_000, "W": 604_800_000}
+
+def resolution_to_ms(resolution: str) -> int:
+    """Bar length of a TradeLocker-style resolution ("1m", "5m", "15m", "1H", "4H", "1D")."""
+    unit = resolution[-1]
+    if unit not in _RESOLUTION_UNITS_MS or not resolution[:-1].isdigit():
+        raise ValueError(f"Unsupported resolution: {resolution}")
+    return int(resolution[:-1]) * _RESOLUTION_UNITS_MS[unit]